@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Provider Connection Reuse Benchmark
+===================================
+Cost of reaching an LLM backend over HTTPS, comparing:
+
+- per-call: a new ``httpx.AsyncClient`` per call, which is what nodes
+  that built their own provider used to pay (TCP + TLS every time)
+- pooled: one shared client from ``providers/http.py`` (keep-alive)
+
+The backend is a local HTTPS server with a self-signed certificate
+(made with ``openssl``) that answers instantly, and ``--rtt-ms`` of
+simulated network round trip is added to every TCP and TLS setup step.
+No LLM calls are made.
+
+Run: python scripts/bench_http_reuse.py [--calls 200] [--rtt-ms 20]
+"""
+
+import argparse
+import asyncio
+import logging
+import ssl
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import structlog
+
+from agent_sandbox.providers.http import create_client, get_http_stats
+
+BODY = b'{"choices": [{"message": {"content": "ok"}}]}'
+
+
+def self_signed(directory: Path) -> tuple[Path, Path]:
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1"]
+        + ["-subj", "/CN=localhost", "-keyout", str(key), "-out", str(cert)],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+async def serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while await reader.readuntil(b"\r\n\r\n"):
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                + f"Content-Length: {len(BODY)}\r\n\r\n".encode()
+                + BODY
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError):
+        pass
+    finally:
+        writer.close()
+
+
+async def run(args: argparse.Namespace, cert: Path, key: Path) -> dict[str, tuple[float, int]]:
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    server = await asyncio.start_server(serve, "127.0.0.1", 0, ssl=context)
+    url = f"https://localhost:{server.sockets[0].getsockname()[1]}/chat"
+    verify = ssl.create_default_context(cafile=str(cert))
+
+    async def setup_delay(event: str, info: dict) -> None:  # noqa: ARG001
+        # TCP connect is one round trip, a TLS 1.3 handshake one more
+        if event in ("connection.connect_tcp.started", "connection.start_tls.started"):
+            await asyncio.sleep(args.rtt_ms / 1000)
+
+    results = {}
+    for mode in ("per-call", "pooled"):
+        before = get_http_stats()["tls_handshakes"]
+        shared = create_client(verify=verify) if mode == "pooled" else None
+        t0 = time.perf_counter()
+        for _ in range(args.calls):
+            client = shared or create_client(verify=verify)
+            await client.post(url, json={"messages": []}, extensions={"trace": setup_delay})
+            if shared is None:
+                await client.aclose()
+        elapsed = (time.perf_counter() - t0) / args.calls * 1000
+        if shared is not None:
+            await shared.aclose()
+        results[mode] = (elapsed, get_http_stats()["tls_handshakes"] - before)
+
+    server.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = self_signed(Path(tmp))
+        results = asyncio.run(run(args, cert, key))
+
+    print(f"{args.calls} sequential calls, {args.rtt_ms:.0f} ms simulated RTT\n")
+    print(f"{'':<10}{'per call':>12}{'TLS handshakes':>17}")
+    for mode, (ms, handshakes) in results.items():
+        print(f"{mode:<10}{ms:>9.1f} ms{handshakes:>17}")
+    per_call, pooled = results["per-call"][0], results["pooled"][0]
+    print(
+        f"\npooled saves {per_call - pooled:.1f} ms per call "
+        f"(httpx {httpx.__version__}, HTTP/1.1 keep-alive; the local server speaks no HTTP/2)"
+    )
+
+
+if __name__ == "__main__":
+    main()
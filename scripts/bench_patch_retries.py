@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Patch-Mode Retry Benchmark
+==========================
+Runs a benchmark suite twice against the configured provider and sandbox,
+once per RETRY_FORMAT:
+
+- full: every retry regenerates the whole program
+- patch: retries return line edits / a diff applied locally, with full
+  regeneration as the fallback
+
+Reports completion tokens and latency per retry generation (the first
+attempt is identical in both runs and is excluded), how often patches
+applied, and the pass rate.
+
+Needs a provider API key and Docker, like run_benchmark.py.
+
+Run: python scripts/bench_patch_retries.py [--suite error_recovery] [--max-attempts 3]
+"""
+
+import argparse
+import asyncio
+import statistics
+
+from agent_sandbox.config import get_settings
+from agent_sandbox.evaluation.problems import get_suite
+from agent_sandbox.orchestrator.graph import AgentGraph
+from agent_sandbox.providers.registry import close_providers
+from agent_sandbox.sandbox.manager import SandboxManager
+
+
+async def run_format(retry_format: str, suite: str, max_attempts: int) -> dict:
+    settings = get_settings().model_copy(update={"retry_format": retry_format})
+    sandbox = SandboxManager(settings)
+    await sandbox.initialize()
+    agent = AgentGraph(sandbox, settings)
+
+    retries: list[dict] = []
+    passed = 0
+    problems = get_suite(suite)
+    try:
+        for problem in problems:
+            state = await agent.run(
+                problem.task, max_attempts=max_attempts, test_code=problem.test_code
+            )
+            passed += bool(state.get("success"))
+            retries.extend(
+                call
+                for call in state.get("llm_calls", [])
+                if call["node"] == "generator" and call["attempt"] > 1
+            )
+    finally:
+        await sandbox.cleanup()
+
+    patches = [c for c in retries if c.get("kind") == "patch"]
+    return {
+        "problems": len(problems),
+        "passed": passed,
+        "retry_calls": len(retries),
+        "completion_tokens": [c["completion_tokens"] for c in retries],
+        "latency_ms": [c["latency_ms"] for c in retries],
+        "patches": len(patches),
+        "applied": sum(bool(c.get("applied")) for c in patches),
+    }
+
+
+def _mean(values: list[float]) -> float:
+    return statistics.mean(values) if values else 0.0
+
+
+def report(name: str, r: dict) -> None:
+    print(f"\n{name}")
+    print(f"  passed:              {r['passed']}/{r['problems']}")
+    print(f"  retry LLM calls:     {r['retry_calls']}")
+    print(f"  completion tokens:   {_mean(r['completion_tokens']):.0f} mean per retry call")
+    print(f"  latency:             {_mean(r['latency_ms']):.0f}ms mean per retry call")
+    if r["patches"]:
+        print(f"  patches applied:     {r['applied']}/{r['patches']}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--suite", default="error_recovery")
+    parser.add_argument("--max-attempts", type=int, default=3)
+    args = parser.parse_args()
+
+    results = {}
+    for retry_format in ("full", "patch"):
+        results[retry_format] = await run_format(retry_format, args.suite, args.max_attempts)
+        report(f"RETRY_FORMAT={retry_format}", results[retry_format])
+    await close_providers()
+
+    full, patch = results["full"], results["patch"]
+    if full["completion_tokens"] and patch["completion_tokens"]:
+        tokens = _mean(patch["completion_tokens"]) / _mean(full["completion_tokens"])
+        latency = _mean(patch["latency_ms"]) / _mean(full["latency_ms"])
+        print(
+            f"\npatch vs full: {tokens:.0%} of the tokens, {latency:.0%} of the latency per retry"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
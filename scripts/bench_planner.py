@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Task Decomposition Benchmark
+============================
+Completion tokens and wall time for a four-part task whose first draft
+has one wrong function, with and without PLANNER_ENABLED:
+
+- whole program: generate, execute, critique, regenerate everything
+- planner: plan, generate and test the functions in parallel (two
+  independent, then the two that call them), retry the wrong one alone
+
+Real graph, stub provider (latency grows with the completion length,
+like a real model) and the local interpreter as the sandbox. No LLM or
+Docker calls are made.
+
+Run: python scripts/bench_planner.py [--base-ms 250] [--ms-per-token 2]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+
+import structlog
+
+from agent_sandbox.config import Settings
+from agent_sandbox.orchestrator.graph import AgentGraph
+from agent_sandbox.orchestrator.nodes import critic as critic_module
+from agent_sandbox.orchestrator.nodes import generator as generator_module
+from agent_sandbox.orchestrator.nodes import planner as planner_module
+from agent_sandbox.providers.base import LLMProvider, LLMResponse, ProviderConfig
+from agent_sandbox.sandbox.models import ExecutionResult, ExecutionStatus
+
+FUNCTIONS = {
+    "parse": "def parse(text):\n"
+    + "    # Split the CSV line\n" * 8
+    + "    return [int(v) for v in text.split(',')]",
+    "total": "def total(values):\n" + "    # Sum the values\n" * 8 + "    return sum(values)",
+    "stats": "def stats(values):\n"
+    + "    # Mean and max\n" * 8
+    + "    return sum(values) / len(values), max(values)",
+    "report": "def report(text):\n"
+    + "    # Format the summary\n" * 8
+    + "    values = parse(text)\n    mean, top = stats(values)\n"
+    + "    return f'total={total(values)} mean={mean} max={top}'",
+}
+BUGGY = "def total(values):\n" + "    # Sum the values\n" * 8 + "    return len(values)"
+MAIN = "print(report('4,5,6'))"
+TESTS = {
+    "parse": "def test_parse():\n    assert parse('1,2') == [1, 2]",
+    "total": "def test_total():\n    assert total([1, 2]) == 3",
+    "stats": "def test_stats():\n    assert stats([1, 3]) == (2.0, 3)",
+    "report": "def test_report():\n    assert report('1,3') == 'total=4 mean=2.0 max=3'",
+}
+PLAN = {
+    "subtasks": [
+        {"name": n, "signature": f"def {n}(...)", "test_code": TESTS[n], "depends_on": deps}
+        for n, deps in (
+            ("parse", []),
+            ("total", []),
+            ("stats", []),
+            ("report", ["parse", "total", "stats"]),
+        )
+    ],
+    "main": MAIN,
+}
+
+
+class StubProvider(LLMProvider):
+    """First drafts of ``total`` are wrong; fixes and critiques are right."""
+
+    name = "stub"
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        super().__init__(ProviderConfig(api_key="", model="stub"))
+        self.args = args
+
+    def _answer(self, system_prompt: str, user_prompt: str) -> str:
+        if system_prompt == planner_module.PLAN_SYSTEM_PROMPT:
+            return json.dumps(PLAN)
+        if user_prompt.startswith("TASK:"):  # Critic
+            return json.dumps({"diagnosis": "total counts values", "fix_suggestion": "sum them"})
+        if "FUNCTION: def " in user_prompt:  # Planner subtask
+            name = user_prompt.split("FUNCTION: def ")[1].split("(")[0]
+            retry = "failed its tests" in user_prompt
+            code = BUGGY if name == "total" and not retry else FUNCTIONS[name]
+            return json.dumps({"code": code, "reasoning": name, "confidence": 0.9})
+        fixed = not user_prompt.startswith("Task:")
+        functions = {**FUNCTIONS, "total": FUNCTIONS["total"] if fixed else BUGGY}
+        code = "\n\n".join(functions.values()) + "\n\n" + MAIN
+        return json.dumps({"code": code, "reasoning": "whole program", "confidence": 0.9})
+
+    async def generate(self, system_prompt, user_prompt, temperature=None, max_tokens=None):  # noqa: ARG002
+        content = self._answer(system_prompt, user_prompt)
+        tokens = len(content) // 4
+        await asyncio.sleep((self.args.base_ms + tokens * self.args.ms_per_token) / 1000)
+        return LLMResponse(
+            content=content,
+            model="stub",
+            provider=self.name,
+            completion_tokens=tokens,
+            total_tokens=tokens,
+        )
+
+    async def generate_json(
+        self,
+        system_prompt,
+        user_prompt,
+        temperature=None,
+        max_tokens=None,
+        schema=None,  # noqa: ARG002
+    ):
+        return await self.generate(system_prompt, user_prompt, temperature, max_tokens)
+
+    async def stream(self, system_prompt, user_prompt, temperature=None):  # noqa: ARG002
+        yield self._answer(system_prompt, user_prompt)
+
+    async def stream_json(
+        self,
+        system_prompt,
+        user_prompt,
+        temperature=None,  # noqa: ARG002
+        max_tokens=None,  # noqa: ARG002
+        schema=None,  # noqa: ARG002
+    ):
+        yield self._answer(system_prompt, user_prompt)
+
+
+class LocalSandbox:
+    async def execute(self, request):
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-c", request.code,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+        )  # fmt: skip
+        output = (await proc.communicate())[0].decode()
+        failed = proc.returncode != 0
+        return ExecutionResult(
+            stdout=output,
+            stderr=output if failed else "",
+            exit_code=proc.returncode,
+            status=ExecutionStatus.ERROR if failed else ExecutionStatus.SUCCESS,
+        )
+
+
+async def run(planner: bool, args: argparse.Namespace) -> dict:
+    provider = StubProvider(args)
+    for module in (critic_module, generator_module, planner_module):
+        module.get_provider = lambda **_: provider
+    settings = Settings(groq_api_key="bench-key", critic_fast_path=False, planner_enabled=planner)
+    # The program's test makes the bug visible to the whole-program run too
+    agent = AgentGraph(LocalSandbox(), settings)
+
+    t0 = time.perf_counter()
+    result = await agent.run(
+        "Parse a CSV line and report its total, mean and max", test_code=TESTS["total"]
+    )
+    return {
+        "success": result["success"],
+        "wall_ms": (time.perf_counter() - t0) * 1000,
+        "completion_tokens": sum(c["completion_tokens"] for c in result["llm_calls"]),
+        "calls": len(result["llm_calls"]),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--base-ms", type=float, default=250)
+    parser.add_argument("--ms-per-token", type=float, default=2)
+    args = parser.parse_args()
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    results = {
+        "whole program": asyncio.run(run(False, args)),
+        "planner": asyncio.run(run(True, args)),
+    }
+    print(f"{'':<15}{'passed':>8}{'LLM calls':>11}{'completion tokens':>19}{'wall time':>12}")
+    for name, r in results.items():
+        print(
+            f"{name:<15}{str(r['success']):>8}{r['calls']:>11}"
+            f"{r['completion_tokens']:>19}{r['wall_ms']:>9.0f} ms"
+        )
+    whole, planned = results["whole program"], results["planner"]
+    print(
+        f"\nplanner: {planned['completion_tokens'] / whole['completion_tokens'] - 1:+.0%} "
+        f"completion tokens, {planned['wall_ms'] / whole['wall_ms'] - 1:+.0%} wall time"
+    )
+
+
+if __name__ == "__main__":
+    main()
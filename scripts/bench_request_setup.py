@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Per-Request Setup Benchmark
+===========================
+Measures what it costs to get an agent ready to serve one request:
+
+- per-request: build a new AgentGraph (compile the workflow) and new
+  generator/critic providers (new SDK/httpx clients) for every request,
+  which is what /execute and BenchmarkRunner used to do
+- shared: one graph built at startup, providers served from the registry
+
+No LLM or Docker calls are made; only setup is timed.
+
+Run: python scripts/bench_request_setup.py [--requests 200]
+"""
+
+import argparse
+import statistics
+import time
+
+from agent_sandbox.config import Settings
+from agent_sandbox.orchestrator.graph import AgentGraph
+from agent_sandbox.providers.factory import create_provider
+from agent_sandbox.providers.registry import get_provider, get_registry_stats
+
+
+class NullSandbox:
+    """Sandbox stand-in; setup never executes code."""
+
+    async def execute(self, request):
+        raise NotImplementedError
+
+
+def _provider_kwargs(settings: Settings) -> dict:
+    return {
+        "provider_type": settings.llm_provider,
+        "api_key": settings.get_provider_api_key(),
+        "model": settings.get_provider_model(),
+        "base_url": settings.get_provider_base_url(),
+    }
+
+
+def per_request(settings: Settings, sandbox: NullSandbox) -> None:
+    AgentGraph(sandbox, settings)
+    kwargs = _provider_kwargs(settings)
+    create_provider(**kwargs)  # generator
+    create_provider(**kwargs)  # critic
+
+
+def shared(agent: AgentGraph, settings: Settings) -> None:
+    kwargs = _provider_kwargs(settings)
+    get_provider(**kwargs)  # generator
+    get_provider(**kwargs)  # critic
+    assert agent.graph is not None
+
+
+def _time(fn, n: int) -> list[float]:
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    settings = Settings(llm_provider="groq", groq_api_key="bench-key")
+    sandbox = NullSandbox()
+
+    # Silence structlog info lines from graph/provider creation
+    import logging
+
+    import structlog
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    before = _time(lambda: per_request(settings, sandbox), args.requests)
+
+    agent = AgentGraph(sandbox, settings)
+    after = _time(lambda: shared(agent, settings), args.requests)
+
+    print(f"Requests: {args.requests}")
+    print(f"{'':14}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for label, samples in (("per-request", before), ("shared", after)):
+        p99 = statistics.quantiles(samples, n=100)[98]
+        print(
+            f"{label:14}{statistics.mean(samples):>10.3f}"
+            f"{statistics.median(samples):>10.3f}{p99:>10.3f}"
+        )
+    saved = statistics.mean(before) - statistics.mean(after)
+    print(f"Setup overhead removed per request: {saved:.3f} ms")
+    print(f"Registry: {get_registry_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+LLM Response Cache Benchmark
+============================
+Cost of rerunning the same task set, with the response cache:
+
+- cold: the first run; every call reaches the provider and is stored
+- warm: a rerun in the same process (memory tier)
+- restart: a rerun with a fresh cache on the same file (disk tier)
+
+The real graph runs against a stub provider with a fixed latency and a
+stub sandbox where every first attempt fails, so each task needs a
+generation, a critique and a regeneration (identical regeneration
+prompts already hit during the cold run). The default
+LLM_CACHE_MAX_TEMPERATURE (0.3) covers the agent's own calls. No LLM or
+Docker calls are made.
+
+Run: python scripts/bench_response_cache.py [--tasks 20] [--llm-ms 400]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import structlog
+
+from agent_sandbox.config import Settings
+from agent_sandbox.orchestrator.graph import AgentGraph
+from agent_sandbox.orchestrator.nodes import critic as critic_module
+from agent_sandbox.orchestrator.nodes import generator as generator_module
+from agent_sandbox.providers.base import LLMProvider, LLMResponse, ProviderConfig
+from agent_sandbox.providers.cache import ResponseCache, get_cache_stats
+from agent_sandbox.providers.wrapper import CachingProvider
+from agent_sandbox.sandbox.models import ExecutionResult, ExecutionStatus
+
+
+class StubProvider(LLMProvider):
+    """Answers after a fixed delay; the answer depends only on the prompt."""
+
+    name = "stub"
+
+    def __init__(self, delay_ms: float) -> None:
+        super().__init__(ProviderConfig(api_key="", model="stub"))
+        self.delay = delay_ms / 1000
+        self.calls = 0
+
+    async def generate(self, system_prompt, user_prompt, temperature=None, max_tokens=None):  # noqa: ARG002
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if system_prompt == critic_module.SYSTEM_PROMPT:
+            content = json.dumps({"diagnosis": "off by one", "fix_suggestion": "use <="})
+        else:
+            # First attempts fail, regenerations pass
+            retry = not user_prompt.startswith("Task:")
+            code = f"print({'pass' if retry else 'fail'!r})"
+            content = json.dumps({"code": code, "reasoning": "stub", "confidence": 0.5})
+        return LLMResponse(
+            content=content,
+            model="stub",
+            provider=self.name,
+            total_tokens=800,
+            latency_ms=self.delay * 1000,
+        )
+
+    async def generate_json(
+        self,
+        system_prompt,
+        user_prompt,
+        temperature=None,
+        max_tokens=None,
+        schema=None,  # noqa: ARG002
+    ):
+        return await self.generate(system_prompt, user_prompt, temperature, max_tokens)
+
+    async def stream(self, system_prompt, user_prompt, temperature=None):
+        yield (await self.generate(system_prompt, user_prompt, temperature)).content
+
+    async def stream_json(
+        self,
+        system_prompt,
+        user_prompt,
+        temperature=None,
+        max_tokens=None,  # noqa: ARG002
+        schema=None,  # noqa: ARG002
+    ):
+        yield (await self.generate(system_prompt, user_prompt, temperature)).content
+
+
+class StubSandbox:
+    """Code printing 'pass' succeeds, anything else fails."""
+
+    async def execute(self, request):
+        if "'pass'" in request.code:
+            return ExecutionResult(stdout="ok\n", exit_code=0, status=ExecutionStatus.SUCCESS)
+        return ExecutionResult(
+            stderr="AssertionError: expected 10, got 9\n",
+            exit_code=1,
+            status=ExecutionStatus.ERROR,
+        )
+
+
+async def run_tasks(cache: ResponseCache, stub: StubProvider, tasks: int) -> tuple[float, int]:
+    """Wall time (s) and tokens spent running every task once."""
+    provider = CachingProvider(stub, cache)
+    critic_module.get_provider = lambda **_: provider
+    generator_module.get_provider = lambda **_: provider
+    settings = Settings(groq_api_key="bench-key", critic_fast_path=False)
+    agent = AgentGraph(StubSandbox(), settings)
+
+    t0 = time.perf_counter()
+    tokens = 0
+    for i in range(tasks):
+        result = await agent.run(f"Sum the first {i + 10} integers")
+        tokens += result["tokens_used"]
+    return time.perf_counter() - t0, tokens
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--tasks", type=int, default=20)
+    parser.add_argument("--llm-ms", type=float, default=400)
+    args = parser.parse_args()
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "cache.db"
+        stub = StubProvider(args.llm_ms)
+        cache = ResponseCache(path)
+        runs = {}
+        for name, run_cache in (("cold", cache), ("warm", cache), ("restart", None)):
+            run_cache = run_cache or ResponseCache(path)
+            calls = stub.calls
+            seconds, tokens = asyncio.run(run_tasks(run_cache, stub, args.tasks))
+            runs[name] = (seconds, tokens, stub.calls - calls)
+            run_cache.close()
+
+    print(f"{args.tasks} tasks, {args.llm_ms:.0f} ms per LLM call\n")
+    print(f"{'':<9}{'wall time':>12}{'tokens':>10}{'LLM calls':>12}")
+    for name, (seconds, tokens, calls) in runs.items():
+        print(f"{name:<9}{seconds * 1000:>9.0f} ms{tokens:>10}{calls:>12}")
+
+    stats = get_cache_stats()
+    cold, restart = runs["cold"][0], runs["restart"][0]
+    print(
+        f"\nhit rate {stats['hit_rate']:.0%}, {stats['tokens_saved']} tokens and "
+        f"{stats['latency_saved_ms'] / 1000:.1f} s of LLM latency saved; "
+        f"rerun after restart {cold / restart:.0f}x faster"
+    )
+
+
+if __name__ == "__main__":
+    main()
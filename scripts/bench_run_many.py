@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Batch Throughput Benchmark
+==========================
+Throughput and latency percentiles of ``AgentRuntime.run_many`` at
+several concurrency levels, against a sequential loop over ``run``.
+
+The real graph runs against a stub provider and a stub sandbox with
+fixed latencies, one attempt per task. No LLM or Docker calls are made.
+
+Run: python scripts/bench_run_many.py [--tasks 40] [--generate-ms 300] [--execute-ms 100]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+import structlog
+
+from agent_sandbox.config import Settings
+from agent_sandbox.orchestrator.graph import AgentGraph
+from agent_sandbox.orchestrator.nodes import generator as generator_module
+from agent_sandbox.providers.base import LLMProvider, LLMResponse, ProviderConfig
+from agent_sandbox.runtime import AgentRuntime
+from agent_sandbox.sandbox.models import ExecutionResult, ExecutionStatus
+
+
+class StubProvider(LLMProvider):
+    name = "stub"
+
+    def __init__(self, delay_ms: float) -> None:
+        super().__init__(ProviderConfig(api_key="", model="stub"))
+        self.delay = delay_ms / 1000
+
+    async def generate(self, system_prompt, user_prompt, temperature=None, max_tokens=None):  # noqa: ARG002
+        await asyncio.sleep(self.delay)
+        content = json.dumps({"code": "print(1)", "reasoning": "stub", "confidence": 0.5})
+        return LLMResponse(content=content, model="stub", provider=self.name)
+
+    async def generate_json(
+        self,
+        system_prompt,
+        user_prompt,
+        temperature=None,
+        max_tokens=None,
+        schema=None,  # noqa: ARG002
+    ):
+        return await self.generate(system_prompt, user_prompt, temperature, max_tokens)
+
+    async def stream(self, system_prompt, user_prompt, temperature=None):
+        yield (await self.generate(system_prompt, user_prompt, temperature)).content
+
+    async def stream_json(
+        self,
+        system_prompt,
+        user_prompt,
+        temperature=None,
+        max_tokens=None,  # noqa: ARG002
+        schema=None,  # noqa: ARG002
+    ):
+        yield (await self.generate(system_prompt, user_prompt, temperature)).content
+
+
+class StubSandbox:
+    def __init__(self, delay_ms: float) -> None:
+        self.delay = delay_ms / 1000
+
+    async def execute(self, request):  # noqa: ARG002
+        await asyncio.sleep(self.delay)
+        return ExecutionResult(stdout="1\n", exit_code=0, status=ExecutionStatus.SUCCESS)
+
+
+async def bench(args: argparse.Namespace) -> None:
+    generator_module.get_provider = lambda **_: StubProvider(args.generate_ms)
+    runtime = AgentRuntime(Settings(groq_api_key="bench-key"))
+    runtime._agent = AgentGraph(StubSandbox(args.execute_ms), runtime.settings)
+    runtime._initialized = True
+    tasks = [f"Task {i}" for i in range(args.tasks)]
+
+    t0 = time.perf_counter()
+    for task in tasks:
+        await runtime.run(task)
+    elapsed = time.perf_counter() - t0
+    print(f"{'':<14}{'tasks/min':>10}{'p50':>10}{'p90':>10}{'p99':>10}")
+    print(f"{'sequential':<14}{len(tasks) * 60 / elapsed:>10.0f}")
+
+    for concurrency in (1, 4, 16):
+        async for _ in runtime.run_many(tasks, concurrency):
+            pass
+        s = runtime.batch_stats.to_dict()
+        print(
+            f"{f'run_many({concurrency})':<14}{s['tasks_per_minute']:>10.0f}"
+            f"{s['p50_ms']:>8.0f}ms{s['p90_ms']:>8.0f}ms{s['p99_ms']:>8.0f}ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--tasks", type=int, default=40)
+    parser.add_argument("--generate-ms", type=float, default=300)
+    parser.add_argument("--execute-ms", type=float, default=100)
+    args = parser.parse_args()
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
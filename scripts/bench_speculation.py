@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Speculative Regeneration Benchmark
+==================================
+Wall time of jobs whose first attempt fails, with and without
+SPECULATIVE_REGENERATION:
+
+- off: critique, then regenerate with it, then execute
+- on: a provisional regeneration from the raw error runs during the
+  critique; if it passes first the critique is cancelled
+
+The real graph runs against stub providers and a stub sandbox with fixed
+latencies. A fix informed by the critique always passes; a fix from the
+raw error alone passes with probability ``--raw-fix-rate``. No LLM or
+Docker calls are made.
+
+Run: python scripts/bench_speculation.py [--jobs 20] [--critic-ms 1200] [--generate-ms 700]
+     [--execute-ms 150] [--raw-fix-rate 0.6]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+
+import structlog
+
+from agent_sandbox.config import Settings
+from agent_sandbox.orchestrator.graph import AgentGraph
+from agent_sandbox.orchestrator.nodes import critic as critic_module
+from agent_sandbox.orchestrator.nodes import generator as generator_module
+from agent_sandbox.orchestrator.nodes.speculative import get_speculation_stats
+from agent_sandbox.providers.base import LLMProvider, LLMResponse, ProviderConfig
+from agent_sandbox.sandbox.models import ExecutionResult, ExecutionStatus
+
+
+class StubProvider(LLMProvider):
+    """Answers after a fixed delay; generations encode whether a critique was seen."""
+
+    name = "stub"
+
+    def __init__(self, delay_ms: float, critic: bool, rng: random.Random, raw_fix_rate: float):
+        super().__init__(ProviderConfig(api_key="", model="stub"))
+        self.delay = delay_ms / 1000
+        self.critic = critic
+        self.rng = rng
+        self.raw_fix_rate = raw_fix_rate
+
+    async def generate(self, system_prompt, user_prompt, temperature=None, max_tokens=None):  # noqa: ARG002
+        await asyncio.sleep(self.delay)
+        if self.critic:
+            content = json.dumps({"diagnosis": "off by one", "fix_suggestion": "use <="})
+        else:
+            if user_prompt.startswith("Task:"):
+                outcome = "fail"  # First attempt
+            elif "## Diagnosis" in user_prompt:
+                outcome = "pass"
+            else:
+                outcome = "pass" if self.rng.random() < self.raw_fix_rate else "fail"
+            code = f"print({outcome!r})  # {self.rng.random()}"
+            content = json.dumps({"code": code, "reasoning": "stub", "confidence": 0.5})
+        return LLMResponse(content=content, model="stub", provider=self.name, total_tokens=500)
+
+    async def generate_json(
+        self,
+        system_prompt,
+        user_prompt,
+        temperature=None,
+        max_tokens=None,
+        schema=None,  # noqa: ARG002
+    ):
+        return await self.generate(system_prompt, user_prompt, temperature, max_tokens)
+
+    async def stream(self, system_prompt, user_prompt, temperature=None):
+        yield (await self.generate(system_prompt, user_prompt, temperature)).content
+
+    async def stream_json(
+        self,
+        system_prompt,
+        user_prompt,
+        temperature=None,
+        max_tokens=None,  # noqa: ARG002
+        schema=None,  # noqa: ARG002
+    ):
+        yield (await self.generate(system_prompt, user_prompt, temperature)).content
+
+
+class StubSandbox:
+    """Runs in fixed time; code printing 'pass' succeeds."""
+
+    def __init__(self, delay_ms: float) -> None:
+        self.delay = delay_ms / 1000
+
+    async def execute(self, request):
+        await asyncio.sleep(self.delay)
+        if "'pass'" in request.code:
+            return ExecutionResult(stdout="ok\n", exit_code=0, status=ExecutionStatus.SUCCESS)
+        return ExecutionResult(
+            stderr="AssertionError: expected 10, got 9\n",
+            exit_code=1,
+            status=ExecutionStatus.ERROR,
+        )
+
+
+async def run_mode(speculative: bool, args: argparse.Namespace) -> tuple[float, int]:
+    """Mean job wall time (ms) and tokens spent over ``args.jobs`` jobs."""
+    rng = random.Random(args.seed)
+    settings = Settings(
+        groq_api_key="bench-key",
+        critic_fast_path=False,
+        stagnation_detection=False,
+        speculative_regeneration=speculative,
+    )
+    # The nodes look up their provider lazily through these module functions
+    critic_module.get_provider = lambda **_: StubProvider(args.critic_ms, True, rng, 0.0)
+    generator_module.get_provider = lambda **_: StubProvider(
+        args.generate_ms, False, rng, args.raw_fix_rate
+    )
+    agent = AgentGraph(StubSandbox(args.execute_ms), settings)
+
+    total_ms = 0.0
+    tokens = 0
+    for _ in range(args.jobs):
+        t0 = time.perf_counter()
+        result = await agent.run("Sum the first ten integers")
+        total_ms += (time.perf_counter() - t0) * 1000
+        tokens += result["tokens_used"]
+    return total_ms / args.jobs, tokens // args.jobs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--critic-ms", type=float, default=1200)
+    parser.add_argument("--generate-ms", type=float, default=700)
+    parser.add_argument("--execute-ms", type=float, default=150)
+    parser.add_argument("--raw-fix-rate", type=float, default=0.6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    off_ms, off_tokens = asyncio.run(run_mode(False, args))
+    on_ms, on_tokens = asyncio.run(run_mode(True, args))
+    stats = get_speculation_stats()
+
+    print(
+        f"critic {args.critic_ms:.0f} ms, generation {args.generate_ms:.0f} ms, "
+        f"execution {args.execute_ms:.0f} ms, raw-error fix rate {args.raw_fix_rate:.0%}\n"
+    )
+    print(f"{'':<6}{'job wall time':>16}{'tokens/job':>12}")
+    print(f"{'off':<6}{off_ms:>13.0f} ms{off_tokens:>12}")
+    print(f"{'on':<6}{on_ms:>13.0f} ms{on_tokens:>12}")
+    print(
+        f"\nspeculation won {stats['won']}/{stats['started']} races: "
+        f"{1 - on_ms / off_ms:.0%} less wall time, {on_tokens / off_tokens - 1:+.0%} tokens"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Graph State Memory Benchmark
+============================
+Per-job state size across a 10-attempt job whose executions print large
+outputs, comparing:
+
+- dicts: results as ``ExecutionResult.model_dump()`` dicts and history
+  entries holding each attempt's full result dict (the old representation)
+- typed: ``StepResult`` / ``AttemptRecord`` slotted objects; history
+  references each result and keeps only the tail of oversized outputs
+
+Reports the in-memory size of the final state (shared objects counted
+once) and the bytes a checkpointer serializes: the final state, and the
+total over the job (the history channel is rewritten after every attempt).
+
+The real RetryManagerNode builds the typed history; no LLM or Docker.
+
+Run: python scripts/bench_state_memory.py [--attempts 10] [--stdout-kb 256] [--stderr-kb 32]
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import logging
+import sys
+
+import structlog
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from agent_sandbox.config import Settings
+from agent_sandbox.orchestrator.checkpoint import STATE_TYPES
+from agent_sandbox.orchestrator.nodes.retry import RetryManagerNode
+from agent_sandbox.orchestrator.nodes.stagnation import code_fingerprint, error_signature
+from agent_sandbox.orchestrator.state import StepResult
+from agent_sandbox.sandbox.models import ExecutionResult, ExecutionStatus
+
+serde = JsonPlusSerializer(allowed_msgpack_modules=STATE_TYPES)
+
+
+def deep_size(obj, seen: set[int] | None = None) -> int:
+    """Bytes reachable from ``obj``, counting shared objects once."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, list | tuple):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif dataclasses.is_dataclass(obj):
+        size += sum(deep_size(getattr(obj, f.name), seen) for f in dataclasses.fields(obj))
+    return size
+
+
+def serialized(state: dict) -> int:
+    return sum(len(serde.dumps_typed(value)[1]) for value in state.values())
+
+
+def execution(attempt: int, stdout_kb: int, stderr_kb: int) -> ExecutionResult:
+    line = f"attempt {attempt}: processing record ....................................\n"
+    return ExecutionResult(
+        stdout=line * (stdout_kb * 1024 // len(line)),
+        stderr=f"Traceback (most recent call last):\n  x\n{'y' * stderr_kb * 1024}\nValueError: bad\n",
+        exit_code=1,
+        status=ExecutionStatus.ERROR,
+    )
+
+
+async def run(attempts: int, stdout_kb: int, stderr_kb: int) -> dict[str, dict[str, int]]:
+    retry = RetryManagerNode(
+        max_attempts=attempts,
+        settings=Settings(groq_api_key="bench-key", stagnation_detection=False),
+    )
+    typed: dict = {"history": [], "max_attempts": attempts, "should_retry": True}
+    dicts: dict = {"history": []}
+    written = {"dicts": 0, "typed": 0}
+
+    for attempt in range(1, attempts + 1):
+        result = execution(attempt, stdout_kb, stderr_kb)
+        code = f"print({attempt})"
+
+        # Old representation
+        dicts["execution_result"] = result.model_dump()
+        dicts["history"] = [
+            *dicts["history"],
+            {
+                "attempt": attempt,
+                "code": code,
+                "execution_result": dicts["execution_result"],
+                "critique": "Diagnosis",
+                "code_hash": code_fingerprint(code),
+                "error_signature": error_signature(dicts["execution_result"]),
+            },
+        ]
+
+        # Current representation, through the real retry node
+        typed.update(
+            {
+                "attempt": attempt,
+                "code": code,
+                "critique": "Diagnosis",
+                "execution_result": StepResult.from_execution(result),
+            }
+        )
+        typed.update(await retry.process(typed))
+
+        # Each attempt checkpoints the changed result and history channels
+        written["dicts"] += serialized(dicts)
+        written["typed"] += serialized({k: typed[k] for k in ("execution_result", "history")})
+
+    typed_state = {k: typed[k] for k in ("execution_result", "history")}
+    return {
+        "dicts": {
+            "memory": deep_size(dicts),
+            "checkpoint": serialized(dicts),
+            "written": written["dicts"],
+        },
+        "typed": {
+            "memory": deep_size(typed_state),
+            "checkpoint": serialized(typed_state),
+            "written": written["typed"],
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--attempts", type=int, default=10)
+    parser.add_argument("--stdout-kb", type=int, default=256)
+    parser.add_argument("--stderr-kb", type=int, default=32)
+    args = parser.parse_args()
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+    results = asyncio.run(run(args.attempts, args.stdout_kb, args.stderr_kb))
+
+    print(
+        f"{args.attempts} attempts, {args.stdout_kb} KiB stdout + {args.stderr_kb} KiB stderr each\n"
+    )
+    print(f"{'':<8}{'state in memory':>18}{'final checkpoint':>20}{'written over job':>20}")
+    for name, r in results.items():
+        print(
+            f"{name:<8}{r['memory'] / 1024:>15.0f} KiB{r['checkpoint'] / 1024:>17.0f} KiB"
+            f"{r['written'] / 1024:>17.0f} KiB"
+        )
+    old, new = results["dicts"], results["typed"]
+    print(
+        f"\ntyped: {old['memory'] / new['memory']:.1f}x smaller in memory, "
+        f"{old['written'] / new['written']:.1f}x fewer checkpoint bytes"
+    )
+
+
+if __name__ == "__main__":
+    main()
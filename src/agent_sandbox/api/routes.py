@@ -5,8 +5,11 @@ API Routes
 FastAPI router with all HTTP endpoints.
 """
 
+import asyncio
 import uuid
+from collections.abc import Awaitable
 from datetime import UTC, datetime
+from typing import TypeVar
 
 import structlog
 from fastapi import APIRouter, HTTPException, Request, status
@@ -20,7 +23,24 @@ from agent_sandbox.api.schemas import (
     JobStatus,
     StatsResponse,
 )
-from agent_sandbox.orchestrator.graph import AgentGraph
+from agent_sandbox.api.websocket import get_websocket_stats
+from agent_sandbox.contracts.repair import get_repair_stats
+from agent_sandbox.contracts.validation import get_validation_stats
+from agent_sandbox.memory.semantic import get_semantic_stats
+from agent_sandbox.orchestrator.graph import AgentGraph, get_cancellation_stats
+from agent_sandbox.orchestrator.nodes.critic import get_critique_stats
+from agent_sandbox.orchestrator.nodes.generator import get_streaming_stats
+from agent_sandbox.orchestrator.nodes.planner import get_planner_stats
+from agent_sandbox.orchestrator.nodes.speculative import get_speculation_stats
+from agent_sandbox.providers.cache import get_cache_stats, get_response_cache
+from agent_sandbox.providers.context import get_context_stats
+from agent_sandbox.providers.hedging import get_hedging_stats
+from agent_sandbox.providers.http import get_http_stats
+from agent_sandbox.providers.ratelimit import get_ratelimit_stats
+from agent_sandbox.providers.registry import get_registry_stats
+from agent_sandbox.providers.routing import get_routing_stats
+from agent_sandbox.providers.schema import get_schema_stats
+from agent_sandbox.providers.singleflight import get_coalescing_stats
 from agent_sandbox.sandbox.manager import SandboxManager
 
 logger = structlog.get_logger()
@@ -34,14 +54,103 @@ _stats = {
     "total_executions": 0,
     "successful": 0,
     "failed": 0,
+    "cancelled": 0,
     "total_attempts": 0,
     "total_time_ms": 0,
 }
 
 
+# How often a running request checks whether its client is still there
+DISCONNECT_POLL_SECONDS = 0.5
+
+T = TypeVar("T")
+
+
+class ClientDisconnected(Exception):
+    """The client went away before its job finished."""
+
+
+async def _unless_disconnected(request: Request, work: Awaitable[T]) -> T:
+    """
+    Await ``work``, cancelling it if the client disconnects first.
+
+    Starlette keeps running a handler after its client goes away, so the
+    connection is polled while the job runs. Cancelling the job aborts its
+    in-flight LLM call and kills its container.
+    """
+    job = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({job}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return job.result()
+            if await request.is_disconnected():
+                raise ClientDisconnected
+    finally:
+        if not job.done():
+            job.cancel()
+            await asyncio.gather(job, return_exceptions=True)
+
+
+def _record_cancelled(response: ExecuteResponse) -> None:
+    """Mark a job whose client disconnected."""
+    logger.info("Client disconnected, job cancelled", job_id=response.job_id)
+    response.status = JobStatus.CANCELLED
+    response.error = "Client disconnected"
+    response.completed_at = datetime.now(UTC)
+    _stats["cancelled"] += 1
+
+
 def get_sandbox_manager(request: Request) -> SandboxManager:
     """Get sandbox manager from app state."""
-    return request.app.state.sandbox_manager
+    manager: SandboxManager = request.app.state.sandbox_manager
+    return manager
+
+
+def get_agent(request: Request) -> AgentGraph:
+    """Get the shared agent graph from app state."""
+    agent: AgentGraph = request.app.state.agent
+    return agent
+
+
+def _record_result(
+    response: ExecuteResponse,
+    result: dict,
+    start_time: datetime,
+) -> None:
+    """Copy a finished agent state onto the job response and update stats."""
+    end_time = datetime.now(UTC)
+    execution_time_ms = (end_time - start_time).total_seconds() * 1000
+
+    response.status = JobStatus.COMPLETED
+    response.success = result.get("success", False)
+    response.output = result.get("final_output", "")
+    response.code = result.get("code", "")
+    response.dependencies = result.get("dependencies", [])
+    response.reasoning = result.get("reasoning", "")
+    response.attempts = result.get("attempt", 1)
+    response.attempts_saved = result.get("attempts_saved", 0)
+    response.time_saved_ms = result.get("time_saved_ms", 0.0)
+    response.stagnation_reason = result.get("stagnation_reason")
+    response.tokens_used = result.get("tokens_used", 0)
+    response.llm_calls = result.get("llm_calls", [])
+    response.deadline_exceeded = result.get("deadline_exceeded", False)
+    response.test_results = result.get("test_results", [])
+    response.plan = result.get("plan")
+    response.semantic_match = result.get("semantic_match")
+    response.execution_time_ms = execution_time_ms
+    response.completed_at = end_time
+
+    if not response.success:
+        response.error = result.get("final_output", "Execution failed")
+
+    _stats["total_executions"] += 1
+    _stats["total_attempts"] += response.attempts
+    _stats["total_time_ms"] += execution_time_ms
+    if response.success:
+        _stats["successful"] += 1
+    else:
+        _stats["failed"] += 1
 
 
 @router.post(
@@ -69,7 +178,7 @@ async def execute_task(
     """Execute an agent task synchronously."""
 
     job_id = str(uuid.uuid4())[:8]
-    sandbox_manager = get_sandbox_manager(request)
+    agent = get_agent(request)
 
     logger.info(
         "Received execution request",
@@ -86,51 +195,34 @@ async def execute_task(
     _jobs[job_id] = response
 
     try:
-        # Create agent graph
-        agent = AgentGraph(sandbox_manager)
-
-        # Run the agent
+        # Run the agent; the job id doubles as the checkpoint thread id
         start_time = datetime.now(UTC)
-        result = await agent.run(
-            task=body.task,
-            max_attempts=body.max_attempts,
+        result = await _unless_disconnected(
+            request,
+            agent.run(
+                task=body.task,
+                max_attempts=body.max_attempts,
+                mode=body.mode,
+                thread_id=job_id,
+                deadline_seconds=body.deadline_seconds,
+                token_budget=body.token_budget,
+                sandbox_timeout=body.timeout_seconds,
+                test_code=body.test_code,
+            ),
         )
-        end_time = datetime.now(UTC)
-
-        # Calculate execution time
-        execution_time_ms = (end_time - start_time).total_seconds() * 1000
-
-        # Update response
-        response.status = JobStatus.COMPLETED
-        response.success = result.get("success", False)
-        response.output = result.get("final_output", "")
-        response.code = result.get("code", "")
-        response.dependencies = result.get("dependencies", [])
-        response.reasoning = result.get("reasoning", "")
-        response.attempts = result.get("attempt", 1)
-        response.execution_time_ms = execution_time_ms
-        response.completed_at = end_time
-
-        if not response.success:
-            response.error = result.get("final_output", "Execution failed")
-
-        # Update stats
-        _stats["total_executions"] += 1
-        _stats["total_attempts"] += response.attempts
-        _stats["total_time_ms"] += execution_time_ms
-        if response.success:
-            _stats["successful"] += 1
-        else:
-            _stats["failed"] += 1
+        _record_result(response, result, start_time)
 
         logger.info(
             "Execution completed",
             job_id=job_id,
             success=response.success,
             attempts=response.attempts,
-            time_ms=execution_time_ms,
+            time_ms=response.execution_time_ms,
         )
 
+    except ClientDisconnected:
+        _record_cancelled(response)
+
     except Exception as e:
         logger.error(
             "Execution failed",
@@ -164,6 +256,64 @@ async def get_job(job_id: str) -> ExecuteResponse:
     return _jobs[job_id]
 
 
+@router.post(
+    "/jobs/{job_id}/resume",
+    response_model=ExecuteResponse,
+    summary="Resume an interrupted job",
+    description="""
+    Continue a job from its last checkpoint, e.g. after a worker restart.
+
+    Steps that already finished (generated code, critiques) are not re-run.
+    Requires `CHECKPOINT_ENABLED=true`.
+    """,
+)
+async def resume_job(request: Request, job_id: str) -> ExecuteResponse:
+    """Resume an interrupted job from its checkpoint."""
+
+    agent = get_agent(request)
+    if agent.checkpointer is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Checkpointing is disabled",
+        )
+
+    existing = _jobs.get(job_id)
+    if existing is not None and existing.status == JobStatus.COMPLETED:
+        return existing
+
+    response = ExecuteResponse(
+        job_id=job_id,
+        status=JobStatus.RUNNING,
+        created_at=existing.created_at if existing else datetime.now(UTC),
+    )
+
+    start_time = datetime.now(UTC)
+    try:
+        result = await _unless_disconnected(request, agent.resume(job_id))
+    except ClientDisconnected:
+        _record_cancelled(response)
+        _jobs[job_id] = response
+        return response
+    except KeyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No checkpoint for job {job_id}",
+        ) from e
+    except Exception as e:
+        logger.error("Resume failed", job_id=job_id, error=str(e))
+        response.status = JobStatus.FAILED
+        response.error = str(e)
+        response.completed_at = datetime.now(UTC)
+        _jobs[job_id] = response
+        return response
+
+    _record_result(response, result, start_time)
+    _jobs[job_id] = response
+
+    logger.info("Job resumed", job_id=job_id, success=response.success)
+    return response
+
+
 @router.get(
     "/health",
     response_model=HealthResponse,
@@ -202,6 +352,31 @@ async def get_stats(request: Request) -> StatsResponse:
         average_attempts=_stats["total_attempts"] / max(total, 1),
         average_execution_time_ms=_stats["total_time_ms"] / max(total, 1),
         sandbox_stats=sandbox_stats,
+        critic_stats=get_critique_stats(),
+        speculation_stats=get_speculation_stats(),
+        planner_stats=get_planner_stats(),
+        context_stats=get_context_stats(),
+        cancelled_executions=_stats["cancelled"],
+        cancellation_stats={
+            **get_cancellation_stats(),
+            "http_disconnects": _stats["cancelled"],
+            "websocket_disconnects": get_websocket_stats()["cancelled_jobs"],
+            "cancelled_containers": sandbox_stats.get("cancelled_containers", 0),
+            "container_seconds_reclaimed": sandbox_stats.get("container_seconds_reclaimed", 0.0),
+        },
+        cache_stats=get_cache_stats(),
+        connection_stats={"providers": get_registry_stats(), "http": get_http_stats()},
+        semantic_cache_stats=get_semantic_stats(),
+        rate_limit_stats=get_ratelimit_stats(),
+        hedging_stats=get_hedging_stats(),
+        routing_stats=get_routing_stats(),
+        coalescing_stats=get_coalescing_stats(),
+        streaming_stats=get_streaming_stats(),
+        structured_output_stats={
+            "decoding": get_schema_stats(),
+            "validation": get_validation_stats(),
+            "repair": get_repair_stats(),
+        },
     )
 
 
@@ -221,7 +396,7 @@ async def run_benchmark(
     from agent_sandbox.evaluation.runner import BenchmarkRunner
 
     sandbox_manager = get_sandbox_manager(request)
-    runner = BenchmarkRunner(sandbox_manager)
+    runner = BenchmarkRunner(sandbox_manager, mode=body.mode, agent=get_agent(request))
 
     logger.info(
         "Starting benchmark",
@@ -236,6 +411,7 @@ async def run_benchmark(
 
     return BenchmarkResponse(
         suite=body.suite,
+        mode=results.mode,
         total=results.total_tests,
         passed=results.passed,
         failed=results.failed,
@@ -256,3 +432,15 @@ async def clear_jobs() -> dict:
     count = len(_jobs)
     _jobs.clear()
     return {"cleared": count}
+
+
+@router.delete(
+    "/cache",
+    summary="Invalidate cached LLM responses",
+    description="Drop cached responses of one provider/model namespace "
+    "(e.g. ``groq/llama-3.3-70b-versatile``), or all of them.",
+)
+async def invalidate_cache(namespace: str | None = None) -> dict:
+    """Invalidate the LLM response cache."""
+    removed = await get_response_cache().ainvalidate(namespace)
+    return {"namespace": namespace, "removed": removed}
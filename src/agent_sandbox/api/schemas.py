@@ -7,7 +7,7 @@ Pydantic models for API contracts.
 
 from datetime import datetime
 from enum import Enum
-from typing import Any
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
@@ -19,6 +19,7 @@ class JobStatus(str, Enum):
     RUNNING = "running"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"  # The client disconnected before the job finished
 
 
 class ExecuteRequest(BaseModel):
@@ -40,8 +41,34 @@ class ExecuteRequest(BaseModel):
         default=5.0, ge=1.0, le=60.0, description="Timeout for each code execution"
     )
 
+    deadline_seconds: float | None = Field(
+        default=None,
+        ge=1.0,
+        le=3600.0,
+        description="Wall-clock limit for the whole job. When it passes, in-flight "
+        "work is cancelled and the partial result is returned.",
+    )
+
+    token_budget: int | None = Field(
+        default=None, ge=256, description="Maximum LLM tokens the job may spend"
+    )
+
+    test_code: str | None = Field(
+        default=None,
+        max_length=50000,
+        description="Python source defining test_* functions. They run against the "
+        "generated code in the same sandbox and must all pass.",
+        examples=["def test_fib():\n    assert fibonacci(10) == 55"],
+    )
+
     stream: bool = Field(default=False, description="Enable streaming responses")
 
+    mode: Literal["reflexion", "fused"] | None = Field(
+        default=None,
+        description="Retry topology: separate critic call (reflexion) or one fused "
+        "critique-and-fix call (fused). Defaults to the server setting.",
+    )
+
 
 class ExecutionStep(BaseModel):
     """A single step in the execution history."""
@@ -69,6 +96,25 @@ class ExecuteResponse(BaseModel):
     # Execution details
     attempts: int = Field(default=0, description="Number of attempts made")
     execution_time_ms: float = Field(default=0, description="Total execution time")
+    attempts_saved: int = Field(default=0, description="Attempts skipped by stagnation detection")
+    time_saved_ms: float = Field(default=0, description="Estimated time saved by reuse/early stop")
+    stagnation_reason: str | None = Field(
+        None, description="Why retries stopped early, if they did"
+    )
+    tokens_used: int = Field(default=0, description="LLM tokens spent by the job")
+    llm_calls: list[dict[str, Any]] = Field(
+        default_factory=list, description="Token usage and latency of each LLM call"
+    )
+    deadline_exceeded: bool = Field(default=False, description="Whether the job hit its deadline")
+    test_results: list[dict[str, Any]] = Field(
+        default_factory=list, description="Per-test results when test_code was supplied"
+    )
+    plan: dict[str, Any] | None = Field(
+        None, description="Subtasks and their verification when the planner split the task"
+    )
+    semantic_match: dict[str, Any] | None = Field(
+        None, description="The similar task whose verified solution was served on attempt 1"
+    )
 
     # Error info
     error: str | None = Field(None, description="Error message if failed")
@@ -100,11 +146,16 @@ class BenchmarkRequest(BaseModel):
         default=10, ge=1, le=100, description="Maximum number of problems to run"
     )
 
+    mode: Literal["reflexion", "fused"] | None = Field(
+        default=None, description="Retry topology to benchmark"
+    )
+
 
 class BenchmarkResponse(BaseModel):
     """Benchmark results response."""
 
     suite: str
+    mode: str = "reflexion"
     total: int
     passed: int
     failed: int
@@ -120,6 +171,21 @@ class StatsResponse(BaseModel):
     total_executions: int = 0
     successful_executions: int = 0
     failed_executions: int = 0
+    cancelled_executions: int = 0
     average_attempts: float = 0.0
     average_execution_time_ms: float = 0.0
     sandbox_stats: dict[str, Any] = Field(default_factory=dict)
+    critic_stats: dict[str, Any] = Field(default_factory=dict)
+    speculation_stats: dict[str, Any] = Field(default_factory=dict)
+    planner_stats: dict[str, Any] = Field(default_factory=dict)
+    context_stats: dict[str, Any] = Field(default_factory=dict)
+    cancellation_stats: dict[str, Any] = Field(default_factory=dict)
+    cache_stats: dict[str, Any] = Field(default_factory=dict)
+    connection_stats: dict[str, Any] = Field(default_factory=dict)
+    semantic_cache_stats: dict[str, Any] = Field(default_factory=dict)
+    rate_limit_stats: dict[str, Any] = Field(default_factory=dict)
+    hedging_stats: dict[str, Any] = Field(default_factory=dict)
+    routing_stats: dict[str, Any] = Field(default_factory=dict)
+    coalescing_stats: dict[str, Any] = Field(default_factory=dict)
+    streaming_stats: dict[str, Any] = Field(default_factory=dict)
+    structured_output_stats: dict[str, Any] = Field(default_factory=dict)
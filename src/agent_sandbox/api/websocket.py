@@ -2,10 +2,13 @@
 WebSocket Streaming
 ===================
 
-Real-time streaming of agent execution via WebSocket.
+Real-time streaming of agent execution via WebSocket. A run is cancelled
+as soon as its client goes away.
 """
 
+import asyncio
 import contextlib
+import json
 from datetime import datetime
 from typing import Any
 
@@ -13,8 +16,9 @@ import structlog
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel
 
-from agent_sandbox.config import get_settings
+from agent_sandbox.config import AgentMode
 from agent_sandbox.orchestrator.graph import AgentGraph
+from agent_sandbox.orchestrator.state import StepResult
 
 logger = structlog.get_logger()
 
@@ -59,6 +63,105 @@ class ConnectionManager:
 
 manager = ConnectionManager()
 
+# Process-wide streaming counters (reported by /api/v1/stats)
+_stats = {"cancelled_jobs": 0}
+
+
+def get_websocket_stats() -> dict[str, Any]:
+    """Streaming runs cancelled because their client went away."""
+    return dict(_stats)
+
+
+async def _wait_for_disconnect(websocket: WebSocket) -> None:
+    """Return once the client disconnects or sends {"action": "cancel"}."""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        with contextlib.suppress(ValueError, TypeError):
+            if json.loads(message.get("text") or "{}").get("action") == "cancel":
+                return
+
+
+async def _forward_events(
+    websocket: WebSocket,
+    agent: AgentGraph,
+    task: str,
+    max_attempts: int,
+    mode: AgentMode | None,
+    **options: Any,
+) -> None:
+    """Run the agent and send each node's output to the client."""
+    async for event in agent.run_streaming(task, max_attempts, mode, **options):
+        # Parse event and send appropriate message
+        for node_name, update in event.items():
+            # Nodes with nothing to change (e.g. verify without test_code) stream None
+            node_output = update or {}
+            if node_name == "generate":
+                await manager.send_message(
+                    websocket,
+                    StreamMessage(
+                        type="code",
+                        data={
+                            "code": node_output.get("code", ""),
+                            "reasoning": node_output.get("reasoning", ""),
+                            "attempt": node_output.get("attempt", 1),
+                        },
+                    ),
+                )
+
+            elif node_name == "execute":
+                result = StepResult.coerce(node_output.get("execution_result")) or StepResult()
+                await manager.send_message(
+                    websocket,
+                    StreamMessage(
+                        type="execution_result",
+                        data={
+                            "exit_code": result.exit_code,
+                            "stdout": result.stdout,
+                            "stderr": result.stderr,
+                            "timed_out": result.timed_out,
+                        },
+                    ),
+                )
+
+            elif node_name == "verify" and node_output.get("test_results"):
+                await manager.send_message(
+                    websocket,
+                    StreamMessage(
+                        type="tests",
+                        data={
+                            "results": node_output["test_results"],
+                            "failing": node_output.get("failing_tests", []),
+                        },
+                    ),
+                )
+
+            elif node_name == "critique":
+                await manager.send_message(
+                    websocket,
+                    StreamMessage(
+                        type="critique",
+                        data={
+                            "critique": node_output.get("critique", ""),
+                            "should_retry": node_output.get("should_retry", False),
+                        },
+                    ),
+                )
+
+            elif node_name == "finalize":
+                await manager.send_message(
+                    websocket,
+                    StreamMessage(
+                        type="complete",
+                        data={
+                            "success": node_output.get("success", False),
+                            "output": node_output.get("final_output", ""),
+                            "deadline_exceeded": node_output.get("deadline_exceeded", False),
+                        },
+                    ),
+                )
+
 
 @router.websocket("/stream")
 async def websocket_stream(websocket: WebSocket):
@@ -67,10 +170,14 @@ async def websocket_stream(websocket: WebSocket):
 
     Protocol:
     1. Client connects
-    2. Client sends: {"task": "...", "max_attempts": 3}
+    2. Client sends: {"task": "...", "max_attempts": 3, "mode": "reflexion"}
     3. Server streams updates as agent executes
     4. Server sends final result and closes
 
+    Disconnecting, or sending {"action": "cancel"}, while the agent runs
+    cancels the run: its in-flight LLM call is aborted and its container
+    killed.
+
     Message types:
     - "connected" - Connection established
     - "started" - Execution started
@@ -96,6 +203,10 @@ async def websocket_stream(websocket: WebSocket):
         data = await websocket.receive_json()
         task = data.get("task", "")
         max_attempts = data.get("max_attempts", 3)
+        mode = data.get("mode")
+        deadline_seconds = data.get("deadline_seconds")
+        token_budget = data.get("token_budget")
+        test_code = data.get("test_code")
 
         if not task:
             await manager.send_message(
@@ -112,77 +223,36 @@ async def websocket_stream(websocket: WebSocket):
             StreamMessage(type="started", data={"task": task}),
         )
 
-        # Get sandbox manager from app state
-        # Note: This requires the WebSocket to have access to app state
-        # In production, you'd inject this properly
-        settings = get_settings()
-
-        from agent_sandbox.sandbox.manager import SandboxManager
-
-        sandbox_manager = SandboxManager(settings)
-        await sandbox_manager.initialize()
+        # Shared graph and sandbox pool from app state
+        agent: AgentGraph = websocket.app.state.agent
 
+        # Forward events while watching for the client going away; a
+        # disconnect or cancel cancels the run, its LLM call and container
+        stream = asyncio.create_task(
+            _forward_events(
+                websocket,
+                agent,
+                task,
+                max_attempts,
+                mode,
+                deadline_seconds=deadline_seconds,
+                token_budget=token_budget,
+                test_code=test_code,
+            )
+        )
+        watcher = asyncio.create_task(_wait_for_disconnect(websocket))
         try:
-            agent = AgentGraph(sandbox_manager, settings)
-
-            # Stream execution
-            async for event in agent.run_streaming(task, max_attempts):
-                # Parse event and send appropriate message
-                for node_name, node_output in event.items():
-                    if node_name == "generate":
-                        await manager.send_message(
-                            websocket,
-                            StreamMessage(
-                                type="code",
-                                data={
-                                    "code": node_output.get("code", ""),
-                                    "reasoning": node_output.get("reasoning", ""),
-                                    "attempt": node_output.get("attempt", 1),
-                                },
-                            ),
-                        )
-
-                    elif node_name == "execute":
-                        result = node_output.get("execution_result", {})
-                        await manager.send_message(
-                            websocket,
-                            StreamMessage(
-                                type="execution_result",
-                                data={
-                                    "exit_code": result.get("exit_code", 1),
-                                    "stdout": result.get("stdout", ""),
-                                    "stderr": result.get("stderr", ""),
-                                    "timed_out": result.get("timed_out", False),
-                                },
-                            ),
-                        )
-
-                    elif node_name == "critique":
-                        await manager.send_message(
-                            websocket,
-                            StreamMessage(
-                                type="critique",
-                                data={
-                                    "critique": node_output.get("critique", ""),
-                                    "should_retry": node_output.get("should_retry", False),
-                                },
-                            ),
-                        )
-
-                    elif node_name == "finalize":
-                        await manager.send_message(
-                            websocket,
-                            StreamMessage(
-                                type="complete",
-                                data={
-                                    "success": node_output.get("success", False),
-                                    "output": node_output.get("final_output", ""),
-                                },
-                            ),
-                        )
-
+            await asyncio.wait({stream, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if stream.done():
+                # Surface errors to the handlers below
+                stream.result()
+            else:
+                _stats["cancelled_jobs"] += 1
+                logger.info("Client went away, cancelling execution", task=task[:50])
         finally:
-            await sandbox_manager.cleanup()
+            for pending in (stream, watcher):
+                pending.cancel()
+            await asyncio.gather(stream, watcher, return_exceptions=True)
 
     except WebSocketDisconnect:
         logger.info("WebSocket client disconnected")
@@ -6,6 +6,7 @@ Command-line interface for the agent sandbox runtime.
 """
 
 import asyncio
+from typing import cast, get_args
 
 import typer
 from rich.console import Console
@@ -14,6 +15,8 @@ from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.syntax import Syntax
 from rich.table import Table
 
+from agent_sandbox.config import AgentMode
+
 app = typer.Typer(
     name="agent-sandbox",
     help="🚀 Self-correcting AI agent with sandboxed execution",
@@ -92,23 +95,29 @@ async def _run_task(task: str, max_attempts: int, verbose: bool):
 def benchmark(
     suite: str = typer.Option("quick", "--suite", "-s", help="Benchmark suite"),
     limit: int | None = typer.Option(None, "--limit", "-l", help="Limit problems"),
+    mode: str | None = typer.Option(
+        None, "--mode", "-m", help="Retry topology: reflexion or fused"
+    ),
 ):
     """
     Run benchmark suite.
 
     Example:
         agent-sandbox benchmark --suite full
+        agent-sandbox benchmark --suite full --mode fused
     """
-    asyncio.run(_run_benchmark(suite, limit))
+    if mode is not None and mode not in get_args(AgentMode):
+        raise typer.BadParameter("must be reflexion or fused", param_hint="--mode")
+    asyncio.run(_run_benchmark(suite, limit, cast(AgentMode | None, mode)))
 
 
-async def _run_benchmark(suite: str, limit: int | None):
+async def _run_benchmark(suite: str, limit: int | None, mode: AgentMode | None = None):
     """Run benchmark asynchronously."""
     from agent_sandbox.runtime import AgentRuntime
 
     console.print(
         Panel.fit(
-            f"[bold blue]Suite:[/bold blue] {suite}",
+            f"[bold blue]Suite:[/bold blue] {suite}  [bold blue]Mode:[/bold blue] {mode or 'default'}",
             title="📊 Benchmark Runner",
         )
     )
@@ -121,13 +130,14 @@ async def _run_benchmark(suite: str, limit: int | None):
         progress.add_task("Running benchmarks...", total=None)
 
         async with AgentRuntime() as runtime:
-            results = await runtime.run_benchmark(suite, limit)
+            results = await runtime.run_benchmark(suite, limit, mode)
 
     # Display results
     table = Table(title="Benchmark Results")
     table.add_column("Metric", style="cyan")
     table.add_column("Value", style="green")
 
+    table.add_row("Mode", results.mode)
     table.add_row("Total Tests", str(results.total_tests))
     table.add_row("Passed", str(results.passed))
     table.add_row("Failed", str(results.failed))
@@ -178,6 +188,7 @@ def demo():
 
 async def _run_demo():
     """Run demo asynchronously."""
+    from agent_sandbox.orchestrator.state import StepResult
     from agent_sandbox.runtime import AgentRuntime
 
     console.print(
@@ -217,15 +228,15 @@ async def _run_demo():
                         console.print(syntax)
 
                 elif node_name == "execute":
-                    result = data.get("execution_result", {})
-                    if result.get("exit_code") == 0:
+                    result = StepResult.coerce(data.get("execution_result")) or StepResult()
+                    if result.exit_code == 0:
                         console.print("[green]✓ Execution successful![/green]")
-                        if result.get("stdout"):
-                            console.print(Panel(result["stdout"], border_style="green"))
+                        if result.stdout:
+                            console.print(Panel(result.stdout, border_style="green"))
                     else:
                         console.print("[red]✗ Execution failed[/red]")
-                        if result.get("stderr"):
-                            console.print(Panel(result["stderr"][:500], border_style="red"))
+                        if result.stderr:
+                            console.print(Panel(result.stderr[:500], border_style="red"))
 
                 elif node_name == "critique":
                     console.print("\n[yellow]🔍 Analyzing error...[/yellow]")
@@ -8,6 +8,15 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 ProviderType = Literal["groq", "openrouter", "anthropic", "google", "ollama", "openai", "cerebras"]
 
+# reflexion: critic call, then regeneration. fused: one call returns diagnosis and fixed code.
+AgentMode = Literal["reflexion", "fused"]
+
+# full: every retry returns the whole program. patch: retries return a diff against the last attempt.
+RetryFormat = Literal["full", "patch"]
+
+# langgraph: compiled StateGraph (checkpointing, resume). native: in-house loop, less overhead per step.
+OrchestratorEngine = Literal["langgraph", "native"]
+
 
 class Settings(BaseSettings):
     """App settings from environment variables."""
@@ -45,7 +54,7 @@ class Settings(BaseSettings):
     sandbox_memory_limit_mb: int = Field(default=256, ge=64, le=2048)
     sandbox_cpu_limit: float = Field(default=0.5, ge=0.1, le=4.0)
     sandbox_network_enabled: bool = False
-    sandbox_pool_size: int = Field(default=5, ge=1, le=20)
+    sandbox_pool_size: int = Field(default=5, ge=1, le=20)  # Containers running at once
     sandbox_image: str = "agent-sandbox-python:latest"
 
     # API
@@ -62,13 +71,78 @@ class Settings(BaseSettings):
 
     # Agent
     max_reflexion_attempts: int = Field(default=3, ge=1, le=10)
+    batch_concurrency: int = Field(default=4, ge=1, le=64)  # Jobs in flight in run_many()
+    orchestrator_engine: OrchestratorEngine = "langgraph"
+    # Split large tasks into functions generated and tested in parallel
+    planner_enabled: bool = False
+    agent_mode: AgentMode = "reflexion"  # Default retry topology, overridable per request
+    retry_format: RetryFormat = "full"
+    stream_generation: bool = False  # Parse generations as they stream; check code before reasoning
+    critic_fast_path: bool = True  # Diagnose mechanical errors locally, skip the LLM critic
+    speculative_regeneration: bool = False  # Regenerate from the raw error during the critique
+    stagnation_detection: bool = True  # Reuse results for repeated code, escalate, stop on stalls
+    escalation_temperature: float = Field(default=0.8, ge=0.0, le=2.0)
+    escalation_model: str | None = None  # Last-resort model for the active provider
+    job_deadline_seconds: float | None = None  # Default wall-clock limit per job
+    job_token_budget: int | None = None  # Default LLM token budget per job
+    prompt_token_budget: int | None = None  # Prompt size limit (default: per provider)
+
+    # Checkpointing (resume interrupted jobs)
+    checkpoint_enabled: bool = False
+    checkpoint_path: str = ".agent_checkpoints/checkpoints.db"
+    checkpoint_keep_last: int = Field(default=1, ge=1, le=100)  # Checkpoints kept per finished job
+    checkpoint_retention_hours: float = Field(default=24.0, gt=0)
+
+    # Provider HTTP clients (pooled, shared per backend)
+    http2_enabled: bool = True  # Needs h2 (httpx[http2]); falls back to HTTP/1.1 keep-alive
+    http_max_connections: int = Field(default=100, ge=1)
+    http_max_keepalive: int = Field(default=20, ge=0)  # Idle connections kept warm per client
+    http_keepalive_seconds: float = Field(default=30.0, ge=0)
+
+    # Provider rate limits and retries (per provider/model, client-side)
+    llm_requests_per_minute: int | None = Field(default=None, ge=1)  # Match your plan's limits
+    llm_tokens_per_minute: int | None = Field(default=None, ge=1)
+    llm_retry_base_delay: float = Field(default=0.5, gt=0)  # Full-jitter exponential backoff
+    llm_retry_max_delay: float = Field(default=30.0, gt=0)  # Longer Retry-After fails the call
+
+    # Provider routing (spread calls over several backends by health and latency)
+    llm_routing_providers: str = ""  # e.g. "cerebras,openrouter" or "groq:llama-3.1-8b-instant"
+    llm_circuit_failures: int = Field(default=3, ge=1)  # Consecutive failures that open a circuit
+    llm_circuit_cooldown_seconds: float = Field(default=30.0, gt=0)
+
+    # Hedged requests (resend calls slower than the primary's p95 to a secondary)
+    llm_hedging_enabled: bool = False
+    llm_hedge_provider: ProviderType | None = None  # Secondary backend (default: the same one)
+    llm_hedge_model: str | None = None  # Secondary model (default: the same / provider default)
+    llm_hedge_percentile: float = Field(default=0.95, gt=0.5, lt=1.0)
+    # Extra tokens hedges may spend per job
+    llm_hedge_budget_tokens: int = Field(default=4000, ge=0)
+
+    # Single-flight: concurrent identical calls share one upstream request
+    llm_coalescing_enabled: bool = True
+
+    # LLM response cache (exact-match, memory LRU + SQLite)
+    llm_cache_enabled: bool = True
+    llm_cache_path: str = ".agent_cache/llm_responses.db"
+    # Hotter calls bypass it; the default covers the agent's generation, critique and planning
+    llm_cache_max_temperature: float = Field(default=0.3, ge=0.0, le=2.0)
+    llm_cache_memory_entries: int = Field(default=256, ge=0)
+    llm_cache_max_entries: int = Field(default=10_000, ge=1)  # Rows kept on disk (LRU eviction)
+    llm_cache_ttl_hours: float = Field(default=168.0, gt=0)
+
+    # Semantic solution cache (serve a similar task's verified solution on attempt 1)
+    semantic_cache_enabled: bool = False  # Requires numpy
+    semantic_cache_threshold: float = Field(default=0.9, ge=0.0, le=1.0)  # Cosine similarity
+    semantic_cache_path: str = ".agent_memory/semantic_cache.jsonl"
+    semantic_cache_max_entries: int = Field(default=5000, ge=1)
 
     # Logging
     log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR"] = "INFO"
     log_format: Literal["json", "console"] = "console"
 
-    def get_provider_api_key(self) -> str:
-        """Get API key for active provider."""
+    def get_provider_api_key(self, provider: ProviderType | None = None) -> str:
+        """Get API key for ``provider`` (default: the active provider)."""
+        provider = provider or self.llm_provider
         keys = {
             "groq": self.groq_api_key,
             "openrouter": self.openrouter_api_key,
@@ -78,13 +152,13 @@ class Settings(BaseSettings):
             "openai": self.openai_api_key,
             "cerebras": self.cerebras_api_key,
         }
-        key = keys.get(self.llm_provider)
-        if key is None and self.llm_provider != "ollama":
-            raise ValueError(f"No API key for {self.llm_provider}")
+        key = keys.get(provider)
+        if key is None and provider != "ollama":
+            raise ValueError(f"No API key for {provider}")
         return key.get_secret_value() if key else ""
 
-    def get_provider_model(self) -> str:
-        """Get model for active provider."""
+    def get_provider_model(self, provider: ProviderType | None = None) -> str:
+        """Get model for ``provider`` (default: the active provider)."""
         models = {
             "groq": self.groq_model,
             "openrouter": self.openrouter_model,
@@ -94,11 +168,11 @@ class Settings(BaseSettings):
             "openai": self.openai_model,
             "cerebras": self.cerebras_model,
         }
-        return models.get(self.llm_provider, "")
+        return models.get(provider or self.llm_provider, "")
 
-    def get_provider_base_url(self) -> str | None:
-        """Get base URL for active provider."""
-        if self.llm_provider == "ollama":
+    def get_provider_base_url(self, provider: ProviderType | None = None) -> str | None:
+        """Get base URL for ``provider`` (default: the active provider)."""
+        if (provider or self.llm_provider) == "ollama":
             return self.ollama_base_url
         return None
 
@@ -6,10 +6,15 @@ Pydantic schemas for structured output enforcement.
 """
 
 from agent_sandbox.contracts.agent_output import AgentOutput, CritiqueOutput
-from agent_sandbox.contracts.validation import ValidationRetryLoop
+from agent_sandbox.contracts.repair import get_repair_stats, repair_json, validate_json
+from agent_sandbox.contracts.validation import ValidationRetryLoop, get_validation_stats
 
 __all__ = [
     "AgentOutput",
     "CritiqueOutput",
     "ValidationRetryLoop",
+    "get_repair_stats",
+    "get_validation_stats",
+    "repair_json",
+    "validate_json",
 ]
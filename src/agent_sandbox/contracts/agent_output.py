@@ -1,6 +1,7 @@
 """Agent output contracts - Pydantic schemas for LLM outputs."""
 
 import re
+from graphlib import CycleError, TopologicalSorter
 
 from pydantic import BaseModel, Field, field_validator, model_validator
 
@@ -12,6 +13,7 @@ class AgentOutput(BaseModel):
     dependencies: list[str] = Field(default_factory=list)
     reasoning: str = Field(..., min_length=5)
     confidence: float = Field(default=0.8, ge=0.0, le=1.0)
+    diagnosis: str | None = None  # Set by fused critique-and-fix retries
 
     @field_validator("code")
     @classmethod
@@ -49,6 +51,65 @@ class AgentOutput(BaseModel):
         return self
 
 
+class LineEdit(BaseModel):
+    """Replace lines ``start``..``end`` (1-based, inclusive) of the previous code."""
+
+    start: int = Field(..., ge=1)
+    end: int = Field(..., ge=0)
+    replacement: str = ""
+
+
+class PatchOutput(BaseModel):
+    """Patch-mode retry output: a fix relative to the previous attempt."""
+
+    patch: str | None = None  # Unified diff
+    edits: list[LineEdit] = Field(default_factory=list)
+    dependencies: list[str] = Field(default_factory=list)
+    reasoning: str = ""
+    confidence: float = Field(default=0.8, ge=0.0, le=1.0)
+
+
+class SubTask(BaseModel):
+    """One independently testable function of a decomposed task."""
+
+    name: str = Field(..., pattern=r"^[A-Za-z_]\w*$")
+    signature: str = Field(..., min_length=5)
+    description: str = ""
+    depends_on: list[str] = Field(default_factory=list)
+    test_code: str = Field(..., min_length=1)
+
+
+class TaskPlan(BaseModel):
+    """Planner output: functions forming a DAG, plus the code that ties them together."""
+
+    subtasks: list[SubTask] = Field(default_factory=list, max_length=8)
+    main: str = ""
+
+    @model_validator(mode="after")
+    def check_dag(self) -> "TaskPlan":
+        """Names unique, dependencies known, no cycles."""
+        names = [s.name for s in self.subtasks]
+        if len(set(names)) != len(names):
+            raise ValueError("Duplicate subtask names")
+        for subtask in self.subtasks:
+            unknown = set(subtask.depends_on) - set(names)
+            if unknown:
+                raise ValueError(f"{subtask.name} depends on unknown subtasks: {sorted(unknown)}")
+        try:
+            self.order()
+        except CycleError as e:
+            raise ValueError(f"Subtask dependencies form a cycle: {e.args[1]}") from e
+        if self.subtasks and not self.main.strip():
+            raise ValueError("Plan has no main code")
+        return self
+
+    def order(self) -> list[SubTask]:
+        """Subtasks with every dependency before its dependents."""
+        by_name = {s.name: s for s in self.subtasks}
+        sorter = TopologicalSorter({s.name: s.depends_on for s in self.subtasks})
+        return [by_name[name] for name in sorter.static_order()]
+
+
 class CritiqueOutput(BaseModel):
     """Critic output schema."""
 
@@ -76,6 +137,7 @@ class BenchmarkSuiteResult(BaseModel):
     """Benchmark suite results."""
 
     suite_name: str
+    mode: str = "reflexion"
     total_tests: int
     passed: int
     failed: int
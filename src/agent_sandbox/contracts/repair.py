@@ -0,0 +1,165 @@
+"""
+Local JSON Repair
+=================
+
+Most invalid structured outputs are one trivial defect away from valid
+JSON. Before an LLM round trip is spent on "fix your JSON", these are
+repaired locally (deterministic, a single pass over the text):
+
+- prose or a Markdown fence around the object
+- trailing commas before ``}`` or ``]``
+- raw newlines and tabs inside strings (e.g. the ``code`` field)
+- a truncated end: missing closing brackets; an unfinished last member
+  is dropped
+
+The repaired JSON is validated against the Pydantic model like any other
+output; an LLM retry happens only if repair fails. Truncated strings are
+never closed, since half a program is worse than none.
+"""
+
+import json
+from typing import Any, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+T = TypeVar("T", bound=BaseModel)
+
+_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+# Process-wide repair counters (reported by /api/v1/stats)
+_stats: dict[str, Any] = {
+    "attempts": 0,  # Outputs that weren't valid JSON
+    "repaired": 0,  # ... and validated after local repair (each saved a round trip)
+    "failed": 0,
+    "fixes": {"wrapping": 0, "trailing_commas": 0, "control_chars": 0, "truncation": 0},
+}
+
+
+def get_repair_stats() -> dict[str, Any]:
+    """How often local repair saved an LLM retry, and which defects it fixed."""
+    attempts = _stats["attempts"]
+    return {
+        **_stats,
+        "fixes": dict(_stats["fixes"]),
+        "success_rate": _stats["repaired"] / attempts if attempts else 0.0,
+        "round_trips_avoided": _stats["repaired"],
+    }
+
+
+def _drop_trailing_comma(out: list[str]) -> bool:
+    i = len(out) - 1
+    while i >= 0 and out[i].isspace():
+        i -= 1
+    if i >= 0 and out[i] == ",":
+        del out[i]
+        return True
+    return False
+
+
+def repair_json(text: str) -> tuple[str, list[str]] | None:
+    """
+    Fix trivial defects in a JSON object.
+
+    Returns:
+        (repaired JSON, names of the fixes applied), or None when the
+        text is beyond local repair
+    """
+    start = text.find("{")
+    if start == -1:
+        return None
+    fixes: set[str] = set()
+    out: list[str] = []
+    stack: list[str] = []
+    # Where the text can be cut and closed: after an opening bracket or
+    # before a comma, i.e. after a complete member
+    safe: tuple[int, list[str]] = (0, [])
+    in_string = escape = closed = False
+    after = ""  # Text following the object
+
+    for i, c in enumerate(text[start:], start):
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+            elif c in _ESCAPES:
+                c = _ESCAPES[c]
+                fixes.add("control_chars")
+            out.append(c)
+        elif c == '"':
+            in_string = True
+            out.append(c)
+        elif c in _CLOSERS:
+            stack.append(_CLOSERS[c])
+            out.append(c)
+            safe = (len(out), list(stack))
+        elif c in "}]":
+            if c != stack[-1]:
+                return None
+            if _drop_trailing_comma(out):
+                fixes.add("trailing_commas")
+            stack.pop()
+            out.append(c)
+            if not stack:
+                closed = True
+                after = text[i + 1 :]
+                break
+        else:
+            if c == ",":
+                safe = (len(out), list(stack))
+            out.append(c)
+
+    if not closed:
+        fixes.add("truncation")
+        if not in_string:
+            _drop_trailing_comma(out)
+            candidate = "".join(out) + "".join(reversed(stack))
+            try:
+                json.loads(candidate)
+                return candidate, sorted(fixes)
+            except json.JSONDecodeError:
+                pass
+        cut, open_brackets = safe
+        out = out[:cut]
+        _drop_trailing_comma(out)
+        stack = open_brackets
+
+    if text[:start].strip() or after.strip():
+        fixes.add("wrapping")
+    return "".join(out) + "".join(reversed(stack)), sorted(fixes)
+
+
+def validate_json(content: str, schema: type[T]) -> tuple[T, bool]:
+    """
+    Parse ``content`` and validate it against ``schema``, repairing it locally if needed.
+
+    Returns:
+        (validated output, whether it needed repair)
+
+    Raises:
+        json.JSONDecodeError | ValidationError: The original error, when
+            the output isn't valid and repair didn't help
+    """
+    try:
+        return schema.model_validate(json.loads(content)), False
+    except json.JSONDecodeError as e:
+        error = e
+
+    _stats["attempts"] += 1
+    repaired = repair_json(content)
+    if repaired is not None:
+        text, fixes = repaired
+        try:
+            result = schema.model_validate(json.loads(text))
+        except (json.JSONDecodeError, ValidationError):
+            pass
+        else:
+            _stats["repaired"] += 1
+            for fix in fixes:
+                _stats["fixes"][fix] += 1
+            return result, True
+    _stats["failed"] += 1
+    raise error
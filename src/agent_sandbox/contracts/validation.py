@@ -1,16 +1,55 @@
 import json
-from typing import TypeVar
+from typing import Any, TypeVar
 
 import structlog
 from pydantic import BaseModel, ValidationError
 
 from agent_sandbox.config import Settings, get_settings
-from agent_sandbox.providers.base import LLMProvider
-from agent_sandbox.providers.factory import create_provider
+from agent_sandbox.contracts.repair import validate_json
+from agent_sandbox.providers.base import LLMProvider, LLMResponse
+from agent_sandbox.providers.context import Section, fit_sections, section_budget
+from agent_sandbox.providers.registry import get_provider
+from agent_sandbox.providers.schema import output_schema
 
 log = structlog.get_logger()
 T = TypeVar("T", bound=BaseModel)
 
+# Process-wide structured-output counters per provider/model (reported by
+# /api/v1/stats), split by whether decoding was constrained to the schema
+_stats: dict[str, dict[str, dict[str, int]]] = {}
+
+
+def record_validation(
+    response: LLMResponse, valid: bool, retried: bool = False, repaired: bool = False
+) -> None:
+    """
+    Count one structured output of ``response``'s provider and whether it validated.
+
+    An output that only validated after local repair is invalid but
+    ``repaired``; it cost no retry.
+    """
+    label = f"{response.provider}/{response.model}"
+    mode = "constrained" if response.constrained else "unconstrained"
+    counts = _stats.setdefault(label, {}).setdefault(
+        mode, {"outputs": 0, "invalid": 0, "repaired": 0, "retries": 0}
+    )
+    counts["outputs"] += 1
+    counts["invalid"] += not valid
+    counts["repaired"] += repaired
+    counts["retries"] += retried
+
+
+def get_validation_stats() -> dict[str, Any]:
+    """Invalid outputs and validation retries per provider, with and without a schema."""
+    return {
+        label: {
+            mode: {**counts, "invalid_rate": counts["invalid"] / counts["outputs"]}
+            for mode, counts in modes.items()
+        }
+        for label, modes in _stats.items()
+    }
+
+
 RETRY_PROMPT = """Invalid response. Fix it.
 
 ERROR: {error}
@@ -29,7 +68,7 @@ class ValidationRetryLoop:
     @property
     def provider(self) -> LLMProvider:
         if self._provider is None:
-            self._provider = create_provider(
+            self._provider = get_provider(
                 provider_type=self.settings.llm_provider,
                 api_key=self.settings.get_provider_api_key(),
                 model=self.settings.get_provider_model(),
@@ -39,18 +78,30 @@ class ValidationRetryLoop:
 
     async def validate_and_retry(
         self,
-        response: str,
+        response: str | LLMResponse,
         schema: type[T],
         system_prompt: str,
         user_prompt: str,
     ) -> T:
+        """
+        Validate ``response`` against ``schema``, asking the provider to fix it if needed.
+
+        Pass the ``LLMResponse`` rather than its content to have the
+        outcome counted for the provider that produced it.
+        """
+        if isinstance(response, str):
+            response = LLMResponse(
+                content=response, model=self.provider.config.model, provider=self.provider.name
+            )
         current = response
         last_error: Exception | None = None
 
         for attempt in range(self.max_retries):
+            retrying = attempt < self.max_retries - 1
             try:
-                data = json.loads(current)
-                result = schema.model_validate(data)
+                # Trivial JSON defects are repaired locally, without a retry
+                result, repaired = validate_json(current.content, schema)
+                record_validation(current, valid=not repaired, repaired=repaired)
                 if attempt > 0:
                     log.info("Validation ok after retry", attempt=attempt + 1)
                 return result
@@ -63,13 +114,27 @@ class ValidationRetryLoop:
                 error_msg = str(e)
                 log.warning("Validation error", attempt=attempt + 1, errors=e.error_count())
 
-            if attempt < self.max_retries - 1:
-                current = await self._retry(error_msg, current, system_prompt, user_prompt)
+            record_validation(current, valid=False, retried=retrying)
+            if retrying:
+                current = await self._retry(
+                    error_msg, current.content, schema, system_prompt, user_prompt
+                )
 
         log.error("Validation failed", max_retries=self.max_retries)
         raise last_error or ValidationError("Unknown error")
 
-    async def _retry(self, error: str, original: str, system: str, user: str) -> str:
-        prompt = RETRY_PROMPT.format(error=error, response=original[:1000])
-        resp = await self.provider.generate_json(system, f"{user}\n\n{prompt}", 0.1, 4096)
-        return resp.content
+    async def _retry(
+        self, error: str, original: str, schema: type[BaseModel], system: str, user: str
+    ) -> LLMResponse:
+        fitted = fit_sections(
+            [
+                Section("error", error, priority=2, kind="error"),
+                Section("user", user, priority=1),
+                Section("response", original, priority=0),
+            ],
+            section_budget(self.settings, system, RETRY_PROMPT),
+        )
+        prompt = RETRY_PROMPT.format(error=fitted["error"], response=fitted["response"])
+        return await self.provider.generate_json(
+            system, f"{fitted['user']}\n\n{prompt}", 0.1, 4096, schema=output_schema(schema)
+        )
@@ -13,7 +13,7 @@ from typing import Any
 
 import structlog
 
-from agent_sandbox.config import Settings, get_settings
+from agent_sandbox.config import AgentMode, Settings, get_settings
 from agent_sandbox.contracts.agent_output import BenchmarkResult, BenchmarkSuiteResult
 from agent_sandbox.evaluation.metrics import MetricsCollector
 from agent_sandbox.evaluation.problems import (
@@ -46,9 +46,14 @@ class BenchmarkRunner:
         self,
         sandbox_manager: SandboxManager,
         settings: Settings | None = None,
+        mode: AgentMode | None = None,
+        agent: AgentGraph | None = None,
     ) -> None:
         self.sandbox_manager = sandbox_manager
         self.settings = settings or get_settings()
+        self.mode = mode or self.settings.agent_mode
+        # Compiled once and reused for every problem in the suite
+        self.agent = agent or AgentGraph(sandbox_manager, self.settings)
         self.metrics = MetricsCollector()
 
     async def run_suite(
@@ -75,6 +80,7 @@ class BenchmarkRunner:
             "Starting benchmark suite",
             suite=suite_name,
             problem_count=len(problems),
+            mode=self.mode,
         )
 
         self.metrics.start()
@@ -102,6 +108,7 @@ class BenchmarkRunner:
         self.metrics.finish()
 
         summary = self.metrics.get_summary(suite_name)
+        summary.mode = self.mode
 
         logger.info(
             "Benchmark suite completed",
@@ -127,13 +134,12 @@ class BenchmarkRunner:
         start_time = datetime.utcnow()
 
         try:
-            # Create agent
-            agent = AgentGraph(self.sandbox_manager, self.settings)
-
             # Run agent on task
-            result = await agent.run(
+            result = await self.agent.run(
                 task=problem.task,
                 max_attempts=self.settings.max_reflexion_attempts,
+                mode=self.mode,
+                test_code=problem.test_code,
             )
 
             end_time = datetime.utcnow()
@@ -180,6 +186,12 @@ class BenchmarkRunner:
         if not result.get("success"):
             return False
 
+        # Tests are the real check when the problem has them
+        if problem.test_code:
+            tests = result.get("test_results", [])
+            if not tests or any(t.get("status") != "passed" for t in tests):
+                return False
+
         output = result.get("final_output", "")
 
         # Check exact match
@@ -203,6 +215,7 @@ class BenchmarkRunner:
 async def run_benchmarks(
     suite_name: str = "quick",
     max_problems: int | None = None,
+    mode: AgentMode | None = None,
 ) -> BenchmarkSuiteResult:
     """
     Convenience function to run benchmarks.
@@ -215,7 +228,7 @@ async def run_benchmarks(
     try:
         await sandbox_manager.initialize()
 
-        runner = BenchmarkRunner(sandbox_manager, settings)
+        runner = BenchmarkRunner(sandbox_manager, settings, mode=mode)
         results = await runner.run_suite(suite_name, max_problems)
 
         # Print report
@@ -15,6 +15,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from agent_sandbox.api.routes import router as api_router
 from agent_sandbox.api.websocket import router as ws_router
 from agent_sandbox.config import get_settings
+from agent_sandbox.orchestrator.checkpoint import SQLiteCheckpointer
+from agent_sandbox.orchestrator.graph import AgentGraph
+from agent_sandbox.providers.registry import close_providers
 from agent_sandbox.sandbox.manager import SandboxManager
 
 # Configure structured logging
@@ -55,11 +58,28 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
 
     logger.info("Sandbox pool initialized", pool_size=settings.sandbox_pool_size)
 
+    # Shared checkpoint store so interrupted jobs can be resumed
+    checkpointer = None
+    if settings.checkpoint_enabled:
+        checkpointer = SQLiteCheckpointer(
+            settings.checkpoint_path,
+            keep_last=settings.checkpoint_keep_last,
+            retention_seconds=settings.checkpoint_retention_hours * 3600,
+        )
+        logger.info("Checkpointing enabled", path=settings.checkpoint_path)
+    app.state.checkpointer = checkpointer
+
+    # One compiled graph for the whole process; per-request options travel in state
+    app.state.agent = AgentGraph(sandbox_manager, settings, checkpointer=checkpointer)
+
     yield
 
     # Cleanup
     logger.info("Shutting down Agent Sandbox Runtime")
     await sandbox_manager.cleanup()
+    await close_providers()
+    if checkpointer is not None:
+        checkpointer.close()
 
 
 # Create FastAPI application
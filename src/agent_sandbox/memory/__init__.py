@@ -17,8 +17,19 @@ from typing import Any
 
 import structlog
 
+from agent_sandbox.memory.semantic import SemanticCache, get_semantic_cache, get_semantic_stats
+
 log = structlog.get_logger()
 
+__all__ = [
+    "EvolvingMemory",
+    "MemoryEntry",
+    "PatternInsight",
+    "SemanticCache",
+    "get_semantic_cache",
+    "get_semantic_stats",
+]
+
 
 @dataclass
 class MemoryEntry:
@@ -0,0 +1,262 @@
+"""
+Semantic Solution Cache
+=======================
+
+Serves a previously verified program for a task that paraphrases an
+earlier one ("compute the 10th fibonacci" / "print fibonacci number 10"),
+so the first attempt skips the LLM. The served program still runs in
+the sandbox (and against the job's tests); if it fails, the normal retry
+loop takes over.
+
+Tasks are embedded locally, with no model to load:
+
+- features are content words (instruction verbs and filler removed),
+  word bigrams and character trigrams, hashed into a fixed-size vector
+  with a sign bit (the "hashing trick")
+- vectors are L2-normalized rows of one NumPy matrix, so a lookup is a
+  single matrix-vector product followed by a top-k partition
+
+A match must reach ``SEMANTIC_CACHE_THRESHOLD`` and mention exactly the
+same numbers as the task, since "fibonacci 10" and "fibonacci 20" embed
+almost identically. Requires NumPy (``pip install agent-sandbox-runtime[semantic]``).
+"""
+
+import json
+import re
+import zlib
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+import structlog
+
+from agent_sandbox.config import Settings, get_settings
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency
+    np = None  # type: ignore[assignment]
+
+log = structlog.get_logger()
+
+DIMENSIONS = 2048
+
+# Feature weights: whole words dominate, bigrams keep some word order,
+# trigrams tolerate inflections ("integer" / "integers")
+WORD_WEIGHT = 1.0
+BIGRAM_WEIGHT = 0.5
+TRIGRAM_WEIGHT = 0.3
+
+# Words that say how to phrase the answer, not what to compute
+STOP_WORDS = frozenset(
+    {
+        # Filler
+        "a", "an", "the", "of", "to", "and", "or", "in", "on", "for", "from", "with",
+        "by", "that", "this", "it", "is", "are", "be", "as", "at", "please", "then",
+        "using", "use", "given",
+        # Instructions
+        "write", "create", "implement", "program", "script", "function", "python",
+        "code", "print", "compute", "calculate", "return", "output", "display", "show",
+        "find", "get", "give", "make", "number", "value",
+    }
+)  # fmt: skip
+
+_WORD_RE = re.compile(r"[a-z]+|\d+")
+_ORDINAL_RE = re.compile(r"(\d)(?:st|nd|rd|th)\b")
+
+# Process-wide semantic cache counters (reported by /api/v1/stats)
+_stats = {
+    "lookups": 0,
+    "served": 0,
+    "validated": 0,
+    "rejected": 0,
+    "stored": 0,
+}
+
+
+def get_semantic_stats() -> dict[str, Any]:
+    """How often a similar task's solution was served, and how often it held up."""
+    decided = _stats["validated"] + _stats["rejected"]
+    return {
+        **_stats,
+        "hit_rate": _stats["served"] / _stats["lookups"] if _stats["lookups"] else 0.0,
+        "validation_rate": _stats["validated"] / decided if decided else 0.0,
+        "entries": len(_cache) if _cache is not None else 0,
+    }
+
+
+def content_words(text: str) -> list[str]:
+    """Lowercased words and numbers of ``text`` without stop words ("10th" -> "10")."""
+    text = _ORDINAL_RE.sub(r"\1", text.lower())
+    return [w for w in _WORD_RE.findall(text) if w not in STOP_WORDS]
+
+
+def _numbers(text: str) -> list[str]:
+    return sorted(w for w in content_words(text) if w.isdigit())
+
+
+def embed(text: str) -> "np.ndarray":
+    """Unit-length hashed n-gram vector of ``text``."""
+    words = content_words(text)
+    features = [(f"w:{w}", WORD_WEIGHT) for w in words]
+    features += [(f"b:{a} {b}", BIGRAM_WEIGHT) for a, b in zip(words, words[1:], strict=False)]
+    for w in words:
+        padded = f"#{w}#"
+        features += [(f"c:{padded[i : i + 3]}", TRIGRAM_WEIGHT) for i in range(len(padded) - 2)]
+
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    for feature, weight in features:
+        # crc32 is stable across processes, unlike hash()
+        h = zlib.crc32(feature.encode())
+        vector[h % DIMENSIONS] += weight if h & 0x80000000 else -weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+@dataclass
+class Solution:
+    """A verified program for a task."""
+
+    task: str
+    code: str
+    dependencies: list[str] = field(default_factory=list)
+
+
+@dataclass
+class Match:
+    """A cached solution and how similar its task is to the query."""
+
+    solution: Solution
+    similarity: float
+
+
+class SemanticCache:
+    """
+    Verified solutions indexed by task embedding.
+
+    Holds at most ``max_entries`` solutions; when full, the oldest slot is
+    overwritten. Solutions are appended to a JSON-lines file and
+    re-embedded on load.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = ".agent_memory/semantic_cache.jsonl",
+        *,
+        threshold: float = 0.9,
+        max_entries: int = 5000,
+    ) -> None:
+        if np is None:
+            raise RuntimeError("The semantic cache requires numpy")
+        self.path = Path(path) if path else None
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._matrix = np.zeros((min(max_entries, 64), DIMENSIONS), dtype=np.float32)
+        self._solutions: list[Solution] = []
+        self._next = 0  # Slot the next solution goes to once full
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._solutions)
+
+    def _load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        lines = self.path.read_text().splitlines()
+        for line in lines[-self.max_entries :]:
+            try:
+                self._insert(Solution(**json.loads(line)))
+            except (TypeError, ValueError):
+                continue
+        # Keep the file from growing without bound
+        if len(lines) > 2 * self.max_entries:
+            self.path.write_text("".join(json.dumps(asdict(s)) + "\n" for s in self._solutions))
+        log.info("Semantic cache loaded", solutions=len(self))
+
+    def _insert(self, solution: Solution) -> None:
+        vector = embed(solution.task)
+        if len(self._solutions) < self.max_entries:
+            if len(self._solutions) == len(self._matrix):
+                grown = np.zeros(
+                    (min(2 * len(self._matrix), self.max_entries), DIMENSIONS), dtype=np.float32
+                )
+                grown[: len(self._matrix)] = self._matrix
+                self._matrix = grown
+            self._matrix[len(self._solutions)] = vector
+            self._solutions.append(solution)
+        else:
+            self._matrix[self._next] = vector
+            self._solutions[self._next] = solution
+            self._next = (self._next + 1) % self.max_entries
+
+    def add(self, task: str, code: str, dependencies: list[str] | None = None) -> None:
+        """Remember a verified solution."""
+        solution = Solution(task=task, code=code, dependencies=list(dependencies or []))
+        self._insert(solution)
+        _stats["stored"] += 1
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a") as f:
+                f.write(json.dumps(asdict(solution)) + "\n")
+
+    def top_k(self, task: str, k: int = 5) -> list[Match]:
+        """The ``k`` most similar cached tasks, most similar first."""
+        n = len(self._solutions)
+        if n == 0:
+            return []
+        scores = self._matrix[:n] @ embed(task)
+        k = min(k, n)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [Match(self._solutions[i], float(scores[i])) for i in best]
+
+    def lookup(self, task: str) -> Match | None:
+        """The most similar solution above the threshold with the same numbers, if any."""
+        _stats["lookups"] += 1
+        numbers = _numbers(task)
+        for match in self.top_k(task):
+            if match.similarity < self.threshold:
+                break
+            if _numbers(match.solution.task) == numbers:
+                _stats["served"] += 1
+                return match
+        return None
+
+    def learn(self, state: dict[str, Any]) -> None:
+        """
+        Update the cache from a finished job.
+
+        Records whether a served solution passed, and stores the job's
+        program if it succeeded. A served solution that passed is already
+        stored, so it is not added again.
+        """
+        served = state.get("semantic_match") is not None
+        success = bool(state.get("success"))
+        if served:
+            passed = success and state.get("attempt") == 1
+            _stats["validated" if passed else "rejected"] += 1
+            if passed:
+                return
+        if success and state.get("code"):
+            self.add(state.get("task", ""), state["code"], state.get("dependencies"))
+
+
+_cache: SemanticCache | None = None
+
+
+def get_semantic_cache(settings: Settings | None = None) -> SemanticCache | None:
+    """The process-wide semantic cache, or None when disabled or NumPy is missing."""
+    global _cache
+    settings = settings or get_settings()
+    if not settings.semantic_cache_enabled:
+        return None
+    if _cache is None:
+        if np is None:
+            log.warning("SEMANTIC_CACHE_ENABLED is set but numpy is not installed")
+            return None
+        _cache = SemanticCache(
+            settings.semantic_cache_path,
+            threshold=settings.semantic_cache_threshold,
+            max_entries=settings.semantic_cache_max_entries,
+        )
+    return _cache
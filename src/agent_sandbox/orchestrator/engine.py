@@ -0,0 +1,88 @@
+"""
+Native Workflow Engine
+======================
+
+A minimal async executor for the agent's fixed topology, as an
+alternative to LangGraph on the hot path (``ORCHESTRATOR_ENGINE=native``).
+
+The workflow is described once as a ``Topology`` (nodes, fixed edges and
+routed edges). ``graph.py`` compiles it into a LangGraph ``StateGraph``;
+``NativeEngine`` walks it directly:
+
+- one state dict, passed to every node by reference and updated in
+  place with each node's partial update (no channels, reducers or
+  per-step state copies)
+- the same node callables and routers as the LangGraph build
+- the same streaming events: ``{node_name: update_or_None}`` per step
+
+It does not checkpoint; jobs that need to be resumable run on LangGraph.
+"""
+
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+END = "__end__"  # Same sentinel value as langgraph.graph.END
+
+Node = Callable[[dict[str, Any]], Awaitable[dict[str, Any] | None]]
+Router = Callable[[dict[str, Any]], str]
+
+
+@dataclass(frozen=True)
+class Topology:
+    """
+    Nodes and edges of a workflow.
+
+    ``edges`` maps a node to the node that always follows it;
+    ``routes`` maps a node to a router and the targets of its outcomes.
+    """
+
+    entry: str
+    nodes: dict[str, Node]
+    edges: dict[str, str] = field(default_factory=dict)
+    routes: dict[str, tuple[Router, dict[str, str]]] = field(default_factory=dict)
+
+    def next_node(self, node: str, state: dict[str, Any]) -> str:
+        """The node that runs after ``node`` in ``state``."""
+        if node in self.edges:
+            return self.edges[node]
+        router, targets = self.routes[node]
+        return targets[router(state)]
+
+
+class StepLimitError(RuntimeError):
+    """A run took more steps than allowed (a routing loop that never ends)."""
+
+
+class NativeEngine:
+    """Runs a ``Topology`` directly on a shared state dict."""
+
+    def __init__(self, topology: Topology, step_limit: int = 100) -> None:
+        self.topology = topology
+        self.step_limit = step_limit
+
+    async def astream(self, state: dict[str, Any]) -> AsyncGenerator[dict[str, Any], None]:
+        """
+        Run from the entry node until END, yielding each node's update.
+
+        ``state`` is updated in place before each event is yielded, so the
+        caller sees the merged state without copying it.
+        """
+        topology = self.topology
+        node = topology.entry
+        steps = 0
+        while node != END:
+            steps += 1
+            if steps > self.step_limit:
+                raise StepLimitError(f"Run exceeded {self.step_limit} steps")
+            update = await topology.nodes[node](state)
+            if update:
+                state.update(update)
+            yield {node: update or None}
+            node = topology.next_node(node, state)
+
+    async def ainvoke(self, state: dict[str, Any]) -> dict[str, Any]:
+        """Run to completion and return the final state."""
+        async for _ in self.astream(state):
+            pass
+        return state
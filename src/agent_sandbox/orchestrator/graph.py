@@ -45,40 +45,81 @@ Visual Representation:
               ┌─────────┐
               │  RETRY  │
               └─────────┘
+
+In "fused" mode a failed execution skips CRITIQUE and goes straight to
+RETRY; the next GENERATE call returns the diagnosis and the fixed code
+together, saving one LLM round trip per retry.
+
+When a job has ``test_code``, EXECUTE runs the program and its tests in
+the same container and VERIFY (between EXECUTE and the success check)
+turns the harness output into per-test results. Without tests VERIFY is
+a no-op.
+
+With ``PLANNER_ENABLED=true`` a PLAN stage runs first: it splits large
+tasks into functions, generates and tests them in parallel, and hands
+the assembled program to EXECUTE (see ``nodes/planner.py``).
+
+With ``SPECULATIVE_REGENERATION=true`` CRITIQUE also starts a provisional
+regeneration from the raw error; if that candidate passes before the
+critique lands, the critique is cancelled and the job goes straight to
+SUCCESS (see ``nodes/speculative.py``).
+
+The topology is defined once (``build_topology``) and runs either as a
+compiled LangGraph workflow or, with ``ORCHESTRATOR_ENGINE=native``, on
+the lighter in-process engine in ``engine.py`` (no checkpointing).
 """
 
-from typing import Any
+import asyncio
+import time
+import uuid
+from collections.abc import AsyncGenerator, AsyncIterator
+from typing import Any, cast
 
 import structlog
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import END, StateGraph
-
-from agent_sandbox.config import Settings, get_settings
+from langgraph.graph.state import CompiledStateGraph
+
+from agent_sandbox.config import AgentMode, Settings, get_settings
+from agent_sandbox.memory.semantic import get_semantic_cache
+from agent_sandbox.orchestrator.checkpoint import SQLiteCheckpointer
+from agent_sandbox.orchestrator.engine import END as ENGINE_END
+from agent_sandbox.orchestrator.engine import NativeEngine, Topology
+from agent_sandbox.orchestrator.nodes.budget import remaining_seconds
 from agent_sandbox.orchestrator.nodes.critic import CriticNode
 from agent_sandbox.orchestrator.nodes.executor import ExecutorNode
 from agent_sandbox.orchestrator.nodes.generator import GeneratorNode
+from agent_sandbox.orchestrator.nodes.planner import PlannerNode
 from agent_sandbox.orchestrator.nodes.retry import RetryManagerNode
+from agent_sandbox.orchestrator.nodes.speculative import SpeculativeCritiqueNode
+from agent_sandbox.orchestrator.nodes.verifier import VerifierNode
+from agent_sandbox.orchestrator.state import GraphState, StepResult
+from agent_sandbox.providers.hedging import end_hedge_budget, start_hedge_budget
 from agent_sandbox.sandbox.manager import SandboxManager
 
 logger = structlog.get_logger()
 
+RECURSION_LIMIT = 100  # Headroom for retry loops
 
-# Type for the state dict used in the graph
-GraphState = dict[str, Any]
+# Jobs cancelled by their caller (reported by /api/v1/stats)
+_cancelled = {"jobs": 0, "attempts_reclaimed": 0}
 
 
-def create_agent_graph(
+def get_cancellation_stats() -> dict[str, int]:
+    """Jobs cancelled mid-run and the attempts they didn't go on to make."""
+    return dict(_cancelled)
+
+
+def build_topology(
     sandbox_manager: SandboxManager,
     settings: Settings | None = None,
-) -> StateGraph:
+) -> Topology:
     """
-    Create the LangGraph workflow for the agent.
+    Create the agent's nodes and wire them into a topology.
 
-    Args:
-        sandbox_manager: Initialized sandbox manager for code execution
-        settings: Optional settings override
-
-    Returns:
-        Compiled StateGraph ready for execution
+    Both engines run this same topology: ``create_agent_graph`` compiles
+    it with LangGraph, ``NativeEngine`` executes it directly.
     """
     settings = settings or get_settings()
 
@@ -86,75 +127,136 @@ def create_agent_graph(
     generator = GeneratorNode(settings)
     executor = ExecutorNode(settings=settings)
     executor.set_sandbox_manager(sandbox_manager)
+    verifier = VerifierNode()
     critic = CriticNode(settings)
-    retry_manager = RetryManagerNode(max_attempts=settings.max_reflexion_attempts)
+    retry_manager = RetryManagerNode(
+        max_attempts=settings.max_reflexion_attempts, settings=settings
+    )
 
-    # Create the graph
-    workflow = StateGraph(GraphState)
+    edges = {
+        "generate": "execute",
+        "execute": "verify",
+        "critique": "retry",
+        "finalize": ENGINE_END,
+    }
+    routes = {}
+    entry = "generate"
+    nodes = {}
+    if settings.planner_enabled:
+        # Large tasks are solved function by function, then executed as attempt 1
+        planner = PlannerNode(settings, sandbox_manager)
+        entry = "plan"
+        nodes["plan"] = planner.plan
+        routes["plan"] = (
+            planner.should_continue,
+            {"generate": "generate", "execute": "execute"},
+        )
+    critique = critic.critique
+    if settings.speculative_regeneration:
+        # A provisional candidate that passes during the critique ends the job
+        speculator = SpeculativeCritiqueNode(critic, generator, executor, verifier, settings)
+        critique = speculator.critique
+        del edges["critique"]
+        routes["critique"] = (
+            speculator.should_continue,
+            {"success": "finalize", "retry": "retry"},
+        )
 
-    # Add nodes
-    workflow.add_node("generate", generator.generate)
-    workflow.add_node("execute", executor.execute)
-    workflow.add_node("critique", critic.critique)
-    workflow.add_node("retry", retry_manager.process)
-    workflow.add_node("finalize", finalize_result)
-
-    # Set entry point
-    workflow.set_entry_point("generate")
-
-    # Add edges
-    workflow.add_edge("generate", "execute")
-
-    # Conditional edge from execute
-    workflow.add_conditional_edges(
-        "execute",
-        executor.should_continue,
-        {
-            "success": "finalize",
-            "critique": "critique",
-            "end": "finalize",
+    return Topology(
+        entry=entry,
+        nodes={
+            **nodes,
+            "generate": generator.generate,
+            "execute": executor.execute,
+            "verify": verifier.verify,
+            "critique": critique,
+            "retry": retry_manager.process,
+            "finalize": finalize_result,
+        },
+        edges=edges,
+        routes={
+            **routes,
+            # After execution (and test verification, if any)
+            "verify": (
+                executor.should_continue,
+                {
+                    "success": "finalize",
+                    "critique": "critique",
+                    "retry": "retry",
+                    "end": "finalize",
+                },
+            ),
+            "retry": (
+                retry_manager.should_continue,
+                {
+                    "generate": "generate",
+                    "end": "finalize",
+                },
+            ),
         },
     )
 
-    workflow.add_edge("critique", "retry")
 
-    # Conditional edge from retry
-    workflow.add_conditional_edges(
-        "retry",
-        retry_manager.should_continue,
-        {
-            "generate": "generate",
-            "end": "finalize",
-        },
-    )
+def compile_topology(
+    topology: Topology,
+    checkpointer: BaseCheckpointSaver | None = None,
+) -> CompiledStateGraph:
+    """Compile a topology into a LangGraph workflow."""
 
-    workflow.add_edge("finalize", END)
+    def target(node: str) -> str:
+        return END if node == ENGINE_END else node
 
-    logger.info("Agent graph created")
+    workflow = StateGraph(GraphState)
+    for name, node in topology.nodes.items():
+        # LangGraph's stubs want nodes typed on a TypedDict; ours take the plain dict it passes
+        workflow.add_node(name, cast(Any, node))
+    workflow.set_entry_point(topology.entry)
+    for source, dest in topology.edges.items():
+        workflow.add_edge(source, target(dest))
+    for source, (router, targets) in topology.routes.items():
+        workflow.add_conditional_edges(
+            source, router, {outcome: target(dest) for outcome, dest in targets.items()}
+        )
+    return workflow.compile(checkpointer=checkpointer)
 
-    return workflow.compile(
-        checkpointer=None,  # No checkpointing needed
-    )
 
+def create_agent_graph(
+    sandbox_manager: SandboxManager,
+    settings: Settings | None = None,
+    checkpointer: BaseCheckpointSaver | None = None,
+) -> CompiledStateGraph:
+    """
+    Create the LangGraph workflow for the agent.
+
+    Args:
+        sandbox_manager: Initialized sandbox manager for code execution
+        settings: Optional settings override
+        checkpointer: Optional checkpoint saver that makes runs resumable
 
-async def finalize_result(state: GraphState) -> GraphState:
+    Returns:
+        Compiled StateGraph ready for execution
+    """
+    graph = compile_topology(build_topology(sandbox_manager, settings), checkpointer)
+    logger.info("Agent graph created")
+    return graph
+
+
+async def finalize_result(state: dict[str, Any]) -> dict[str, Any]:
     """
     Finalize the workflow result.
 
     Prepares the final output to return to the user.
     """
-    execution_result = state.get("execution_result", {})
-    exit_code = execution_result.get("exit_code", 1)
-    stdout = execution_result.get("stdout", "")
-    stderr = execution_result.get("stderr", "")
+    result = StepResult.coerce(state.get("execution_result")) or StepResult()
 
-    success = exit_code == 0 and not execution_result.get("timed_out", False)
+    success = result.exit_code == 0 and not result.timed_out
 
     if success:
-        final_output = stdout
+        final_output = result.stdout
     else:
         final_output = (
-            f"Execution failed after {state.get('attempt', 1)} attempts.\n\nLast error:\n{stderr}"
+            f"Execution failed after {state.get('attempt', 1)} attempts.\n\n"
+            f"Last error:\n{result.stderr}"
         )
 
     logger.info(
@@ -170,6 +272,20 @@ async def finalize_result(state: GraphState) -> GraphState:
     }
 
 
+def deadline_result(state: dict[str, Any]) -> GraphState:
+    """Partial result for a job cancelled by its deadline."""
+    result = StepResult.coerce(state.get("execution_result"))
+    final_output = f"Deadline exceeded after {state.get('attempt', 0)} attempts."
+    if result is not None and result.stderr:
+        final_output += f"\n\nLast error:\n{result.stderr}"
+    return {
+        "completed": True,
+        "success": False,
+        "deadline_exceeded": True,
+        "final_output": final_output,
+    }
+
+
 class AgentGraph:
     """
     High-level wrapper for the agent workflow.
@@ -181,85 +297,317 @@ class AgentGraph:
         self,
         sandbox_manager: SandboxManager,
         settings: Settings | None = None,
+        checkpointer: SQLiteCheckpointer | None = None,
     ) -> None:
         self.settings = settings or get_settings()
         self.sandbox_manager = sandbox_manager
-        self.graph = create_agent_graph(sandbox_manager, settings)
-
-    async def run(
+        self.semantic_cache = get_semantic_cache(self.settings)
+        if checkpointer is None and self.settings.checkpoint_enabled:
+            checkpointer = SQLiteCheckpointer(
+                self.settings.checkpoint_path,
+                keep_last=self.settings.checkpoint_keep_last,
+                retention_seconds=self.settings.checkpoint_retention_hours * 3600,
+            )
+        self.checkpointer = checkpointer
+
+        self._topology = build_topology(sandbox_manager, self.settings)
+        self.engine: NativeEngine | None = None
+        if self.settings.orchestrator_engine == "native":
+            if checkpointer is None:
+                self.engine = NativeEngine(self._topology, step_limit=RECURSION_LIMIT)
+            else:
+                logger.warning("Native engine can't checkpoint, running jobs on LangGraph")
+        self._graph: CompiledStateGraph | None = None
+        if self.engine is None:
+            self._graph = compile_topology(self._topology, checkpointer)
+        logger.info("Agent graph created", engine="native" if self.engine else "langgraph")
+
+    @property
+    def graph(self) -> CompiledStateGraph:
+        """The compiled LangGraph workflow; with the native engine, compiled on first use."""
+        if self._graph is None:
+            self._graph = compile_topology(self._topology, self.checkpointer)
+        return self._graph
+
+    def _config(self, thread_id: str | None) -> RunnableConfig:
+        """Build the run config; every job gets its own checkpoint thread."""
+        config: RunnableConfig = {"recursion_limit": RECURSION_LIMIT}
+        if self.checkpointer is not None:
+            config["configurable"] = {"thread_id": thread_id or str(uuid.uuid4())}
+        return config
+
+    async def _compact(self, config: RunnableConfig) -> None:
+        """Drop intermediate checkpoints once a job has finished."""
+        if self.checkpointer is not None:
+            await self.checkpointer.acompact(config["configurable"]["thread_id"])
+
+    def _initial_state(
         self,
         task: str,
-        max_attempts: int | None = None,
-    ) -> dict[str, Any]:
-        """
-        Run the agent on a task.
-
-        Args:
-            task: The task description
-            max_attempts: Optional override for max retry attempts
-
-        Returns:
-            Final state with results
-        """
-        initial_state: GraphState = {
+        max_attempts: int | None,
+        mode: AgentMode | None = None,
+        deadline_seconds: float | None = None,
+        token_budget: int | None = None,
+        sandbox_timeout: float | None = None,
+        test_code: str | None = None,
+    ) -> GraphState:
+        """Build the state a new job starts from."""
+        started_at = time.time()
+        deadline_seconds = deadline_seconds or self.settings.job_deadline_seconds
+        return {
             "task": task,
+            "mode": mode or self.settings.agent_mode,
+            "started_at": started_at,
             "code": "",
             "dependencies": [],
             "reasoning": "",
             "confidence": 0.0,
             "execution_result": None,
+            "execution_reused": False,
+            "run_hash": "",
+            "test_code": test_code,
+            "test_results": [],
+            "failing_tests": [],
             "critique": None,
+            "critique_source": None,
+            "plan": None,
+            "semantic_match": None,
             "should_retry": False,
             "attempt": 0,
             "max_attempts": max_attempts or self.settings.max_reflexion_attempts,
             "history": [],
+            "deadline": started_at + deadline_seconds if deadline_seconds else None,
+            "token_budget": token_budget or self.settings.job_token_budget,
+            "tokens_used": 0,
+            "llm_calls": [],
+            "sandbox_timeout": sandbox_timeout,
+            "deadline_exceeded": False,
+            "budget_exhausted": False,
+            "escalation_level": 0,
+            "stagnation_reason": None,
+            "attempts_saved": 0,
+            "time_saved_ms": 0.0,
             "completed": False,
             "success": False,
             "final_output": None,
         }
 
-        logger.info("Starting agent workflow", task=task[:100])
+    async def _stream(
+        self,
+        graph_input: GraphState | None,
+        config: RunnableConfig,
+        state: dict[str, Any],
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Stream node updates, merging them into ``state``.
+
+        Enforces the job deadline: when it passes, the in-flight node is
+        cancelled (aborting its provider call or removing its container)
+        and a final ``finalize`` event carries the partial result.
+        Cancelling the caller's task stops the in-flight node the same way.
+
+        New jobs run on the native engine when it is enabled; it updates
+        ``state`` in place. Resumed jobs always run on LangGraph.
+
+        The job's provider calls share one hedge budget.
+        """
+        hedge_budget = start_hedge_budget(self.settings.llm_hedge_budget_tokens)
+        stream: AsyncGenerator[dict[str, Any], None]
+        if self.engine is not None and graph_input is not None:
+            stream = self.engine.astream(state)
+        else:
+            # An async generator, though LangGraph annotates it as an iterator
+            stream = cast(
+                AsyncGenerator[dict[str, Any], None],
+                self.graph.astream(graph_input, config=config),
+            )
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(anext(stream), remaining_seconds(state))
+                except StopAsyncIteration:
+                    break
+                for update in event.values():
+                    if update:
+                        state.update(update)
+                yield event
+        except TimeoutError:
+            logger.warning("Job deadline exceeded, cancelled", attempts=state.get("attempt", 0))
+            partial = deadline_result(state)
+            state.update(partial)
+            yield {"finalize": partial}
+        except asyncio.CancelledError:
+            # The caller went away; closing the stream cancels the in-flight node
+            attempt = state.get("attempt", 0)
+            _cancelled["jobs"] += 1
+            _cancelled["attempts_reclaimed"] += max(state.get("max_attempts", 0) - attempt, 0)
+            logger.info("Job cancelled", attempts=attempt)
+            raise
+        finally:
+            await stream.aclose()
+            end_hedge_budget(hedge_budget)
+        await self._compact(config)
+        if self.semantic_cache is not None and state.get("completed"):
+            self.semantic_cache.learn(state)
+
+    async def run(
+        self,
+        task: str,
+        max_attempts: int | None = None,
+        mode: AgentMode | None = None,
+        thread_id: str | None = None,
+        *,
+        deadline_seconds: float | None = None,
+        token_budget: int | None = None,
+        sandbox_timeout: float | None = None,
+        test_code: str | None = None,
+    ) -> dict[str, Any]:
+        """
+        Run the agent on a task.
+
+        Args:
+            task: The task description
+            max_attempts: Optional override for max retry attempts
+            mode: Optional retry topology override ("reflexion" or "fused")
+            thread_id: Checkpoint thread to record progress under (used by resume)
+            deadline_seconds: Wall-clock limit for the whole job
+            token_budget: Total LLM tokens the job may spend
+            sandbox_timeout: Per-execution sandbox timeout override
+            test_code: Optional ``test_*`` functions the code must pass
+
+        Returns:
+            Final state with results (partial if the deadline passed)
+        """
+        initial = self._initial_state(
+            task,
+            max_attempts,
+            mode,
+            deadline_seconds,
+            token_budget,
+            sandbox_timeout,
+            test_code,
+        )
+        state: dict[str, Any] = dict(initial)
+        config = self._config(thread_id)
+
+        logger.info("Starting agent workflow", task=task[:100], mode=state["mode"])
 
         # Run the graph
-        final_state = await self.graph.ainvoke(initial_state)
+        async for _ in self._stream(initial, config, state):
+            pass
 
         logger.info(
             "Agent workflow completed",
-            success=final_state.get("success"),
-            attempts=final_state.get("attempt"),
+            success=state.get("success"),
+            attempts=state.get("attempt"),
         )
 
-        return final_state
+        return state
 
     async def run_streaming(
         self,
         task: str,
         max_attempts: int | None = None,
+        mode: AgentMode | None = None,
+        thread_id: str | None = None,
+        *,
+        deadline_seconds: float | None = None,
+        token_budget: int | None = None,
+        sandbox_timeout: float | None = None,
+        test_code: str | None = None,
     ):
         """
         Run the agent with streaming updates.
 
         Yields state updates as the workflow progresses.
         """
-        initial_state: GraphState = {
-            "task": task,
-            "code": "",
-            "dependencies": [],
-            "reasoning": "",
-            "confidence": 0.0,
-            "execution_result": None,
-            "critique": None,
-            "should_retry": False,
-            "attempt": 0,
-            "max_attempts": max_attempts or self.settings.max_reflexion_attempts,
-            "history": [],
-            "completed": False,
-            "success": False,
-            "final_output": None,
-        }
+        initial = self._initial_state(
+            task,
+            max_attempts,
+            mode,
+            deadline_seconds,
+            token_budget,
+            sandbox_timeout,
+            test_code,
+        )
+        state: dict[str, Any] = dict(initial)
+        config = self._config(thread_id)
 
         logger.info("Starting streaming agent workflow", task=task[:100])
 
-        # Stream updates with increased recursion limit for retry loops
-        async for event in self.graph.astream(initial_state, config={"recursion_limit": 100}):
+        async for event in self._stream(initial, config, state):
+            yield event
+
+    async def _resume_state(
+        self,
+        thread_id: str,
+        deadline_seconds: float | None,
+    ) -> tuple[dict[str, Any], RunnableConfig | None]:
+        """Stored state of a thread and the config to resume it (None if finished)."""
+        if self.checkpointer is None:
+            raise RuntimeError(
+                "Checkpointing is disabled; set CHECKPOINT_ENABLED=true to resume jobs"
+            )
+
+        config = self._config(thread_id)
+        snapshot = await self.graph.aget_state(config)
+        if not snapshot.values:
+            raise KeyError(f"No checkpoint found for job {thread_id}")
+        state = dict(snapshot.values)
+        if not snapshot.next:
+            return state, None
+
+        # The original deadline was relative to the first run
+        deadline = time.time() + deadline_seconds if deadline_seconds else None
+        if state.get("deadline") != deadline:
+            await self.graph.aupdate_state(config, {"deadline": deadline})
+            state["deadline"] = deadline
+        return state, config
+
+    async def resume(
+        self,
+        thread_id: str,
+        deadline_seconds: float | None = None,
+    ) -> dict[str, Any]:
+        """
+        Resume an interrupted job from its last checkpoint.
+
+        Nodes that finished before the interruption are not re-run, so
+        completed LLM calls are not paid for again.
+
+        Args:
+            thread_id: The thread id the job was started with
+            deadline_seconds: Optional new wall-clock limit for the rest of the job
+
+        Returns:
+            Final state with results
+
+        Raises:
+            RuntimeError: If checkpointing is disabled
+            KeyError: If the thread has no checkpoint
+        """
+        state, config = await self._resume_state(thread_id, deadline_seconds)
+        if config is None:
+            logger.info("Job already finished, returning stored state", thread_id=thread_id)
+            return state
+
+        logger.info("Resuming agent workflow", thread_id=thread_id)
+        async for _ in self._stream(None, config, state):
+            pass
+        return state
+
+    async def resume_streaming(
+        self, thread_id: str, deadline_seconds: float | None = None
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Resume an interrupted job with streaming updates.
+
+        Yields nothing if the job already finished.
+        """
+        state, config = await self._resume_state(thread_id, deadline_seconds)
+        if config is None:
+            return
+
+        logger.info("Resuming streaming agent workflow", thread_id=thread_id)
+        async for event in self._stream(None, config, state):
             yield event
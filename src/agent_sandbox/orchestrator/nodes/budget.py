@@ -0,0 +1,91 @@
+"""
+Job Budgets
+===========
+
+Per-job deadline and token budget, carried in graph state:
+
+- ``deadline``: absolute ``time.time()`` by which the job must finish
+- ``token_budget`` / ``tokens_used``: total LLM tokens the job may spend
+
+Nodes size their LLM ``max_tokens`` and sandbox timeout from what is
+left, so the last attempt doesn't start a call that cannot finish in
+time. The graph runner enforces the deadline itself by cancelling the run.
+"""
+
+import time
+from typing import Any
+
+from agent_sandbox.providers.base import LLMResponse
+
+# Below these, a call can't produce anything useful
+MIN_COMPLETION_TOKENS = 256
+MIN_SANDBOX_TIMEOUT = 0.1  # ExecutionRequest.timeout_seconds lower bound
+
+
+def remaining_seconds(state: dict[str, Any]) -> float | None:
+    """Seconds until the job deadline, or None without a deadline."""
+    deadline: float | None = state.get("deadline")
+    if deadline is None:
+        return None
+    return deadline - time.time()
+
+
+def remaining_tokens(state: dict[str, Any]) -> int | None:
+    """Tokens left in the job budget, or None without a budget."""
+    budget: int | None = state.get("token_budget")
+    if budget is None:
+        return None
+    used: int = state.get("tokens_used", 0)
+    return budget - used
+
+
+def sized_max_tokens(state: dict[str, Any], default: int) -> int:
+    """Completion limit for the next LLM call."""
+    left = remaining_tokens(state)
+    if left is None:
+        return default
+    return max(min(default, left), MIN_COMPLETION_TOKENS)
+
+
+def sized_timeout(state: dict[str, Any], default: float) -> float:
+    """Sandbox timeout for the next execution."""
+    left = remaining_seconds(state)
+    if left is None:
+        return default
+    return max(min(default, left), MIN_SANDBOX_TIMEOUT)
+
+
+def token_budget_exhausted(state: dict[str, Any]) -> bool:
+    """Whether another attempt can't fit in the token budget."""
+    left = remaining_tokens(state)
+    return left is not None and left < MIN_COMPLETION_TOKENS
+
+
+def add_usage(state: dict[str, Any], response: LLMResponse) -> int:
+    """``tokens_used`` after counting ``response`` (cached and coalesced responses are free)."""
+    used: int = state.get("tokens_used", 0)
+    if response.cached or response.coalesced:
+        return used
+    return used + response.total_tokens
+
+
+def record_call(state: dict[str, Any], node: str, response: LLMResponse, **extra: Any) -> list:
+    """``llm_calls`` after logging ``response``'s usage and latency."""
+    call = {
+        "node": node,
+        "attempt": state.get("attempt", 0),
+        "prompt_tokens": response.prompt_tokens,
+        "completion_tokens": response.completion_tokens,
+        "latency_ms": round(response.latency_ms, 1),
+        **({"cached": True} if response.cached else {}),
+        **({"coalesced": True} if response.coalesced else {}),
+        **(
+            {"throttle_wait_ms": round(response.throttle_wait_ms, 1)}
+            if response.throttle_wait_ms
+            else {}
+        ),
+        **({"retries": response.retries} if response.retries else {}),
+        **({"hedged": True} if response.hedged else {}),
+        **extra,
+    }
+    return [*state.get("llm_calls", []), call]
@@ -1,16 +1,51 @@
 """Critic node - analyzes failures and suggests fixes."""
 
 import json
+import time
 from typing import Any
 
 import structlog
 
 from agent_sandbox.config import Settings, get_settings
-from agent_sandbox.providers.base import LLMProvider
-from agent_sandbox.providers.factory import create_provider
+from agent_sandbox.contracts.agent_output import CritiqueOutput
+from agent_sandbox.contracts.repair import validate_json
+from agent_sandbox.contracts.validation import record_validation
+from agent_sandbox.orchestrator.nodes.budget import add_usage, record_call, sized_max_tokens
+from agent_sandbox.orchestrator.nodes.rules import classify_failure
+from agent_sandbox.orchestrator.state import StepResult
+from agent_sandbox.providers.base import LLMProvider, LLMResponse
+from agent_sandbox.providers.context import Section, error_lines, fit_sections, section_budget
+from agent_sandbox.providers.registry import get_provider
+from agent_sandbox.providers.schema import output_schema
 
 log = structlog.get_logger()
 
+# Process-wide critique counters (reported by /api/v1/stats)
+_stats = {
+    "local": 0,
+    "llm": 0,
+    "local_time_ms": 0.0,
+    "llm_time_ms": 0.0,
+}
+
+
+def get_critique_stats() -> dict[str, Any]:
+    """Fraction of critiques served by the rule-based fast path and latency saved."""
+    total = _stats["local"] + _stats["llm"]
+    avg_llm_ms = _stats["llm_time_ms"] / _stats["llm"] if _stats["llm"] else 0.0
+    avg_local_ms = _stats["local_time_ms"] / _stats["local"] if _stats["local"] else 0.0
+    return {
+        "total": total,
+        "local": _stats["local"],
+        "llm": _stats["llm"],
+        "local_fraction": _stats["local"] / total if total else 0.0,
+        "avg_llm_latency_ms": avg_llm_ms,
+        "avg_local_latency_ms": avg_local_ms,
+        # Estimated from the observed LLM critique latency
+        "latency_saved_ms": max(avg_llm_ms - avg_local_ms, 0.0) * _stats["local"],
+    }
+
+
 SYSTEM_PROMPT = """You analyze why Python code failed and suggest fixes.
 
 Check for:
@@ -39,7 +74,7 @@ class CriticNode:
     @property
     def provider(self) -> LLMProvider:
         if self._provider is None:
-            self._provider = create_provider(
+            self._provider = get_provider(
                 provider_type=self.settings.llm_provider,
                 api_key=self.settings.get_provider_api_key(),
                 model=self.settings.get_provider_model(),
@@ -51,53 +86,106 @@ class CriticNode:
         """Review failed code. Called by LangGraph."""
         task = state.get("task", "")
         code = state.get("code", "")
-        result = state.get("execution_result", {})
+        result = StepResult.coerce(state.get("execution_result")) or StepResult()
         attempt = state.get("attempt", 1)
 
-        stderr = result.get("stderr", "")
-        exit_code = result.get("exit_code", 1)
-        timed_out = result.get("timed_out", False)
+        stderr = result.stderr
+        exit_code = result.exit_code
 
         error = stderr
-        if timed_out:
+        if result.timed_out:
             error = f"Timed out. {stderr}"
 
         log.info("Critiquing", attempt=attempt, exit_code=exit_code)
 
-        prompt = f"""TASK: {task}
+        if self.settings.critic_fast_path:
+            t0 = time.perf_counter()
+            local = classify_failure(result, code)
+            if local is not None:
+                _stats["local"] += 1
+                _stats["local_time_ms"] += (time.perf_counter() - t0) * 1000
+                log.info("Critique served locally", category=local.error_category)
+                return {
+                    "critique": self._format(local),
+                    "should_retry": local.should_retry,
+                    "critique_source": "rules",
+                }
+
+        # The traceback matters most, then the code around the failing lines
+        fitted = fit_sections(
+            [
+                Section("error", error, priority=3, kind="error"),
+                Section("task", task, priority=2),
+                Section("code", code, priority=1, kind="code", focus=tuple(error_lines(error))),
+                Section("tests", state.get("test_code") or "", priority=0),
+            ],
+            section_budget(self.settings, SYSTEM_PROMPT),
+        )
+
+        prompt = f"""TASK: {fitted["task"]}
 
 CODE:
 ```python
-{code}
+{fitted["code"]}
 ```
 
 ERROR (exit {exit_code}):
-{error[:2000]}
+{fitted["error"]}
 
 Attempt {attempt} of {state.get("max_attempts", 3)}. Analyze and suggest fix."""
+        if state.get("test_code"):
+            prompt += f"\n\nTESTS:\n```python\n{fitted['tests']}\n```"
 
         try:
             resp = await self.provider.generate_json(
                 system_prompt=SYSTEM_PROMPT,
                 user_prompt=prompt,
                 temperature=0.3,
-                max_tokens=1024,
+                max_tokens=sized_max_tokens(state, 1024),
+                schema=output_schema(CritiqueOutput),
             )
 
-            data = self._parse(resp.content)
+            _stats["llm"] += 1
+            _stats["llm_time_ms"] += resp.latency_ms
+
+            data = self._parse(resp)
 
             critique = f"## Diagnosis\n{data.get('diagnosis', 'Unknown')}\n\n## Fix\n{data.get('fix_suggestion', 'Review error')}"
             should_retry = data.get("should_retry", True)
 
             log.info("Critique done", should_retry=should_retry)
 
-            return {"critique": critique, "should_retry": should_retry}
+            return {
+                "critique": critique,
+                "should_retry": should_retry,
+                "critique_source": "llm",
+                "tokens_used": add_usage(state, resp),
+                "llm_calls": record_call(state, "critic", resp),
+            }
         except Exception as e:
             log.error("Critique failed", error=str(e))
-            return {"critique": f"Review failed: {e}", "should_retry": True}
+            return {
+                "critique": f"Review failed: {e}",
+                "should_retry": True,
+                "critique_source": "llm",
+            }
+
+    def _format(self, output: CritiqueOutput) -> str:
+        return f"## Diagnosis\n{output.diagnosis}\n\n## Fix\n{output.fix_suggestion}"
 
-    def _parse(self, content: str) -> dict:
+    def _parse(self, resp: LLMResponse) -> dict:
         try:
-            return json.loads(content)
+            output, repaired = validate_json(resp.content, CritiqueOutput)
         except json.JSONDecodeError:
-            return {"diagnosis": content, "fix_suggestion": "Check syntax", "should_retry": True}
+            record_validation(resp, valid=False)
+            return {
+                "diagnosis": resp.content,
+                "fix_suggestion": "Check syntax",
+                "should_retry": True,
+            }
+        except ValueError:
+            # Valid JSON, wrong shape: usable anyway, missing fields have defaults
+            record_validation(resp, valid=False)
+            return json.loads(resp.content)
+        record_validation(resp, valid=not repaired, repaired=repaired)
+        return output.model_dump()
@@ -10,8 +10,12 @@ from typing import Any
 import structlog
 
 from agent_sandbox.config import Settings, get_settings
+from agent_sandbox.orchestrator.nodes.budget import sized_timeout
+from agent_sandbox.orchestrator.nodes.stagnation import run_fingerprint
+from agent_sandbox.orchestrator.state import AttemptRecord, StepResult
+from agent_sandbox.sandbox.harness import build_harness
 from agent_sandbox.sandbox.manager import SandboxManager
-from agent_sandbox.sandbox.models import ExecutionRequest, ExecutionResult, ExecutionStatus
+from agent_sandbox.sandbox.models import ExecutionRequest
 
 logger = structlog.get_logger()
 
@@ -60,13 +64,26 @@ class ExecutorNode:
         if not code:
             logger.warning("No code to execute")
             return {
-                "execution_result": ExecutionResult(
-                    status=ExecutionStatus.ERROR,
-                    stderr="No code provided",
-                    exit_code=1,
-                ).model_dump(),
+                "execution_result": StepResult(stderr="No code provided"),
+                "execution_reused": False,
             }
 
+        timeout = state.get("sandbox_timeout") or self.settings.sandbox_timeout_seconds
+        run_hash = run_fingerprint(
+            code, dependencies, timeout, state.get("test_code"), state.get("failing_tests", [])
+        )
+        if self.settings.stagnation_detection:
+            cached = self._previous_result(state, run_hash)
+            if cached is not None:
+                # Execution is deterministic for our purposes; don't pay for it twice
+                logger.info("Identical run already executed, reusing result", attempt=attempt)
+                return {
+                    "execution_result": cached,
+                    "execution_reused": True,
+                    "run_hash": run_hash,
+                    "time_saved_ms": state.get("time_saved_ms", 0.0) + cached.execution_time_ms,
+                }
+
         logger.info(
             "Executing code in sandbox",
             attempt=attempt,
@@ -77,9 +94,9 @@ class ExecutorNode:
         try:
             # Create execution request
             request = ExecutionRequest(
-                code=code,
+                code=self._program(state, code),
                 dependencies=dependencies,
-                timeout_seconds=self.settings.sandbox_timeout_seconds,
+                timeout_seconds=sized_timeout(state, timeout),
                 memory_limit_mb=self.settings.sandbox_memory_limit_mb,
                 network_enabled=self.settings.sandbox_network_enabled,
             )
@@ -96,19 +113,40 @@ class ExecutorNode:
             )
 
             return {
-                "execution_result": result.model_dump(),
+                "execution_result": StepResult.from_execution(result),
+                "execution_reused": False,
+                "run_hash": run_hash,
             }
 
         except Exception as e:
             logger.error("Execution failed", error=str(e))
             return {
-                "execution_result": ExecutionResult(
-                    status=ExecutionStatus.ERROR,
-                    stderr=f"Execution error: {str(e)}",
-                    exit_code=1,
-                ).model_dump(),
+                "execution_result": StepResult(stderr=f"Execution error: {str(e)}"),
+                "execution_reused": False,
+                "run_hash": run_hash,
             }
 
+    def _program(self, state: dict[str, Any], code: str) -> str:
+        """The code to run: wrapped in the test harness when tests were supplied."""
+        test_code = state.get("test_code")
+        if not test_code:
+            return code
+        failing = state.get("failing_tests", [])
+        # Re-run what failed last time first and stop at the first repeat failure
+        return build_harness(code, test_code, priority=failing, fail_fast=bool(failing))
+
+    def _previous_result(self, state: dict[str, Any], run_hash: str) -> StepResult | None:
+        """
+        Result of an earlier attempt that ran equivalent code the same way, if any.
+
+        New dependencies, a new timeout or a new test harness make it a new run.
+        """
+        for entry in reversed(state.get("history", [])):
+            entry = AttemptRecord.coerce(entry)
+            if entry.result is not None and entry.run_hash == run_hash:
+                return entry.result
+        return None
+
     def should_continue(self, state: dict[str, Any]) -> str:
         """
         Determine the next node based on execution result.
@@ -116,18 +154,16 @@ class ExecutorNode:
         Returns:
             "success" if code ran successfully
             "critique" if code failed and needs review
+            "retry" if code failed in fused mode (no separate critic call),
+                or the result was reused (the code was already critiqued)
             "end" if max attempts reached
         """
-        result_dict = state.get("execution_result", {})
+        result = StepResult.coerce(state.get("execution_result")) or StepResult()
         attempt = state.get("attempt", 1)
         max_attempts = state.get("max_attempts", 3)
 
         # Check for success
-        exit_code = result_dict.get("exit_code", 1)
-        stderr = result_dict.get("stderr", "")
-        timed_out = result_dict.get("timed_out", False)
-
-        if exit_code == 0 and not stderr and not timed_out:
+        if result.passed:
             logger.info("Execution successful, ending workflow")
             return "success"
 
@@ -140,9 +176,19 @@ class ExecutorNode:
             )
             return "end"
 
+        if state.get("mode") == "fused":
+            logger.info(
+                "Execution failed, fused retry", attempt=attempt, exit_code=result.exit_code
+            )
+            return "retry"
+
+        if state.get("execution_reused", False):
+            logger.info("Repeated code, skipping critic", attempt=attempt)
+            return "retry"
+
         logger.info(
             "Execution failed, routing to critic",
             attempt=attempt,
-            exit_code=exit_code,
+            exit_code=result.exit_code,
         )
         return "critique"
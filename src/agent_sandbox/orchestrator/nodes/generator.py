@@ -1,17 +1,72 @@
 """Generator node - creates code from task descriptions."""
 
+import ast
 import json
+import time
+from contextlib import aclosing
+from dataclasses import replace
 from typing import Any
 
 import structlog
 
 from agent_sandbox.config import Settings, get_settings
-from agent_sandbox.contracts.agent_output import AgentOutput
-from agent_sandbox.providers.base import LLMProvider
-from agent_sandbox.providers.factory import create_provider
+from agent_sandbox.contracts.agent_output import AgentOutput, PatchOutput
+from agent_sandbox.contracts.repair import validate_json
+from agent_sandbox.contracts.validation import record_validation
+from agent_sandbox.memory.semantic import get_semantic_cache
+from agent_sandbox.orchestrator.nodes.budget import add_usage, record_call, sized_max_tokens
+from agent_sandbox.orchestrator.nodes.patch import PatchError, apply_patch, number_lines
+from agent_sandbox.orchestrator.nodes.rules import classify_failure
+from agent_sandbox.orchestrator.nodes.stagnation import (
+    HIGH_TEMPERATURE,
+    RETHINK,
+    STRONGER_MODEL,
+)
+from agent_sandbox.orchestrator.state import AttemptRecord, StepResult
+from agent_sandbox.providers.base import LLMProvider, LLMResponse
+from agent_sandbox.providers.context import (
+    Section,
+    estimate_tokens,
+    fit_sections,
+    section_budget,
+)
+from agent_sandbox.providers.jsonstream import JsonStreamParser, MalformedJSON
+from agent_sandbox.providers.registry import get_provider
+from agent_sandbox.providers.schema import output_schema
 
 log = structlog.get_logger()
 
+# Process-wide streaming generation counters (reported by /api/v1/stats)
+_stats = {
+    "streams": 0,
+    "code_ready": 0,  # Streams whose code field closed
+    "completed": 0,  # Streams read to the end of the JSON object
+    "time_to_code_ms": 0.0,
+    "time_to_full_ms": 0.0,
+    "code_lead_ms": 0.0,  # Time to full minus time to code, over completed streams
+    "early_stops": 0,  # Stopped once the fields the run needs were in
+    "preflight_aborts": 0,  # Stopped early: the code does not parse
+    "malformed_aborts": 0,  # Stopped early: the output can't become JSON
+    "fallbacks": 0,  # Regenerated with generate_json after a failed stream
+}
+
+
+def get_streaming_stats() -> dict[str, Any]:
+    """Time to the code field versus time to the full response, and early aborts."""
+    ready, completed = _stats["code_ready"], _stats["completed"]
+    return {
+        "streams": _stats["streams"],
+        "completed": completed,
+        "avg_time_to_code_ms": _stats["time_to_code_ms"] / ready if ready else 0.0,
+        "avg_time_to_full_ms": _stats["time_to_full_ms"] / completed if completed else 0.0,
+        "avg_code_lead_ms": _stats["code_lead_ms"] / completed if completed else 0.0,
+        "early_stops": _stats["early_stops"],
+        "preflight_aborts": _stats["preflight_aborts"],
+        "malformed_aborts": _stats["malformed_aborts"],
+        "fallbacks": _stats["fallbacks"],
+    }
+
+
 SYSTEM_PROMPT = """You are an expert Python programmer. Write clean, working code.
 
 RULES:
@@ -41,6 +96,63 @@ ERROR:
 
 Return fixed code in JSON format with code, dependencies, reasoning, confidence fields."""
 
+FUSED_RETRY_PROMPT = """This code failed. Diagnose the failure and fix it in one step.
+
+PREVIOUS CODE:
+```python
+{previous_code}
+```
+
+ERROR:
+{error_context}
+
+Return JSON with these fields:
+- diagnosis: what went wrong, in one or two sentences
+- code: the complete fixed program
+- dependencies, reasoning, confidence"""
+
+PATCH_SYSTEM_PROMPT = """You are an expert Python programmer. Fix broken code with minimal edits.
+
+RULES:
+1. Change only the lines that need fixing
+2. The edited program must be complete and runnable
+3. NO os.system, subprocess, or eval
+
+OUTPUT FORMAT (JSON), either line edits:
+{
+    "edits": [{"start": 3, "end": 4, "replacement": "new lines"}],
+    "dependencies": [],
+    "reasoning": "your fix",
+    "confidence": 0.85
+}
+or a unified diff against the previous code in a "patch" field instead of "edits"."""
+
+PATCH_RETRY_PROMPT = """Fix this broken code by editing it.
+
+PREVIOUS CODE (the "N | " prefixes are line numbers, not code):
+```
+{numbered_code}
+```
+
+ERROR:
+{error_context}
+
+Each edit replaces lines start..end (1-based, inclusive) with its replacement;
+use end = start - 1 to insert before line start. Return JSON with edits (or patch),
+dependencies, reasoning, confidence fields."""
+
+TESTS_PROMPT = """
+
+Your code will be checked by these tests (run in the same namespace after your program):
+```python
+{test_code}
+```"""
+
+RETHINK_PROMPT = """
+
+Previous fixes keep producing the same failure. Do not patch the old code again:
+rethink the approach from scratch and write a different solution."""
+
 
 class GeneratorNode:
     """Generates Python code using LLM."""
@@ -48,11 +160,12 @@ class GeneratorNode:
     def __init__(self, settings: Settings | None = None) -> None:
         self.settings = settings or get_settings()
         self._provider: LLMProvider | None = None
+        self.semantic_cache = get_semantic_cache(self.settings)
 
     @property
     def provider(self) -> LLMProvider:
         if self._provider is None:
-            self._provider = create_provider(
+            self._provider = get_provider(
                 provider_type=self.settings.llm_provider,
                 api_key=self.settings.get_provider_api_key(),
                 model=self.settings.get_provider_model(),
@@ -60,6 +173,17 @@ class GeneratorNode:
             )
         return self._provider
 
+    def _escalated_provider(self) -> LLMProvider:
+        """Provider for the last escalation level (falls back to the default model)."""
+        if not self.settings.escalation_model:
+            return self.provider
+        return get_provider(
+            provider_type=self.settings.llm_provider,
+            api_key=self.settings.get_provider_api_key(),
+            model=self.settings.escalation_model,
+            base_url=self.settings.get_provider_base_url(),
+        )
+
     async def generate(self, state: dict[str, Any]) -> dict[str, Any]:
         """Generate code for task. Called by LangGraph."""
         task = state.get("task", "")
@@ -67,52 +191,367 @@ class GeneratorNode:
 
         log.info("Generating", task=task[:50], attempt=attempt)
 
+        if attempt == 1 and self.semantic_cache is not None:
+            match = self.semantic_cache.lookup(task)
+            if match is not None:
+                # Served without an LLM call; execution re-validates it
+                log.info(
+                    "Serving a similar task's solution",
+                    similarity=round(match.similarity, 3),
+                    cached_task=match.solution.task[:50],
+                )
+                return {
+                    "code": match.solution.code,
+                    "dependencies": match.solution.dependencies,
+                    "reasoning": f"Verified solution of a similar task: {match.solution.task}",
+                    "confidence": match.similarity,
+                    "attempt": attempt,
+                    "semantic_match": {
+                        "task": match.solution.task,
+                        "similarity": round(match.similarity, 4),
+                    },
+                }
+
+        fused = state.get("mode") == "fused" and attempt > 1
+
+        # Escalate when the retry manager saw attempts repeat
+        level = state.get("escalation_level", 0) if attempt > 1 else 0
+        temperature = self.settings.escalation_temperature if level >= HIGH_TEMPERATURE else 0.2
+        provider = self._escalated_provider() if level >= STRONGER_MODEL else self.provider
+
+        # A rethink asks for a new program, so it is never a patch
+        patch = (
+            attempt > 1
+            and not fused
+            and level < RETHINK
+            and self.settings.retry_format == "patch"
+            and bool(state.get("code"))
+        )
+        kind = "initial" if attempt == 1 else "fused" if fused else "full"
+
+        system = SYSTEM_PROMPT
+        test_code = state.get("test_code")
         if attempt == 1:
-            system = SYSTEM_PROMPT
-            user = f"Task: {task}"
+            _, tests = self._fit_context(system, task, "", test_code)
+            user = f"Task: {task}" + tests
+        elif fused:
+            prev_code = state.get("code", "")
+            error, tests = self._fit_context(
+                system, task + prev_code, self._fused_error_context(state), test_code
+            )
+            user = (
+                f"Task: {task}\n\n"
+                + FUSED_RETRY_PROMPT.format(previous_code=prev_code, error_context=error)
+                + tests
+            )
         else:
             prev_code = state.get("code", "")
-            error = state.get("critique", "") or self._extract_error(state)
-            system = SYSTEM_PROMPT
-            user = RETRY_PROMPT.format(previous_code=prev_code, error_context=error)
+            error, tests = self._fit_context(
+                system,
+                prev_code,
+                state.get("critique", "") or self._extract_error(state),
+                test_code,
+            )
+            user = RETRY_PROMPT.format(previous_code=prev_code, error_context=error) + tests
+
+        if level >= RETHINK:
+            user += RETHINK_PROMPT
 
         try:
-            resp = await self.provider.generate_json(
-                system_prompt=system,
-                user_prompt=user,
-                temperature=0.2,
-                max_tokens=4096,
-            )
+            if patch:
+                update, state = await self._patch(state, provider, temperature, attempt)
+                if update is not None:
+                    return update
 
-            output = self._parse(resp.content)
+            resp = None
+            if self.settings.stream_generation and provider.supports_streaming:
+                # Fused retries need the diagnosis, which comes after the code
+                needed = (
+                    ("code", "dependencies", "diagnosis") if fused else ("code", "dependencies")
+                )
+                resp = await self._stream_json(
+                    provider, system, user, temperature, sized_max_tokens(state, 4096), needed
+                )
+            streamed = resp is not None
+            if resp is None:
+                resp = await provider.generate_json(
+                    system_prompt=system,
+                    user_prompt=user,
+                    temperature=temperature,
+                    max_tokens=sized_max_tokens(state, 4096),
+                    schema=output_schema(AgentOutput),
+                )
+
+            output = self._parse(resp)
 
             log.info("Generated", attempt=attempt, lines=output.code.count("\n"))
 
-            return {
+            update = {
                 "code": output.code,
                 "dependencies": output.dependencies,
                 "reasoning": output.reasoning,
                 "confidence": output.confidence,
                 "attempt": attempt,
+                "tokens_used": add_usage(state, resp),
+                "llm_calls": record_call(
+                    state,
+                    "generator",
+                    resp,
+                    attempt=attempt,
+                    kind=kind,
+                    fallback=patch,
+                    **({"streamed": True} if streamed else {}),
+                ),
             }
+            if fused:
+                update.update(self._fused_critique(state, output))
+            return update
         except Exception as e:
             log.error("Generation failed", error=str(e))
             return {"code": "", "reasoning": f"Failed: {e}", "attempt": attempt}
 
-    def _parse(self, content: str) -> AgentOutput:
+    async def _stream_json(
+        self,
+        provider: LLMProvider,
+        system: str,
+        user: str,
+        temperature: float,
+        max_tokens: int,
+        needed: tuple[str, ...],
+    ) -> LLMResponse | None:
+        """
+        Stream a JSON completion and parse it as it arrives.
+
+        The stream uses the same JSON mode, schema and token budget as
+        ``generate_json``. The code is pre-flight checked (does it
+        parse?) the moment its field closes, while the model is still
+        writing; code that doesn't parse ends the stream there. Once the
+        ``needed`` fields are in, the rest (the reasoning) isn't waited
+        for. Output that can't become a JSON object ends the stream at
+        the first bad character.
+
+        Streams report no usage, so token counts are estimated.
+
+        Returns:
+            The response, or None when the caller should fall back to
+            ``generate_json``
+        """
+        _stats["streams"] += 1
+        parser = JsonStreamParser()
+        t0 = time.perf_counter()
+        time_to_code_ms: float | None = None
+        stopped = ""
+        chunks = provider.stream_json(
+            system, user, temperature, max_tokens, schema=output_schema(AgentOutput)
+        )
+        try:
+            async with aclosing(chunks):
+                async for chunk in chunks:
+                    if "code" in parser.feed(chunk):
+                        time_to_code_ms = (time.perf_counter() - t0) * 1000
+                        _stats["code_ready"] += 1
+                        _stats["time_to_code_ms"] += time_to_code_ms
+                        stopped = _preflight(parser.fields["code"])
+                        if stopped:
+                            _stats["preflight_aborts"] += 1
+                            break
+                    if parser.done:
+                        break
+                    if all(name in parser.fields for name in needed):
+                        _stats["early_stops"] += 1
+                        stopped = "the remaining fields were not needed"
+                        break
+        except MalformedJSON as e:
+            _stats["malformed_aborts"] += 1
+            _stats["fallbacks"] += 1
+            log.info("Malformed streamed JSON, regenerating", error=str(e), chars=len(parser.text))
+            return None
+        except Exception as e:
+            _stats["fallbacks"] += 1
+            log.warning("Streaming generation failed, regenerating", error=str(e)[:100])
+            return None
+
+        latency_ms = (time.perf_counter() - t0) * 1000
+        fields = dict(parser.fields)
+        if not isinstance(fields.get("code"), str):
+            _stats["fallbacks"] += 1
+            log.info("Stream ended without code, regenerating", chars=len(parser.text))
+            return None
+        if parser.done:
+            _stats["completed"] += 1
+            _stats["time_to_full_ms"] += latency_ms
+            _stats["code_lead_ms"] += latency_ms - (time_to_code_ms or latency_ms)
+        elif not stopped:
+            stopped = "the stream ended before the JSON object closed"
+
+        if stopped:
+            log.info("Stream stopped after the code", reason=stopped)
+            if len(str(fields.get("reasoning", "")).strip()) < 5:
+                fields["reasoning"] = f"Stream stopped after the code: {stopped}"
+            fields.setdefault("confidence", 0.5)
+
+        prompt_tokens = estimate_tokens(system) + estimate_tokens(user)
+        completion_tokens = estimate_tokens(parser.text)
+        return LLMResponse(
+            content=json.dumps(fields),
+            model=provider.config.model,
+            provider=provider.name,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+            finish_reason="stop" if parser.done else "aborted",
+            latency_ms=latency_ms,
+        )
+
+    async def _patch(
+        self,
+        state: dict[str, Any],
+        provider: LLMProvider,
+        temperature: float,
+        attempt: int,
+    ) -> tuple[dict[str, Any] | None, dict[str, Any]]:
+        """
+        Ask for a patch against the previous code and apply it locally.
+
+        Returns:
+            (state update, state) on success, or (None, state with any
+            rejected call's usage counted) when the request or the patch
+            failed and the caller should fall back to full regeneration
+        """
+        previous = state.get("code", "")
+        numbered = number_lines(previous)
+        error, tests = self._fit_context(
+            PATCH_SYSTEM_PROMPT,
+            numbered,
+            state.get("critique", "") or self._extract_error(state),
+            state.get("test_code"),
+        )
+        user = PATCH_RETRY_PROMPT.format(numbered_code=numbered, error_context=error) + tests
+
+        try:
+            resp = await provider.generate_json(
+                system_prompt=PATCH_SYSTEM_PROMPT,
+                user_prompt=user,
+                temperature=temperature,
+                max_tokens=sized_max_tokens(state, 4096),
+                schema=output_schema(PatchOutput),
+            )
+        except Exception as e:
+            # A full regeneration may still get through (another backend, a fresh retry budget)
+            log.warning("Patch request failed, regenerating in full", attempt=attempt, error=str(e))
+            return None, state
+
         try:
-            return AgentOutput(**json.loads(content))
+            patch, repaired = validate_json(resp.content, PatchOutput)
+            record_validation(resp, valid=not repaired, repaired=repaired)
+            code = apply_patch(previous, patch.patch, [e.model_dump() for e in patch.edits])
+            reasoning = patch.reasoning.strip()
+            output = AgentOutput(
+                code=code,
+                dependencies=patch.dependencies or state.get("dependencies", []),
+                reasoning=reasoning if len(reasoning) >= 5 else "Patched the previous attempt",
+                confidence=patch.confidence,
+            )
+        except (json.JSONDecodeError, TypeError, ValueError) as e:
+            if not isinstance(e, PatchError):
+                record_validation(resp, valid=False)
+            log.info("Patch rejected, regenerating in full", attempt=attempt, error=str(e))
+            calls = record_call(
+                state, "generator", resp, attempt=attempt, kind="patch", applied=False
+            )
+            return None, {**state, "tokens_used": add_usage(state, resp), "llm_calls": calls}
+
+        log.info("Patched", attempt=attempt, lines=output.code.count("\n"))
+
+        return {
+            "code": output.code,
+            "dependencies": output.dependencies,
+            "reasoning": output.reasoning,
+            "confidence": output.confidence,
+            "attempt": attempt,
+            "tokens_used": add_usage(state, resp),
+            "llm_calls": record_call(
+                state, "generator", resp, attempt=attempt, kind="patch", applied=True
+            ),
+        }, state
+
+    def _fit_context(
+        self,
+        system: str,
+        fixed: str,
+        error: str,
+        test_code: str | None,
+    ) -> tuple[str, str]:
+        """
+        Trim the error context and tests to the prompt budget.
+
+        ``fixed`` (the task or the code being fixed) is never trimmed.
+
+        Returns:
+            (error context, tests prompt suffix or "")
+        """
+        fitted = fit_sections(
+            [
+                Section("fixed", fixed, required=True),
+                Section("error", error, priority=1, kind="error"),
+                Section("tests", test_code or "", priority=0),
+            ],
+            section_budget(self.settings, system, RETRY_PROMPT),
+        )
+        tests = TESTS_PROMPT.format(test_code=fitted["tests"]) if test_code else ""
+        return fitted["error"], tests
+
+    def _parse(self, resp: LLMResponse) -> AgentOutput:
+        content = resp.content
+        try:
+            # Fences, trailing commas, raw newlines and truncation are repaired locally
+            output, repaired = validate_json(content, AgentOutput)
+            record_validation(resp, valid=not repaired, repaired=repaired)
+            return output
         except (json.JSONDecodeError, ValueError):
+            record_validation(resp, valid=False)
             code = content
             if "```python" in content:
                 code = content.split("```python")[1].split("```")[0].strip()
             return AgentOutput(code=code, dependencies=[], reasoning="Extracted", confidence=0.5)
 
+    def _fused_error_context(self, state: dict) -> str:
+        """Raw error plus the rule-based diagnosis when one is available (no LLM call)."""
+        error = self._extract_error(state)
+        result = StepResult.coerce(state.get("execution_result"))
+        if result is not None:
+            hint = classify_failure(result, state.get("code", ""))
+            if hint is not None:
+                error += f"\n\nHint: {hint.diagnosis} {hint.fix_suggestion}"
+        return error
+
+    def _fused_critique(self, state: dict, output: AgentOutput) -> dict[str, Any]:
+        """Record the fused diagnosis as the critique of the previous attempt."""
+        diagnosis = output.diagnosis or "No diagnosis returned"
+        history = list(state.get("history", []))
+        if history:
+            last = AttemptRecord.coerce(history[-1])
+            if last.attempt == state.get("attempt"):
+                history[-1] = replace(last, critique=diagnosis)
+        return {"critique": diagnosis, "critique_source": "fused", "history": history}
+
     def _extract_error(self, state: dict) -> str:
         result = state.get("execution_result")
         if result:
             if hasattr(result, "get_error_summary"):
                 return result.get_error_summary()
-            if isinstance(result, dict):
-                return result.get("stderr", "") or f"Exit: {result.get('exit_code', 1)}"
+            step = StepResult.coerce(result)
+            if step is not None:
+                return step.stderr or f"Exit: {step.exit_code}"
         return "Unknown error"
+
+
+def _preflight(code: str) -> str:
+    """Why ``code`` can't run, or "" if it parses."""
+    try:
+        ast.parse(code)
+    except SyntaxError as e:
+        return f"the code does not parse: {e.msg} (line {e.lineno})"
+    except ValueError as e:  # Null bytes
+        return f"the code does not parse: {e}"
+    return ""
@@ -0,0 +1,142 @@
+"""
+Patch Retries
+=============
+
+Applies an LLM-written fix to the previous attempt instead of asking for
+the whole program again, so a retry's output scales with the size of
+the fix rather than the size of the program.
+
+Two patch formats are accepted:
+
+- ``patch``: a unified diff against the previous code. Hunks are
+  located by their context lines, so slightly wrong line numbers in
+  the ``@@`` headers are tolerated.
+- ``edits``: line-range replacements, ``{"start": 3, "end": 5,
+  "replacement": "..."}`` with 1-based inclusive line numbers
+  (``end = start - 1`` inserts before ``start``).
+
+The patched program must still parse; anything else raises
+``PatchError`` and the generator falls back to full regeneration, as it
+does when the patch request itself fails.
+"""
+
+import ast
+import re
+from typing import Any
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,\d+)? \+\d+(?:,\d+)? @@")
+
+
+class PatchError(ValueError):
+    """A patch could not be applied to the previous code."""
+
+
+def number_lines(code: str) -> str:
+    """Prefix each line with its 1-based number, for line-range edits."""
+    lines = code.splitlines()
+    width = len(str(len(lines)))
+    return "\n".join(f"{i:>{width}} | {line}" for i, line in enumerate(lines, 1))
+
+
+def _parse_hunks(diff: str) -> list[tuple[int, list[str], list[str]]]:
+    """(old start line, old lines, new lines) for each hunk."""
+    hunks: list[tuple[int, list[str], list[str]]] = []
+    old: list[str] = []
+    new: list[str] = []
+    for line in diff.splitlines():
+        header = _HUNK_HEADER.match(line)
+        if header:
+            old, new = [], []
+            hunks.append((int(header.group(1)), old, new))
+        elif not hunks:
+            continue  # "---"/"+++" file headers and anything before the first hunk
+        elif line.startswith("-"):
+            old.append(line[1:])
+        elif line.startswith("+"):
+            new.append(line[1:])
+        elif line.startswith("\\"):
+            continue  # "\ No newline at end of file"
+        else:
+            # Context line; models often strip the leading space of blank lines
+            text = line[1:] if line.startswith(" ") else line
+            old.append(text)
+            new.append(text)
+    if not hunks:
+        raise PatchError("No hunks in diff")
+    return hunks
+
+
+def _locate(lines: list[str], block: list[str], hint: int, start: int) -> int | None:
+    """Index of ``block`` in ``lines`` at or after ``start``, nearest to ``hint``."""
+    wanted = [line.rstrip() for line in block]
+    candidates = range(start, len(lines) - len(block) + 1)
+    for index in sorted(candidates, key=lambda i: abs(i - hint)):
+        if [line.rstrip() for line in lines[index : index + len(block)]] == wanted:
+            return index
+    return None
+
+
+def apply_unified_diff(code: str, diff: str) -> str:
+    """Apply a unified diff to ``code``."""
+    lines = code.splitlines()
+    result: list[str] = []
+    position = 0
+    for old_start, old, new in _parse_hunks(diff):
+        hint = max(old_start - 1, position)
+        if old:
+            index = _locate(lines, old, hint, position)
+            if index is None:
+                raise PatchError(f"Hunk at line {old_start} does not match the previous code")
+        else:
+            # Pure insertion: "-N,0" means after line N
+            index = min(max(old_start, position), len(lines))
+        result.extend(lines[position:index])
+        result.extend(new)
+        position = index + len(old)
+    result.extend(lines[position:])
+    return "\n".join(result) + "\n"
+
+
+def apply_line_edits(code: str, edits: list[dict[str, Any]]) -> str:
+    """Apply non-overlapping line-range replacements to ``code``."""
+    lines = code.splitlines()
+    try:
+        spans = sorted(
+            ((int(e["start"]), int(e["end"]), str(e.get("replacement", ""))) for e in edits),
+            key=lambda span: span[0],
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise PatchError(f"Malformed edit: {e}") from e
+
+    result: list[str] = []
+    position = 0  # 0-based index of the first line not yet copied
+    for start, end, replacement in spans:
+        if start < 1 or end < start - 1 or end > len(lines) or start - 1 < position:
+            raise PatchError(f"Edit {start}-{end} is out of range or overlaps another")
+        result.extend(lines[position : start - 1])
+        result.extend(replacement.splitlines())
+        position = end
+    result.extend(lines[position:])
+    return "\n".join(result) + "\n"
+
+
+def apply_patch(code: str, patch: str | None = None, edits: list | None = None) -> str:
+    """
+    Apply a diff or line edits to ``code`` and check the result parses.
+
+    Raises:
+        PatchError: If the patch is missing, doesn't apply, or leaves
+            the program syntactically invalid
+    """
+    if edits:
+        patched = apply_line_edits(code, edits)
+    elif patch and patch.strip():
+        patched = apply_unified_diff(code, patch)
+    else:
+        raise PatchError("Response contained neither a patch nor edits")
+
+    try:
+        ast.parse(patched)
+    except SyntaxError as e:
+        raise PatchError(f"Patched code does not parse: {e.msg} (line {e.lineno})") from e
+    return patched
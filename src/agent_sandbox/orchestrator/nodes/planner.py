@@ -0,0 +1,384 @@
+"""
+Planner Node
+============
+
+Optional first stage (``PLANNER_ENABLED=true``) that splits a large task
+into a small DAG of independently testable functions:
+
+1. one LLM call returns a ``TaskPlan``: functions with signatures, the
+   functions each one calls, ``test_*`` code per function, and the main
+   code that ties them together
+2. every function whose dependencies are verified is generated and run
+   against its own tests in the sandbox, in parallel with the others
+3. a function that fails its tests is retried on its own, with its
+   previous code and the failing tests; verified functions are kept
+4. the verified functions and the main code are assembled into the
+   program that EXECUTE runs as attempt 1
+
+Tasks the planner doesn't split (fewer than two functions), invalid
+plans and functions that never pass fall back to whole-program
+generation.
+"""
+
+import asyncio
+import json
+from typing import Any
+
+import structlog
+
+from agent_sandbox.config import Settings, get_settings
+from agent_sandbox.contracts.agent_output import AgentOutput, SubTask, TaskPlan
+from agent_sandbox.contracts.repair import validate_json
+from agent_sandbox.orchestrator.nodes.budget import (
+    add_usage,
+    record_call,
+    sized_max_tokens,
+    sized_timeout,
+)
+from agent_sandbox.providers.base import LLMProvider
+from agent_sandbox.providers.registry import get_provider
+from agent_sandbox.providers.schema import output_schema
+from agent_sandbox.sandbox.harness import build_harness, parse_harness_output, summarize
+from agent_sandbox.sandbox.manager import SandboxManager
+from agent_sandbox.sandbox.models import ExecutionRequest
+
+log = structlog.get_logger()
+
+# Process-wide planner counters (reported by /api/v1/stats)
+_stats = {
+    "plans": 0,
+    "assembled": 0,
+    "fallbacks": 0,
+    "subtasks": 0,
+    "subtask_retries": 0,
+}
+
+
+def get_planner_stats() -> dict[str, Any]:
+    """How often tasks were decomposed and how many functions needed a retry."""
+    return dict(_stats)
+
+
+PLAN_SYSTEM_PROMPT = """You split programming tasks into small, independently testable Python functions.
+
+RULES:
+1. Only split tasks with several distinct parts; for simple tasks return no subtasks
+2. At most 6 subtasks, each a single function with a clear signature
+3. depends_on lists the subtasks whose functions this one calls
+4. Each subtask has test_* functions (plain asserts) that exercise only that function
+5. main is the top-level code that calls the functions and prints the result
+
+OUTPUT FORMAT (JSON):
+{
+    "subtasks": [
+        {
+            "name": "parse_rows",
+            "signature": "def parse_rows(text: str) -> list[dict]",
+            "description": "what it does",
+            "depends_on": [],
+            "test_code": "def test_parse_rows():\\n    assert parse_rows('a\\\\n1') == [{'a': '1'}]"
+        }
+    ],
+    "main": "print(parse_rows(DATA))"
+}"""
+
+SUBTASK_SYSTEM_PROMPT = """You are an expert Python programmer. Implement exactly the requested function.
+
+RULES:
+1. Match the given signature
+2. Include the imports the function needs
+3. No top-level calls, prints or tests
+4. NO os.system, subprocess, or eval
+
+OUTPUT FORMAT (JSON):
+{
+    "code": "your Python code",
+    "dependencies": [],
+    "reasoning": "your approach",
+    "confidence": 0.85
+}"""
+
+SUBTASK_PROMPT = """Implement one function of a larger program.
+
+OVERALL TASK: {task}
+
+FUNCTION: {signature}
+{description}
+{dependencies}
+It will be checked by these tests:
+```python
+{test_code}
+```
+
+Return JSON with code (the function and the imports it needs, no top-level calls),
+dependencies, reasoning, confidence fields."""
+
+DEPENDENCIES_PROMPT = """
+These functions are already implemented and verified; call them, do not redefine them:
+```python
+{code}
+```
+"""
+
+SUBTASK_RETRY_PROMPT = """
+
+Your previous version failed its tests:
+```python
+{previous_code}
+```
+{error}"""
+
+
+class PlannerNode:
+    """Decomposes a task, solves the pieces in parallel and assembles them."""
+
+    def __init__(
+        self,
+        settings: Settings | None = None,
+        sandbox_manager: SandboxManager | None = None,
+    ) -> None:
+        self.settings = settings or get_settings()
+        self._sandbox_manager = sandbox_manager
+        self._provider: LLMProvider | None = None
+
+    @property
+    def provider(self) -> LLMProvider:
+        if self._provider is None:
+            self._provider = get_provider(
+                provider_type=self.settings.llm_provider,
+                api_key=self.settings.get_provider_api_key(),
+                model=self.settings.get_provider_model(),
+                base_url=self.settings.get_provider_base_url(),
+            )
+        return self._provider
+
+    @property
+    def sandbox(self) -> SandboxManager:
+        if self._sandbox_manager is None:
+            raise RuntimeError("Sandbox manager not set")
+        return self._sandbox_manager
+
+    async def plan(self, state: dict[str, Any]) -> dict[str, Any]:
+        """Plan and solve the task piecewise. Called by LangGraph."""
+        task = state.get("task", "")
+        _stats["plans"] += 1
+        # Running usage of this stage; calls finish in any order
+        usage = {
+            "tokens_used": state.get("tokens_used", 0),
+            "llm_calls": list(state.get("llm_calls", [])),
+        }
+
+        try:
+            resp = await self.provider.generate_json(
+                system_prompt=PLAN_SYSTEM_PROMPT,
+                user_prompt=f"Task: {task}",
+                temperature=0.2,
+                max_tokens=sized_max_tokens({**state, **usage}, 2048),
+                schema=output_schema(TaskPlan),
+            )
+            self._count(usage, resp, "planner")
+            plan, _ = validate_json(resp.content, TaskPlan)
+        except Exception as e:
+            log.info("No usable plan, generating the whole program", error=str(e))
+            return {**usage, "plan": None}
+
+        if len(plan.subtasks) < 2:
+            log.info("Task not decomposed", subtasks=len(plan.subtasks))
+            return {**usage, "plan": None}
+
+        log.info("Planned", subtasks=[s.name for s in plan.subtasks])
+        _stats["subtasks"] += len(plan.subtasks)
+        solved, attempts = await self._solve(state, plan, usage)
+
+        record = {
+            "subtasks": [
+                {
+                    "name": s.name,
+                    "depends_on": s.depends_on,
+                    "attempts": attempts.get(s.name, 0),
+                    "verified": s.name in solved,
+                }
+                for s in plan.order()
+            ],
+            "assembled": len(solved) == len(plan.subtasks),
+        }
+        if not record["assembled"]:
+            _stats["fallbacks"] += 1
+            log.info(
+                "Subtasks failed, generating the whole program",
+                failed=len(plan.subtasks) - len(solved),
+            )
+            return {**usage, "plan": record}
+
+        _stats["assembled"] += 1
+        pieces = [solved[s.name] for s in plan.order()]
+        code = "\n\n\n".join([*(p.code.strip() for p in pieces), plan.main.strip()]) + "\n"
+        dependencies = sorted({d for p in pieces for d in p.dependencies})
+        log.info("Assembled verified subtasks", subtasks=len(pieces), lines=code.count("\n"))
+
+        return {
+            **usage,
+            "plan": record,
+            "code": code,
+            "dependencies": dependencies,
+            "reasoning": "Assembled from verified functions: "
+            + ", ".join(s.name for s in plan.order()),
+            "confidence": min(p.confidence for p in pieces),
+            "attempt": 1,
+        }
+
+    async def _solve(
+        self,
+        state: dict[str, Any],
+        plan: TaskPlan,
+        usage: dict[str, Any],
+    ) -> tuple[dict[str, AgentOutput], dict[str, int]]:
+        """
+        Solve subtasks as soon as their dependencies are verified.
+
+        Returns:
+            (verified output per subtask, attempts per subtask). Subtasks
+            that depend on a failed one are never started.
+        """
+        solved: dict[str, AgentOutput] = {}
+        attempts: dict[str, int] = {}
+        failed: set[str] = set()
+        running: dict[asyncio.Task, str] = {}
+        try:
+            while True:
+                for subtask in plan.subtasks:
+                    name = subtask.name
+                    started = name in solved or name in failed or name in running.values()
+                    if not started and all(d in solved for d in subtask.depends_on):
+                        solve = self._subtask(state, plan, subtask, solved, usage, attempts)
+                        running[asyncio.create_task(solve)] = name
+                if not running:
+                    break
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for job in done:
+                    name = running.pop(job)
+                    try:
+                        output = job.result()
+                    except Exception as e:
+                        log.error("Subtask errored", subtask=name, error=str(e))
+                        output = None
+                    if output is None:
+                        failed.add(name)
+                    else:
+                        solved[name] = output
+        finally:
+            for job in running:
+                job.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+        return solved, attempts
+
+    async def _subtask(
+        self,
+        state: dict[str, Any],
+        plan: TaskPlan,
+        subtask: SubTask,
+        solved: dict[str, AgentOutput],
+        usage: dict[str, Any],
+        attempts: dict[str, int],
+    ) -> AgentOutput | None:
+        """Generate and verify one function, retrying it alone until it passes."""
+        # Everything it (transitively) calls, in dependency order
+        needed = self._closure(plan, subtask)
+        context = "\n\n\n".join(
+            solved[s.name].code.strip() for s in plan.order() if s.name in needed
+        )
+        dependencies = DEPENDENCIES_PROMPT.format(code=context) if context else ""
+        prompt = SUBTASK_PROMPT.format(
+            task=state.get("task", ""),
+            signature=subtask.signature,
+            description=subtask.description,
+            dependencies=dependencies,
+            test_code=subtask.test_code,
+        )
+
+        retry = ""
+        for attempt in range(1, self.settings.max_reflexion_attempts + 1):
+            attempts[subtask.name] = attempt
+            if attempt > 1:
+                _stats["subtask_retries"] += 1
+            resp = await self.provider.generate_json(
+                system_prompt=SUBTASK_SYSTEM_PROMPT,
+                user_prompt=prompt + retry,
+                temperature=0.2,
+                # Sized from the running total: other subtasks spend the budget too
+                max_tokens=sized_max_tokens({**state, **usage}, 2048),
+                schema=output_schema(AgentOutput),
+            )
+            self._count(usage, resp, "subtask", subtask=subtask.name, attempt=attempt)
+            try:
+                output, _ = validate_json(resp.content, AgentOutput)
+            except (json.JSONDecodeError, TypeError, ValueError) as e:
+                retry = f"\n\nYour previous answer was not valid: {e}"
+                continue
+
+            passed, error = await self._verify(state, context, output, subtask.test_code)
+            log.info(
+                "Subtask verified" if passed else "Subtask failed",
+                subtask=subtask.name,
+                attempt=attempt,
+            )
+            if passed:
+                return output
+            retry = SUBTASK_RETRY_PROMPT.format(previous_code=output.code, error=error)
+        return None
+
+    async def _verify(
+        self,
+        state: dict[str, Any],
+        context: str,
+        output: AgentOutput,
+        test_code: str,
+    ) -> tuple[bool, str]:
+        """Run a function (after the code it calls) against its tests."""
+        program = f"{context}\n\n\n{output.code}" if context else output.code
+        request = ExecutionRequest(
+            code=build_harness(program, test_code),
+            dependencies=output.dependencies,
+            timeout_seconds=sized_timeout(state, self.settings.sandbox_timeout_seconds),
+            memory_limit_mb=self.settings.sandbox_memory_limit_mb,
+            network_enabled=self.settings.sandbox_network_enabled,
+        )
+        result = await self.sandbox.execute(request)
+        parsed = parse_harness_output(result.stdout)
+        if parsed is None:
+            return False, result.stderr or "The tests did not run"
+        _, outcomes = parsed
+        if not any(o.failed for o in outcomes) and result.exit_code == 0:
+            return True, ""
+        return False, summarize(outcomes)
+
+    @staticmethod
+    def _closure(plan: TaskPlan, subtask: SubTask) -> set[str]:
+        """Names of the subtasks ``subtask`` depends on, directly or not."""
+        by_name = {s.name: s for s in plan.subtasks}
+        needed: set[str] = set()
+        stack = list(subtask.depends_on)
+        while stack:
+            name = stack.pop()
+            if name not in needed:
+                needed.add(name)
+                stack.extend(by_name[name].depends_on)
+        return needed
+
+    @staticmethod
+    def _count(usage: dict[str, Any], resp: Any, node: str, **extra: Any) -> None:
+        usage["llm_calls"] = record_call(usage, node, resp, **extra)
+        usage["tokens_used"] = add_usage(usage, resp)
+
+    def should_continue(self, state: dict[str, Any]) -> str:
+        """
+        Determine the next step after planning.
+
+        Returns:
+            "execute" to run the assembled program
+            "generate" to generate the whole program instead
+        """
+        plan = state.get("plan")
+        if plan and plan.get("assembled"):
+            return "execute"
+        return "generate"
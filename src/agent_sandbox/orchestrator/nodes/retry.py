@@ -5,13 +5,41 @@ Retry Manager Node
 Manages the retry logic and decides when to continue or stop.
 """
 
+import time
 from typing import Any
 
 import structlog
 
+from agent_sandbox.config import Settings, get_settings
+from agent_sandbox.orchestrator.nodes.budget import token_budget_exhausted
+from agent_sandbox.orchestrator.nodes.stagnation import (
+    ESCALATION_NAMES,
+    code_fingerprint,
+    error_signature,
+    max_escalation,
+)
+from agent_sandbox.orchestrator.state import AttemptRecord, StepResult
+from agent_sandbox.providers.context import Section, error_lines, fit_sections, section_budget
+
 logger = structlog.get_logger()
 
 
+def attempt_record(state: dict[str, Any]) -> AttemptRecord:
+    """History entry for the attempt in ``state``."""
+    code = state.get("code", "")
+    result = StepResult.coerce(state.get("execution_result"))
+    return AttemptRecord(
+        attempt=state.get("attempt", 1),
+        code=code,
+        # Shared with execution_result unless its output is oversized
+        result=result.clipped() if result else None,
+        critique=state.get("critique"),
+        code_hash=code_fingerprint(code),
+        run_hash=state.get("run_hash", ""),
+        error_signature=error_signature(result),
+    )
+
+
 class RetryManagerNode:
     """
     Manages retry logic for the reflexion loop.
@@ -19,12 +47,13 @@ class RetryManagerNode:
     Responsibilities:
     - Track attempt history
     - Decide if retry should continue
-    - Apply exponential backoff (if needed)
+    - Escalate strategy when attempts repeat, stop when progress stalls
     - Aggregate learning from failures
     """
 
-    def __init__(self, max_attempts: int = 3) -> None:
+    def __init__(self, max_attempts: int = 3, settings: Settings | None = None) -> None:
         self.max_attempts = max_attempts
+        self.settings = settings or get_settings()
 
     async def process(self, state: dict[str, Any]) -> dict[str, Any]:
         """
@@ -37,21 +66,50 @@ class RetryManagerNode:
             Updated state with retry decision
         """
         attempt = state.get("attempt", 1)
-        should_retry = state.get("should_retry", False)
+        # Fused mode and reused results skip the critic, so nothing has vetoed the retry
+        should_retry = (
+            state.get("should_retry", False)
+            or state.get("mode") == "fused"
+            or state.get("execution_reused", False)
+        )
         max_attempts = state.get("max_attempts", self.max_attempts)
 
         # Add to history
-        history = state.get("history", [])
-        history_entry = {
-            "attempt": attempt,
-            "code": state.get("code", ""),
-            "execution_result": state.get("execution_result"),
-            "critique": state.get("critique"),
-        }
+        history = [AttemptRecord.coerce(e) for e in state.get("history", [])]
+        history_entry = attempt_record(state)
+
+        update: dict[str, Any] = {}
+        stagnation_reason = None
+        if self.settings.stagnation_detection:
+            level, stagnation_reason = self._check_progress(state, history, history_entry)
+            update["escalation_level"] = level
+
         history.append(history_entry)
 
+        budget_exhausted = token_budget_exhausted(state)
+        if budget_exhausted:
+            update["budget_exhausted"] = True
+
         # Check if we should continue
-        can_continue = should_retry and attempt < max_attempts
+        can_continue = (
+            should_retry
+            and attempt < max_attempts
+            and stagnation_reason is None
+            and not budget_exhausted
+        )
+
+        if stagnation_reason and should_retry and attempt < max_attempts:
+            attempts_saved = max_attempts - attempt
+            started_at = state.get("started_at")
+            avg_attempt_ms = (time.time() - started_at) * 1000 / attempt if started_at else 0.0
+            update.update(
+                {
+                    "stagnation_reason": stagnation_reason,
+                    "attempts_saved": attempts_saved,
+                    "time_saved_ms": state.get("time_saved_ms", 0.0)
+                    + avg_attempt_ms * attempts_saved,
+                }
+            )
 
         if can_continue:
             logger.info(
@@ -60,7 +118,14 @@ class RetryManagerNode:
                 max_attempts=max_attempts,
             )
         else:
-            reason = "max attempts reached" if attempt >= max_attempts else "retry not recommended"
+            if budget_exhausted:
+                reason = "token budget exhausted"
+            elif stagnation_reason:
+                reason = stagnation_reason
+            elif attempt >= max_attempts:
+                reason = "max attempts reached"
+            else:
+                reason = "retry not recommended"
             logger.info(
                 "Stopping retries",
                 attempt=attempt,
@@ -68,10 +133,40 @@ class RetryManagerNode:
             )
 
         return {
+            **update,
             "history": history,
             "should_retry": can_continue,
         }
 
+    def _check_progress(
+        self,
+        state: dict[str, Any],
+        previous: list[AttemptRecord],
+        entry: AttemptRecord,
+    ) -> tuple[int, str | None]:
+        """
+        Compare an attempt against earlier ones.
+
+        Returns:
+            (escalation level for the next attempt, stagnation reason or None)
+        """
+        level = state.get("escalation_level", 0)
+        if not previous:
+            return level, None
+
+        repeated_code = any(e.code_hash == entry.code_hash for e in previous)
+        repeated_error = previous[-1].error_signature == entry.error_signature
+        if not (repeated_code or repeated_error):
+            return level, None
+
+        what = "identical code" if repeated_code else f"same error ({entry.error_signature})"
+        if level >= max_escalation(self.settings.escalation_model):
+            return level, f"no progress: {what} after every escalation"
+
+        level += 1
+        logger.info("No progress, escalating", repeated=what, strategy=ESCALATION_NAMES[level])
+        return level, None
+
     def should_continue(self, state: dict[str, Any]) -> str:
         """
         Determine next step in workflow.
@@ -84,33 +179,38 @@ class RetryManagerNode:
             return "generate"
         return "end"
 
-    def get_accumulated_context(self, state: dict[str, Any]) -> str:
+    def get_accumulated_context(self, state: dict[str, Any], budget: int | None = None) -> str:
         """
         Build context from all previous attempts.
 
         This helps the generator learn from ALL past failures,
-        not just the most recent one.
+        not just the most recent one. Older attempts are trimmed first
+        to fit ``budget`` tokens (default: half the prompt budget).
         """
         history = state.get("history", [])
         if not history:
             return ""
 
-        context_parts = ["## Previous Attempts\n"]
+        history = [AttemptRecord.coerce(e) for e in history]
+        sections = []
+        for i, entry in enumerate(history):
+            focus = tuple(error_lines(entry.result.stderr)) if entry.result else ()
+            sections.append(Section(f"code{i}", entry.code, 2 * i, kind="code", focus=focus))
+            sections.append(Section(f"critique{i}", entry.critique or "N/A", 2 * i + 1))
+        fitted = fit_sections(sections, budget or section_budget(self.settings) // 2)
 
-        for entry in history:
-            attempt_num = entry.get("attempt", 0)
-            code = entry.get("code", "")[:500]  # Truncate
-            result = entry.get("execution_result", {})
-            critique = entry.get("critique", "")
+        context_parts = ["## Previous Attempts\n"]
 
+        for i, entry in enumerate(history):
+            exit_code = entry.result.exit_code if entry.result else "N/A"
             context_parts.append(f"""
-### Attempt {attempt_num}
-**Code snippet:**
+### Attempt {entry.attempt}
+**Code:**
 ```python
-{code}...
+{fitted[f"code{i}"]}
 ```
-**Result:** Exit code {result.get("exit_code", "N/A")}
-**Critique:** {critique[:300] if critique else "N/A"}
+**Result:** Exit code {exit_code}
+**Critique:** {fitted[f"critique{i}"]}
 """)
 
         return "\n".join(context_parts)
@@ -0,0 +1,176 @@
+"""Rule-based critic - diagnoses mechanical failures without an LLM call."""
+
+import difflib
+import re
+import sys
+from typing import Any
+
+from agent_sandbox.contracts.agent_output import CritiqueOutput
+from agent_sandbox.orchestrator.state import StepResult
+from agent_sandbox.sandbox.tracebacks import ParsedError, parse_traceback
+
+_STDLIB = sorted(sys.stdlib_module_names)
+
+# SyntaxError messages whose fix is obvious from the message alone
+_MECHANICAL_SYNTAX = (
+    "was never closed",
+    "unterminated string literal",
+    "unterminated triple-quoted string",
+    "expected ':'",
+    "perhaps you forgot a comma",
+    "unmatched ')'",
+    "unmatched ']'",
+    "unmatched '}'",
+)
+
+
+def _where(err: ParsedError) -> str:
+    if err.line is None:
+        return ""
+    where = f" on line {err.line}"
+    if err.frame and err.frame.source:
+        where += f" (`{err.frame.source}`)"
+    return where
+
+
+def _module_not_found(err: ParsedError) -> CritiqueOutput | None:
+    match = re.search(r"No module named '([\w.]+)'", err.message)
+    if not match:
+        return None
+    module = match.group(1)
+    top = module.split(".")[0]
+
+    if top in sys.stdlib_module_names:
+        # Submodule of a stdlib package that doesn't exist - not mechanical
+        return None
+
+    close = difflib.get_close_matches(top, _STDLIB, n=1, cutoff=0.8)
+    if close:
+        fix = f"'{top}' looks like a typo of the standard library module '{close[0]}'. Import '{close[0]}' instead."
+    else:
+        fix = (
+            f"'{top}' is not installed in the sandbox and network access is disabled. "
+            "Rewrite the solution using only the Python standard library, "
+            f"or list '{top}' in dependencies if network access is enabled."
+        )
+    return CritiqueOutput(
+        diagnosis=f"Import of '{module}' failed{_where(err)}: the module is not available.",
+        fix_suggestion=fix,
+        confidence=0.9,
+        error_category="import",
+    )
+
+
+def _name_error(err: ParsedError, code: str) -> CritiqueOutput | None:
+    match = re.search(r"name '(\w+)' is not defined", err.message)
+    if not match:
+        return None
+    name = match.group(1)
+
+    hint = re.search(r"Did you mean: '(\w+)'", err.message)
+    if name in sys.stdlib_module_names:
+        fix = f"Add `import {name}` at the top of the file."
+    elif hint:
+        fix = f"Replace '{name}' with '{hint.group(1)}'."
+    else:
+        identifiers = set(re.findall(r"\b[A-Za-z_]\w*\b", code)) - {name}
+        close = difflib.get_close_matches(name, sorted(identifiers), n=1, cutoff=0.75)
+        if not close:
+            # Could be a missing definition or a logic problem - let the LLM decide
+            return None
+        fix = f"'{name}' is likely a typo of '{close[0]}'. Use '{close[0]}' consistently."
+
+    return CritiqueOutput(
+        diagnosis=f"NameError{_where(err)}: '{name}' is used before it is defined or imported.",
+        fix_suggestion=fix,
+        confidence=0.85,
+        error_category="name",
+    )
+
+
+def _indentation_error(err: ParsedError) -> CritiqueOutput:
+    return CritiqueOutput(
+        diagnosis=f"{err.error_type}{_where(err)}: {err.message or 'inconsistent indentation'}.",
+        fix_suggestion=(
+            f"Re-indent the block around line {err.line or '?'} using 4 spaces per level, "
+            "never mixing tabs and spaces, and make sure every block has a body."
+        ),
+        confidence=0.9,
+        error_category="syntax",
+    )
+
+
+def _syntax_error(err: ParsedError) -> CritiqueOutput | None:
+    lowered = err.message.lower()
+    if not any(pattern in lowered for pattern in _MECHANICAL_SYNTAX):
+        return None
+    return CritiqueOutput(
+        diagnosis=f"SyntaxError{_where(err)}: {err.message}.",
+        fix_suggestion=(
+            f"Fix the syntax at line {err.line or '?'} as the message says "
+            "(close brackets and strings, add the missing ':' or ','). "
+            "Keep the rest of the program unchanged."
+        ),
+        confidence=0.85,
+        error_category="syntax",
+    )
+
+
+def _zero_division(err: ParsedError) -> CritiqueOutput:
+    return CritiqueOutput(
+        diagnosis=f"ZeroDivisionError{_where(err)}: {err.message or 'division by zero'}.",
+        fix_suggestion=(
+            "Guard the division: check the denominator is non-zero before dividing, "
+            "or catch ZeroDivisionError and handle the case explicitly."
+        ),
+        confidence=0.85,
+        error_category="runtime",
+    )
+
+
+def _timeout(execution_time_ms: float) -> CritiqueOutput:
+    return CritiqueOutput(
+        diagnosis=(
+            f"Execution was killed after {execution_time_ms / 1000:.1f}s. "
+            "The program likely loops forever, waits on input(), or uses an exponential algorithm."
+        ),
+        fix_suggestion=(
+            "Remove input() and sleep() calls, make sure every loop terminates, "
+            "and replace naive recursion with an iterative or memoized version."
+        ),
+        confidence=0.8,
+        error_category="timeout",
+    )
+
+
+def classify_failure(result: StepResult | dict[str, Any], code: str = "") -> CritiqueOutput | None:
+    """
+    Diagnose a failed execution locally.
+
+    Args:
+        result: Execution result (a StepResult or its dict form)
+        code: The code that produced the result
+
+    Returns:
+        CritiqueOutput for known mechanical failures, None when unsure
+    """
+    result = StepResult.coerce(result) or StepResult()
+    if result.timed_out:
+        return _timeout(result.execution_time_ms)
+
+    err = parse_traceback(result.stderr)
+    if err is None:
+        return None
+
+    if err.error_type in ("ModuleNotFoundError", "ImportError"):
+        return _module_not_found(err)
+    if err.error_type == "NameError":
+        return _name_error(err, code)
+    if err.error_type in ("IndentationError", "TabError"):
+        return _indentation_error(err)
+    if err.error_type == "SyntaxError":
+        return _syntax_error(err)
+    if err.error_type == "ZeroDivisionError":
+        return _zero_division(err)
+
+    return None
@@ -0,0 +1,190 @@
+"""
+Speculative Regeneration
+========================
+
+Hides critic latency after a failed attempt. While the critic analyzes
+the failure, a provisional candidate is generated from the raw error and
+run in the sandbox at the same time:
+
+- if the candidate passes before the critique lands, the critique is
+  cancelled and the candidate becomes the next attempt
+- otherwise the candidate is dropped (its token usage still counts) and
+  the critique-informed retry proceeds as usual
+
+Failures the rule-based critic can diagnose are not speculated on: their
+critique is instant, so there is no latency to hide.
+"""
+
+import asyncio
+import time
+from typing import Any
+
+import structlog
+
+from agent_sandbox.config import Settings, get_settings
+from agent_sandbox.orchestrator.nodes.budget import token_budget_exhausted
+from agent_sandbox.orchestrator.nodes.critic import CriticNode
+from agent_sandbox.orchestrator.nodes.executor import ExecutorNode
+from agent_sandbox.orchestrator.nodes.generator import GeneratorNode
+from agent_sandbox.orchestrator.nodes.retry import attempt_record
+from agent_sandbox.orchestrator.nodes.rules import classify_failure
+from agent_sandbox.orchestrator.nodes.verifier import VerifierNode
+from agent_sandbox.orchestrator.state import AttemptRecord, StepResult
+
+logger = structlog.get_logger()
+
+# Process-wide speculation counters (reported by /api/v1/stats)
+_stats = {
+    "started": 0,
+    "won": 0,
+    "lost": 0,
+    "tokens_wasted": 0,
+    "won_time_ms": 0.0,
+}
+
+
+def get_speculation_stats() -> dict[str, Any]:
+    """How often the provisional candidate beat the critique, and what losing cost."""
+    decided = _stats["won"] + _stats["lost"]
+    return {
+        "started": _stats["started"],
+        "won": _stats["won"],
+        "lost": _stats["lost"],
+        "win_rate": _stats["won"] / decided if decided else 0.0,
+        "tokens_wasted": _stats["tokens_wasted"],
+        # A win ends the job without waiting for the critique and the next attempt
+        "avg_won_attempt_ms": _stats["won_time_ms"] / _stats["won"] if _stats["won"] else 0.0,
+    }
+
+
+class SpeculativeCritiqueNode:
+    """Races the critique against a provisional regeneration."""
+
+    def __init__(
+        self,
+        critic: CriticNode,
+        generator: GeneratorNode,
+        executor: ExecutorNode,
+        verifier: VerifierNode,
+        settings: Settings | None = None,
+    ) -> None:
+        self.critic = critic
+        self.generator = generator
+        self.executor = executor
+        self.verifier = verifier
+        self.settings = settings or get_settings()
+
+    def _worth_speculating(self, state: dict[str, Any]) -> bool:
+        """Whether the critique is slow enough, and budget left, to race it."""
+        if token_budget_exhausted(state):
+            return False
+        if self.settings.critic_fast_path:
+            result = StepResult.coerce(state.get("execution_result")) or StepResult()
+            if classify_failure(result, state.get("code", "")) is not None:
+                return False
+        return True
+
+    async def critique(self, state: dict[str, Any]) -> dict[str, Any]:
+        """Critique the failed attempt, racing a provisional fix. Called by LangGraph."""
+        if not self._worth_speculating(state):
+            return await self.critic.critique(state)
+
+        _stats["started"] += 1
+        t0 = time.perf_counter()
+        critique_task = asyncio.create_task(self.critic.critique(state))
+        candidate_task = asyncio.create_task(self._candidate(state))
+        try:
+            done, _ = await asyncio.wait(
+                {critique_task, candidate_task}, return_when=asyncio.FIRST_COMPLETED
+            )
+            candidate = None
+            if candidate_task in done:
+                candidate = candidate_task.result()
+                if self._passed(candidate):
+                    _stats["won"] += 1
+                    _stats["won_time_ms"] += (time.perf_counter() - t0) * 1000
+                    logger.info(
+                        "Provisional candidate passed, critique cancelled",
+                        attempt=candidate["attempt"],
+                    )
+                    return self._accept(state, candidate)
+
+            update = await critique_task
+            _stats["lost"] += 1
+            logger.info(
+                "Critique landed first" if candidate is None else "Provisional candidate failed",
+                attempt=state.get("attempt", 1),
+            )
+            return self._with_usage(state, update, candidate)
+        finally:
+            pending = [t for t in (critique_task, candidate_task) if not t.done()]
+            for task in pending:
+                task.cancel()
+            # Let cancelled calls and executions clean up before moving on
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _candidate(self, state: dict[str, Any]) -> dict[str, Any]:
+        """Generate from the raw error (no critique), execute and verify."""
+        spec = {**state, "critique": None}
+        known_calls = len(state.get("llm_calls", []))
+        candidate = await self.generator.generate(spec)
+        # Tell speculative calls apart in the job's call log
+        calls = candidate.get("llm_calls", [])
+        candidate["llm_calls"] = [
+            *calls[:known_calls],
+            *({**call, "speculative": True} for call in calls[known_calls:]),
+        ]
+        if not candidate.get("code"):
+            return candidate
+
+        spec.update(candidate)
+        for node in (self.executor.execute, self.verifier.verify):
+            update = await node(spec)
+            spec.update(update)
+            candidate.update(update)
+        return candidate
+
+    def _passed(self, state: dict[str, Any]) -> bool:
+        result = StepResult.coerce(state.get("execution_result"))
+        return result is not None and result.passed
+
+    def _accept(self, state: dict[str, Any], candidate: dict[str, Any]) -> dict[str, Any]:
+        """Make the passing candidate the next attempt, recording the failed one."""
+        history = [AttemptRecord.coerce(e) for e in state.get("history", [])]
+        history.append(attempt_record({**state, "critique": None}))
+        return {**candidate, "history": history, "critique": None, "critique_source": None}
+
+    def _with_usage(
+        self,
+        state: dict[str, Any],
+        update: dict[str, Any],
+        candidate: dict[str, Any] | None,
+    ) -> dict[str, Any]:
+        """The critique update, also counting a finished candidate's LLM usage."""
+        if candidate is None:
+            return update
+        known_calls = len(state.get("llm_calls", []))
+        wasted = candidate.get("tokens_used", 0) - state.get("tokens_used", 0)
+        if wasted <= 0:
+            return update
+        _stats["tokens_wasted"] += wasted
+        return {
+            **update,
+            "tokens_used": update.get("tokens_used", state.get("tokens_used", 0)) + wasted,
+            "llm_calls": [
+                *update.get("llm_calls", state.get("llm_calls", [])),
+                *candidate["llm_calls"][known_calls:],
+            ],
+        }
+
+    def should_continue(self, state: dict[str, Any]) -> str:
+        """
+        Determine the next step after the critique.
+
+        Returns:
+            "success" if a provisional candidate passed
+            "retry" to go on with the critique-informed retry
+        """
+        if self._passed(state):
+            return "success"
+        return "retry"
@@ -0,0 +1,91 @@
+"""
+Stagnation Detection
+====================
+
+Fingerprints reflexion attempts so the loop can tell when it is going
+in circles:
+
+- the code fingerprint ignores comments and formatting, so a "fix" that
+  only reflows the program counts as the same code
+- the run fingerprint adds everything else an execution depends on, so a
+  result is only reused for the same code run the same way
+- the error signature identifies "the same failure" across attempts
+
+When fingerprints repeat, the loop escalates its strategy one level at
+a time and stops once every level has been tried.
+"""
+
+import ast
+import hashlib
+import re
+from typing import Any
+
+from agent_sandbox.orchestrator.state import StepResult
+from agent_sandbox.sandbox.tracebacks import parse_traceback
+
+# Escalation levels, in order
+NORMAL = 0
+HIGH_TEMPERATURE = 1  # Sample more diverse fixes
+RETHINK = 2  # Ask for a different approach instead of a patch
+STRONGER_MODEL = 3  # Only when ESCALATION_MODEL is configured
+
+ESCALATION_NAMES = {
+    NORMAL: "normal",
+    HIGH_TEMPERATURE: "high_temperature",
+    RETHINK: "rethink",
+    STRONGER_MODEL: "stronger_model",
+}
+
+
+def code_fingerprint(code: str) -> str:
+    """
+    Hash of the program's syntax tree.
+
+    Falls back to whitespace-normalized source for code that doesn't parse.
+    """
+    try:
+        canonical = ast.dump(ast.parse(code), annotate_fields=False)
+    except (SyntaxError, ValueError):
+        canonical = re.sub(r"\s+", " ", code).strip()
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+def run_fingerprint(
+    code: str,
+    dependencies: list[str],
+    timeout_seconds: float,
+    test_code: str | None = None,
+    priority: list[str] | None = None,
+) -> str:
+    """Hash of an execution's inputs: code, dependencies, timeout and test harness."""
+    parts = [
+        code_fingerprint(code),
+        ",".join(sorted(dependencies)),
+        repr(timeout_seconds),
+        test_code or "",
+        ",".join(priority or []),
+    ]
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()[:16]
+
+
+def error_signature(result: StepResult | dict[str, Any] | None) -> str:
+    """Identify an execution outcome independent of volatile details."""
+    result = StepResult.coerce(result)
+    if result is None:
+        return "none"
+    if result.timed_out:
+        return "timeout"
+    stderr = result.stderr
+    if result.exit_code == 0 and not stderr:
+        return "ok"
+    parsed = parse_traceback(stderr)
+    if parsed is not None:
+        return parsed.signature
+    # No traceback (e.g. a test summary): the output itself identifies the failure
+    digest = hashlib.sha256(re.sub(r"\s+", " ", stderr).strip().encode()).hexdigest()[:8]
+    return f"exit:{result.exit_code}:{digest}"
+
+
+def max_escalation(escalation_model: str | None) -> int:
+    """Highest escalation level available with the current settings."""
+    return STRONGER_MODEL if escalation_model else RETHINK
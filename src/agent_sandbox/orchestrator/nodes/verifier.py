@@ -0,0 +1,73 @@
+"""
+Verifier Node
+=============
+
+Turns the test harness output of an execution into per-test results.
+
+The executor runs the program and its tests in a single sandbox
+invocation (see ``sandbox/harness.py``); this node splits the results
+line off the program output and, when tests fail, replaces the raw
+output in ``stderr`` with a summary of the failing tests so the critic
+and the next generation can target them.
+"""
+
+from dataclasses import replace
+from typing import Any
+
+import structlog
+
+from agent_sandbox.orchestrator.state import StepResult
+from agent_sandbox.sandbox.harness import parse_harness_output, summarize
+
+logger = structlog.get_logger()
+
+
+class VerifierNode:
+    """Parses test results out of a harness execution."""
+
+    async def verify(self, state: dict[str, Any]) -> dict[str, Any]:
+        """
+        Extract test results from the latest execution.
+
+        Args:
+            state: Current agent state
+
+        Returns:
+            Updated execution result, test results and failing test names
+        """
+        if not state.get("test_code") or state.get("execution_reused", False):
+            return {}
+
+        result = StepResult.coerce(state.get("execution_result")) or StepResult()
+        parsed = parse_harness_output(result.stdout)
+        if parsed is None:
+            # The program crashed before the tests ran; the raw error is what matters
+            logger.info("Tests did not run", attempt=state.get("attempt", 1))
+            return {"test_results": []}
+
+        output, outcomes = parsed
+        previous = set(state.get("failing_tests", []))
+        # Tests skipped by fail-fast stay on the list for the next attempt
+        failing = [
+            o.name for o in outcomes if o.failed or (o.status == "skipped" and o.name in previous)
+        ]
+
+        if failing:
+            result = replace(
+                result, stdout=output, stderr=summarize(outcomes), exit_code=result.exit_code or 1
+            )
+        else:
+            result = replace(result, stdout=output, stderr="")
+
+        logger.info(
+            "Verified",
+            attempt=state.get("attempt", 1),
+            passed=sum(o.status == "passed" for o in outcomes),
+            failing=len(failing),
+        )
+
+        return {
+            "execution_result": result,
+            "test_results": [o.to_dict() for o in outcomes],
+            "failing_tests": failing,
+        }
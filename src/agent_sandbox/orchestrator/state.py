@@ -6,15 +6,181 @@ Defines the state that flows through the LangGraph workflow.
 This is the "memory" of the agent as it executes.
 """
 
-from collections.abc import Sequence
+from collections.abc import Mapping, Sequence
+from dataclasses import asdict, dataclass, fields, replace
 from datetime import datetime
-from typing import Annotated, Any
+from typing import Annotated, Any, TypedDict
 
 from langgraph.graph import add_messages
 from pydantic import BaseModel, Field
 
 from agent_sandbox.sandbox.models import ExecutionResult
 
+# Outputs longer than this are kept as their tail in history entries;
+# the latest result in ``execution_result`` is always complete
+HISTORY_OUTPUT_LIMIT = 8192
+
+
+@dataclass(slots=True, frozen=True)
+class StepResult:
+    """
+    Outcome of one sandbox execution, as carried in graph state.
+
+    Immutable, so nodes and history entries share one instance by
+    reference instead of copying its output.
+    """
+
+    exit_code: int = 1
+    stdout: str = ""
+    stderr: str = ""
+    timed_out: bool = False
+    execution_time_ms: float = 0.0
+    memory_used_mb: float = 0.0
+    status: str = "error"
+
+    @classmethod
+    def from_execution(cls, result: ExecutionResult) -> "StepResult":
+        return cls(
+            exit_code=result.exit_code,
+            stdout=result.stdout,
+            stderr=result.stderr,
+            timed_out=result.timed_out,
+            execution_time_ms=result.execution_time_ms,
+            memory_used_mb=result.memory_used_mb,
+            status=result.status.value,
+        )
+
+    @classmethod
+    def coerce(cls, value: Any) -> "StepResult | None":
+        """Accept a StepResult, an ExecutionResult or a result dict (older checkpoints)."""
+        if value is None or isinstance(value, StepResult):
+            return value
+        if isinstance(value, ExecutionResult):
+            return cls.from_execution(value)
+        if isinstance(value, Mapping):
+            return cls(**{f.name: value[f.name] for f in fields(cls) if f.name in value})
+        raise TypeError(f"Not an execution result: {type(value).__name__}")
+
+    @property
+    def passed(self) -> bool:
+        """Clean exit with nothing on stderr."""
+        return self.exit_code == 0 and not self.stderr and not self.timed_out
+
+    def clipped(self, limit: int = HISTORY_OUTPUT_LIMIT) -> "StepResult":
+        """This result, or a copy keeping only the tail of oversized outputs."""
+        if len(self.stdout) <= limit and len(self.stderr) <= limit:
+            return self
+        return replace(self, stdout=self.stdout[-limit:], stderr=self.stderr[-limit:])
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass(slots=True, frozen=True)
+class AttemptRecord:
+    """One finished attempt in ``history``; ``result`` references the attempt's StepResult."""
+
+    attempt: int
+    code: str
+    result: StepResult | None = None
+    critique: str | None = None
+    code_hash: str = ""
+    run_hash: str = ""  # Code plus dependencies, timeout and tests (see stagnation.py)
+    error_signature: str = ""
+
+    @classmethod
+    def coerce(cls, value: Any) -> "AttemptRecord":
+        """Accept an AttemptRecord or a history dict (older checkpoints)."""
+        if isinstance(value, AttemptRecord):
+            return value
+        return cls(
+            attempt=value.get("attempt", 0),
+            code=value.get("code", ""),
+            result=StepResult.coerce(value.get("execution_result")),
+            critique=value.get("critique"),
+            code_hash=value.get("code_hash", ""),
+            run_hash=value.get("run_hash", ""),
+            error_signature=value.get("error_signature", ""),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "attempt": self.attempt,
+            "code": self.code,
+            "execution_result": self.result.to_dict() if self.result else None,
+            "critique": self.critique,
+            "code_hash": self.code_hash,
+            "run_hash": self.run_hash,
+            "error_signature": self.error_signature,
+        }
+
+
+class GraphState(TypedDict, total=False):
+    """
+    Channel schema for the compiled LangGraph workflow.
+
+    Every key is its own channel, so a node's partial update is merged into
+    the state and a checkpoint only re-serializes the keys that changed.
+    Nodes may only return keys declared here.
+    """
+
+    # Input
+    task: str
+    mode: str
+    started_at: float
+
+    # Current solution
+    code: str
+    dependencies: list[str]
+    reasoning: str
+    confidence: float
+
+    # Execution
+    execution_result: StepResult | None
+    execution_reused: bool
+    run_hash: str
+
+    # Decomposition (see orchestrator/nodes/planner.py)
+    plan: dict[str, Any] | None
+
+    # Solution served from a similar task (see memory/semantic.py)
+    semantic_match: dict[str, Any] | None
+
+    # Verification (see sandbox/harness.py)
+    test_code: str | None
+    test_results: list[dict[str, Any]]
+    failing_tests: list[str]
+
+    # Reflexion
+    critique: str | None
+    critique_source: str | None
+    should_retry: bool
+
+    # Control flow
+    attempt: int
+    max_attempts: int
+    history: list[AttemptRecord]
+
+    # Budgets (see orchestrator/nodes/budget.py)
+    deadline: float | None
+    token_budget: int | None
+    tokens_used: int
+    llm_calls: list[dict[str, Any]]  # Per-call usage and latency
+    sandbox_timeout: float | None
+    deadline_exceeded: bool
+    budget_exhausted: bool
+
+    # Stagnation
+    escalation_level: int
+    stagnation_reason: str | None
+    attempts_saved: int
+    time_saved_ms: float
+
+    # Final status
+    completed: bool
+    success: bool
+    final_output: str | None
+
 
 class HistoryEntry(BaseModel):
     """A single entry in the agent's execution history."""
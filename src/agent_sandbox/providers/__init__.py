@@ -1,12 +1,50 @@
 """LLM Providers - unified interface for multiple backends."""
 
 from agent_sandbox.providers.base import LLMProvider, LLMResponse, ProviderConfig
+from agent_sandbox.providers.cache import ResponseCache, get_cache_stats, get_response_cache
+from agent_sandbox.providers.context import estimate_tokens, fit_sections, get_context_stats
 from agent_sandbox.providers.factory import create_provider, get_available_providers
+from agent_sandbox.providers.hedging import HedgingProvider, get_hedging_stats
+from agent_sandbox.providers.http import close_clients, create_client, get_http_stats
+from agent_sandbox.providers.jsonstream import JsonStreamParser, MalformedJSON
+from agent_sandbox.providers.ratelimit import RateLimiter, get_ratelimit_stats
+from agent_sandbox.providers.registry import close_providers, get_provider, get_registry_stats
+from agent_sandbox.providers.routing import RoutingProvider, get_routing_stats
+from agent_sandbox.providers.schema import get_schema_stats, output_schema
+from agent_sandbox.providers.singleflight import CoalescingProvider, get_coalescing_stats
+from agent_sandbox.providers.wrapper import CachingProvider, ProviderWrapper, RateLimitedProvider
 
 __all__ = [
+    "CachingProvider",
+    "CoalescingProvider",
+    "HedgingProvider",
+    "JsonStreamParser",
     "LLMProvider",
     "LLMResponse",
+    "MalformedJSON",
     "ProviderConfig",
+    "ProviderWrapper",
+    "RateLimitedProvider",
+    "RateLimiter",
+    "ResponseCache",
+    "RoutingProvider",
+    "close_clients",
+    "close_providers",
+    "create_client",
     "create_provider",
+    "estimate_tokens",
+    "fit_sections",
     "get_available_providers",
+    "get_cache_stats",
+    "get_coalescing_stats",
+    "get_context_stats",
+    "get_hedging_stats",
+    "get_http_stats",
+    "get_provider",
+    "get_ratelimit_stats",
+    "get_registry_stats",
+    "get_response_cache",
+    "get_routing_stats",
+    "get_schema_stats",
+    "output_schema",
 ]
@@ -1,10 +1,13 @@
+import json
 import time
-from collections.abc import AsyncIterator
+from collections.abc import AsyncGenerator, AsyncIterator
+from typing import Any
 
-import httpx
 import structlog
 
 from agent_sandbox.providers.base import LLMProvider, LLMResponse, ProviderConfig
+from agent_sandbox.providers.http import create_client
+from agent_sandbox.providers.schema import schema_instruction
 
 logger = structlog.get_logger()
 
@@ -29,7 +32,7 @@ class AnthropicProvider(LLMProvider):
 
     def __init__(self, config: ProviderConfig) -> None:
         super().__init__(config)
-        self.client = httpx.AsyncClient(
+        self.client = create_client(
             base_url=config.base_url or self.BASE_URL,
             timeout=config.timeout,
             headers={
@@ -57,7 +60,7 @@ class AnthropicProvider(LLMProvider):
                 "messages": [
                     {"role": "user", "content": user_prompt},
                 ],
-                "temperature": temperature or self.config.temperature,
+                "temperature": self.config.temperature if temperature is None else temperature,
                 "max_tokens": max_tokens or self.config.max_tokens,
             },
         )
@@ -92,19 +95,11 @@ class AnthropicProvider(LLMProvider):
         user_prompt: str,
         temperature: float | None = None,
         max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
     ) -> LLMResponse:
         """Generate JSON completion using Claude."""
-        # Claude doesn't have native JSON mode, use prompting
-        json_system = (
-            system_prompt
-            + """
-
-CRITICAL: You MUST respond with valid JSON only. No markdown code blocks, no explanation.
-Start your response with '{' and end with '}'. Nothing else."""
-        )
-
         return await self.generate(
-            system_prompt=json_system,
+            system_prompt=_json_system(system_prompt, schema),
             user_prompt=user_prompt,
             temperature=temperature,
             max_tokens=max_tokens,
@@ -117,6 +112,35 @@ Start your response with '{' and end with '}'. Nothing else."""
         temperature: float | None = None,
     ) -> AsyncIterator[str]:
         """Stream completion using Claude."""
+        async for text in self._stream_messages(
+            system_prompt, user_prompt, temperature, self.config.max_tokens
+        ):
+            yield text
+
+    async def stream_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
+    ) -> AsyncGenerator[str, None]:
+        """Stream JSON completion using Claude."""
+        async for text in self._stream_messages(
+            _json_system(system_prompt, schema),
+            user_prompt,
+            temperature,
+            max_tokens or self.config.max_tokens,
+        ):
+            yield text
+
+    async def _stream_messages(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None,
+        max_tokens: int,
+    ) -> AsyncIterator[str]:
         async with self.client.stream(
             "POST",
             "/messages",
@@ -126,16 +150,14 @@ Start your response with '{' and end with '}'. Nothing else."""
                 "messages": [
                     {"role": "user", "content": user_prompt},
                 ],
-                "temperature": temperature or self.config.temperature,
-                "max_tokens": self.config.max_tokens,
+                "temperature": self.config.temperature if temperature is None else temperature,
+                "max_tokens": max_tokens,
                 "stream": True,
             },
         ) as response:
             async for line in response.aiter_lines():
                 if line.startswith("data: "):
                     data = line[6:]
-                    import json
-
                     try:
                         event = json.loads(data)
                         if event.get("type") == "content_block_delta":
@@ -148,3 +170,17 @@ Start your response with '{' and end with '}'. Nothing else."""
     async def close(self):
         """Close the HTTP client."""
         await self.client.aclose()
+
+
+def _json_system(system_prompt: str, schema: dict[str, Any] | None) -> str:
+    """System prompt asking for JSON (Claude has no native JSON mode)."""
+    json_system = (
+        system_prompt
+        + """
+
+CRITICAL: You MUST respond with valid JSON only. No markdown code blocks, no explanation.
+Start your response with '{' and end with '}'. Nothing else."""
+    )
+    if schema is not None:
+        json_system += schema_instruction(schema)
+    return json_system
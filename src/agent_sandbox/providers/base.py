@@ -1,7 +1,7 @@
 """Provider base classes and types."""
 
 from abc import ABC, abstractmethod
-from collections.abc import AsyncIterator
+from collections.abc import AsyncGenerator, AsyncIterator
 from dataclasses import dataclass, field
 from typing import Any
 
@@ -33,6 +33,12 @@ class LLMResponse(BaseModel):
     total_tokens: int = 0
     finish_reason: str | None = None
     latency_ms: float = 0.0
+    cached: bool = False  # Served from the response cache; no tokens were spent
+    throttle_wait_ms: float = 0.0  # Queued for rate limits or backing off, not in latency_ms
+    retries: int = 0  # Transient failures retried before this response
+    coalesced: bool = False  # Shared a concurrent identical call; no tokens were spent
+    hedged: bool = False  # Answered by the hedge to a secondary provider
+    constrained: bool = False  # Decoding was constrained to the requested JSON schema
     raw: dict[str, Any] | None = None
 
 
@@ -64,18 +70,37 @@ class LLMProvider(ABC):
         user_prompt: str,
         temperature: float | None = None,
         max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
     ) -> LLMResponse:
-        """Generate JSON output."""
+        """
+        Generate JSON output.
+
+        ``schema`` is the expected output's JSON Schema (see
+        ``providers/schema.py``); providers that support it constrain
+        decoding to it, the others ignore it.
+        """
         pass
 
     @abstractmethod
-    async def stream(
+    def stream(
         self,
         system_prompt: str,
         user_prompt: str,
         temperature: float | None = None,
     ) -> AsyncIterator[str]:
-        """Stream completion tokens."""
+        """Stream completion tokens (implemented as an async generator)."""
+        pass
+
+    @abstractmethod
+    def stream_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
+    ) -> AsyncGenerator[str, None]:
+        """Stream JSON output, in the same JSON mode as ``generate_json``."""
         pass
 
     async def health_check(self) -> bool:
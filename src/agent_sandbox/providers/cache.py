@@ -0,0 +1,262 @@
+"""
+LLM Response Cache
+==================
+
+Exact-match cache for provider completions, so repeated tasks and
+benchmark reruns don't pay for identical calls twice.
+
+Two tiers:
+
+- memory: an LRU of the most recently used responses
+- disk: a SQLite file (WAL mode) shared across restarts, capped at
+  ``max_entries`` rows; the least recently used rows are evicted first
+
+Entries are keyed by a hash of (provider, model, method, prompts,
+temperature, max_tokens) and grouped in namespaces (``provider/model``),
+which can be invalidated on their own, e.g. after a model update.
+Entries older than the TTL are treated as misses and deleted.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+import structlog
+
+from agent_sandbox.config import Settings, get_settings
+from agent_sandbox.providers.base import LLMResponse
+
+log = structlog.get_logger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_namespace ON responses (namespace);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+# Process-wide cache counters (reported by /api/v1/stats)
+_stats = {
+    "memory_hits": 0,
+    "disk_hits": 0,
+    "misses": 0,
+    "stores": 0,
+    "evictions": 0,
+    "expired": 0,
+    "tokens_saved": 0,
+    "latency_saved_ms": 0.0,
+}
+
+
+def get_cache_stats() -> dict[str, Any]:
+    """Hit rate of the response cache and the tokens and latency it saved."""
+    hits = _stats["memory_hits"] + _stats["disk_hits"]
+    lookups = hits + _stats["misses"]
+    return {
+        **_stats,
+        "hits": hits,
+        "hit_rate": hits / lookups if lookups else 0.0,
+        "latency_saved_ms": round(_stats["latency_saved_ms"], 1),
+    }
+
+
+def cache_key(
+    provider: str,
+    model: str,
+    method: str,
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float,
+    max_tokens: int,
+    schema: dict[str, Any] | None = None,
+) -> str:
+    """Stable key for one completion request."""
+    parts = [provider, model, method, system_prompt, user_prompt, temperature, max_tokens]
+    if schema is not None:
+        # Appended only when set, so keys of schema-less calls stay the same
+        parts.append(schema)
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _record_hit(tier: str, response: LLMResponse) -> LLMResponse:
+    _stats[f"{tier}_hits"] += 1
+    _stats["tokens_saved"] += response.total_tokens
+    _stats["latency_saved_ms"] += response.latency_ms
+    return response
+
+
+class ResponseCache:
+    """In-memory LRU in front of a size-limited SQLite store."""
+
+    def __init__(
+        self,
+        path: str | Path = ".agent_cache/llm_responses.db",
+        *,
+        memory_entries: int = 256,
+        max_entries: int = 10_000,
+        ttl_seconds: float = 7 * 24 * 3600,
+    ) -> None:
+        self.path = str(path)
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory: OrderedDict[str, tuple[str, float, LLMResponse]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Opened on first use, so a cache that is never hit never creates a file
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def close(self) -> None:
+        """Close the database connection (it reopens on next use)."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _remember(self, key: str, namespace: str, created_at: float, response: LLMResponse) -> None:
+        self._memory[key] = (namespace, created_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Sync implementation (runs in a worker thread for the async API)
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> LLMResponse | None:
+        """Cached response for ``key``, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[1] <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    return _record_hit("memory", entry[2])
+                del self._memory[key]
+
+            row = self.conn.execute(
+                "SELECT namespace, response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                _stats["misses"] += 1
+                return None
+            namespace, payload, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                _stats["expired"] += 1
+                _stats["misses"] += 1
+                return None
+
+            self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            response = LLMResponse.model_validate_json(payload)
+            self._remember(key, namespace, created_at, response)
+            return _record_hit("disk", response)
+
+    def put(self, key: str, namespace: str, response: LLMResponse) -> None:
+        """Store ``response``, evicting the least recently used rows past the limit."""
+        now = time.time()
+        payload = response.model_dump_json(exclude={"raw"})
+        with self._lock, self.conn:
+            self._remember(key, namespace, now, response)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, namespace, payload, now, now),
+            )
+            _stats["stores"] += 1
+            (count,) = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if count > self.max_entries:
+                evicted = self.conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                ).rowcount
+                _stats["evictions"] += evicted
+
+    def invalidate(self, namespace: str | None = None) -> int:
+        """
+        Drop the entries of one namespace (``provider/model``), or all of them.
+
+        Returns:
+            Number of disk entries removed
+        """
+        with self._lock, self.conn:
+            for key in [k for k, e in self._memory.items() if namespace in (None, e[0])]:
+                del self._memory[key]
+            if namespace is None:
+                removed = self.conn.execute("DELETE FROM responses").rowcount
+            else:
+                removed = self.conn.execute(
+                    "DELETE FROM responses WHERE namespace = ?", (namespace,)
+                ).rowcount
+        log.info("Response cache invalidated", namespace=namespace or "*", removed=removed)
+        return removed
+
+    def size(self) -> dict[str, int]:
+        """Entries held in each tier."""
+        with self._lock:
+            (disk,) = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            return {"memory": len(self._memory), "disk": disk}
+
+    # ------------------------------------------------------------------
+    # Async API
+    # ------------------------------------------------------------------
+
+    async def aget(self, key: str) -> LLMResponse | None:
+        # Memory hits don't need a worker thread
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and time.time() - entry[1] <= self.ttl_seconds:
+                self._memory.move_to_end(key)
+                return _record_hit("memory", entry[2])
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, namespace: str, response: LLMResponse) -> None:
+        await asyncio.to_thread(self.put, key, namespace, response)
+
+    async def ainvalidate(self, namespace: str | None = None) -> int:
+        return await asyncio.to_thread(self.invalidate, namespace)
+
+
+_cache: ResponseCache | None = None
+
+
+def get_response_cache(settings: Settings | None = None) -> ResponseCache:
+    """The process-wide response cache, created on first use."""
+    global _cache
+    if _cache is None:
+        settings = settings or get_settings()
+        _cache = ResponseCache(
+            settings.llm_cache_path,
+            memory_entries=settings.llm_cache_memory_entries,
+            max_entries=settings.llm_cache_max_entries,
+            ttl_seconds=settings.llm_cache_ttl_hours * 3600,
+        )
+    return _cache
+
+
+def close_response_cache() -> None:
+    """Close the process-wide cache's database (call on shutdown)."""
+    if _cache is not None:
+        _cache.close()
@@ -0,0 +1,218 @@
+"""
+Prompt Context Budget
+=====================
+
+Fits prompt sections (code, error output, critiques, tests) into a
+per-provider token budget, trimming by relevance instead of slicing at
+a fixed character count:
+
+- error output keeps the exception line and the innermost traceback
+  frames; outer frames and program output go first
+- code keeps the lines around the failing line numbers and the
+  ``def``/``class``/``import`` lines that give them context
+- plain text keeps its beginning
+
+Sections are trimmed lowest priority first, so the latest critique or
+the traceback survive when older history has to go. Token counts come
+from a local estimator; no tokenizer is loaded.
+"""
+
+import re
+from dataclasses import dataclass
+
+from agent_sandbox.config import Settings
+from agent_sandbox.sandbox.tracebacks import parse_traceback
+
+# Prompt budgets per provider, well inside each backend's context window
+# so the completion still fits and time-to-first-token stays low
+PROVIDER_PROMPT_BUDGETS = {
+    "groq": 6000,
+    "cerebras": 6000,
+    "openrouter": 8000,
+    "ollama": 3000,
+    "openai": 12000,
+    "anthropic": 16000,
+    "google": 16000,
+}
+DEFAULT_PROMPT_BUDGET = 6000
+
+# A trimmed section keeps at least this much, so it never vanishes entirely
+MIN_SECTION_TOKENS = 48
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_SIGNATURE_RE = re.compile(r"^\s*(?:async\s+def|def|class|import|from)\b")
+
+_stats = {"prompts": 0, "trimmed": 0, "tokens_in": 0, "tokens_out": 0}
+
+
+def get_context_stats() -> dict[str, float]:
+    """How many prompts were trimmed and the prompt tokens saved."""
+    return {
+        "prompts": _stats["prompts"],
+        "trimmed": _stats["trimmed"],
+        "tokens_saved": _stats["tokens_in"] - _stats["tokens_out"],
+    }
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate BPE token count.
+
+    Counts word runs and punctuation, which tracks code tokenizers closely;
+    long identifiers are split roughly every 8 characters like BPE does.
+    """
+    return sum(1 + len(t) // 8 for t in _TOKEN_RE.findall(text))
+
+
+def prompt_budget(provider_type: str, override: int | None = None) -> int:
+    """Prompt token budget for a provider (``override`` wins when set)."""
+    return override or PROVIDER_PROMPT_BUDGETS.get(provider_type, DEFAULT_PROMPT_BUDGET)
+
+
+def _fit_lines(lines: list[str], scores: list[float], budget: int, unit: str = "lines") -> str:
+    """Keep the highest-scoring lines that fit, in original order, marking gaps."""
+    costs = [estimate_tokens(line) + 1 for line in lines]
+    keep: set[int] = set()
+    used = 0
+    for i in sorted(range(len(lines)), key=lambda i: -scores[i]):
+        if used + costs[i] > budget:
+            continue
+        keep.add(i)
+        used += costs[i]
+
+    out: list[str] = []
+    gap = 0
+    for i, line in enumerate(lines):
+        if i in keep:
+            if gap:
+                out.append(f"... ({gap} {unit} omitted)")
+                gap = 0
+            out.append(line)
+        else:
+            gap += 1
+    if gap:
+        out.append(f"... ({gap} {unit} omitted)")
+    return "\n".join(out)
+
+
+def trim_text(text: str, budget: int) -> str:
+    """Keep the beginning of ``text``."""
+    if estimate_tokens(text) <= budget:
+        return text
+    lines = text.splitlines()
+    return _fit_lines(lines, [-i for i in range(len(lines))], budget)
+
+
+def trim_error(error: str, budget: int) -> str:
+    """
+    Keep the exception and the innermost frames of an error output.
+
+    Without a traceback (e.g. a test summary), keeps the first lines,
+    which carry the summary, and then the last ones.
+    """
+    if estimate_tokens(error) <= budget:
+        return error
+    lines = error.splitlines()
+    n = len(lines)
+    if parse_traceback(error) is None:
+        scores: list[float] = [max(n - i, i) for i in range(n)]  # Both ends first
+        return _fit_lines(lines, scores, budget)
+
+    # The exception starts at the last unindented line
+    exception = max(i for i, line in enumerate(lines) if not line.startswith((" ", "\t")))
+    scores = []
+    for i, line in enumerate(lines):
+        score = float(i)  # Later lines are closer to the failure
+        if i >= exception:
+            score += 3 * n
+        elif line.startswith("Traceback (most recent call last)"):
+            score += 2 * n
+        scores.append(score)
+    return _fit_lines(lines, scores, budget)
+
+
+def trim_code(code: str, budget: int, focus: list[int] | tuple[int, ...] = ()) -> str:
+    """
+    Keep the code around ``focus`` (1-based line numbers).
+
+    Without focus lines, keeps the beginning of the program.
+    """
+    if estimate_tokens(code) <= budget:
+        return code
+    lines = code.splitlines()
+    scores = []
+    for i, line in enumerate(lines, 1):
+        score = -min(abs(i - f) for f in focus) if focus else -i
+        if _SIGNATURE_RE.match(line):
+            score += 10  # Structure stays readable even far from the failure
+        scores.append(float(score))
+    return _fit_lines(lines, scores, budget)
+
+
+def error_lines(error: str) -> list[int]:
+    """Line numbers of the generated program that appear in a traceback."""
+    parsed = parse_traceback(error)
+    if parsed is None:
+        return []
+    return [f.line for f in parsed.frames if f.is_user_code]
+
+
+@dataclass
+class Section:
+    """
+    One part of a prompt.
+
+    ``priority``: higher survives longer; ``kind`` picks the trimmer
+    ("text", "error" or "code"); ``required`` sections are never trimmed.
+    """
+
+    name: str
+    text: str
+    priority: int = 0
+    kind: str = "text"
+    focus: tuple[int, ...] = ()
+    required: bool = False
+
+
+def _trim(section: Section, budget: int) -> str:
+    if section.kind == "error":
+        return trim_error(section.text, budget)
+    if section.kind == "code":
+        return trim_code(section.text, budget, section.focus)
+    return trim_text(section.text, budget)
+
+
+def fit_sections(sections: list[Section], budget: int) -> dict[str, str]:
+    """
+    Trim sections until their estimated total fits ``budget``.
+
+    Returns:
+        Section name -> (possibly trimmed) text
+    """
+    sizes = {s.name: estimate_tokens(s.text) for s in sections}
+    total = sum(sizes.values())
+    fitted = {s.name: s.text for s in sections}
+
+    _stats["prompts"] += 1
+    _stats["tokens_in"] += total
+    if total > budget:
+        _stats["trimmed"] += 1
+        over = total - budget
+        for section in sorted(sections, key=lambda s: s.priority):
+            if over <= 0:
+                break
+            if section.required or sizes[section.name] <= MIN_SECTION_TOKENS:
+                continue
+            target = max(sizes[section.name] - over, MIN_SECTION_TOKENS)
+            fitted[section.name] = _trim(section, target)
+            size = estimate_tokens(fitted[section.name])
+            over -= sizes[section.name] - size
+            total -= sizes[section.name] - size
+    _stats["tokens_out"] += total
+    return fitted
+
+
+def section_budget(settings: Settings, *fixed: str) -> int:
+    """Tokens left for trimmable sections after the fixed prompt parts."""
+    budget = prompt_budget(settings.llm_provider, settings.prompt_token_budget)
+    return budget - sum(estimate_tokens(text) for text in fixed)
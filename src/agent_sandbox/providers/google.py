@@ -6,13 +6,16 @@ Google Gemini API provider.
 Great for multimodal tasks and large context windows.
 """
 
+import json
 import time
-from collections.abc import AsyncIterator
+from collections.abc import AsyncGenerator, AsyncIterator
+from typing import Any
 
-import httpx
 import structlog
 
 from agent_sandbox.providers.base import LLMProvider, LLMResponse, ProviderConfig
+from agent_sandbox.providers.http import create_client
+from agent_sandbox.providers.schema import schema_instruction
 
 logger = structlog.get_logger()
 
@@ -45,7 +48,7 @@ class GoogleProvider(LLMProvider):
 
     def __init__(self, config: ProviderConfig) -> None:
         super().__init__(config)
-        self.client = httpx.AsyncClient(
+        self.client = create_client(
             timeout=config.timeout,
         )
         self.api_key = config.api_key
@@ -71,7 +74,7 @@ class GoogleProvider(LLMProvider):
                 "systemInstruction": {"parts": [{"text": system_prompt}]},
                 "contents": [{"parts": [{"text": user_prompt}]}],
                 "generationConfig": {
-                    "temperature": temperature or self.config.temperature,
+                    "temperature": self.config.temperature if temperature is None else temperature,
                     "maxOutputTokens": max_tokens or self.config.max_tokens,
                 },
             },
@@ -110,17 +113,21 @@ class GoogleProvider(LLMProvider):
         user_prompt: str,
         temperature: float | None = None,
         max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
     ) -> LLMResponse:
         """Generate JSON completion using Gemini."""
         start_time = time.time()
 
+        if schema is not None:
+            system_prompt += schema_instruction(schema)
+
         response = await self.client.post(
             self._get_url(self.config.model),
             json={
                 "systemInstruction": {"parts": [{"text": system_prompt}]},
                 "contents": [{"parts": [{"text": user_prompt}]}],
                 "generationConfig": {
-                    "temperature": temperature or self.config.temperature,
+                    "temperature": self.config.temperature if temperature is None else temperature,
                     "maxOutputTokens": max_tokens or self.config.max_tokens,
                     "responseMimeType": "application/json",
                 },
@@ -159,21 +166,55 @@ class GoogleProvider(LLMProvider):
         temperature: float | None = None,
     ) -> AsyncIterator[str]:
         """Stream completion using Gemini."""
+        async for text in self._stream_content(
+            system_prompt,
+            user_prompt,
+            {
+                "temperature": self.config.temperature if temperature is None else temperature,
+                "maxOutputTokens": self.config.max_tokens,
+            },
+        ):
+            yield text
+
+    async def stream_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
+    ) -> AsyncGenerator[str, None]:
+        """Stream JSON completion using Gemini."""
+        if schema is not None:
+            system_prompt += schema_instruction(schema)
+
+        async for text in self._stream_content(
+            system_prompt,
+            user_prompt,
+            {
+                "temperature": self.config.temperature if temperature is None else temperature,
+                "maxOutputTokens": max_tokens or self.config.max_tokens,
+                "responseMimeType": "application/json",
+            },
+        ):
+            yield text
+
+    async def _stream_content(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        generation_config: dict[str, Any],
+    ) -> AsyncIterator[str]:
         async with self.client.stream(
             "POST",
             self._get_url(self.config.model, "streamGenerateContent"),
             json={
                 "systemInstruction": {"parts": [{"text": system_prompt}]},
                 "contents": [{"parts": [{"text": user_prompt}]}],
-                "generationConfig": {
-                    "temperature": temperature or self.config.temperature,
-                    "maxOutputTokens": self.config.max_tokens,
-                },
+                "generationConfig": generation_config,
             },
         ) as response:
             async for line in response.aiter_lines():
-                import json
-
                 try:
                     data = json.loads(line)
                     candidates = data.get("candidates", [])
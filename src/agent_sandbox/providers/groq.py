@@ -1,12 +1,15 @@
 """Groq provider - ultra fast inference."""
 
 import time
-from collections.abc import AsyncIterator
+from collections.abc import AsyncGenerator, AsyncIterator
+from typing import Any
 
 import structlog
 from groq import AsyncGroq
 
 from agent_sandbox.providers.base import LLMProvider, LLMResponse, ProviderConfig
+from agent_sandbox.providers.http import get_shared_client
+from agent_sandbox.providers.schema import response_format, schema_rejected, use_schema
 
 log = structlog.get_logger()
 
@@ -27,7 +30,8 @@ class GroqProvider(LLMProvider):
         self.client = AsyncGroq(
             api_key=config.api_key,
             timeout=config.timeout,
-            max_retries=config.max_retries,
+            max_retries=0,  # RateLimitedProvider retries, with shared backoff
+            http_client=get_shared_client("groq"),
         )
 
     async def generate(
@@ -45,7 +49,7 @@ class GroqProvider(LLMProvider):
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
-            temperature=temperature or self.config.temperature,
+            temperature=self.config.temperature if temperature is None else temperature,
             max_tokens=max_tokens or self.config.max_tokens,
         )
 
@@ -66,18 +70,12 @@ class GroqProvider(LLMProvider):
         user_prompt: str,
         temperature: float | None = None,
         max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
     ) -> LLMResponse:
         t0 = time.time()
 
-        resp = await self.client.chat.completions.create(
-            model=self.config.model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=temperature or self.config.temperature,
-            max_tokens=max_tokens or self.config.max_tokens,
-            response_format={"type": "json_object"},
+        resp, constrained = await self._create_json(
+            system_prompt, user_prompt, temperature, max_tokens, schema
         )
 
         return LLMResponse(
@@ -89,6 +87,7 @@ class GroqProvider(LLMProvider):
             total_tokens=resp.usage.total_tokens if resp.usage else 0,
             finish_reason=resp.choices[0].finish_reason,
             latency_ms=(time.time() - t0) * 1000,
+            constrained=constrained,
         )
 
     async def stream(
@@ -103,10 +102,65 @@ class GroqProvider(LLMProvider):
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
-            temperature=temperature or self.config.temperature,
+            temperature=self.config.temperature if temperature is None else temperature,
             max_tokens=self.config.max_tokens,
             stream=True,
         )
         async for chunk in stream:
             if chunk.choices[0].delta.content:
                 yield chunk.choices[0].delta.content
+
+    async def stream_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
+    ) -> AsyncGenerator[str, None]:
+        stream, _ = await self._create_json(
+            system_prompt, user_prompt, temperature, max_tokens, schema, stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def _create_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None,
+        max_tokens: int | None,
+        schema: dict[str, Any] | None,
+        stream: bool = False,
+    ) -> tuple[Any, bool]:
+        """
+        Create a JSON mode completion, constrained to ``schema`` if the model takes it.
+
+        Returns:
+            (completion, or chunk stream if ``stream``, whether decoding was constrained)
+        """
+        request: dict[str, Any] = {
+            "model": self.config.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            "temperature": self.config.temperature if temperature is None else temperature,
+            "max_tokens": max_tokens or self.config.max_tokens,
+            "stream": stream,
+        }
+        # Only some Groq models take json_schema; the others are remembered
+        constrained = use_schema(self.name, self.config.model, schema)
+        try:
+            response = await self.client.chat.completions.create(
+                **request, response_format=response_format(schema if constrained else None)
+            )
+        except Exception as e:
+            if not (constrained and schema_rejected(self.name, self.config.model, e)):
+                raise
+            response = await self.client.chat.completions.create(
+                **request, response_format=response_format(None)
+            )
+            return response, False
+        return response, constrained
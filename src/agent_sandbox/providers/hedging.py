@@ -0,0 +1,271 @@
+"""
+Hedged Requests
+===============
+
+Cuts the latency tail of provider calls: when the primary provider
+hasn't answered within its usual time, the same request goes to a
+secondary provider/model as well, and whichever answers first wins; the
+other call is cancelled.
+
+- "usual time" is the primary's observed p95 latency (``LLM_HEDGE_PERCENTILE``),
+  read from a latency histogram kept per provider/model from every call
+- until a provider has ``MIN_SAMPLES`` latencies there is no hedging
+- each job has a hedge budget (``LLM_HEDGE_BUDGET_TOKENS``) that caps the
+  extra tokens hedges may spend; a hedge is charged its prompt, which is
+  roughly what the cancelled loser of the race costs
+
+Only ``generate``/``generate_json`` are hedged; streams go to the primary.
+"""
+
+import asyncio
+import math
+import time
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar, Token
+from typing import Any
+
+import structlog
+
+from agent_sandbox.providers.base import LLMProvider, LLMResponse
+from agent_sandbox.providers.context import estimate_tokens
+from agent_sandbox.providers.wrapper import ProviderWrapper
+
+log = structlog.get_logger()
+
+# Below this many observations a percentile is noise
+MIN_SAMPLES = 20
+
+# Process-wide hedging counters (reported by /api/v1/stats)
+_stats = {
+    "calls": 0,
+    "hedges": 0,
+    "hedge_wins": 0,
+    "budget_denied": 0,
+    "extra_tokens": 0,
+}
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram that slowly forgets.
+
+    Buckets grow by ``GROWTH`` from ``FIRST_BUCKET_MS`` (~6% resolution,
+    10 ms to several minutes). Every ``half_life`` observations all counts
+    are halved, so percentiles follow a backend whose speed changes.
+    """
+
+    FIRST_BUCKET_MS = 10.0
+    GROWTH = 1.12
+    BUCKETS = 128
+
+    def __init__(self, half_life: int = 500) -> None:
+        self.counts = [0.0] * self.BUCKETS
+        self.half_life = half_life
+        self.samples = 0
+        self._since_decay = 0
+
+    def observe(self, latency_ms: float) -> None:
+        ratio = max(latency_ms, self.FIRST_BUCKET_MS) / self.FIRST_BUCKET_MS
+        bucket = min(int(math.log(ratio, self.GROWTH)), self.BUCKETS - 1)
+        self.counts[bucket] += 1
+        self.samples += 1
+        self._since_decay += 1
+        if self._since_decay >= self.half_life:
+            self.counts = [c / 2 for c in self.counts]
+            self._since_decay = 0
+
+    def percentile(self, q: float) -> float | None:
+        """Upper bound (ms) of the bucket holding the ``q`` quantile, or None when empty."""
+        total = sum(self.counts)
+        if not total:
+            return None
+        seen = 0.0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= q * total:
+                return self.FIRST_BUCKET_MS * self.GROWTH ** (bucket + 1)
+        return self.FIRST_BUCKET_MS * self.GROWTH**self.BUCKETS
+
+
+_histograms: dict[str, LatencyHistogram] = {}
+
+
+def latency_histogram(provider: LLMProvider) -> LatencyHistogram:
+    """The shared histogram of ``provider``'s backend and model."""
+    key = f"{provider.name}/{provider.config.model}"
+    if key not in _histograms:
+        _histograms[key] = LatencyHistogram()
+    return _histograms[key]
+
+
+def get_hedging_stats() -> dict[str, Any]:
+    """Hedges issued and won, their extra spend, and latency percentiles per provider."""
+    hedges = _stats["hedges"]
+    return {
+        **_stats,
+        "hedge_rate": hedges / _stats["calls"] if _stats["calls"] else 0.0,
+        "hedge_win_rate": _stats["hedge_wins"] / hedges if hedges else 0.0,
+        "latency_ms": {
+            key: {
+                "samples": h.samples,
+                **{f"p{q}": round(h.percentile(q / 100) or 0.0, 1) for q in (50, 95, 99)},
+            }
+            for key, h in _histograms.items()
+        },
+    }
+
+
+class HedgeBudget:
+    """Extra tokens one job's hedges may spend."""
+
+    def __init__(self, tokens: int) -> None:
+        self.remaining = tokens
+
+    def spend(self, tokens: int) -> bool:
+        """Take ``tokens`` if they fit."""
+        if tokens > self.remaining:
+            return False
+        self.remaining -= tokens
+        return True
+
+
+# The running job's budget; calls outside a job (no budget) may always hedge
+_budget: ContextVar[HedgeBudget | None] = ContextVar("hedge_budget", default=None)
+
+
+def start_hedge_budget(tokens: int) -> Token:
+    """Give the current job (and the tasks it starts) a fresh hedge budget."""
+    return _budget.set(HedgeBudget(tokens))
+
+
+def end_hedge_budget(token: Token) -> None:
+    _budget.reset(token)
+
+
+class HedgingProvider(ProviderWrapper):
+    """
+    Sends a slow call to ``secondary`` as well; the first answer wins.
+
+    ``secondary`` may be the same backend and model (a plain duplicate
+    request) or a different one.
+    """
+
+    def __init__(
+        self,
+        primary: LLMProvider,
+        secondary: LLMProvider,
+        percentile: float = 0.95,
+        min_delay: float = 0.05,
+    ) -> None:
+        super().__init__(primary)
+        self.secondary = secondary
+        self.percentile = percentile
+        self.min_delay = min_delay
+
+    def hedge_delay(self) -> float | None:
+        """Seconds to wait for the primary before hedging, or None to never hedge."""
+        histogram = latency_histogram(self.inner)
+        if histogram.samples < MIN_SAMPLES:
+            return None
+        ms = histogram.percentile(self.percentile)
+        if ms is None:
+            return None
+        return max(ms / 1000, self.min_delay)
+
+    @staticmethod
+    async def _timed(provider: LLMProvider, call: Awaitable[LLMResponse]) -> LLMResponse:
+        t0 = time.perf_counter()
+        response = await call
+        latency_histogram(provider).observe((time.perf_counter() - t0) * 1000)
+        return response
+
+    async def _hedged(
+        self,
+        method: str,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None,
+        max_tokens: int | None,
+        **kwargs: Any,
+    ) -> LLMResponse:
+        def start(provider: LLMProvider) -> asyncio.Task[LLMResponse]:
+            call: Callable[..., Awaitable[LLMResponse]] = getattr(provider, method)
+            return asyncio.create_task(
+                self._timed(
+                    provider, call(system_prompt, user_prompt, temperature, max_tokens, **kwargs)
+                )
+            )
+
+        _stats["calls"] += 1
+        delay = self.hedge_delay()
+        t0 = time.perf_counter()
+        primary = start(self.inner)
+        tasks = {primary}
+        try:
+            if delay is None:
+                return await primary
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+
+            cost = estimate_tokens(system_prompt) + estimate_tokens(user_prompt)
+            budget = _budget.get()
+            if budget is not None and not budget.spend(cost):
+                _stats["budget_denied"] += 1
+                return await primary
+            _stats["hedges"] += 1
+            _stats["extra_tokens"] += cost
+            hedge = start(self.secondary)
+            tasks.add(hedge)
+
+            # First successful answer wins; a failed call leaves the race to the other
+            winner = None
+            pending = set(tasks)
+            while winner is None and pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((t for t in done if t.exception() is None), None)
+            if winner is None:
+                error = primary.exception()
+                assert error is not None  # Every task finished and none succeeded
+                raise error
+
+            loser = hedge if winner is primary else primary
+            if loser is primary and not primary.done():
+                # The cancelled primary took at least this long; keep it in its p95
+                latency_histogram(self.inner).observe((time.perf_counter() - t0) * 1000)
+            if winner is hedge:
+                _stats["hedge_wins"] += 1
+            log.debug(
+                "Hedged call",
+                provider=self.name,
+                secondary=f"{self.secondary.name}/{self.secondary.config.model}",
+                delay_ms=round(delay * 1000),
+                winner="secondary" if winner is hedge else "primary",
+            )
+            response = winner.result()
+            return response.model_copy(update={"hedged": True}) if winner is hedge else response
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def generate(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+    ) -> LLMResponse:
+        return await self._hedged("generate", system_prompt, user_prompt, temperature, max_tokens)
+
+    async def generate_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
+    ) -> LLMResponse:
+        return await self._hedged(
+            "generate_json", system_prompt, user_prompt, temperature, max_tokens, schema=schema
+        )
@@ -0,0 +1,146 @@
+"""
+Pooled HTTP Clients
+===================
+
+Every provider talks to its backend through an ``httpx.AsyncClient``
+built here, so all of them get the same connection policy:
+
+- HTTP/2 when ``h2`` is installed (one multiplexed connection carries
+  concurrent calls), HTTP/1.1 keep-alive otherwise
+- bounded pools (``HTTP_MAX_CONNECTIONS`` / ``HTTP_MAX_KEEPALIVE``) with
+  idle connections kept for ``HTTP_KEEPALIVE_SECONDS``
+
+SDK-based providers (Groq, OpenAI, Cerebras) share one client per
+backend, since the SDK sends credentials per request; httpx-based
+providers carry credentials in client headers and get their own. An SDK
+built on its own httpx fork (recent OpenAI releases use ``httpx2``)
+passes its client class, which takes the same pool settings and hooks.
+
+Each client traces its connections, so the stats show how many requests
+reused a warm connection instead of paying for TCP + TLS setup.
+"""
+
+import importlib.util
+from collections.abc import Callable
+from typing import Any, TypeVar, overload
+
+import httpx
+import structlog
+
+from agent_sandbox.config import get_settings
+
+log = structlog.get_logger()
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+ClientT = TypeVar("ClientT")
+
+_clients: dict[str, Any] = {}
+
+# Process-wide connection counters (reported by /api/v1/stats)
+_stats = {
+    "clients": 0,
+    "requests": 0,
+    "https_requests": 0,
+    "connections": 0,
+    "tls_handshakes": 0,
+}
+
+
+def get_http_stats() -> dict[str, Any]:
+    """Requests sent, connections opened and the TLS handshakes reuse avoided."""
+    requests = _stats["requests"]
+    return {
+        **_stats,
+        "shared_clients": len(_clients),
+        "http2": HTTP2_AVAILABLE and get_settings().http2_enabled,
+        "connection_reuse_rate": 1 - _stats["connections"] / requests if requests else 0.0,
+        "tls_handshakes_avoided": max(_stats["https_requests"] - _stats["tls_handshakes"], 0),
+    }
+
+
+async def _trace(event: str, info: dict[str, Any]) -> None:  # noqa: ARG001
+    """httpcore trace hook: count connections actually opened."""
+    if event == "connection.connect_tcp.complete":
+        _stats["connections"] += 1
+    elif event == "connection.start_tls.complete":
+        _stats["tls_handshakes"] += 1
+
+
+async def _on_request(request: httpx.Request) -> None:
+    _stats["requests"] += 1
+    if request.url.scheme == "https":
+        _stats["https_requests"] += 1
+    caller_trace = request.extensions.get("trace")
+    if caller_trace is None:
+        request.extensions["trace"] = _trace
+        return
+
+    async def trace(event: str, info: dict[str, Any]) -> None:
+        await _trace(event, info)
+        await caller_trace(event, info)
+
+    request.extensions["trace"] = trace
+
+
+@overload
+def create_client(*, client_class: Callable[..., ClientT], **kwargs: Any) -> ClientT: ...
+
+
+@overload
+def create_client(**kwargs: Any) -> httpx.AsyncClient: ...
+
+
+def create_client(*, client_class: Callable[..., Any] = httpx.AsyncClient, **kwargs: Any) -> Any:
+    """
+    A pooled, instrumented ``httpx.AsyncClient`` (or ``client_class``).
+
+    Keyword arguments (``base_url``, ``headers``, ``timeout``...) are
+    passed through to httpx.
+    """
+    settings = get_settings()
+    http2 = settings.http2_enabled and HTTP2_AVAILABLE
+    if settings.http2_enabled and not HTTP2_AVAILABLE:
+        log.debug("h2 not installed, using HTTP/1.1 keep-alive")
+    _stats["clients"] += 1
+    return client_class(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive,
+            keepalive_expiry=settings.http_keepalive_seconds,
+        ),
+        event_hooks={"request": [_on_request]},
+        **kwargs,
+    )
+
+
+@overload
+def get_shared_client(
+    backend: str, *, client_class: Callable[..., ClientT], **kwargs: Any
+) -> ClientT: ...
+
+
+@overload
+def get_shared_client(backend: str, **kwargs: Any) -> httpx.AsyncClient: ...
+
+
+def get_shared_client(
+    backend: str, *, client_class: Callable[..., Any] = httpx.AsyncClient, **kwargs: Any
+) -> Any:
+    """The process-wide client for ``backend``, created on first use."""
+    client = _clients.get(backend)
+    if client is None or client.is_closed:
+        client = create_client(client_class=client_class, **kwargs)
+        _clients[backend] = client
+    return client
+
+
+async def close_clients() -> None:
+    """Close the shared clients (call on shutdown)."""
+    for backend, client in _clients.items():
+        try:
+            await client.aclose()
+        except Exception as e:
+            log.warning("Failed to close HTTP client", backend=backend, error=str(e))
+    _clients.clear()
@@ -0,0 +1,159 @@
+"""
+Incremental JSON Parsing
+========================
+
+Parses a streamed JSON object chunk by chunk and hands out each
+top-level field the moment its value closes, so a caller can act on
+``"code"`` while the model is still writing ``"reasoning"``.
+
+It also notices broken output early: prose before the object ("Here is
+the code: ..."), a missing colon or comma, or a bad scalar raise
+``MalformedJSON`` at the first offending character instead of after
+``max_tokens`` of garbage. A leading Markdown fence (```` ```json ````)
+is skipped, since streams don't get the providers' JSON mode.
+
+Values of fields are decoded with ``json.loads`` (non-strict, so raw
+newlines inside code strings are accepted).
+"""
+
+import json
+from typing import Any
+
+_WHITESPACE = " \t\r\n"
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class MalformedJSON(ValueError):
+    """The stream can no longer become a JSON object."""
+
+
+class JsonStreamParser:
+    """Incremental parser for one top-level JSON object."""
+
+    def __init__(self) -> None:
+        self.text = ""
+        self.fields: dict[str, Any] = {}
+        self.done = False
+        self._pos = 0
+        self._state = "start"
+        self._key = ""
+        self._start = 0  # Where the current key or value began
+        self._stack: list[str] = []  # Closers expected inside a nested value
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> dict[str, Any]:
+        """Add a chunk; returns the fields completed by it."""
+        self.text += chunk
+        completed: dict[str, Any] = {}
+        text = self.text
+        i = self._pos
+        while i < len(text) and not self.done:
+            if self._step(text, i, completed):
+                i += 1
+        self._pos = i
+        return completed
+
+    def _fail(self, i: int, expected: str) -> MalformedJSON:
+        return MalformedJSON(f"expected {expected} at offset {i}, got {self.text[i]!r}")
+
+    def _decode(self, end: int) -> Any:
+        try:
+            return json.loads(self.text[self._start : end], strict=False)
+        except json.JSONDecodeError as e:
+            raise MalformedJSON(f"invalid value at offset {self._start}: {e.msg}") from e
+
+    def _step(self, text: str, i: int, completed: dict[str, Any]) -> bool:
+        """Consume ``text[i]``; returns False to look at the same character again."""
+        c = text[i]
+        state = self._state
+
+        if state in ("key", "string"):
+            if self._escape:
+                self._escape = False
+            elif c == "\\":
+                self._escape = True
+            elif c == '"':
+                if state == "key":
+                    self._key = self._decode(i + 1)
+                    self._state = "colon"
+                else:
+                    self._complete(i + 1, completed)
+            return True
+
+        if state == "nested":
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c in _CLOSERS:
+                self._stack.append(_CLOSERS[c])
+            elif c in "}]":
+                if c != self._stack.pop():
+                    raise self._fail(i, "a matching bracket")
+                if not self._stack:
+                    self._complete(i + 1, completed)
+            return True
+
+        if state == "scalar":
+            if c in _WHITESPACE or c in ",}":
+                self._complete(i, completed)
+                return False
+            return True
+
+        if state == "fence":
+            if c == "\n":
+                self._state = "start"
+            return True
+
+        if c in _WHITESPACE:
+            return True
+
+        if state == "start":
+            if c == "`":
+                self._state = "fence"
+            elif c == "{":
+                self._state = "key_or_end"
+            else:
+                raise self._fail(i, "'{'")
+        elif state in ("key_or_end", "key_start"):
+            if c == '"':
+                self._start = i
+                self._state = "key"
+            elif c == "}" and state == "key_or_end":
+                self.done = True
+            else:
+                raise self._fail(i, "a key")
+        elif state == "colon":
+            if c != ":":
+                raise self._fail(i, "':'")
+            self._state = "value"
+        elif state == "value":
+            self._start = i
+            if c == '"':
+                self._state = "string"
+            elif c in _CLOSERS:
+                self._stack = [_CLOSERS[c]]
+                self._in_string = False
+                self._state = "nested"
+            else:
+                self._state = "scalar"
+                return False
+        elif state == "comma_or_end":
+            if c == ",":
+                self._state = "key_start"
+            elif c == "}":
+                self.done = True
+            else:
+                raise self._fail(i, "',' or '}'")
+        return True
+
+    def _complete(self, end: int, completed: dict[str, Any]) -> None:
+        value = self._decode(end)
+        self.fields[self._key] = completed[self._key] = value
+        self._state = "comma_or_end"
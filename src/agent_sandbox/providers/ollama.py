@@ -6,13 +6,17 @@ Ollama provider for running local LLM models.
 Best for privacy-sensitive applications and offline use.
 """
 
+import json
 import time
-from collections.abc import AsyncIterator
+from collections.abc import AsyncGenerator, AsyncIterator
+from typing import Any
 
 import httpx
 import structlog
 
 from agent_sandbox.providers.base import LLMProvider, LLMResponse, ProviderConfig
+from agent_sandbox.providers.http import create_client
+from agent_sandbox.providers.schema import schema_rejected, use_schema
 
 logger = structlog.get_logger()
 
@@ -52,7 +56,7 @@ class OllamaProvider(LLMProvider):
 
     def __init__(self, config: ProviderConfig) -> None:
         super().__init__(config)
-        self.client = httpx.AsyncClient(
+        self.client = create_client(
             base_url=config.base_url or self.DEFAULT_URL,
             timeout=config.timeout * 2,  # Local models can be slower
         )
@@ -76,7 +80,7 @@ class OllamaProvider(LLMProvider):
                     {"role": "user", "content": user_prompt},
                 ],
                 "options": {
-                    "temperature": temperature or self.config.temperature,
+                    "temperature": self.config.temperature if temperature is None else temperature,
                     "num_predict": max_tokens or self.config.max_tokens,
                 },
                 "stream": False,
@@ -105,27 +109,36 @@ class OllamaProvider(LLMProvider):
         user_prompt: str,
         temperature: float | None = None,
         max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
     ) -> LLMResponse:
-        """Generate JSON completion using Ollama."""
+        """Generate JSON completion using Ollama (schema-constrained if given)."""
         start_time = time.time()
 
-        response = await self.client.post(
-            "/api/chat",
-            json={
-                "model": self.config.model,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                "format": "json",  # Enable JSON mode
-                "options": {
-                    "temperature": temperature or self.config.temperature,
-                    "num_predict": max_tokens or self.config.max_tokens,
-                },
-                "stream": False,
+        payload = {
+            "model": self.config.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            "options": {
+                "temperature": self.config.temperature if temperature is None else temperature,
+                "num_predict": max_tokens or self.config.max_tokens,
             },
-        )
-        response.raise_for_status()
+            "stream": False,
+        }
+        # "format" takes a JSON schema since Ollama 0.5; older servers only know "json"
+        constrained = use_schema(self.name, self.config.model, schema)
+        try:
+            response = await self.client.post(
+                "/api/chat", json={**payload, "format": schema if constrained else "json"}
+            )
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            if not (constrained and schema_rejected(self.name, self.config.model, e)):
+                raise
+            constrained = False
+            response = await self.client.post("/api/chat", json={**payload, "format": "json"})
+            response.raise_for_status()
         data = response.json()
 
         latency_ms = (time.time() - start_time) * 1000
@@ -140,6 +153,7 @@ class OllamaProvider(LLMProvider):
             finish_reason="stop" if data.get("done") else None,
             latency_ms=latency_ms,
             raw=data,
+            constrained=constrained,
         )
 
     async def stream(
@@ -149,25 +163,62 @@ class OllamaProvider(LLMProvider):
         temperature: float | None = None,
     ) -> AsyncIterator[str]:
         """Stream completion using Ollama."""
-        async with self.client.stream(
-            "POST",
-            "/api/chat",
-            json={
+        async for text in self._stream_chat(
+            {
                 "model": self.config.model,
                 "messages": [
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt},
                 ],
                 "options": {
-                    "temperature": temperature or self.config.temperature,
+                    "temperature": self.config.temperature if temperature is None else temperature,
                     "num_predict": self.config.max_tokens,
                 },
                 "stream": True,
+            }
+        ):
+            yield text
+
+    async def stream_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
+    ) -> AsyncGenerator[str, None]:
+        """Stream JSON completion using Ollama (schema-constrained if given)."""
+        payload = {
+            "model": self.config.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            "options": {
+                "temperature": self.config.temperature if temperature is None else temperature,
+                "num_predict": max_tokens or self.config.max_tokens,
             },
-        ) as response:
-            async for line in response.aiter_lines():
-                import json
+            "stream": True,
+        }
+        constrained = use_schema(self.name, self.config.model, schema)
+        try:
+            async for text in self._stream_chat(
+                {**payload, "format": schema if constrained else "json"}
+            ):
+                yield text
+        except httpx.HTTPStatusError as e:
+            # Raised before the first chunk, so nothing was yielded yet
+            if not (constrained and schema_rejected(self.name, self.config.model, e)):
+                raise
+            async for text in self._stream_chat({**payload, "format": "json"}):
+                yield text
 
+    async def _stream_chat(self, payload: dict[str, Any]) -> AsyncIterator[str]:
+        async with self.client.stream("POST", "/api/chat", json=payload) as response:
+            if response.is_error:
+                await response.aread()  # The error detail
+                response.raise_for_status()
+            async for line in response.aiter_lines():
                 try:
                     data = json.loads(line)
                     content = data.get("message", {}).get("content", "")
@@ -6,12 +6,15 @@ OpenAI API provider for GPT models.
 """
 
 import time
-from collections.abc import AsyncIterator
+from collections.abc import AsyncGenerator, AsyncIterator
+from typing import Any
 
 import structlog
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 
 from agent_sandbox.providers.base import LLMProvider, LLMResponse, ProviderConfig
+from agent_sandbox.providers.http import get_shared_client
+from agent_sandbox.providers.schema import response_format, schema_rejected, use_schema
 
 logger = structlog.get_logger()
 
@@ -48,7 +51,11 @@ class OpenAIProvider(LLMProvider):
             api_key=config.api_key,
             base_url=config.base_url,
             timeout=config.timeout,
-            max_retries=config.max_retries,
+            max_retries=0,  # RateLimitedProvider retries, with shared backoff
+            # The SDK's own client class: recent releases are built on httpx2, not httpx
+            http_client=get_shared_client(
+                f"openai:{config.base_url or ''}", client_class=DefaultAsyncHttpxClient
+            ),
         )
 
     async def generate(
@@ -67,7 +74,7 @@ class OpenAIProvider(LLMProvider):
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
-            temperature=temperature or self.config.temperature,
+            temperature=self.config.temperature if temperature is None else temperature,
             max_tokens=max_tokens or self.config.max_tokens,
         )
 
@@ -90,19 +97,13 @@ class OpenAIProvider(LLMProvider):
         user_prompt: str,
         temperature: float | None = None,
         max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
     ) -> LLMResponse:
-        """Generate JSON completion using OpenAI."""
+        """Generate JSON completion using OpenAI (schema-constrained if given)."""
         start_time = time.time()
 
-        response = await self.client.chat.completions.create(
-            model=self.config.model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=temperature or self.config.temperature,
-            max_tokens=max_tokens or self.config.max_tokens,
-            response_format={"type": "json_object"},
+        response, constrained = await self._create_json(
+            system_prompt, user_prompt, temperature, max_tokens, schema
         )
 
         latency_ms = (time.time() - start_time) * 1000
@@ -116,6 +117,7 @@ class OpenAIProvider(LLMProvider):
             total_tokens=response.usage.total_tokens if response.usage else 0,
             finish_reason=response.choices[0].finish_reason,
             latency_ms=latency_ms,
+            constrained=constrained,
         )
 
     async def stream(
@@ -131,7 +133,7 @@ class OpenAIProvider(LLMProvider):
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
-            temperature=temperature or self.config.temperature,
+            temperature=self.config.temperature if temperature is None else temperature,
             max_tokens=self.config.max_tokens,
             stream=True,
         )
@@ -139,3 +141,58 @@ class OpenAIProvider(LLMProvider):
         async for chunk in stream:
             if chunk.choices[0].delta.content:
                 yield chunk.choices[0].delta.content
+
+    async def stream_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
+    ) -> AsyncGenerator[str, None]:
+        """Stream JSON completion using OpenAI (schema-constrained if given)."""
+        stream, _ = await self._create_json(
+            system_prompt, user_prompt, temperature, max_tokens, schema, stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def _create_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None,
+        max_tokens: int | None,
+        schema: dict[str, Any] | None,
+        stream: bool = False,
+    ) -> tuple[Any, bool]:
+        """
+        Create a JSON mode completion, constrained to ``schema`` if the model takes it.
+
+        Returns:
+            (completion, or chunk stream if ``stream``, whether decoding was constrained)
+        """
+        request: dict[str, Any] = {
+            "model": self.config.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            "temperature": self.config.temperature if temperature is None else temperature,
+            "max_tokens": max_tokens or self.config.max_tokens,
+            "stream": stream,
+        }
+        constrained = use_schema(self.name, self.config.model, schema)
+        try:
+            response = await self.client.chat.completions.create(
+                **request, response_format=response_format(schema if constrained else None)
+            )
+        except Exception as e:
+            if not (constrained and schema_rejected(self.name, self.config.model, e)):
+                raise
+            response = await self.client.chat.completions.create(
+                **request, response_format=response_format(None)
+            )
+            return response, False
+        return response, constrained
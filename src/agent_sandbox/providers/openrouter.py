@@ -6,16 +6,21 @@ OpenRouter API provider for access to 100+ models from various providers.
 Great for testing different models or using premium models without individual API keys.
 """
 
+import json
 import time
-from collections.abc import AsyncIterator
+from collections.abc import AsyncGenerator, AsyncIterator
+from typing import Any
 
 import httpx
 import structlog
 
 from agent_sandbox.providers.base import LLMProvider, LLMResponse, ProviderConfig
+from agent_sandbox.providers.http import create_client
+from agent_sandbox.providers.schema import response_format, schema_rejected, use_schema
 
 logger = structlog.get_logger()
 
+JSON_INSTRUCTION = "\n\nYou MUST respond with valid JSON only."
 
 # Popular OpenRouter models for code
 OPENROUTER_MODELS = {
@@ -51,7 +56,7 @@ class OpenRouterProvider(LLMProvider):
 
     def __init__(self, config: ProviderConfig) -> None:
         super().__init__(config)
-        self.client = httpx.AsyncClient(
+        self.client = create_client(
             base_url=config.base_url or self.BASE_URL,
             timeout=config.timeout,
             headers={
@@ -81,7 +86,7 @@ class OpenRouterProvider(LLMProvider):
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt},
                 ],
-                "temperature": temperature or self.config.temperature,
+                "temperature": self.config.temperature if temperature is None else temperature,
                 "max_tokens": max_tokens or self.config.max_tokens,
             },
         )
@@ -110,27 +115,43 @@ class OpenRouterProvider(LLMProvider):
         user_prompt: str,
         temperature: float | None = None,
         max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
     ) -> LLMResponse:
         """Generate JSON completion using OpenRouter."""
         start_time = time.time()
 
         # Add JSON instruction to system prompt (not all models support response_format)
-        json_system = system_prompt + "\n\nYou MUST respond with valid JSON only."
-
-        response = await self.client.post(
-            "/chat/completions",
-            json={
-                "model": self.config.model,
-                "messages": [
-                    {"role": "system", "content": json_system},
-                    {"role": "user", "content": user_prompt},
-                ],
-                "temperature": temperature or self.config.temperature,
-                "max_tokens": max_tokens or self.config.max_tokens,
-                "response_format": {"type": "json_object"},
-            },
-        )
-        response.raise_for_status()
+        json_system = system_prompt + JSON_INSTRUCTION
+
+        payload = {
+            "model": self.config.model,
+            "messages": [
+                {"role": "system", "content": json_system},
+                {"role": "user", "content": user_prompt},
+            ],
+            "temperature": self.config.temperature if temperature is None else temperature,
+            "max_tokens": max_tokens or self.config.max_tokens,
+        }
+        # Models without structured outputs reject json_schema; they are remembered
+        constrained = use_schema(self.name, self.config.model, schema)
+        try:
+            response = await self.client.post(
+                "/chat/completions",
+                json={
+                    **payload,
+                    "response_format": response_format(schema if constrained else None),
+                },
+            )
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            if not (constrained and schema_rejected(self.name, self.config.model, e)):
+                raise
+            constrained = False
+            response = await self.client.post(
+                "/chat/completions",
+                json={**payload, "response_format": response_format(None)},
+            )
+            response.raise_for_status()
         data = response.json()
 
         latency_ms = (time.time() - start_time) * 1000
@@ -147,6 +168,7 @@ class OpenRouterProvider(LLMProvider):
             finish_reason=data["choices"][0].get("finish_reason"),
             latency_ms=latency_ms,
             raw=data,
+            constrained=constrained,
         )
 
     async def stream(
@@ -156,27 +178,64 @@ class OpenRouterProvider(LLMProvider):
         temperature: float | None = None,
     ) -> AsyncIterator[str]:
         """Stream completion using OpenRouter."""
-        async with self.client.stream(
-            "POST",
-            "/chat/completions",
-            json={
+        async for text in self._stream_chat(
+            {
                 "model": self.config.model,
                 "messages": [
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt},
                 ],
-                "temperature": temperature or self.config.temperature,
+                "temperature": self.config.temperature if temperature is None else temperature,
                 "max_tokens": self.config.max_tokens,
                 "stream": True,
-            },
-        ) as response:
+            }
+        ):
+            yield text
+
+    async def stream_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
+    ) -> AsyncGenerator[str, None]:
+        """Stream JSON completion using OpenRouter (schema-constrained if given)."""
+        payload = {
+            "model": self.config.model,
+            "messages": [
+                {"role": "system", "content": system_prompt + JSON_INSTRUCTION},
+                {"role": "user", "content": user_prompt},
+            ],
+            "temperature": self.config.temperature if temperature is None else temperature,
+            "max_tokens": max_tokens or self.config.max_tokens,
+            "stream": True,
+        }
+        constrained = use_schema(self.name, self.config.model, schema)
+        try:
+            async for text in self._stream_chat(
+                {**payload, "response_format": response_format(schema if constrained else None)}
+            ):
+                yield text
+        except httpx.HTTPStatusError as e:
+            # Raised before the first chunk, so nothing was yielded yet
+            if not (constrained and schema_rejected(self.name, self.config.model, e)):
+                raise
+            async for text in self._stream_chat(
+                {**payload, "response_format": response_format(None)}
+            ):
+                yield text
+
+    async def _stream_chat(self, payload: dict[str, Any]) -> AsyncIterator[str]:
+        async with self.client.stream("POST", "/chat/completions", json=payload) as response:
+            if response.is_error:
+                await response.aread()  # The error detail
+                response.raise_for_status()
             async for line in response.aiter_lines():
                 if line.startswith("data: "):
                     data = line[6:]
                     if data == "[DONE]":
                         break
-                    import json
-
                     chunk = json.loads(data)
                     if chunk["choices"][0]["delta"].get("content"):
                         yield chunk["choices"][0]["delta"]["content"]
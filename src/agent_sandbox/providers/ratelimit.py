@@ -0,0 +1,211 @@
+"""
+Rate Limits and Retries
+=======================
+
+Keeps provider calls inside the backend's rate limits and retries the
+ones that fail transiently, for every provider alike:
+
+- client-side token buckets per provider/model, one for requests/min
+  and one for tokens/min (``LLM_REQUESTS_PER_MINUTE`` /
+  ``LLM_TOKENS_PER_MINUTE``); a call near the limit queues until the
+  buckets refill instead of being sent and rejected
+- 429s, overloaded/5xx responses and connection errors are retried up
+  to ``ProviderConfig.max_retries`` times with full-jitter exponential
+  backoff, so concurrent callers spread out instead of retrying in step
+- a ``Retry-After`` from the backend pauses every queued call of that
+  provider until it expires, not just the call that got it
+
+Token usage is estimated up front (prompt plus completion limit) and
+settled with the real usage once the response arrives.
+"""
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+import httpx
+
+# Status codes worth retrying; 529 is Anthropic's "overloaded"
+RETRYABLE_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504, 529})
+
+# Process-wide rate limit counters (reported by /api/v1/stats)
+_stats = {
+    "calls": 0,
+    "throttled": 0,  # Calls that queued for the token buckets
+    "throttle_wait_ms": 0.0,
+    "rate_limited": 0,  # 429s received
+    "retries": 0,
+    "retry_wait_ms": 0.0,
+    "gave_up": 0,
+}
+
+
+def get_ratelimit_stats() -> dict[str, Any]:
+    """Time spent queueing for rate limits and retrying rejected calls."""
+    calls = _stats["calls"]
+    return {
+        **_stats,
+        "throttle_wait_ms": round(_stats["throttle_wait_ms"], 1),
+        "retry_wait_ms": round(_stats["retry_wait_ms"], 1),
+        "avg_throttle_wait_ms": round(_stats["throttle_wait_ms"] / calls, 1) if calls else 0.0,
+    }
+
+
+def error_status(exc: BaseException) -> int | None:
+    """HTTP status of a provider error (SDK or httpx), if it has one."""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Whether ``exc`` is a transient failure (rate limit, overload, network)."""
+    if error_status(exc) in RETRYABLE_STATUS:
+        return True
+    # SDK connection errors wrap the httpx error
+    return isinstance(exc, httpx.TransportError) or isinstance(exc.__cause__, httpx.TransportError)
+
+
+def retry_after(exc: BaseException) -> float | None:
+    """Seconds the backend asked us to wait (``Retry-After``), if it said."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if "retry-after-ms" in headers:
+            return max(float(headers["retry-after-ms"]) / 1000, 0.0)
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^attempt)]."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+class TokenBucket:
+    """Refills ``per_minute`` units evenly over a minute, holding at most a minute's worth."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` units are available."""
+        self._refill()
+        return max(min(amount, self.capacity) - self.level, 0.0) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def give_back(self, amount: float) -> None:
+        """Return (or, when negative, charge) units after the real usage is known."""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """
+    Request and token buckets for one provider/model.
+
+    Waiting calls queue in arrival order, so a large call near the limit
+    isn't starved by a stream of small ones.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None,
+    ) -> None:
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.paused_until = 0.0
+        self._lock: asyncio.Lock | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _queue(self) -> asyncio.Lock:
+        # Providers outlive event loops in tests and scripts; a lock is bound to one
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock, self._loop = asyncio.Lock(), loop
+        return self._lock
+
+    def wait_time(self, tokens: int) -> float:
+        wait = self.paused_until - time.monotonic()
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens))
+        return wait
+
+    async def acquire(self, tokens: int) -> float:
+        """Wait until a call of ``tokens`` fits, take it from the buckets; returns seconds waited."""
+        t0 = time.monotonic()
+        async with self._queue():
+            while (wait := self.wait_time(tokens)) > 0:
+                await asyncio.sleep(wait)
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None:
+                self.tokens.take(tokens)
+        waited = time.monotonic() - t0
+        _stats["calls"] += 1
+        if waited > 0.001:
+            _stats["throttled"] += 1
+            _stats["throttle_wait_ms"] += waited * 1000
+        return waited
+
+    def settle(self, reserved: int, used: int) -> None:
+        """Correct the token bucket once a call's real usage is known."""
+        if self.tokens is not None:
+            self.tokens.give_back(reserved - used)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every call back for ``seconds`` (the backend sent ``Retry-After``)."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+def retry_delay(
+    exc: BaseException,
+    retries: int,
+    max_retries: int,
+    limiter: RateLimiter,
+    base: float,
+    cap: float,
+) -> float | None:
+    """Seconds to wait before retrying after ``exc`` (``retries`` made so far), or None to give up."""
+    if not is_retryable(exc):
+        return None
+    if error_status(exc) == 429:
+        _stats["rate_limited"] += 1
+    after = retry_after(exc)
+    if retries >= max_retries or (after is not None and after > cap):
+        _stats["gave_up"] += 1
+        return None
+    if after is None:
+        delay = backoff_delay(retries, base, cap)
+    else:
+        limiter.pause(after)
+        # A little jitter on top, so the paused calls don't all fire at once
+        delay = after + random.uniform(0, base)
+    _stats["retries"] += 1
+    _stats["retry_wait_ms"] += delay * 1000
+    return delay
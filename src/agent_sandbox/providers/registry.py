@@ -0,0 +1,196 @@
+"""
+Provider registry - one provider (and HTTP client) per backend per process.
+
+Providers hold connection pools, so creating one per request means a new
+TLS handshake per request. Nodes look providers up here instead of
+calling ``create_provider`` directly. Their HTTP clients come from
+``providers/http.py``.
+
+Each provider is wrapped, innermost first, in:
+
+- ``RateLimitedProvider``: rate limits and retries
+- ``RoutingProvider`` (active provider, ``LLM_ROUTING_PROVIDERS``):
+  spreads calls over the extra backends
+- ``HedgingProvider`` (``LLM_HEDGING_ENABLED``): resends slow calls
+- ``CoalescingProvider`` (``LLM_COALESCING_ENABLED``): concurrent
+  identical calls share one request
+- ``CachingProvider`` (``LLM_CACHE_ENABLED``): on top, so cache hits
+  never wait for the rate limiter or start hedges
+"""
+
+import hashlib
+from typing import Any, cast, get_args
+
+import structlog
+
+from agent_sandbox.config import get_settings
+from agent_sandbox.providers.base import LLMProvider
+from agent_sandbox.providers.cache import close_response_cache, get_response_cache
+from agent_sandbox.providers.factory import ProviderType, create_provider
+from agent_sandbox.providers.hedging import HedgingProvider
+from agent_sandbox.providers.http import close_clients
+from agent_sandbox.providers.ratelimit import RateLimiter
+from agent_sandbox.providers.routing import RoutingProvider
+from agent_sandbox.providers.singleflight import CoalescingProvider
+from agent_sandbox.providers.wrapper import CachingProvider, RateLimitedProvider
+
+log = structlog.get_logger()
+
+_providers: dict[tuple[str, str, str | None, str], LLMProvider] = {}
+# Rate-limited providers without cache or hedging; hedges reuse them as secondaries
+_backends: dict[tuple[str, str, str | None, str], LLMProvider] = {}
+_stats = {"created": 0, "reused": 0}
+
+
+def _key(
+    provider_type: str, api_key: str, model: str | None, base_url: str | None
+) -> tuple[str, str, str | None, str]:
+    # Never keep the raw key around in the cache key
+    key_hash = hashlib.sha256(api_key.encode()).hexdigest()[:16]
+    return (provider_type, model or "", base_url, key_hash)
+
+
+def _backend(
+    provider_type: ProviderType,
+    api_key: str,
+    model: str | None,
+    base_url: str | None,
+) -> LLMProvider:
+    key = _key(provider_type, api_key, model, base_url)
+    provider = _backends.get(key)
+    if provider is None:
+        settings = get_settings()
+        provider = RateLimitedProvider(
+            create_provider(provider_type, api_key, model, base_url),
+            RateLimiter(settings.llm_requests_per_minute, settings.llm_tokens_per_minute),
+            retry_base_delay=settings.llm_retry_base_delay,
+            retry_max_delay=settings.llm_retry_max_delay,
+        )
+        _backends[key] = provider
+    return provider
+
+
+def _hedge_secondary(
+    provider_type: ProviderType,
+    api_key: str,
+    model: str | None,
+    base_url: str | None,
+) -> LLMProvider:
+    """The provider hedges of ``provider_type``/``model`` go to (``LLM_HEDGE_PROVIDER``/``_MODEL``)."""
+    settings = get_settings()
+    secondary = settings.llm_hedge_provider or provider_type
+    if secondary == provider_type:
+        return _backend(provider_type, api_key, settings.llm_hedge_model or model, base_url)
+    return _backend(
+        secondary,
+        settings.get_provider_api_key(secondary),
+        settings.llm_hedge_model or settings.get_provider_model(secondary),
+        settings.get_provider_base_url(secondary),
+    )
+
+
+def _routed(
+    provider_type: ProviderType,
+    api_key: str,
+    model: str | None,
+    base_url: str | None,
+) -> LLMProvider:
+    """The active provider plus the ``LLM_ROUTING_PROVIDERS`` backends behind one router."""
+    settings = get_settings()
+    primary = _backend(provider_type, api_key, model, base_url)
+    backends = [primary]
+    for entry in settings.llm_routing_providers.split(","):
+        name, _, routed_model = entry.strip().partition(":")
+        if not name:
+            continue
+        if name not in get_args(ProviderType):
+            log.warning("Skipping routing backend", backend=entry.strip(), error="unknown provider")
+            continue
+        backend_type = cast(ProviderType, name)
+        try:
+            backend = _backend(
+                backend_type,
+                settings.get_provider_api_key(backend_type),
+                routed_model or settings.get_provider_model(backend_type),
+                settings.get_provider_base_url(backend_type),
+            )
+        except ValueError as e:
+            log.warning("Skipping routing backend", backend=entry.strip(), error=str(e))
+            continue
+        if backend not in backends:
+            backends.append(backend)
+    if len(backends) == 1:
+        return primary
+    return RoutingProvider(
+        backends,
+        failure_threshold=settings.llm_circuit_failures,
+        cooldown_seconds=settings.llm_circuit_cooldown_seconds,
+    )
+
+
+def get_provider(
+    provider_type: ProviderType,
+    api_key: str,
+    model: str | None = None,
+    base_url: str | None = None,
+) -> LLMProvider:
+    """
+    Get the shared provider for a backend, creating it on first use.
+
+    Providers are keyed by (provider, model, base_url, api key), so
+    different models of the same backend get their own instance.
+    """
+    key = _key(provider_type, api_key, model, base_url)
+    provider = _providers.get(key)
+    if provider is None:
+        settings = get_settings()
+        active = provider_type == settings.llm_provider and model in (
+            None,
+            settings.get_provider_model(),
+        )
+        if settings.llm_routing_providers and active:
+            provider = _routed(provider_type, api_key, model, base_url)
+        else:
+            provider = _backend(provider_type, api_key, model, base_url)
+        if settings.llm_hedging_enabled:
+            provider = HedgingProvider(
+                provider,
+                _hedge_secondary(provider_type, api_key, model, base_url),
+                percentile=settings.llm_hedge_percentile,
+            )
+        if settings.llm_coalescing_enabled:
+            provider = CoalescingProvider(provider)
+        if settings.llm_cache_enabled:
+            provider = CachingProvider(
+                provider,
+                get_response_cache(settings),
+                max_temperature=settings.llm_cache_max_temperature,
+            )
+        _providers[key] = provider
+        _stats["created"] += 1
+    else:
+        _stats["reused"] += 1
+    return provider
+
+
+def get_registry_stats() -> dict[str, Any]:
+    """How many providers were created vs. served from the registry."""
+    return {"providers": len(_providers), **_stats}
+
+
+async def close_providers() -> None:
+    """Close every provider's HTTP client and the response cache (call on shutdown)."""
+    for provider in _backends.values():
+        close = getattr(provider, "close", None)
+        if close is None:
+            client = getattr(provider, "client", None)
+            close = getattr(client, "close", None) or getattr(client, "aclose", None)
+        if close is not None:
+            try:
+                await close()
+            except Exception as e:
+                log.warning("Failed to close provider", provider=provider.name, error=str(e))
+    _providers.clear()
+    _backends.clear()
+    await close_clients()
+    close_response_cache()
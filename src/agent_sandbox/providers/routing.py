@@ -0,0 +1,272 @@
+"""
+Latency-Aware Provider Routing
+==============================
+
+Spreads calls over several configured backends instead of pinning one
+(``LLM_ROUTING_PROVIDERS``), so one degraded provider doesn't degrade
+every job:
+
+- each backend keeps EWMAs of latency, error rate and tokens/s
+- a call goes to the healthy backend with the lowest expected time to a
+  successful answer (latency / (1 - error rate)); faster generation
+  (tokens/s) breaks ties. Backends without data are tried first, and
+  every ``EXPLORE_EVERY`` calls the least recently used one gets a call,
+  so a backend that recovered is noticed
+- a failure fails over to the next backend, unless the request itself
+  was rejected (400/422): that would fail on every backend, so it is
+  raised right away. Auth and not-found errors count against the backend
+  like transient ones, so a misconfigured backend's circuit opens
+- ``LLM_CIRCUIT_FAILURES`` consecutive failures open a backend's circuit:
+  it gets no calls for ``LLM_CIRCUIT_COOLDOWN_SECONDS`` (doubling while
+  it keeps failing), then a background probe (half-open) decides whether
+  it closes again
+"""
+
+import asyncio
+import time
+import weakref
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable
+from enum import Enum
+from typing import Any
+
+import structlog
+
+from agent_sandbox.providers.base import LLMProvider, LLMResponse
+from agent_sandbox.providers.ratelimit import error_status
+from agent_sandbox.providers.wrapper import ProviderWrapper
+
+log = structlog.get_logger()
+
+EWMA_ALPHA = 0.2  # Weight of the newest observation
+EXPLORE_EVERY = 20
+MAX_COOLDOWN_SECONDS = 600.0
+REQUEST_ERROR_STATUS = frozenset({400, 422})  # The request is at fault, not the backend
+
+# Process-wide routing counters (reported by /api/v1/stats)
+_stats = {"calls": 0, "failovers": 0, "explorations": 0, "circuit_opens": 0, "probes": 0}
+_routers: "weakref.WeakSet[RoutingProvider]" = weakref.WeakSet()
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"  # Healthy, gets calls
+    OPEN = "open"  # Failing, gets no calls until the cooldown ends
+    HALF_OPEN = "half_open"  # Cooldown over, a probe is deciding
+
+
+def _ewma(current: float | None, value: float) -> float:
+    return value if current is None else EWMA_ALPHA * value + (1 - EWMA_ALPHA) * current
+
+
+class Backend:
+    """One routed provider, its health and its circuit breaker."""
+
+    def __init__(self, provider: LLMProvider) -> None:
+        self.provider = provider
+        self.label = f"{provider.name}/{provider.config.model}"
+        self.latency_ms: float | None = None
+        self.error_rate = 0.0
+        self.tokens_per_s: float | None = None
+        self.calls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_used = 0.0
+        self.state = CircuitState.CLOSED
+        self.cooldown = 0.0
+        self.opened_at = 0.0
+
+    @property
+    def score(self) -> float:
+        """Expected milliseconds to a successful answer (lower is better)."""
+        if self.latency_ms is None:
+            return 0.0
+        return self.latency_ms / max(1 - self.error_rate, 0.01)
+
+    def record_success(self, response: LLMResponse, latency_ms: float) -> None:
+        self.calls += 1
+        self.consecutive_failures = 0
+        self.latency_ms = _ewma(self.latency_ms, latency_ms)
+        self.error_rate = _ewma(self.error_rate, 0.0)
+        if response.completion_tokens and latency_ms > 0:
+            self.tokens_per_s = _ewma(
+                self.tokens_per_s, response.completion_tokens / (latency_ms / 1000)
+            )
+
+    def record_failure(self) -> None:
+        self.calls += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.error_rate = _ewma(self.error_rate, 1.0)
+
+    def open(self, cooldown: float) -> None:
+        self.state = CircuitState.OPEN
+        self.cooldown = min(cooldown, MAX_COOLDOWN_SECONDS)
+        self.opened_at = time.monotonic()
+        _stats["circuit_opens"] += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "state": self.state.value,
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "tokens_per_s": round(self.tokens_per_s, 1) if self.tokens_per_s else None,
+            "score": round(self.score, 1),
+            "calls": self.calls,
+            "failures": self.failures,
+        }
+
+
+def get_routing_stats() -> dict[str, Any]:
+    """Routing decisions, failovers and each backend's health."""
+    return {**_stats, "routers": [router.stats() for router in _routers]}
+
+
+class RoutingProvider(ProviderWrapper):
+    """
+    Routes each call to the best healthy provider of ``providers``.
+
+    Behaves like the first provider for everything but completions
+    (``name``, ``config`` ...). Streams go to the best backend without
+    failover.
+    """
+
+    def __init__(
+        self,
+        providers: list[LLMProvider],
+        failure_threshold: int = 3,
+        cooldown_seconds: float = 30.0,
+    ) -> None:
+        super().__init__(providers[0])
+        self.backends = [Backend(p) for p in providers]
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._calls = 0
+        self._probes: set[asyncio.Task] = set()
+        _routers.add(self)
+
+    def _refresh(self) -> None:
+        """Start a probe for every open circuit whose cooldown is over."""
+        now = time.monotonic()
+        for backend in self.backends:
+            if backend.state is CircuitState.OPEN and now - backend.opened_at >= backend.cooldown:
+                backend.state = CircuitState.HALF_OPEN
+                task = asyncio.create_task(self._probe(backend))
+                self._probes.add(task)
+                task.add_done_callback(self._probes.discard)
+
+    async def _probe(self, backend: Backend) -> None:
+        _stats["probes"] += 1
+        try:
+            await backend.provider.generate("You are helpful.", "Say ok.", max_tokens=5)
+        except Exception as e:
+            backend.record_failure()
+            backend.open(backend.cooldown * 2)
+            log.info("Provider still failing", backend=backend.label, error=str(e)[:100])
+            return
+        # A 5-token answer says nothing about latency; only the circuit changes
+        backend.consecutive_failures = 0
+        backend.state = CircuitState.CLOSED
+        log.info("Provider recovered, circuit closed", backend=backend.label)
+
+    def ranked(self) -> list[Backend]:
+        """Backends in the order a call tries them."""
+        self._refresh()
+        healthy = [b for b in self.backends if b.state is CircuitState.CLOSED]
+        if not healthy:
+            # Everything is down: try the one that failed longest ago rather than nothing
+            return sorted(self.backends, key=lambda b: b.opened_at)[:1]
+        ranked = sorted(healthy, key=lambda b: (b.score, -(b.tokens_per_s or 0.0)))
+        self._calls += 1
+        if self._calls % EXPLORE_EVERY == 0 and len(ranked) > 1:
+            stale = min(ranked, key=lambda b: b.last_used)
+            if stale is not ranked[0]:
+                _stats["explorations"] += 1
+                ranked.remove(stale)
+                ranked.insert(0, stale)
+        return ranked
+
+    async def _routed(self, call: Callable[[LLMProvider], Awaitable[LLMResponse]]) -> LLMResponse:
+        _stats["calls"] += 1
+        error: Exception | None = None
+        for i, backend in enumerate(self.ranked()):
+            if i:
+                _stats["failovers"] += 1
+            backend.last_used = time.monotonic()
+            t0 = time.perf_counter()
+            try:
+                response = await call(backend.provider)
+            except Exception as e:
+                # Bad requests would fail on every backend; they say nothing about health
+                if error_status(e) in REQUEST_ERROR_STATUS:
+                    raise
+                error = e
+                backend.record_failure()
+                if (
+                    backend.state is CircuitState.CLOSED
+                    and backend.consecutive_failures >= self.failure_threshold
+                ):
+                    backend.open(self.cooldown_seconds)
+                    log.warning(
+                        "Provider circuit opened", backend=backend.label, error=str(e)[:100]
+                    )
+                continue
+            backend.record_success(response, (time.perf_counter() - t0) * 1000)
+            # A fallback to an open circuit that worked closes it
+            backend.state = CircuitState.CLOSED
+            return response
+        assert error is not None
+        raise error
+
+    async def generate(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+    ) -> LLMResponse:
+        return await self._routed(
+            lambda p: p.generate(system_prompt, user_prompt, temperature, max_tokens)
+        )
+
+    async def generate_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
+    ) -> LLMResponse:
+        return await self._routed(
+            lambda p: p.generate_json(
+                system_prompt, user_prompt, temperature, max_tokens, schema=schema
+            )
+        )
+
+    async def stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+    ) -> AsyncIterator[str]:
+        # Chunks may already be out when a stream fails, so there is no failover
+        backend = self.ranked()[0]
+        backend.last_used = time.monotonic()
+        async for chunk in backend.provider.stream(system_prompt, user_prompt, temperature):
+            yield chunk
+
+    async def stream_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
+    ) -> AsyncGenerator[str, None]:
+        backend = self.ranked()[0]
+        backend.last_used = time.monotonic()
+        async for chunk in backend.provider.stream_json(
+            system_prompt, user_prompt, temperature, max_tokens, schema=schema
+        ):
+            yield chunk
+
+    def stats(self) -> dict[str, Any]:
+        return {b.label: b.stats() for b in self.backends}
@@ -0,0 +1,137 @@
+"""
+Schema-Constrained Decoding
+===========================
+
+``generate_json`` accepts the JSON Schema of the expected output
+(``output_schema(AgentOutput)``). Providers that can constrain decoding
+to a schema (OpenAI and Groq ``json_schema`` response formats, Ollama's
+``format``) do so, which makes the output well-formed JSON of the right
+shape by construction. Providers without constrained decoding
+(Anthropic, Gemini) get the schema in the prompt instead.
+
+The schema sent is the Pydantic model's, made strict: every property
+required, no extra properties, and value constraints (lengths, ranges,
+patterns) dropped, since not every backend supports them. Pydantic still
+checks those on the way in.
+
+A model that rejects schemas is remembered and gets plain JSON mode from
+then on, so unsupported models cost one failed request, not one per call.
+"""
+
+import functools
+import json
+from typing import Any
+
+import structlog
+from pydantic import BaseModel
+
+from agent_sandbox.providers.ratelimit import error_status
+
+log = structlog.get_logger()
+
+# Keywords that constrain values rather than structure
+_VALUE_KEYWORDS = frozenset(
+    {
+        "default",
+        "minLength",
+        "maxLength",
+        "pattern",
+        "format",
+        "minimum",
+        "maximum",
+        "exclusiveMinimum",
+        "exclusiveMaximum",
+        "minItems",
+        "maxItems",
+    }
+)
+
+# Models that rejected a schema ("provider/model")
+_unsupported: set[str] = set()
+
+# Process-wide constrained-decoding counters (reported by /api/v1/stats)
+_stats = {
+    "requests": 0,  # Calls with a schema to providers that can constrain decoding
+    "constrained": 0,
+    "rejected": 0,  # Schemas a model refused (the call was repeated in JSON mode)
+}
+
+
+def get_schema_stats() -> dict[str, Any]:
+    """Schema-constrained requests and the models that don't support them."""
+    return {**_stats, "unsupported_models": sorted(_unsupported)}
+
+
+def _strict(node: Any) -> Any:
+    if isinstance(node, list):
+        return [_strict(v) for v in node]
+    if not isinstance(node, dict):
+        return node
+    strict: dict[str, Any] = {}
+    for key, value in node.items():
+        if key in ("properties", "$defs"):
+            # Names, not keywords: keep every entry
+            strict[key] = {name: _strict(v) for name, v in value.items()}
+        elif key not in _VALUE_KEYWORDS:
+            strict[key] = _strict(value)
+    if "properties" in strict:
+        strict["required"] = list(strict["properties"])
+        strict["additionalProperties"] = False
+    return strict
+
+
+@functools.cache
+def output_schema(model: type[BaseModel]) -> dict[str, Any]:
+    """Strict JSON Schema for ``model``'s output (shared; don't modify it)."""
+    schema: dict[str, Any] = _strict(model.model_json_schema())
+    return schema
+
+
+def response_format(schema: dict[str, Any] | None) -> Any:
+    """
+    OpenAI-style ``response_format`` constraining output to ``schema`` (or any JSON).
+
+    Typed ``Any``: each SDK declares the same shape as its own TypedDict.
+    """
+    if schema is None:
+        return {"type": "json_object"}
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": schema.get("title", "output"), "schema": schema, "strict": True},
+    }
+
+
+def schema_instruction(schema: dict[str, Any]) -> str:
+    """System prompt suffix for providers that can't constrain decoding."""
+    return f"\n\nThe JSON must match this JSON Schema:\n{json.dumps(schema)}"
+
+
+def use_schema(provider: str, model: str, schema: dict[str, Any] | None) -> bool:
+    """Whether a ``generate_json`` call should send ``schema``."""
+    if schema is None:
+        return False
+    _stats["requests"] += 1
+    if f"{provider}/{model}" in _unsupported:
+        return False
+    _stats["constrained"] += 1
+    return True
+
+
+def schema_rejected(provider: str, model: str, exc: Exception) -> bool:
+    """
+    Whether ``exc`` is the backend refusing the schema.
+
+    If so the model is remembered as unsupported and the caller should
+    retry in plain JSON mode.
+    """
+    if error_status(exc) not in (400, 422):
+        return False
+    response = getattr(exc, "response", None)
+    detail = f"{exc} {getattr(response, 'text', '')}".lower()
+    if not any(word in detail for word in ("schema", "format")):
+        return False
+    _unsupported.add(f"{provider}/{model}")
+    _stats["constrained"] -= 1
+    _stats["rejected"] += 1
+    log.info("Model rejected the output schema, using JSON mode", provider=provider, model=model)
+    return True
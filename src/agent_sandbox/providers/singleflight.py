@@ -0,0 +1,140 @@
+"""
+Single-Flight Coalescing
+========================
+
+When several jobs send the same prompt at the same time (the same task
+submitted by several API users or benchmark workers), only one upstream
+request is made; the other callers attach to it and get its response.
+
+Calls are identical when their response-cache key is: same provider,
+model, method, prompts, temperature, completion limit and output schema. Unlike the
+response cache this holds for sampling calls too, since only calls
+already in flight are shared.
+
+The upstream request runs as its own task. A caller that is cancelled
+just detaches; the request is only cancelled once every caller has gone.
+"""
+
+import asyncio
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+import structlog
+
+from agent_sandbox.providers.base import LLMProvider, LLMResponse
+from agent_sandbox.providers.cache import cache_key
+from agent_sandbox.providers.wrapper import ProviderWrapper
+
+log = structlog.get_logger()
+
+# Process-wide coalescing counters (reported by /api/v1/stats)
+_stats = {
+    "calls": 0,
+    "upstream": 0,
+    "coalesced": 0,
+    "tokens_saved": 0,
+    "abandoned": 0,  # Upstream calls cancelled because every caller went away
+}
+
+
+def get_coalescing_stats() -> dict[str, Any]:
+    """How many calls shared an in-flight request, and the tokens that saved."""
+    calls = _stats["calls"]
+    return {**_stats, "coalesce_rate": _stats["coalesced"] / calls if calls else 0.0}
+
+
+class _Flight:
+    """An upstream call and how many callers are waiting for it."""
+
+    def __init__(self, task: asyncio.Task[LLMResponse]) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class CoalescingProvider(ProviderWrapper):
+    """Shares one upstream request among concurrent identical calls."""
+
+    def __init__(self, inner: LLMProvider) -> None:
+        super().__init__(inner)
+        self._flights: dict[str, _Flight] = {}
+
+    async def _coalesced(
+        self,
+        method: str,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None,
+        max_tokens: int | None,
+        **kwargs: Any,
+    ) -> LLMResponse:
+        _stats["calls"] += 1
+        key = cache_key(
+            self.name,
+            self.config.model,
+            method,
+            system_prompt,
+            user_prompt,
+            self.config.temperature if temperature is None else temperature,
+            max_tokens or self.config.max_tokens,
+            kwargs.get("schema"),
+        )
+        flight = self._flights.get(key)
+        leader = flight is None
+        if flight is None:
+            call: Callable[..., Coroutine[Any, Any, LLMResponse]] = getattr(self.inner, method)
+            flight = _Flight(
+                asyncio.create_task(
+                    call(system_prompt, user_prompt, temperature, max_tokens, **kwargs)
+                )
+            )
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._land(key, flight))
+            _stats["upstream"] += 1
+
+        flight.waiters += 1
+        try:
+            # shield: cancelling this caller must not cancel the shared request
+            response = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # New callers must start afresh, not attach to a dying request
+                self._land(key, flight)
+                flight.task.cancel()
+                _stats["abandoned"] += 1
+            raise
+        flight.waiters -= 1
+
+        if leader:
+            return response
+        _stats["coalesced"] += 1
+        _stats["tokens_saved"] += response.total_tokens
+        log.debug("Coalesced identical call", provider=self.name, method=method)
+        return response.model_copy(update={"coalesced": True})
+
+    def _land(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def generate(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+    ) -> LLMResponse:
+        return await self._coalesced(
+            "generate", system_prompt, user_prompt, temperature, max_tokens
+        )
+
+    async def generate_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
+    ) -> LLMResponse:
+        return await self._coalesced(
+            "generate_json", system_prompt, user_prompt, temperature, max_tokens, schema=schema
+        )
@@ -0,0 +1,346 @@
+"""
+Provider Wrappers
+=================
+
+Providers that add behaviour around another provider while keeping the
+``LLMProvider`` interface, so nodes never know they are wrapped.
+
+- ``ProviderWrapper``: delegates everything to the wrapped provider;
+  attributes it doesn't define (``client``, ``close``) fall through too
+- ``CachingProvider``: serves repeated ``generate``/``generate_json``
+  calls from the response cache (see ``providers/cache.py``)
+- ``RateLimitedProvider``: queues calls within the provider's rate
+  limits and retries transient failures (see ``providers/ratelimit.py``)
+"""
+
+import asyncio
+import time
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable
+from typing import Any
+
+import structlog
+
+from agent_sandbox.providers.base import LLMProvider, LLMResponse
+from agent_sandbox.providers.cache import ResponseCache, cache_key
+from agent_sandbox.providers.context import estimate_tokens
+from agent_sandbox.providers.ratelimit import RateLimiter, retry_delay
+
+log = structlog.get_logger()
+
+
+class ProviderWrapper(LLMProvider):
+    """Base class for providers wrapping another provider."""
+
+    def __init__(self, inner: LLMProvider) -> None:
+        super().__init__(inner.config)
+        self.inner = inner
+        self.name = inner.name
+        self.supports_json_mode = inner.supports_json_mode
+        self.supports_streaming = inner.supports_streaming
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes the wrapper doesn't have
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    async def generate(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+    ) -> LLMResponse:
+        return await self.inner.generate(system_prompt, user_prompt, temperature, max_tokens)
+
+    async def generate_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
+    ) -> LLMResponse:
+        return await self.inner.generate_json(
+            system_prompt, user_prompt, temperature, max_tokens, schema=schema
+        )
+
+    async def stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+    ) -> AsyncIterator[str]:
+        async for chunk in self.inner.stream(system_prompt, user_prompt, temperature):
+            yield chunk
+
+    async def stream_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
+    ) -> AsyncGenerator[str, None]:
+        async for chunk in self.inner.stream_json(
+            system_prompt, user_prompt, temperature, max_tokens, schema=schema
+        ):
+            yield chunk
+
+    def get_model_info(self) -> dict[str, Any]:
+        return self.inner.get_model_info()
+
+
+class CachingProvider(ProviderWrapper):
+    """
+    Serves identical completion calls from the response cache.
+
+    Only calls at or below ``max_temperature`` are cached. The default
+    (0.3) covers the agent's own low-temperature calls; sampling calls
+    such as escalated retries always reach the provider. Streams are
+    never cached.
+    """
+
+    def __init__(
+        self,
+        inner: LLMProvider,
+        cache: ResponseCache,
+        max_temperature: float = 0.3,
+    ) -> None:
+        super().__init__(inner)
+        self.cache = cache
+        self.max_temperature = max_temperature
+
+    @property
+    def namespace(self) -> str:
+        return f"{self.name}/{self.config.model}"
+
+    async def _cached(
+        self,
+        method: str,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None,
+        max_tokens: int | None,
+        **kwargs: Any,
+    ) -> LLMResponse:
+        call: Callable[..., Awaitable[LLMResponse]] = getattr(self.inner, method)
+        temperature = self.config.temperature if temperature is None else temperature
+        if temperature > self.max_temperature:
+            return await call(system_prompt, user_prompt, temperature, max_tokens, **kwargs)
+
+        t0 = time.perf_counter()
+        key = cache_key(
+            self.name,
+            self.config.model,
+            method,
+            system_prompt,
+            user_prompt,
+            temperature,
+            max_tokens or self.config.max_tokens,
+            kwargs.get("schema"),
+        )
+        try:
+            hit = await self.cache.aget(key)
+        except Exception as e:
+            log.warning("Response cache lookup failed", error=str(e))
+            hit = None
+        if hit is not None:
+            return hit.model_copy(
+                update={"cached": True, "latency_ms": (time.perf_counter() - t0) * 1000}
+            )
+
+        response = await call(system_prompt, user_prompt, temperature, max_tokens, **kwargs)
+        # Truncated answers would be served again and again
+        if response.content and response.finish_reason != "length":
+            try:
+                await self.cache.aput(key, self.namespace, response)
+            except Exception as e:
+                log.warning("Response cache store failed", error=str(e))
+        return response
+
+    async def generate(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+    ) -> LLMResponse:
+        return await self._cached("generate", system_prompt, user_prompt, temperature, max_tokens)
+
+    async def generate_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
+    ) -> LLMResponse:
+        return await self._cached(
+            "generate_json", system_prompt, user_prompt, temperature, max_tokens, schema=schema
+        )
+
+
+class RateLimitedProvider(ProviderWrapper):
+    """
+    Sends calls through a ``RateLimiter`` and retries transient failures.
+
+    The time a call spent queued or backing off is reported as
+    ``LLMResponse.throttle_wait_ms``, apart from ``latency_ms``.
+    Streams are retried only until their first chunk arrives.
+    """
+
+    def __init__(
+        self,
+        inner: LLMProvider,
+        limiter: RateLimiter,
+        retry_base_delay: float = 0.5,
+        retry_max_delay: float = 30.0,
+    ) -> None:
+        super().__init__(inner)
+        self.limiter = limiter
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+
+    def _retry_delay(self, exc: Exception, retries: int) -> float | None:
+        return retry_delay(
+            exc,
+            retries,
+            self.config.max_retries,
+            self.limiter,
+            self.retry_base_delay,
+            self.retry_max_delay,
+        )
+
+    async def _limited(
+        self,
+        method: str,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None,
+        max_tokens: int | None,
+        **kwargs: Any,
+    ) -> LLMResponse:
+        call: Callable[..., Awaitable[LLMResponse]] = getattr(self.inner, method)
+        reserved = (
+            estimate_tokens(system_prompt)
+            + estimate_tokens(user_prompt)
+            + (max_tokens or self.config.max_tokens)
+        )
+        waited = 0.0
+        retries = 0
+        while True:
+            waited += await self.limiter.acquire(reserved)
+            # Rejected and cancelled calls don't count against the token limit
+            used = 0
+            try:
+                response = await call(system_prompt, user_prompt, temperature, max_tokens, **kwargs)
+                used = response.total_tokens
+            except Exception as e:
+                delay = self._retry_delay(e, retries)
+                if delay is None:
+                    raise
+                log.info(
+                    "Retrying provider call",
+                    provider=self.name,
+                    retry=retries + 1,
+                    delay_s=round(delay, 2),
+                    error=str(e)[:100],
+                )
+            else:
+                if waited or retries:
+                    response = response.model_copy(
+                        update={"throttle_wait_ms": waited * 1000, "retries": retries}
+                    )
+                return response
+            finally:
+                self.limiter.settle(reserved, used)
+            await asyncio.sleep(delay)
+            waited += delay
+            retries += 1
+
+    async def generate(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+    ) -> LLMResponse:
+        return await self._limited("generate", system_prompt, user_prompt, temperature, max_tokens)
+
+    async def generate_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
+    ) -> LLMResponse:
+        return await self._limited(
+            "generate_json", system_prompt, user_prompt, temperature, max_tokens, schema=schema
+        )
+
+    async def stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+    ) -> AsyncIterator[str]:
+        async for chunk in self._limited_stream("stream", system_prompt, user_prompt, temperature):
+            yield chunk
+
+    async def stream_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        schema: dict[str, Any] | None = None,
+    ) -> AsyncGenerator[str, None]:
+        async for chunk in self._limited_stream(
+            "stream_json",
+            system_prompt,
+            user_prompt,
+            temperature,
+            max_tokens=max_tokens,
+            schema=schema,
+        ):
+            yield chunk
+
+    async def _limited_stream(
+        self,
+        method: str,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None,
+        **kwargs: Any,
+    ) -> AsyncIterator[str]:
+        call = getattr(self.inner, method)
+        prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(user_prompt)
+        reserved = prompt_tokens + (kwargs.get("max_tokens") or self.config.max_tokens)
+        retries = 0
+        while True:
+            await self.limiter.acquire(reserved)
+            streamed: list[str] = []
+            cancelled = False
+            try:
+                async for chunk in call(system_prompt, user_prompt, temperature, **kwargs):
+                    streamed.append(chunk)
+                    yield chunk
+                return
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+            except Exception as e:
+                delay = None if streamed else self._retry_delay(e, retries)
+                if delay is None:
+                    raise
+            finally:
+                # Streams report no usage: count the prompt and what came back
+                # (also when the consumer stops early), nothing if it never started
+                used = 0
+                if streamed and not cancelled:
+                    used = prompt_tokens + estimate_tokens("".join(streamed))
+                self.limiter.settle(reserved, used)
+            await asyncio.sleep(delay)
+            retries += 1
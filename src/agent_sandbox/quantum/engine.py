@@ -7,7 +7,7 @@ from typing import Any
 import structlog
 
 from agent_sandbox.config import Settings, get_settings
-from agent_sandbox.providers import LLMProvider, create_provider
+from agent_sandbox.providers import LLMProvider, get_provider
 from agent_sandbox.sandbox.manager import ExecutionRequest, SandboxManager
 
 log = structlog.get_logger()
@@ -83,10 +83,11 @@ class QuantumFluxEngine:
     @property
     def provider(self) -> LLMProvider:
         if not self._provider:
-            self._provider = create_provider(
-                self.settings.llm_provider,
-                self.settings.get_provider_api_key(),
-                self.settings.get_provider_model(),
+            self._provider = get_provider(
+                provider_type=self.settings.llm_provider,
+                api_key=self.settings.get_provider_api_key(),
+                model=self.settings.get_provider_model(),
+                base_url=self.settings.get_provider_base_url(),
             )
         return self._provider
 
@@ -5,19 +5,66 @@ Agent Runtime
 High-level API for running the self-correcting agent.
 """
 
-from collections.abc import AsyncGenerator
+import asyncio
+import math
+import time
+from collections.abc import AsyncGenerator, AsyncIterator, Mapping, Sequence
+from dataclasses import dataclass, field
 from typing import Any
 
 import structlog
 
-from agent_sandbox.config import Settings, get_settings
+from agent_sandbox.config import AgentMode, Settings, get_settings
 from agent_sandbox.contracts.agent_output import BenchmarkSuiteResult
 from agent_sandbox.orchestrator.graph import AgentGraph
+from agent_sandbox.orchestrator.state import AttemptRecord
+from agent_sandbox.providers.registry import close_providers
 from agent_sandbox.sandbox.manager import SandboxManager
 
 logger = structlog.get_logger()
 
 
+@dataclass
+class BatchStats:
+    """Throughput and latency of a ``run_many`` batch, updated as tasks finish."""
+
+    started_at: float = field(default_factory=time.perf_counter)
+    completed: int = 0
+    succeeded: int = 0
+    latencies_ms: list[float] = field(default_factory=list)
+
+    def record(self, result: dict[str, Any]) -> None:
+        self.completed += 1
+        self.succeeded += bool(result.get("success"))
+        self.latencies_ms.append(result["latency_ms"])
+
+    @property
+    def elapsed_s(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    @property
+    def tasks_per_minute(self) -> float:
+        return self.completed * 60 / self.elapsed_s if self.completed else 0.0
+
+    def percentile(self, p: float) -> float:
+        """Nearest-rank latency percentile in ms (0 before any task finished)."""
+        if not self.latencies_ms:
+            return 0.0
+        ordered = sorted(self.latencies_ms)
+        return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "completed": self.completed,
+            "succeeded": self.succeeded,
+            "elapsed_s": round(self.elapsed_s, 3),
+            "tasks_per_minute": round(self.tasks_per_minute, 2),
+            "p50_ms": round(self.percentile(50), 1),
+            "p90_ms": round(self.percentile(90), 1),
+            "p99_ms": round(self.percentile(99), 1),
+        }
+
+
 class AgentRuntime:
     """
     High-level runtime for the self-correcting agent.
@@ -40,6 +87,7 @@ class AgentRuntime:
         self._sandbox_manager: SandboxManager | None = None
         self._agent: AgentGraph | None = None
         self._initialized = False
+        self.batch_stats: BatchStats | None = None  # Latest run_many() batch
 
     async def __aenter__(self) -> "AgentRuntime":
         """Initialize runtime."""
@@ -69,6 +117,9 @@ class AgentRuntime:
         """Cleanup resources."""
         if self._sandbox_manager:
             await self._sandbox_manager.cleanup()
+        if self._agent and self._agent.checkpointer:
+            self._agent.checkpointer.close()
+        await close_providers()
 
         self._sandbox_manager = None
         self._agent = None
@@ -94,6 +145,12 @@ class AgentRuntime:
         self,
         task: str,
         max_attempts: int | None = None,
+        mode: AgentMode | None = None,
+        thread_id: str | None = None,
+        *,
+        deadline_seconds: float | None = None,
+        token_budget: int | None = None,
+        test_code: str | None = None,
     ) -> dict[str, Any]:
         """
         Run the agent on a task.
@@ -101,6 +158,11 @@ class AgentRuntime:
         Args:
             task: Task description
             max_attempts: Optional max retry attempts
+            mode: Optional retry topology ("reflexion" or "fused")
+            thread_id: Optional checkpoint thread id, pass it to resume() later
+            deadline_seconds: Optional wall-clock limit; a partial result is returned when hit
+            token_budget: Optional cap on LLM tokens spent by the job
+            test_code: Optional test_* functions the generated code must pass
 
         Returns:
             Result dictionary with:
@@ -113,8 +175,99 @@ class AgentRuntime:
         if not self._initialized:
             raise RuntimeError("Runtime not initialized. Use async context manager.")
 
-        result = await self.agent.run(task, max_attempts)
+        result = await self.agent.run(
+            task,
+            max_attempts,
+            mode,
+            thread_id=thread_id,
+            deadline_seconds=deadline_seconds,
+            token_budget=token_budget,
+            test_code=test_code,
+        )
+        return self._to_result(result)
+
+    async def run_many(
+        self,
+        tasks: Sequence[str],
+        concurrency: int | None = None,
+        per_task_options: Sequence[Mapping[str, Any] | None] | None = None,
+        **options: Any,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Run the agent on many tasks, yielding results as they complete.
+
+        All tasks share this runtime's graph, provider clients and sandbox
+        (which caps concurrent containers at ``SANDBOX_POOL_SIZE``). A task
+        that raises yields a failed result instead of stopping the batch;
+        breaking out of the loop cancels the tasks still running.
+
+        Args:
+            tasks: Task descriptions
+            concurrency: Jobs in flight at once (default: ``BATCH_CONCURRENCY``)
+            per_task_options: Optional run() keyword arguments per task, aligned
+                with ``tasks`` (e.g. a per-task ``deadline_seconds``)
+            **options: run() keyword arguments applied to every task
+
+        Yields:
+            Result dicts shaped like run()'s, plus ``index`` (position in
+            ``tasks``) and ``latency_ms``. ``self.batch_stats`` holds the
+            batch's throughput and latency percentiles.
+        """
+        if not self._initialized:
+            raise RuntimeError("Runtime not initialized. Use async context manager.")
+        if per_task_options is not None and len(per_task_options) != len(tasks):
+            raise ValueError("per_task_options must have one entry per task")
+
+        semaphore = asyncio.Semaphore(concurrency or self.settings.batch_concurrency)
+        stats = self.batch_stats = BatchStats()
+
+        async def run_one(index: int, task: str) -> dict[str, Any]:
+            task_options = dict(options)
+            overrides = per_task_options[index] if per_task_options else None
+            if overrides:
+                task_options.update(overrides)
+            async with semaphore:
+                t0 = time.perf_counter()
+                try:
+                    result = await self.run(task, **task_options)
+                except Exception as e:
+                    logger.error("Batch task failed", index=index, error=str(e))
+                    result = {"success": False, "output": f"Error: {e}", "error": str(e)}
+                result["index"] = index
+                result["latency_ms"] = (time.perf_counter() - t0) * 1000
+                return result
+
+        pending = [asyncio.create_task(run_one(i, task)) for i, task in enumerate(tasks)]
+        try:
+            for next_result in asyncio.as_completed(pending):
+                result = await next_result
+                stats.record(result)
+                yield result
+        finally:
+            for job in pending:
+                job.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            logger.info("Batch finished", tasks=len(tasks), **stats.to_dict())
+
+    async def resume(self, thread_id: str) -> dict[str, Any]:
+        """
+        Resume a run interrupted mid-way (requires CHECKPOINT_ENABLED=true).
+
+        Args:
+            thread_id: The thread id passed to run()
+
+        Returns:
+            Result dictionary, same shape as run()
+        """
+        if not self._initialized:
+            raise RuntimeError("Runtime not initialized. Use async context manager.")
+
+        result = await self.agent.resume(thread_id)
+        return self._to_result(result)
 
+    @staticmethod
+    def _to_result(result: dict[str, Any]) -> dict[str, Any]:
+        """Shape a final graph state into the public result dict."""
         return {
             "success": result.get("success", False),
             "code": result.get("code", ""),
@@ -122,13 +275,23 @@ class AgentRuntime:
             "attempts": result.get("attempt", 1),
             "reasoning": result.get("reasoning", ""),
             "dependencies": result.get("dependencies", []),
-            "history": result.get("history", []),
+            "history": [AttemptRecord.coerce(e).to_dict() for e in result.get("history", [])],
+            "attempts_saved": result.get("attempts_saved", 0),
+            "time_saved_ms": result.get("time_saved_ms", 0.0),
+            "stagnation_reason": result.get("stagnation_reason"),
+            "tokens_used": result.get("tokens_used", 0),
+            "llm_calls": result.get("llm_calls", []),
+            "deadline_exceeded": result.get("deadline_exceeded", False),
+            "test_results": result.get("test_results", []),
+            "plan": result.get("plan"),
+            "semantic_match": result.get("semantic_match"),
         }
 
     async def run_streaming(
         self,
         task: str,
         max_attempts: int | None = None,
+        mode: AgentMode | None = None,
     ) -> AsyncGenerator[dict[str, Any], None]:
         """
         Run the agent with streaming updates.
@@ -138,13 +301,14 @@ class AgentRuntime:
         if not self._initialized:
             raise RuntimeError("Runtime not initialized")
 
-        async for event in self.agent.run_streaming(task, max_attempts):
+        async for event in self.agent.run_streaming(task, max_attempts, mode):
             yield event
 
     async def run_benchmark(
         self,
         suite: str = "quick",
         max_problems: int | None = None,
+        mode: AgentMode | None = None,
     ) -> BenchmarkSuiteResult:
         """
         Run benchmark suite.
@@ -152,6 +316,7 @@ class AgentRuntime:
         Args:
             suite: Benchmark suite name
             max_problems: Optional problem limit
+            mode: Optional retry topology, for A/B runs
 
         Returns:
             Benchmark results
@@ -161,7 +326,7 @@ class AgentRuntime:
         if not self._initialized:
             raise RuntimeError("Runtime not initialized")
 
-        runner = BenchmarkRunner(self.sandbox, self.settings)
+        runner = BenchmarkRunner(self.sandbox, self.settings, mode=mode, agent=self.agent)
         return await runner.run_suite(suite, max_problems)
 
 
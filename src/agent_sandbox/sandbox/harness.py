@@ -0,0 +1,181 @@
+"""
+Test Harness
+============
+
+Runs a program and its tests in one sandbox invocation.
+
+The generated code is wrapped in a small driver that:
+
+1. executes the program as ``__main__`` (compiled with the real sandbox
+   path, so tracebacks still point at the user's lines)
+2. executes the test code in the same namespace and calls every
+   ``test_*`` function, failing ones from the previous attempt first
+3. prints one JSON line with per-test results after a marker
+
+With ``fail_fast``, a failure among the prioritized tests stops the run
+and the remaining tests are reported as skipped.
+"""
+
+import json
+from dataclasses import asdict, dataclass
+
+from agent_sandbox.sandbox.tracebacks import SANDBOX_CODE_PATH
+
+RESULTS_MARKER = "__AGENT_TEST_RESULTS__"
+TEST_CODE_PATH = "/sandbox/tests.py"
+
+_DRIVER = """\
+import io as _io, json as _json, linecache as _lc, sys as _sys, traceback as _tb
+from contextlib import redirect_stdout as _redirect
+
+_CODE = {code!r}
+_TESTS = {tests!r}
+_PRIORITY = {priority!r}
+_FAIL_FAST = {fail_fast!r}
+
+# Let tracebacks show the user's source rather than this driver's
+_lc.cache[{code_path!r}] = (len(_CODE), None, _CODE.splitlines(True), {code_path!r})
+_lc.cache[{test_path!r}] = (len(_TESTS), None, _TESTS.splitlines(True), {test_path!r})
+
+
+def _run(source, path, ns):
+    try:
+        exec(compile(source, path, "exec"), ns)
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            raise
+    except BaseException as e:
+        # Print without this driver's frame, like a plain ``python code.py`` run
+        _tb.print_exception(type(e), e, e.__traceback__.tb_next)
+        _sys.exit(1)
+
+
+_ns = {{"__name__": "__main__", "__file__": {code_path!r}}}
+_run(_CODE, {code_path!r}, _ns)
+_sys.stdout.flush()
+_run(_TESTS, {test_path!r}, _ns)
+
+_names = [n for n, f in list(_ns.items()) if n.startswith("test_") and callable(f)]
+_order = [n for n in _PRIORITY if n in _names] + [n for n in _names if n not in _PRIORITY]
+_results = []
+_stop = False
+for _name in _order:
+    if _stop:
+        _results.append({{"name": _name, "status": "skipped"}})
+        continue
+    _buf = _io.StringIO()
+    try:
+        with _redirect(_buf):
+            _ns[_name]()
+        _results.append({{"name": _name, "status": "passed"}})
+    except Exception as _e:
+        _frames = _tb.extract_tb(_e.__traceback__)[1:]  # Drop the driver's call site
+        _line = _frames[-1].lineno if _frames else None
+        _results.append({{
+            "name": _name,
+            "status": "failed" if isinstance(_e, AssertionError) else "error",
+            "message": f"{{type(_e).__name__}}: {{_e}}"[:500],
+            "line": _line,
+            "traceback": "".join(_tb.format_list(_frames))[-1500:],
+            "output": _buf.getvalue()[-500:],
+        }})
+        if _FAIL_FAST and _name in _PRIORITY:
+            _stop = True
+
+print()
+print({marker!r} + _json.dumps(_results))
+_sys.exit(1 if any(r["status"] in ("failed", "error") for r in _results) else 0)
+"""
+
+
+@dataclass(frozen=True)
+class TestOutcome:
+    """Result of a single ``test_*`` function."""
+
+    name: str
+    status: str  # "passed", "failed", "error" or "skipped"
+    message: str | None = None
+    line: int | None = None
+    traceback: str | None = None
+    output: str | None = None
+
+    @property
+    def failed(self) -> bool:
+        return self.status in ("failed", "error")
+
+    def to_dict(self) -> dict:
+        return {k: v for k, v in asdict(self).items() if v is not None}
+
+
+def build_harness(
+    code: str,
+    test_code: str,
+    priority: list[str] | None = None,
+    fail_fast: bool = False,
+) -> str:
+    """
+    Wrap ``code`` and ``test_code`` into one runnable program.
+
+    Args:
+        code: The generated program
+        test_code: Source defining ``test_*`` functions
+        priority: Tests to run first (the ones that failed last time)
+        fail_fast: Skip the rest when a prioritized test fails
+    """
+    return _DRIVER.format(
+        code=code,
+        tests=test_code,
+        priority=list(priority or []),
+        fail_fast=fail_fast,
+        code_path=SANDBOX_CODE_PATH,
+        test_path=TEST_CODE_PATH,
+        marker=RESULTS_MARKER,
+    )
+
+
+def parse_harness_output(output: str) -> tuple[str, list[TestOutcome]] | None:
+    """
+    Split harness output into program output and test outcomes.
+
+    Returns:
+        (output without the results line, outcomes), or None if the
+        harness never reached the tests (e.g. the program itself crashed)
+    """
+    index = output.rfind(RESULTS_MARKER)
+    if index == -1:
+        return None
+    line_end = output.find("\n", index)
+    payload = output[index + len(RESULTS_MARKER) : None if line_end == -1 else line_end]
+    try:
+        raw = json.loads(payload)
+    except json.JSONDecodeError:
+        return None
+
+    outcomes = [
+        TestOutcome(**{k: v for k, v in item.items() if k in TestOutcome.__dataclass_fields__})
+        for item in raw
+        if isinstance(item, dict) and "name" in item and "status" in item
+    ]
+    # Drop the newline the driver prints before the marker
+    program_output = output[:index]
+    if program_output.endswith("\n"):
+        program_output = program_output[:-1]
+    return program_output, outcomes
+
+
+def summarize(outcomes: list[TestOutcome]) -> str:
+    """Human/LLM-readable summary listing each failing test."""
+    counts: dict[str, int] = {}
+    for outcome in outcomes:
+        counts[outcome.status] = counts.get(outcome.status, 0) + 1
+    header = "Tests: " + ", ".join(f"{n} {status}" for status, n in counts.items())
+
+    parts = [header]
+    for outcome in outcomes:
+        if not outcome.failed:
+            continue
+        where = f" (line {outcome.line})" if outcome.line else ""
+        parts.append(f"\nFAILED {outcome.name}{where}: {outcome.message}")
+        if outcome.traceback:
+            parts.append(outcome.traceback.rstrip())
+    return "\n".join(parts)
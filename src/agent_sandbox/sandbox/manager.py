@@ -12,8 +12,10 @@ Key Features:
 - Configurable timeouts with graceful termination
 - Resource isolation (CPU, memory, network)
 - stdout/stderr capture with structured output
-- Automatic cleanup on crash/timeout
+- Automatic cleanup on crash/timeout/cancellation
 - Container pooling for performance
+- At most ``SANDBOX_POOL_SIZE`` containers at once; concurrent jobs
+  queue for a slot instead of overloading the Docker host
 
 Security Model:
 - No network access by default
@@ -26,6 +28,7 @@ Security Model:
 import asyncio
 import contextlib
 import tempfile
+import time
 import uuid
 from datetime import UTC, datetime
 from pathlib import Path
@@ -58,6 +61,12 @@ class SandboxManager:
         self.client: docker.DockerClient | None = None
         self._pool: asyncio.Queue[Container] = asyncio.Queue()
         self._active_containers: dict[str, Container] = {}
+        self._slots = asyncio.Semaphore(settings.sandbox_pool_size)
+        self._waiting = 0
+        self._slot_wait_ms = 0.0
+        self._executions = 0
+        self._killed = 0
+        self._seconds_reclaimed = 0.0
         self._initialized = False
 
     async def initialize(self) -> None:
@@ -127,8 +136,25 @@ class SandboxManager:
         if not self._initialized:
             raise RuntimeError("Sandbox manager not initialized")
 
+        # Wait for a container slot; the request's timeout starts once it runs
+        t0 = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        self._slot_wait_ms += (time.perf_counter() - t0) * 1000
+        self._executions += 1
+        try:
+            return await self._execute(request)
+        finally:
+            self._slots.release()
+
+    async def _execute(self, request: ExecutionRequest) -> ExecutionResult:
+        """Run one request in a new container (the caller holds a slot)."""
         execution_id = str(uuid.uuid4())[:8]
         container: Container | None = None
+        start_time: float | None = None
         result = ExecutionResult(
             status=ExecutionStatus.PENDING,
             started_at=datetime.now(UTC),
@@ -235,6 +261,24 @@ class SandboxManager:
                 execution_time_ms=result.execution_time_ms,
             )
 
+        except asyncio.CancelledError:
+            # The job was cancelled (deadline, client disconnect): stop the
+            # container now instead of letting it run to its timeout
+            if container is None:
+                # Cancelled while it was being created: Docker may have it already
+                container = self._find_container(execution_id)
+            if container is not None:
+                with contextlib.suppress(Exception):
+                    container.kill()
+                self._killed += 1
+                if start_time is not None:
+                    elapsed = asyncio.get_event_loop().time() - start_time
+                    self._seconds_reclaimed += max(request.timeout_seconds - elapsed, 0.0)
+            logger.info(
+                "Execution cancelled", execution_id=execution_id, killed=container is not None
+            )
+            raise
+
         except ContainerError as e:
             logger.error(
                 "Container error",
@@ -338,6 +382,19 @@ class SandboxManager:
 
         return container
 
+    def _find_container(self, execution_id: str) -> Container | None:
+        """The container created for ``execution_id``, looked up by its label."""
+        if not self.client:
+            return None
+        try:
+            found = self.client.containers.list(
+                all=True, filters={"label": f"execution-id={execution_id}"}
+            )
+        except Exception as e:
+            logger.warning("Failed to look up container", execution_id=execution_id, error=str(e))
+            return None
+        return found[0] if found else None
+
     def _build_command(self, request: ExecutionRequest) -> list[str]:
         """Build the execution command."""
         cmd = ["python", "/sandbox/code.py"]
@@ -381,4 +438,9 @@ class SandboxManager:
             "initialized": self._initialized,
             "active_containers": len(self._active_containers),
             "pool_size": self.settings.sandbox_pool_size,
+            "waiting": self._waiting,
+            "avg_slot_wait_ms": self._slot_wait_ms / self._executions if self._executions else 0.0,
+            # Containers killed by cancellation and the timeout budget they didn't use
+            "cancelled_containers": self._killed,
+            "container_seconds_reclaimed": round(self._seconds_reclaimed, 3),
         }
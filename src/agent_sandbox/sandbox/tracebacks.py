@@ -0,0 +1,135 @@
+"""
+Traceback Parsing
+=================
+
+Turns the raw output of a failed sandbox run into a structured error.
+
+Docker merges stdout and stderr, so ``ExecutionResult.stderr`` may contain
+program output before the traceback. The parser only looks at the last
+traceback block and the final exception line.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+# Path the sandbox mounts generated code at (see SandboxManager._create_container)
+SANDBOX_CODE_PATH = "/sandbox/code.py"
+
+_FRAME_RE = re.compile(r'^\s*File "(?P<file>[^"]+)", line (?P<line>\d+)(?:, in (?P<func>.+))?\s*$')
+_EXCEPTION_RE = re.compile(r"^(?P<type>[A-Za-z_][\w.]*)(?::\s?(?P<message>.*))?$")
+_EXCEPTION_SUFFIXES = ("Error", "Exception", "Exit", "Interrupt", "Iteration", "Warning")
+
+
+@dataclass(frozen=True)
+class TracebackFrame:
+    """A single ``File "...", line N, in func`` frame."""
+
+    filename: str
+    line: int
+    function: str | None = None
+    source: str | None = None
+
+    @property
+    def is_user_code(self) -> bool:
+        """Whether the frame points into the generated program."""
+        return self.filename in (SANDBOX_CODE_PATH, "<string>", "<stdin>")
+
+
+@dataclass(frozen=True)
+class ParsedError:
+    """Structured view of a Python traceback."""
+
+    error_type: str
+    message: str
+    line: int | None = None
+    frame: TracebackFrame | None = None
+    frames: tuple[TracebackFrame, ...] = field(default_factory=tuple)
+
+    @property
+    def signature(self) -> str:
+        """Stable identifier for "the same error" across attempts."""
+        return f"{self.error_type}:{self.line}:{_normalize_message(self.message)}"
+
+
+def _normalize_message(message: str) -> str:
+    """Strip volatile parts (memory addresses, whitespace runs) from a message."""
+    message = re.sub(r"0x[0-9a-fA-F]+", "0x?", message)
+    return re.sub(r"\s+", " ", message).strip()
+
+
+def _is_exception_line(line: str) -> re.Match[str] | None:
+    if line.startswith((" ", "\t")):
+        return None
+    match = _EXCEPTION_RE.match(line.rstrip())
+    if not match:
+        return None
+    error_type = match.group("type").rsplit(".", 1)[-1]
+    if not error_type.endswith(_EXCEPTION_SUFFIXES) and error_type != "KeyboardInterrupt":
+        return None
+    return match
+
+
+def parse_traceback(stderr: str) -> ParsedError | None:
+    """
+    Parse the last traceback in ``stderr``.
+
+    Handles regular tracebacks as well as the frame-less ``SyntaxError`` /
+    ``IndentationError`` format the interpreter prints at compile time.
+
+    Returns:
+        ParsedError, or None if no exception line could be found
+    """
+    if not stderr:
+        return None
+
+    lines = stderr.rstrip().splitlines()
+
+    # Find the final exception line, scanning from the end
+    exc_index = None
+    exc_match = None
+    for i in range(len(lines) - 1, -1, -1):
+        match = _is_exception_line(lines[i])
+        if match:
+            exc_index, exc_match = i, match
+            break
+
+    if exc_match is None or exc_index is None:
+        return None
+
+    # Frames belong to the block that ends at the exception line. Chained
+    # exceptions print several blocks; only the last one is relevant.
+    start = 0
+    for i in range(exc_index, -1, -1):
+        if lines[i].startswith("Traceback (most recent call last)"):
+            start = i
+            break
+
+    frames: list[TracebackFrame] = []
+    for i in range(start, exc_index):
+        match = _FRAME_RE.match(lines[i])
+        if not match:
+            continue
+        source = None
+        if i + 1 < exc_index and not _FRAME_RE.match(lines[i + 1]):
+            candidate = lines[i + 1].strip()
+            if candidate and set(candidate) - {"^", "~", " "}:
+                source = candidate
+        frames.append(
+            TracebackFrame(
+                filename=match.group("file"),
+                line=int(match.group("line")),
+                function=match.group("func"),
+                source=source,
+            )
+        )
+
+    user_frames = [f for f in frames if f.is_user_code]
+    frame = user_frames[-1] if user_frames else (frames[-1] if frames else None)
+
+    return ParsedError(
+        error_type=exc_match.group("type").rsplit(".", 1)[-1],
+        message=(exc_match.group("message") or "").strip(),
+        line=frame.line if frame else None,
+        frame=frame,
+        frames=tuple(frames),
+    )
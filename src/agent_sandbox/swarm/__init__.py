@@ -16,7 +16,7 @@ from typing import Any
 import structlog
 
 from agent_sandbox.config import Settings, get_settings
-from agent_sandbox.providers import LLMProvider, create_provider
+from agent_sandbox.providers import LLMProvider, get_provider
 
 log = structlog.get_logger()
 
@@ -85,10 +85,11 @@ class SwarmIntelligence:
     @property
     def provider(self) -> LLMProvider:
         if not self._provider:
-            self._provider = create_provider(
-                self.settings.llm_provider,
-                self.settings.get_provider_api_key(),
-                self.settings.get_provider_model(),
+            self._provider = get_provider(
+                provider_type=self.settings.llm_provider,
+                api_key=self.settings.get_provider_api_key(),
+                model=self.settings.get_provider_model(),
+                base_url=self.settings.get_provider_base_url(),
             )
         return self._provider
 
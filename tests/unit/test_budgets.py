@@ -0,0 +1,62 @@
+"""
+Tests for Job Deadlines and Token Budgets
+"""
+
+import json
+import time
+
+from agent_sandbox.orchestrator.graph import AgentGraph
+from agent_sandbox.orchestrator.nodes.budget import sized_max_tokens, sized_timeout
+from agent_sandbox.orchestrator.nodes.retry import RetryManagerNode
+
+from .test_orchestrator import FakeProvider, SlowSandbox, _settings
+
+
+class TestBudgets:
+    """Tests for per-job deadlines and token budgets."""
+
+    def test_sizing_from_remaining_budget(self):
+        """Test limits shrink to what is left, down to a floor."""
+        state = {"token_budget": 3000, "tokens_used": 2000, "deadline": time.time() + 2}
+        assert sized_max_tokens(state, 4096) == 1000
+        assert sized_max_tokens({**state, "tokens_used": 2990}, 4096) == 256
+        assert sized_timeout(state, 5.0) <= 2.0
+        assert sized_max_tokens({}, 4096) == 4096
+        assert sized_timeout({}, 5.0) == 5.0
+
+    async def test_token_budget_stops_retries(self):
+        """Test the retry manager stops once the budget can't fit another call."""
+        retry = RetryManagerNode(settings=_settings())
+        state = {
+            "attempt": 1,
+            "max_attempts": 3,
+            "should_retry": True,
+            "token_budget": 1000,
+            "tokens_used": 900,
+            "history": [],
+        }
+
+        update = await retry.process(state)
+
+        assert update["should_retry"] is False
+        assert update["budget_exhausted"] is True
+
+    async def test_deadline_cancels_and_returns_partial(self, monkeypatch):
+        """Test an in-flight execution is cancelled when the deadline passes."""
+        response = json.dumps({"code": "print(1)", "reasoning": "trivial", "confidence": 0.5})
+        provider = FakeProvider([response])
+        monkeypatch.setattr(
+            "agent_sandbox.orchestrator.nodes.generator.get_provider", lambda **_: provider
+        )
+        sandbox = SlowSandbox()
+        agent = AgentGraph(sandbox, _settings())
+
+        t0 = time.perf_counter()
+        result = await agent.run("Print 1", deadline_seconds=0.3)
+
+        assert time.perf_counter() - t0 < 5
+        assert sandbox.cancelled
+        assert result["deadline_exceeded"] is True
+        assert result["success"] is False
+        # Work done before the deadline is kept
+        assert result["code"] == "print(1)"
@@ -0,0 +1,187 @@
+"""
+Tests for Cancellation Propagation
+"""
+
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from agent_sandbox.api.routes import ClientDisconnected, _unless_disconnected
+from agent_sandbox.orchestrator.graph import AgentGraph, get_cancellation_stats
+from agent_sandbox.sandbox.manager import SandboxManager
+from agent_sandbox.sandbox.models import ExecutionRequest
+
+from .test_orchestrator import FakeProvider, SlowProvider, SlowSandbox, _settings
+
+PROGRAM = json.dumps({"code": "print(1)", "reasoning": "trivial", "confidence": 0.5})
+
+
+class BlockingContainer:
+    """Container whose ``wait`` blocks until it is killed."""
+
+    short_id = "abc123"
+
+    def __init__(self) -> None:
+        self.stopped = threading.Event()
+        self.killed = False
+        self.removed = False
+
+    def start(self):
+        pass
+
+    def wait(self):
+        self.stopped.wait(timeout=10)
+        return {"StatusCode": 137}
+
+    def kill(self):
+        self.killed = True
+        self.stopped.set()
+
+    def remove(self, **kwargs):  # noqa: ARG002
+        self.removed = True
+
+    def logs(self, **kwargs):  # noqa: ARG002
+        return b""
+
+
+class FakeRequest:
+    """Request whose client disconnects after ``polls`` checks."""
+
+    def __init__(self, polls: int) -> None:
+        self.polls = polls
+
+    async def is_disconnected(self) -> bool:
+        self.polls -= 1
+        return self.polls < 0
+
+
+class TestAgentCancellation:
+    """Tests for cancelling a running job."""
+
+    async def test_cancel_stops_execution(self, monkeypatch):
+        """Test cancelling the caller cancels the in-flight sandbox execution."""
+        provider = FakeProvider([PROGRAM])
+        monkeypatch.setattr(
+            "agent_sandbox.orchestrator.nodes.generator.get_provider", lambda **_: provider
+        )
+        sandbox = SlowSandbox()
+        agent = AgentGraph(sandbox, _settings())
+        before = get_cancellation_stats()
+
+        job = asyncio.create_task(agent.run("Print 1", max_attempts=3))
+        await asyncio.sleep(0.2)
+        job.cancel()
+        await asyncio.gather(job, return_exceptions=True)
+
+        assert job.cancelled()
+        assert sandbox.cancelled
+        after = get_cancellation_stats()
+        assert after["jobs"] == before["jobs"] + 1
+        # Cancelled during attempt 1 of 3
+        assert after["attempts_reclaimed"] == before["attempts_reclaimed"] + 2
+
+    async def test_cancel_aborts_provider_call(self, monkeypatch):
+        """Test cancelling the caller aborts the in-flight LLM call."""
+        provider = SlowProvider([PROGRAM])
+        monkeypatch.setattr(
+            "agent_sandbox.orchestrator.nodes.generator.get_provider", lambda **_: provider
+        )
+        agent = AgentGraph(SlowSandbox(), _settings())
+
+        job = asyncio.create_task(agent.run("Print 1"))
+        await asyncio.sleep(0.2)
+        job.cancel()
+        await asyncio.gather(job, return_exceptions=True)
+
+        assert provider.cancelled
+
+
+class TestSandboxCancellation:
+    """Tests for killing containers of cancelled executions."""
+
+    async def test_cancel_kills_container(self, monkeypatch):
+        """Test a cancelled execution kills and removes its container right away."""
+        manager = SandboxManager(_settings())
+        manager._initialized = True
+        container = BlockingContainer()
+
+        async def create_container(**kwargs):  # noqa: ARG001
+            return container
+
+        monkeypatch.setattr(manager, "_create_container", create_container)
+
+        job = asyncio.create_task(
+            manager.execute(ExecutionRequest(code="pass", timeout_seconds=30))
+        )
+        await asyncio.sleep(0.1)
+        job.cancel()
+        await asyncio.gather(job, return_exceptions=True)
+
+        assert container.killed
+        assert container.removed
+        assert not manager._active_containers
+        stats = await manager.get_stats()
+        assert stats["cancelled_containers"] == 1
+        assert 29 < stats["container_seconds_reclaimed"] <= 30
+
+    async def test_cancel_during_create_removes_container(self, monkeypatch):
+        """Test a container Docker created before the cancellation landed is found and removed."""
+        manager = SandboxManager(_settings())
+        manager._initialized = True
+        container = BlockingContainer()
+        lookups = []
+
+        def list_containers(all=False, filters=None):
+            lookups.append(filters)
+            return [container] if all else []
+
+        manager.client = SimpleNamespace(containers=SimpleNamespace(list=list_containers))
+
+        async def create_container(**kwargs):  # noqa: ARG001
+            # Docker has the container, but the call hasn't returned yet
+            await asyncio.sleep(10)
+
+        monkeypatch.setattr(manager, "_create_container", create_container)
+
+        job = asyncio.create_task(manager.execute(ExecutionRequest(code="pass")))
+        await asyncio.sleep(0.1)
+        job.cancel()
+        await asyncio.gather(job, return_exceptions=True)
+
+        assert container.removed
+        assert lookups[0]["label"].startswith("execution-id=")
+
+
+class TestClientDisconnect:
+    """Tests for the HTTP disconnect watcher."""
+
+    async def test_disconnect_cancels_work(self, monkeypatch):
+        """Test the work is cancelled once the client disconnects."""
+        monkeypatch.setattr("agent_sandbox.api.routes.DISCONNECT_POLL_SECONDS", 0.01)
+        cancelled = False
+
+        async def work():
+            nonlocal cancelled
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+
+        with pytest.raises(ClientDisconnected):
+            await _unless_disconnected(FakeRequest(polls=2), work())
+
+        assert cancelled
+
+    async def test_connected_client_gets_result(self, monkeypatch):
+        """Test work that finishes first returns its result."""
+        monkeypatch.setattr("agent_sandbox.api.routes.DISCONNECT_POLL_SECONDS", 0.01)
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return 42
+
+        assert await _unless_disconnected(FakeRequest(polls=100), work()) == 42
@@ -0,0 +1,173 @@
+"""
+Tests for SQLite Checkpointing
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from agent_sandbox.orchestrator.checkpoint import SQLiteCheckpointer
+from agent_sandbox.orchestrator.graph import AgentGraph
+from agent_sandbox.sandbox.models import ExecutionResult, ExecutionStatus
+
+from .test_orchestrator import FakeProvider, _settings
+
+GOOD_CODE = json.dumps({"code": "print('hi')", "reasoning": "trivial", "confidence": 0.9})
+
+
+class WorkerCrash(BaseException):
+    """Stands in for the process dying; not caught by the executor node."""
+
+
+class CrashingSandbox:
+    """Sandbox that dies on its first call, like a worker restart mid-job."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def execute(self, request):  # noqa: ARG002
+        self.calls += 1
+        if self.calls == 1:
+            raise WorkerCrash
+        return ExecutionResult(stdout="hi\n", exit_code=0, status=ExecutionStatus.SUCCESS)
+
+
+class SlowThenFastSandbox(CrashingSandbox):
+    """Sandbox whose first execution hangs until cancelled."""
+
+    async def execute(self, request):  # noqa: ARG002
+        self.calls += 1
+        if self.calls == 1:
+            await asyncio.sleep(30)
+        return ExecutionResult(stdout="hi\n", exit_code=0, status=ExecutionStatus.SUCCESS)
+
+
+@pytest.fixture
+def checkpointer(tmp_path):
+    saver = SQLiteCheckpointer(tmp_path / "checkpoints.db")
+    yield saver
+    saver.close()
+
+
+def _agent(monkeypatch, checkpointer, provider, sandbox) -> AgentGraph:
+    monkeypatch.setattr(
+        "agent_sandbox.orchestrator.nodes.generator.get_provider",
+        lambda **_: provider,
+    )
+    return AgentGraph(sandbox, _settings(), checkpointer=checkpointer)
+
+
+class TestSQLiteCheckpointer:
+    """Tests for the checkpointer and resumable runs."""
+
+    def test_wal_mode(self, checkpointer):
+        """Test the database runs in WAL mode."""
+        mode = checkpointer.conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+
+    async def test_resume_skips_finished_nodes(self, monkeypatch, checkpointer):
+        """Test a resumed job doesn't repeat the LLM call made before the crash."""
+        provider = FakeProvider([GOOD_CODE])
+        sandbox = CrashingSandbox()
+        agent = _agent(monkeypatch, checkpointer, provider, sandbox)
+
+        with pytest.raises(WorkerCrash):
+            await agent.run("Print hi", thread_id="job-1")
+
+        result = await agent.resume("job-1")
+
+        assert result["success"] is True
+        assert result["code"] == "print('hi')"
+        assert len(provider.prompts) == 1
+        assert sandbox.calls == 2
+
+    async def test_state_updates_are_merged(self, monkeypatch, checkpointer):
+        """Test partial node updates keep the rest of the state."""
+        provider = FakeProvider([GOOD_CODE])
+        sandbox = CrashingSandbox()
+        sandbox.calls = 1
+        agent = _agent(monkeypatch, checkpointer, provider, sandbox)
+
+        result = await agent.run("Print hi", thread_id="job-2")
+
+        # finalize only returns the status keys; task and code must survive
+        assert result["task"] == "Print hi"
+        assert result["code"] == "print('hi')"
+        assert result["completed"] is True
+
+    async def test_writes_are_incremental(self, monkeypatch, checkpointer):
+        """Test unchanged channels aren't re-serialized at every step."""
+        provider = FakeProvider([GOOD_CODE])
+        sandbox = CrashingSandbox()
+        sandbox.calls = 1
+        checkpointer.keep_last = 100
+        agent = _agent(monkeypatch, checkpointer, provider, sandbox)
+
+        await agent.run("Print hi", thread_id="job-3")
+
+        task_blobs = checkpointer.conn.execute(
+            "SELECT COUNT(*) FROM blobs WHERE thread_id = 'job-3' AND channel = 'task'"
+        ).fetchone()[0]
+        steps = checkpointer.conn.execute(
+            "SELECT COUNT(*) FROM checkpoints WHERE thread_id = 'job-3'"
+        ).fetchone()[0]
+        assert task_blobs == 1
+        assert steps > 1
+
+    async def test_compaction(self, monkeypatch, checkpointer):
+        """Test finished jobs keep only their latest checkpoint."""
+        provider = FakeProvider([GOOD_CODE])
+        sandbox = CrashingSandbox()
+        sandbox.calls = 1
+        agent = _agent(monkeypatch, checkpointer, provider, sandbox)
+
+        await agent.run("Print hi", thread_id="job-4")
+
+        steps = checkpointer.conn.execute(
+            "SELECT COUNT(*) FROM checkpoints WHERE thread_id = 'job-4'"
+        ).fetchone()[0]
+        assert steps == 1
+        # The compacted checkpoint still restores the full state
+        snapshot = await agent.graph.aget_state({"configurable": {"thread_id": "job-4"}})
+        assert snapshot.values["success"] is True
+        assert snapshot.values["task"] == "Print hi"
+
+    async def test_prune_expired(self, monkeypatch, checkpointer):
+        """Test threads past the retention window are deleted."""
+        provider = FakeProvider([GOOD_CODE])
+        sandbox = CrashingSandbox()
+        sandbox.calls = 1
+        agent = _agent(monkeypatch, checkpointer, provider, sandbox)
+        await agent.run("Print hi", thread_id="job-5")
+
+        checkpointer.retention_seconds = -1
+        assert checkpointer.prune_expired() == 1
+        assert checkpointer.get_tuple({"configurable": {"thread_id": "job-5"}}) is None
+
+    async def test_resume_after_deadline(self, monkeypatch, checkpointer):
+        """Test a job cut off by its deadline can be resumed without one."""
+        provider = FakeProvider([GOOD_CODE])
+        sandbox = SlowThenFastSandbox()
+        agent = _agent(monkeypatch, checkpointer, provider, sandbox)
+
+        partial = await agent.run("Print hi", thread_id="job-6", deadline_seconds=0.2)
+        assert partial["deadline_exceeded"] is True
+
+        result = await agent.resume("job-6")
+
+        assert result["success"] is True
+        assert len(provider.prompts) == 1
+
+    async def test_resume_unknown_thread(self, monkeypatch, checkpointer):
+        """Test resuming a job without checkpoints fails clearly."""
+        agent = _agent(monkeypatch, checkpointer, FakeProvider([]), CrashingSandbox())
+        with pytest.raises(KeyError):
+            await agent.resume("missing")
+
+    def test_resume_requires_checkpointer(self):
+        """Test resume is rejected when checkpointing is disabled."""
+        agent = AgentGraph(CrashingSandbox(), _settings())
+        assert agent.checkpointer is None
+        with pytest.raises(RuntimeError):
+            asyncio.run(agent.resume("job"))
@@ -0,0 +1,103 @@
+"""
+Tests for the Prompt Context Budget
+"""
+
+import json
+
+from agent_sandbox.orchestrator.nodes.critic import CriticNode
+from agent_sandbox.providers.context import (
+    Section,
+    estimate_tokens,
+    fit_sections,
+    trim_code,
+    trim_error,
+)
+
+from .test_orchestrator import FakeProvider, _settings
+
+# 40 nested calls deep, failing on line 95 of the program
+DEEP_TRACEBACK = (
+    "Traceback (most recent call last):\n"
+    + "".join(
+        f'  File "/sandbox/code.py", line {i}, in f{i}\n    return f{i + 1}(x)\n'
+        for i in range(10, 50)
+    )
+    + '  File "/sandbox/code.py", line 95, in parse\n    return int(value)\n'
+    + "ValueError: invalid literal for int() with base 10: 'abc'\n"
+)
+LONG_CODE = "\n".join(
+    "def parse(value):\n    return int(value)" if i == 94 else f"x{i} = {i} * 2"
+    for i in range(1, 201)
+)
+
+
+class TestTrimming:
+    """Tests for relevance-based trimming."""
+
+    def test_estimate_tokens(self):
+        """Test the estimator is in the right range for code."""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("print(x + 1)") == 6
+        assert 250 < estimate_tokens(LONG_CODE) < 1500
+
+    def test_error_keeps_exception_and_innermost_frames(self):
+        """Test outer frames are dropped before the failure site."""
+        trimmed = trim_error(DEEP_TRACEBACK, 80)
+
+        assert estimate_tokens(trimmed) < estimate_tokens(DEEP_TRACEBACK)
+        assert trimmed.startswith("Traceback (most recent call last)")
+        assert trimmed.rstrip().endswith("with base 10: 'abc'")
+        assert "line 95, in parse" in trimmed
+        assert "line 10, in f10" not in trimmed
+        assert "lines omitted" in trimmed
+
+    def test_code_keeps_failing_lines(self):
+        """Test the code around the focus line survives."""
+        trimmed = trim_code(LONG_CODE, 60, focus=(95,))
+
+        assert "    return int(value)" in trimmed
+        assert "def parse(value):" in trimmed
+        assert "x1 = 1 * 2" not in trimmed
+
+    def test_sections_trim_lowest_priority_first(self):
+        """Test high-priority and required sections are kept whole."""
+        fitted = fit_sections(
+            [
+                Section("code", LONG_CODE, required=True),
+                Section("error", DEEP_TRACEBACK, priority=2, kind="error"),
+                Section("history", "old attempt\n" * 300, priority=1),
+            ],
+            estimate_tokens(LONG_CODE) + estimate_tokens(DEEP_TRACEBACK) + 100,
+        )
+
+        assert fitted["code"] == LONG_CODE
+        assert fitted["error"] == DEEP_TRACEBACK
+        assert len(fitted["history"]) < 1000
+
+    def test_small_prompts_unchanged(self):
+        """Test nothing is trimmed when the prompt fits."""
+        sections = [Section("a", "hello"), Section("b", "world", kind="code")]
+        assert fit_sections(sections, 100) == {"a": "hello", "b": "world"}
+
+
+class TestCriticBudget:
+    """Tests for the critic prompt under a small budget."""
+
+    async def test_critic_prompt_fits_budget(self):
+        """Test the critic sends the failure site instead of slicing the output."""
+        response = json.dumps({"diagnosis": "bad input", "fix_suggestion": "validate it"})
+        critic = CriticNode(_settings(prompt_token_budget=600, critic_fast_path=False))
+        critic._provider = FakeProvider([response])
+        state = {
+            "task": "parse numbers",
+            "code": LONG_CODE,
+            "execution_result": {"exit_code": 1, "stderr": DEEP_TRACEBACK},
+            "attempt": 1,
+        }
+
+        await critic.critique(state)
+
+        prompt = critic._provider.prompts[0]
+        assert estimate_tokens(prompt) < 600
+        assert "ValueError: invalid literal" in prompt
+        assert "    return int(value)" in prompt
@@ -101,6 +101,18 @@ class TestAgentOutput:
                 reasoning="Testing validation",
             )
 
+    def test_fused_diagnosis_optional(self):
+        """Test the fused-mode diagnosis field is optional."""
+        output = AgentOutput(code="print(1)", reasoning="Simple print statement")
+        assert output.diagnosis is None
+
+        output = AgentOutput(
+            code="print(1)",
+            reasoning="Simple print statement",
+            diagnosis="Missing import of math",
+        )
+        assert output.diagnosis == "Missing import of math"
+
 
 class TestCritiqueOutput:
     """Tests for CritiqueOutput schema."""
@@ -0,0 +1,124 @@
+"""
+Tests for the Rule-Based Critic
+"""
+
+from agent_sandbox.orchestrator.nodes.rules import classify_failure
+from agent_sandbox.sandbox.tracebacks import parse_traceback
+
+RUNTIME_TRACEBACK = """55
+Traceback (most recent call last):
+  File "/sandbox/code.py", line 7, in <module>
+    print(ratio(1, 0))
+          ^^^^^^^^^^^
+  File "/sandbox/code.py", line 4, in ratio
+    return a / b
+           ~~^~~
+ZeroDivisionError: division by zero
+"""
+
+SYNTAX_TRACEBACK = """  File "/sandbox/code.py", line 3
+    print((1 + 2)
+         ^
+SyntaxError: '(' was never closed
+"""
+
+
+def _failed(stderr: str) -> dict:
+    return {"exit_code": 1, "stderr": stderr, "stdout": stderr, "timed_out": False}
+
+
+class TestParseTraceback:
+    """Tests for parse_traceback."""
+
+    def test_runtime_error(self):
+        """Test innermost user frame and exception are extracted."""
+        err = parse_traceback(RUNTIME_TRACEBACK)
+        assert err is not None
+        assert err.error_type == "ZeroDivisionError"
+        assert err.message == "division by zero"
+        assert err.line == 4
+        assert err.frame.function == "ratio"
+        assert err.frame.source == "return a / b"
+        assert len(err.frames) == 2
+
+    def test_syntax_error_without_traceback_header(self):
+        """Test compile-time errors without a Traceback header."""
+        err = parse_traceback(SYNTAX_TRACEBACK)
+        assert err is not None
+        assert err.error_type == "SyntaxError"
+        assert err.line == 3
+
+    def test_no_error(self):
+        """Test plain output yields nothing."""
+        assert parse_traceback("hello world\n") is None
+        assert parse_traceback("") is None
+
+    def test_signature_is_stable(self):
+        """Test the same error produces the same signature."""
+        a = parse_traceback(RUNTIME_TRACEBACK)
+        b = parse_traceback("other output\n" + RUNTIME_TRACEBACK)
+        assert a.signature == b.signature
+
+
+class TestClassifyFailure:
+    """Tests for classify_failure."""
+
+    def test_missing_third_party_module(self):
+        """Test a missing pip package is diagnosed locally."""
+        stderr = (
+            "Traceback (most recent call last):\n"
+            '  File "/sandbox/code.py", line 1, in <module>\n'
+            "    import requests\n"
+            "ModuleNotFoundError: No module named 'requests'\n"
+        )
+        critique = classify_failure(_failed(stderr))
+        assert critique is not None
+        assert critique.error_category == "import"
+        assert "standard library" in critique.fix_suggestion
+
+    def test_stdlib_typo(self):
+        """Test a misspelled stdlib module gets a suggestion."""
+        stderr = "ModuleNotFoundError: No module named 'maths'\n"
+        critique = classify_failure(_failed(stderr))
+        assert critique is not None
+        assert "'math'" in critique.fix_suggestion
+
+    def test_name_error_missing_import(self):
+        """Test a stdlib module used without import."""
+        stderr = (
+            "Traceback (most recent call last):\n"
+            '  File "/sandbox/code.py", line 1, in <module>\n'
+            "NameError: name 'math' is not defined\n"
+        )
+        critique = classify_failure(_failed(stderr), "print(math.sqrt(4))")
+        assert critique is not None
+        assert "import math" in critique.fix_suggestion
+
+    def test_name_error_unknown_is_deferred(self):
+        """Test an unexplained NameError falls through to the LLM."""
+        stderr = "NameError: name 'solve' is not defined\n"
+        assert classify_failure(_failed(stderr), "print(solve())") is None
+
+    def test_zero_division(self):
+        """Test ZeroDivisionError is classified."""
+        critique = classify_failure(_failed(RUNTIME_TRACEBACK))
+        assert critique is not None
+        assert "line 4" in critique.diagnosis
+
+    def test_mechanical_syntax_error(self):
+        """Test unclosed bracket is classified."""
+        critique = classify_failure(_failed(SYNTAX_TRACEBACK))
+        assert critique is not None
+        assert critique.error_category == "syntax"
+
+    def test_timeout(self):
+        """Test timeouts are classified."""
+        result = {"exit_code": 137, "stderr": "", "timed_out": True, "execution_time_ms": 5000.0}
+        critique = classify_failure(result)
+        assert critique is not None
+        assert critique.error_category == "timeout"
+
+    def test_logic_error_is_deferred(self):
+        """Test errors without a mechanical fix go to the LLM."""
+        stderr = "Traceback (most recent call last):\nValueError: bad input\n"
+        assert classify_failure(_failed(stderr)) is None
@@ -0,0 +1,110 @@
+"""
+Tests for the Test Harness and Verifier
+"""
+
+import subprocess
+import sys
+
+from agent_sandbox.orchestrator.nodes.executor import ExecutorNode
+from agent_sandbox.orchestrator.nodes.verifier import VerifierNode
+from agent_sandbox.sandbox.harness import build_harness, parse_harness_output
+from agent_sandbox.sandbox.tracebacks import parse_traceback
+
+from .test_orchestrator import _settings
+
+CODE = "def add(a, b):\n    return a - b\n\nprint('program ran')\n"
+TESTS = (
+    "def test_add():\n    assert add(2, 2) == 4, 'add is wrong'\n\n"
+    "def test_zero():\n    assert add(0, 0) == 0\n"
+)
+
+
+def _run(program: str) -> dict:
+    """Run a harness locally, shaped like a sandbox result (stdout/stderr merged)."""
+    proc = subprocess.run(
+        [sys.executable, "-c", program], capture_output=True, text=True, timeout=30
+    )
+    output = proc.stdout + proc.stderr
+    return {
+        "exit_code": proc.returncode,
+        "stdout": output,
+        "stderr": output if proc.returncode else "",
+        "timed_out": False,
+    }
+
+
+class TestHarness:
+    """Tests for running a program and its tests in one process."""
+
+    def test_per_test_results(self):
+        """Test each test_* function is reported separately."""
+        result = _run(build_harness(CODE, TESTS))
+        output, outcomes = parse_harness_output(result["stdout"])
+
+        assert result["exit_code"] == 1
+        assert output == "program ran\n"
+        statuses = {o.name: o.status for o in outcomes}
+        assert statuses == {"test_add": "failed", "test_zero": "passed"}
+        failed = next(o for o in outcomes if o.name == "test_add")
+        assert "add is wrong" in failed.message
+        assert failed.line == 2
+
+    def test_fail_fast_runs_previous_failures_first(self):
+        """Test a repeat failure of a prioritized test skips the rest."""
+        result = _run(build_harness(CODE, TESTS, priority=["test_add"], fail_fast=True))
+        _, outcomes = parse_harness_output(result["stdout"])
+
+        assert [(o.name, o.status) for o in outcomes] == [
+            ("test_add", "failed"),
+            ("test_zero", "skipped"),
+        ]
+
+    def test_program_crash_keeps_plain_traceback(self):
+        """Test a crashing program looks like a normal run to the traceback parser."""
+        result = _run(build_harness("y = 2\nx = 1 / 0\n", TESTS))
+
+        assert parse_harness_output(result["stdout"]) is None
+        err = parse_traceback(result["stderr"])
+        assert err.error_type == "ZeroDivisionError"
+        assert err.line == 2
+        assert err.frame.source == "x = 1 / 0"
+
+
+class TestVerifierNode:
+    """Tests for the verify graph node."""
+
+    async def test_failing_tests_become_the_error(self):
+        """Test failures are summarized for the critic and remembered for retry."""
+        result = _run(build_harness(CODE, TESTS))
+        state = {"test_code": TESTS, "execution_result": result, "attempt": 1}
+
+        update = await VerifierNode().verify(state)
+
+        assert update["failing_tests"] == ["test_add"]
+        assert update["execution_result"].stdout == "program ran\n"
+        assert "FAILED test_add" in update["execution_result"].stderr
+        assert ExecutorNode(settings=_settings()).should_continue({**state, **update}) == "critique"
+
+    async def test_passing_tests_succeed(self):
+        """Test all-green tests route to success with clean output."""
+        fixed = CODE.replace("a - b", "a + b")
+        result = _run(build_harness(fixed, TESTS))
+        state = {"test_code": TESTS, "execution_result": result, "attempt": 2}
+
+        update = await VerifierNode().verify(state)
+
+        assert update["failing_tests"] == []
+        assert update["execution_result"].stderr == ""
+        assert ExecutorNode(settings=_settings()).should_continue({**state, **update}) == "success"
+
+    async def test_no_tests_is_noop(self):
+        """Test jobs without test_code pass through untouched."""
+        assert await VerifierNode().verify({"execution_result": {"stdout": "x"}}) == {}
+
+    def test_executor_wraps_code_with_failing_first(self):
+        """Test the executor prioritizes the previous failures."""
+        executor = ExecutorNode(settings=_settings())
+        program = executor._program({"test_code": TESTS, "failing_tests": ["test_zero"]}, CODE)
+        result = _run(program)
+        _, outcomes = parse_harness_output(result["stdout"])
+        assert outcomes[0].name == "test_zero"
@@ -0,0 +1,146 @@
+"""
+Tests for Hedged Provider Requests
+"""
+
+import asyncio
+
+import pytest
+
+from agent_sandbox.providers import hedging
+from agent_sandbox.providers.base import LLMResponse
+from agent_sandbox.providers.hedging import (
+    MIN_SAMPLES,
+    HedgingProvider,
+    LatencyHistogram,
+    end_hedge_budget,
+    get_hedging_stats,
+    latency_histogram,
+    start_hedge_budget,
+)
+
+from .test_orchestrator import FakeProvider
+
+
+class TimedProvider(FakeProvider):
+    """Provider answering after ``delays`` seconds (the last one repeats)."""
+
+    def __init__(self, name: str, delays: list[float]) -> None:
+        super().__init__([])
+        self.name = name
+        self.config.model = "model"
+        self.delays = list(delays)
+        self.calls = 0
+        self.cancelled = 0
+
+    async def generate(self, system_prompt, user_prompt, temperature=None, max_tokens=None):  # noqa: ARG002
+        delay = self.delays[min(self.calls, len(self.delays) - 1)]
+        self.calls += 1
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return LLMResponse(content=self.name, model="model", provider=self.name)
+
+
+def _warm(provider, latency_ms: float) -> None:
+    for _ in range(MIN_SAMPLES):
+        latency_histogram(provider).observe(latency_ms)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_histograms(monkeypatch):
+    monkeypatch.setattr(hedging, "_histograms", {})
+
+
+class TestLatencyHistogram:
+    """Tests for the per-provider latency histogram."""
+
+    def test_percentiles(self):
+        """Test percentiles land within a bucket of the true value."""
+        histogram = LatencyHistogram(half_life=10_000)
+        for ms in range(1, 1001):
+            histogram.observe(ms)
+        assert histogram.percentile(0.5) == pytest.approx(500, rel=0.12)
+        assert histogram.percentile(0.95) == pytest.approx(950, rel=0.12)
+
+    def test_decay_follows_a_slower_backend(self):
+        """Test old observations fade, so the p95 tracks current latency."""
+        histogram = LatencyHistogram(half_life=50)
+        for _ in range(200):
+            histogram.observe(100)
+        for _ in range(400):
+            histogram.observe(2000)
+        assert histogram.percentile(0.5) == pytest.approx(2000, rel=0.12)
+
+
+class TestHedgingProvider:
+    """Tests for racing a slow primary against a secondary."""
+
+    async def test_no_hedge_until_warmed_up(self):
+        """Test a provider without enough latency samples is never hedged."""
+        primary = TimedProvider("primary", [0.05])
+        secondary = TimedProvider("secondary", [0.0])
+        provider = HedgingProvider(primary, secondary)
+
+        response = await provider.generate("s", "u")
+
+        assert response.content == "primary"
+        assert secondary.calls == 0
+        assert latency_histogram(primary).samples == 1
+
+    async def test_slow_primary_is_hedged_and_cancelled(self):
+        """Test a call past the primary's p95 goes to the secondary, which wins."""
+        primary = TimedProvider("primary", [5.0])
+        secondary = TimedProvider("secondary", [0.01])
+        _warm(primary, 20)
+        provider = HedgingProvider(primary, secondary, min_delay=0.0)
+        before = get_hedging_stats()
+
+        response = await asyncio.wait_for(provider.generate("s", "u"), timeout=1.0)
+
+        assert response.content == "secondary" and response.hedged
+        assert primary.cancelled == 1
+        stats = get_hedging_stats()
+        assert stats["hedges"] == before["hedges"] + 1
+        assert stats["hedge_wins"] == before["hedge_wins"] + 1
+
+    async def test_fast_primary_is_not_hedged(self):
+        """Test calls answered within the p95 never reach the secondary."""
+        primary = TimedProvider("primary", [0.01])
+        secondary = TimedProvider("secondary", [0.0])
+        _warm(primary, 500)
+
+        response = await HedgingProvider(primary, secondary).generate("s", "u")
+
+        assert response.content == "primary" and not response.hedged
+        assert secondary.calls == 0
+
+    async def test_primary_can_still_win(self):
+        """Test the primary's answer wins if it arrives before the hedge's."""
+        primary = TimedProvider("primary", [0.05])
+        secondary = TimedProvider("secondary", [5.0])
+        _warm(primary, 20)
+
+        response = await HedgingProvider(primary, secondary, min_delay=0.0).generate("s", "u")
+
+        assert response.content == "primary"
+        assert secondary.cancelled == 1
+
+    async def test_budget_caps_hedges(self):
+        """Test a job's hedges stop once its hedge budget is spent."""
+        primary = TimedProvider("primary", [0.05])
+        secondary = TimedProvider("secondary", [0.0])
+        _warm(primary, 10)
+        provider = HedgingProvider(primary, secondary, min_delay=0.0)
+        before = get_hedging_stats()
+
+        token = start_hedge_budget(1)  # Less than any prompt
+        try:
+            response = await provider.generate("system prompt", "user prompt")
+        finally:
+            end_hedge_budget(token)
+
+        assert response.content == "primary"
+        assert secondary.calls == 0
+        assert get_hedging_stats()["budget_denied"] == before["budget_denied"] + 1
@@ -0,0 +1,114 @@
+"""
+Tests for Local JSON Repair
+"""
+
+import json
+
+import pytest
+
+from agent_sandbox.contracts.agent_output import AgentOutput, CritiqueOutput
+from agent_sandbox.contracts.repair import get_repair_stats, repair_json, validate_json
+from agent_sandbox.contracts.validation import ValidationRetryLoop, get_validation_stats
+from agent_sandbox.orchestrator.nodes.generator import GeneratorNode
+from agent_sandbox.providers.base import LLMResponse
+
+from .test_orchestrator import FakeProvider, _settings
+
+
+class TestRepairJson:
+    """Tests for the individual repairs."""
+
+    @pytest.mark.parametrize(
+        ("text", "expected", "fixes"),
+        [
+            ('```json\n{"a": 1}\n```', {"a": 1}, ["wrapping"]),
+            ('Here it is: {"a": 1} Hope this helps!', {"a": 1}, ["wrapping"]),
+            ('{"a": [1, 2,], "b": 3,}', {"a": [1, 2], "b": 3}, ["trailing_commas"]),
+            ('{"code": "x = 1\n\tprint(x)"}', {"code": "x = 1\n\tprint(x)"}, ["control_chars"]),
+            ('{"a": {"b": [1, 2', {"a": {"b": [1, 2]}}, ["truncation"]),
+            ('{"a": "}", "b": 0.', {"a": "}"}, ["truncation"]),
+            ('{"a": 1, "b":', {"a": 1}, ["truncation"]),
+        ],
+    )
+    def test_repairs(self, text, expected, fixes):
+        """Test each defect is fixed and reported."""
+        repaired, applied = repair_json(text)
+
+        assert json.loads(repaired) == expected
+        assert applied == fixes
+
+    def test_truncated_string_is_dropped_not_closed(self):
+        """Test half a code string is never passed off as the code."""
+        repaired, _ = repair_json('{"reasoning": "fine", "code": "def f():\n    return')
+
+        assert json.loads(repaired) == {"reasoning": "fine"}
+
+    @pytest.mark.parametrize("text", ["no braces at all", '{"a": [1}'])
+    def test_beyond_repair(self, text):
+        """Test text that isn't a damaged object is left alone."""
+        assert repair_json(text) is None
+
+
+class TestValidateJson:
+    """Tests for repair before validation."""
+
+    def test_valid_output_needs_no_repair(self):
+        """Test valid JSON is validated as is."""
+        output, repaired = validate_json(
+            '{"code": "print(1)", "reasoning": "trivial"}', AgentOutput
+        )
+
+        assert output.code == "print(1)"
+        assert not repaired
+
+    def test_repaired_output_is_validated(self):
+        """Test repaired JSON must still match the schema."""
+        before = get_repair_stats()
+
+        output, repaired = validate_json(
+            '```json\n{"code": "print(1)\n", "reasoning": "trivial",}\n```', AgentOutput
+        )
+        with pytest.raises(json.JSONDecodeError):
+            # Repairs to {"code": "print(1)"}, which lacks the reasoning
+            validate_json('{"code": "print(1)", "reasoning": "tr', AgentOutput)
+
+        assert output.code == "print(1)\n"
+        assert repaired
+        stats = get_repair_stats()
+        assert stats["attempts"] == before["attempts"] + 2
+        assert stats["repaired"] == before["repaired"] + 1
+        assert stats["failed"] == before["failed"] + 1
+        assert stats["fixes"]["control_chars"] == before["fixes"]["control_chars"] + 1
+
+
+class TestRepairBeforeRetry:
+    """Tests for repair saving LLM round trips."""
+
+    async def test_retry_loop_repairs_without_a_round_trip(self):
+        """Test a fenced, trailing-comma critique is fixed without calling the provider."""
+        loop = ValidationRetryLoop(_settings())
+        loop._provider = FakeProvider([])  # Any call would fail
+        before = get_repair_stats()
+        response = LLMResponse(
+            content='```json\n{"diagnosis": "Missing import", "fix_suggestion": "Import it",}\n```',
+            model="m",
+            provider="fenced",
+        )
+
+        result = await loop.validate_and_retry(response, CritiqueOutput, "system", "user")
+
+        assert result.diagnosis == "Missing import"
+        assert get_repair_stats()["round_trips_avoided"] == before["round_trips_avoided"] + 1
+        counts = get_validation_stats()["fenced/m"]["unconstrained"]
+        assert counts["repaired"] == 1 and counts["retries"] == 0
+
+    async def test_generator_uses_repaired_output(self):
+        """Test the generator keeps the repaired fields instead of guessing the code."""
+        content = '```json\n{"code": "import math\nprint(math.pi)", "reasoning": "Use math",}'
+        generator = GeneratorNode(_settings())
+        generator._provider = FakeProvider([content])
+
+        update = await generator.generate({"task": "Print pi"})
+
+        assert update["code"] == "import math\nprint(math.pi)"
+        assert update["reasoning"] == "Use math"
@@ -0,0 +1,187 @@
+"""
+Tests for Incremental JSON Parsing and Streamed Generation
+"""
+
+import json
+
+import pytest
+
+from agent_sandbox.contracts.agent_output import AgentOutput
+from agent_sandbox.orchestrator.nodes.generator import GeneratorNode, get_streaming_stats
+from agent_sandbox.providers.jsonstream import JsonStreamParser, MalformedJSON
+from agent_sandbox.providers.schema import output_schema
+
+from .test_orchestrator import FakeProvider, _settings
+
+DOCUMENT = {
+    "code": 'import json\nprint(json.dumps({"a": "}"}))\n',
+    "dependencies": ["numpy", "requests"],
+    "reasoning": 'Escapes \\ and "quotes" survive',
+    "confidence": 0.85,
+}
+
+
+class StreamingProvider(FakeProvider):
+    """Provider that streams a fixed text in small chunks."""
+
+    def __init__(self, text: str, chunk_size: int = 5) -> None:
+        super().__init__([json.dumps({"code": "print('fallback')", "reasoning": "JSON mode"})])
+        self.text = text
+        self.chunk_size = chunk_size
+        self.sent = 0
+        self.json_calls = 0
+        self.streams: list[tuple] = []
+
+    async def generate_json(
+        self,
+        system_prompt,
+        user_prompt,
+        temperature=None,
+        max_tokens=None,
+        schema=None,  # noqa: ARG002
+    ):
+        self.json_calls += 1
+        return await self.generate(system_prompt, user_prompt, temperature, max_tokens)
+
+    async def stream_json(
+        self, system_prompt, user_prompt, temperature=None, max_tokens=None, schema=None
+    ):
+        self.streams.append((system_prompt, user_prompt, temperature, max_tokens, schema))
+        for i in range(0, len(self.text), self.chunk_size):
+            self.sent = i + self.chunk_size
+            yield self.text[i : i + self.chunk_size]
+
+
+class TestJsonStreamParser:
+    """Tests for emitting fields as they close."""
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 7, 1000])
+    def test_fields_match_json_loads(self, chunk_size):
+        """Test any chunking yields the same fields as parsing the whole text."""
+        text = json.dumps(DOCUMENT, indent=2)
+        parser = JsonStreamParser()
+        order = []
+        for i in range(0, len(text), chunk_size):
+            order.extend(parser.feed(text[i : i + chunk_size]))
+
+        assert parser.done
+        assert parser.fields == DOCUMENT
+        assert order == list(DOCUMENT)
+
+    def test_code_is_emitted_before_the_rest_arrives(self):
+        """Test the code field is handed out as soon as its string closes."""
+        parser = JsonStreamParser()
+        assert parser.feed('{"code": "print(1)') == {}
+        assert parser.feed('", "reason') == {"code": "print(1)"}
+        assert not parser.done
+
+    def test_markdown_fence_and_raw_newlines(self):
+        """Test a ```json fence is skipped and raw newlines in strings are accepted."""
+        parser = JsonStreamParser()
+        parser.feed('```json\n{"code": "a = 1\nprint(a)", "n": null}\n```')
+
+        assert parser.done
+        assert parser.fields == {"code": "a = 1\nprint(a)", "n": None}
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "Here is the code: {",
+            '{"code" "x"}',
+            '{"code": "x" "reasoning"',
+            '{"deps": [1, 2}',
+            '{"confidence": tru,',
+            '{"code": "x",}',
+        ],
+    )
+    def test_malformed_output_fails_at_once(self, text):
+        """Test broken output raises at the offending character, not at the end."""
+        with pytest.raises(MalformedJSON):
+            JsonStreamParser().feed(text)
+
+
+class TestStreamedGeneration:
+    """Tests for GeneratorNode's streaming path."""
+
+    def _generator(self, provider: FakeProvider) -> GeneratorNode:
+        generator = GeneratorNode(_settings(stream_generation=True))
+        generator._provider = provider
+        return generator
+
+    async def test_streamed_output_matches_json_mode(self):
+        """Test a complete stream produces the same update as generate_json would."""
+        document = {**DOCUMENT, "diagnosis": "json was not imported"}
+        provider = StreamingProvider(json.dumps(document))
+        before = get_streaming_stats()
+
+        # Fused retries read up to the diagnosis, i.e. to the end
+        update = await self._generator(provider).generate(
+            {"task": "t", "mode": "fused", "attempt": 1, "code": "print(1)", "history": []}
+        )
+
+        assert update["code"] == DOCUMENT["code"]
+        assert update["dependencies"] == DOCUMENT["dependencies"]
+        assert update["reasoning"] == DOCUMENT["reasoning"]
+        assert update["critique"] == "json was not imported"
+        assert provider.json_calls == 0
+        assert update["llm_calls"][-1]["streamed"] is True
+        assert update["tokens_used"] > 0
+        stats = get_streaming_stats()
+        assert stats["completed"] == before["completed"] + 1
+        assert stats["avg_time_to_full_ms"] >= stats["avg_code_lead_ms"] >= 0
+
+    async def test_stream_stops_once_the_needed_fields_are_in(self):
+        """Test the reasoning isn't waited for, and the stream asks for JSON within budget."""
+        document = {**DOCUMENT, "reasoning": "r" * 500}
+        provider = StreamingProvider(json.dumps(document))
+        before = get_streaming_stats()
+
+        update = await self._generator(provider).generate(
+            {"task": "t", "token_budget": 3000, "tokens_used": 1000}
+        )
+
+        assert update["code"] == DOCUMENT["code"]
+        assert update["dependencies"] == DOCUMENT["dependencies"]
+        assert update["reasoning"].startswith("Stream stopped after the code")
+        assert provider.sent < len(provider.text) / 2
+        _, _, _, max_tokens, schema = provider.streams[0]
+        assert max_tokens == 2000
+        assert schema == output_schema(AgentOutput)
+        assert get_streaming_stats()["early_stops"] == before["early_stops"] + 1
+
+    async def test_code_that_does_not_parse_stops_the_stream(self):
+        """Test the pre-flight check ends the stream before the reasoning is read."""
+        document = {**DOCUMENT, "code": "def f(:\n    pass", "reasoning": "r" * 500}
+        provider = StreamingProvider(json.dumps(document))
+        before = get_streaming_stats()
+
+        update = await self._generator(provider).generate({"task": "t"})
+
+        assert update["code"] == document["code"]
+        assert update["reasoning"].startswith("Stream stopped after the code")
+        assert provider.sent < len(provider.text) / 2
+        assert get_streaming_stats()["preflight_aborts"] == before["preflight_aborts"] + 1
+
+    async def test_malformed_stream_falls_back_to_json_mode(self):
+        """Test prose instead of JSON aborts at the first chunk and regenerates."""
+        provider = StreamingProvider("Sure! Here is the code you asked for: " + "x" * 5000)
+        before = get_streaming_stats()
+
+        update = await self._generator(provider).generate({"task": "t"})
+
+        assert update["code"] == "print('fallback')"
+        assert provider.json_calls == 1
+        assert provider.sent == provider.chunk_size
+        stats = get_streaming_stats()
+        assert stats["malformed_aborts"] == before["malformed_aborts"] + 1
+        assert stats["fallbacks"] == before["fallbacks"] + 1
+
+    async def test_truncated_stream_keeps_the_code(self):
+        """Test a stream cut off during the reasoning still yields the code."""
+        provider = StreamingProvider('{"code": "print(1)", "reasoning": "I will')
+
+        update = await self._generator(provider).generate({"task": "t"})
+
+        assert update["code"] == "print(1)"
+        assert provider.json_calls == 0
+        assert update["confidence"] == 0.5
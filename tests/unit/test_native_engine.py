@@ -0,0 +1,62 @@
+"""
+Tests for the Native Orchestrator Engine
+"""
+
+import json
+
+from agent_sandbox.orchestrator.graph import AgentGraph
+
+from .test_orchestrator import FakeProvider, ScriptedSandbox, SlowSandbox, _settings
+
+
+class TestNativeEngine:
+    """Tests for the native engine against the LangGraph build."""
+
+    def _agent(self, monkeypatch, engine: str, sandbox=None) -> AgentGraph:
+        provider = FakeProvider(
+            [
+                json.dumps({"code": f"print({n})", "reasoning": "trivial", "confidence": 0.5})
+                for n in (1, 2)
+            ]
+        )
+        monkeypatch.setattr(
+            "agent_sandbox.orchestrator.nodes.generator.get_provider", lambda **_: provider
+        )
+        return AgentGraph(sandbox or ScriptedSandbox(), _settings(orchestrator_engine=engine))
+
+    async def test_same_events_as_langgraph(self, monkeypatch):
+        """Test both engines stream the same steps and reach the same result."""
+        runs = {}
+        for engine in ("langgraph", "native"):
+            agent = self._agent(monkeypatch, engine)
+            assert (agent.engine is not None) == (engine == "native")
+            # Native jobs never use the LangGraph build, so it isn't compiled up front
+            assert (agent._graph is None) == (engine == "native")
+            events = [event async for event in agent.run_streaming("Print 1", mode="fused")]
+            runs[engine] = [
+                (name, sorted(update or {})) for e in events for name, update in e.items()
+            ]
+
+        assert runs["native"] == runs["langgraph"]
+        assert [name for name, _ in runs["native"]] == [
+            "generate", "execute", "verify", "retry",
+            "generate", "execute", "verify", "finalize",
+        ]  # fmt: skip
+
+    async def test_native_result(self, monkeypatch):
+        """Test the native engine returns the merged final state."""
+        result = await self._agent(monkeypatch, "native").run("Print 1", mode="fused")
+
+        assert result["success"] is True
+        assert result["attempt"] == 2
+        assert len(result["history"]) == 1
+
+    async def test_native_deadline(self, monkeypatch):
+        """Test the deadline cancels an in-flight node on the native engine too."""
+        sandbox = SlowSandbox()
+        agent = self._agent(monkeypatch, "native", sandbox)
+
+        result = await agent.run("Print 1", deadline_seconds=0.3)
+
+        assert sandbox.cancelled
+        assert result["deadline_exceeded"] is True
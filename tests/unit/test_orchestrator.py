@@ -0,0 +1,171 @@
+"""
+Tests for Orchestrator Nodes
+"""
+
+import asyncio
+import json
+
+from agent_sandbox.config import Settings
+from agent_sandbox.orchestrator.nodes.executor import ExecutorNode
+from agent_sandbox.orchestrator.nodes.generator import GeneratorNode
+from agent_sandbox.orchestrator.nodes.retry import RetryManagerNode
+from agent_sandbox.providers.base import LLMProvider, LLMResponse, ProviderConfig
+from agent_sandbox.sandbox.models import ExecutionResult, ExecutionStatus
+
+
+class FakeProvider(LLMProvider):
+    """Provider that returns canned responses and records prompts."""
+
+    name = "fake"
+
+    def __init__(self, responses: list[str]) -> None:
+        super().__init__(ProviderConfig(api_key="", model="fake"))
+        self.responses = list(responses)
+        self.prompts: list[str] = []
+        self.temperatures: list[float | None] = []
+
+    async def generate(self, system_prompt, user_prompt, temperature=None, max_tokens=None):  # noqa: ARG002
+        self.prompts.append(user_prompt)
+        self.temperatures.append(temperature)
+        return LLMResponse(content=self.responses.pop(0), model="fake", provider=self.name)
+
+    async def generate_json(
+        self,
+        system_prompt,
+        user_prompt,
+        temperature=None,
+        max_tokens=None,
+        schema=None,  # noqa: ARG002
+    ):
+        return await self.generate(system_prompt, user_prompt, temperature, max_tokens)
+
+    async def stream(self, system_prompt, user_prompt, temperature=None):  # noqa: ARG002
+        yield self.responses.pop(0)
+
+    async def stream_json(
+        self,
+        system_prompt,
+        user_prompt,
+        temperature=None,
+        max_tokens=None,  # noqa: ARG002
+        schema=None,  # noqa: ARG002
+    ):
+        async for chunk in self.stream(system_prompt, user_prompt, temperature):
+            yield chunk
+
+
+class SlowSandbox:
+    """Sandbox whose executions never finish on their own."""
+
+    def __init__(self) -> None:
+        self.cancelled = False
+
+    async def execute(self, request):  # noqa: ARG002
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+class ScriptedSandbox:
+    """Sandbox that fails once, then succeeds."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def execute(self, request):  # noqa: ARG002
+        self.calls += 1
+        if self.calls == 1:
+            return ExecutionResult(
+                stderr="NameError: name 'x' is not defined\n",
+                exit_code=1,
+                status=ExecutionStatus.ERROR,
+            )
+        return ExecutionResult(stdout="1\n", exit_code=0, status=ExecutionStatus.SUCCESS)
+
+
+class SlowProvider(FakeProvider):
+    """Provider whose calls take ``delay`` seconds and record cancellation."""
+
+    def __init__(self, responses: list[str], delay: float = 30) -> None:
+        super().__init__(responses)
+        self.delay = delay
+        self.cancelled = False
+
+    async def generate(self, system_prompt, user_prompt, temperature=None, max_tokens=None):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return await super().generate(system_prompt, user_prompt, temperature, max_tokens)
+
+
+def _settings(**kwargs) -> Settings:
+    return Settings(groq_api_key="test-key", **kwargs)
+
+
+FAILED_RESULT = {
+    "exit_code": 1,
+    "stdout": "",
+    "stderr": "NameError: name 'math' is not defined\n",
+    "timed_out": False,
+}
+
+
+class TestFusedMode:
+    """Tests for the fused critique-and-fix topology."""
+
+    def test_failed_execution_skips_critic(self):
+        """Test fused mode routes failures straight to retry."""
+        executor = ExecutorNode(settings=_settings())
+        state = {"execution_result": FAILED_RESULT, "attempt": 1, "max_attempts": 3}
+
+        assert executor.should_continue(state) == "critique"
+        assert executor.should_continue({**state, "mode": "fused"}) == "retry"
+
+    async def test_retry_without_critique(self):
+        """Test the retry manager doesn't wait for a critic veto in fused mode."""
+        retry = RetryManagerNode()
+        state = {"attempt": 1, "max_attempts": 3, "mode": "fused", "history": []}
+
+        update = await retry.process(state)
+
+        assert update["should_retry"] is True
+        assert retry.should_continue(update) == "generate"
+
+    async def test_fused_generation_returns_diagnosis(self):
+        """Test one call yields both the fixed code and the diagnosis."""
+        provider = FakeProvider(
+            [
+                json.dumps(
+                    {
+                        "diagnosis": "math was used without being imported",
+                        "code": "import math\nprint(math.sqrt(4))",
+                        "reasoning": "Add the missing import",
+                        "confidence": 0.9,
+                    }
+                )
+            ]
+        )
+        generator = GeneratorNode(_settings())
+        generator._provider = provider
+        history = [{"attempt": 1, "code": "print(math.sqrt(4))", "critique": None}]
+        state = {
+            "task": "Print sqrt(4)",
+            "mode": "fused",
+            "attempt": 1,
+            "code": "print(math.sqrt(4))",
+            "execution_result": FAILED_RESULT,
+            "history": history,
+        }
+
+        update = await generator.generate(state)
+
+        assert update["attempt"] == 2
+        assert update["code"].startswith("import math")
+        assert update["critique"] == "math was used without being imported"
+        assert update["history"][-1].critique == update["critique"]
+        # The rule-based diagnosis is passed along as a free hint
+        assert "Hint:" in provider.prompts[0]
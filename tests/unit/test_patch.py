@@ -0,0 +1,154 @@
+"""
+Tests for Patch-Mode Retries
+"""
+
+import json
+
+import pytest
+
+from agent_sandbox.orchestrator.nodes.generator import GeneratorNode
+from agent_sandbox.orchestrator.nodes.patch import (
+    PatchError,
+    apply_line_edits,
+    apply_patch,
+    apply_unified_diff,
+    number_lines,
+)
+from agent_sandbox.providers.base import LLMResponse
+
+from .test_orchestrator import FAILED_RESULT, FakeProvider, _settings
+
+CODE = "def area(r):\n    return pi * r ** 2\n\n\nprint(area(2))\n"
+
+
+class UsageProvider(FakeProvider):
+    """FakeProvider that reports token usage and latency."""
+
+    async def generate(self, system_prompt, user_prompt, temperature=None, max_tokens=None):
+        resp = await super().generate(system_prompt, user_prompt, temperature, max_tokens)
+        tokens = len(resp.content) // 4
+        return LLMResponse(
+            content=resp.content,
+            model="fake",
+            provider=self.name,
+            prompt_tokens=100,
+            completion_tokens=tokens,
+            total_tokens=100 + tokens,
+            latency_ms=float(tokens),
+        )
+
+
+class TestApplyPatch:
+    """Tests for applying diffs and line edits."""
+
+    def test_unified_diff(self):
+        """Test a diff with headers and context applies."""
+        diff = (
+            "--- a/code.py\n+++ b/code.py\n"
+            "@@ -1,2 +1,4 @@\n"
+            "+from math import pi\n+\n"
+            " def area(r):\n"
+            "     return pi * r ** 2\n"
+        )
+        assert apply_unified_diff(CODE, diff) == "from math import pi\n\n" + CODE
+
+    def test_diff_tolerates_wrong_line_numbers(self):
+        """Test hunks are found by context when the header is off."""
+        diff = "@@ -9,1 +9,1 @@\n-print(area(2))\n+print(round(area(2), 2))\n"
+        assert apply_unified_diff(CODE, diff).endswith("print(round(area(2), 2))\n")
+
+    def test_diff_context_mismatch(self):
+        """Test a hunk whose context isn't in the code is rejected."""
+        diff = "@@ -1,1 +1,1 @@\n-def volume(r):\n+def area(r):\n"
+        with pytest.raises(PatchError, match="does not match"):
+            apply_unified_diff(CODE, diff)
+
+    def test_line_edits(self):
+        """Test replacements and insertions by line number."""
+        edits = [
+            {"start": 1, "end": 0, "replacement": "import math\n"},
+            {"start": 2, "end": 2, "replacement": "    return math.pi * r ** 2"},
+        ]
+        patched = apply_line_edits(CODE, edits)
+        assert patched.startswith("import math\ndef area(r):\n    return math.pi")
+
+    def test_overlapping_edits(self):
+        """Test overlapping ranges are rejected."""
+        edits = [{"start": 1, "end": 2, "replacement": ""}, {"start": 2, "end": 2}]
+        with pytest.raises(PatchError):
+            apply_line_edits(CODE, edits)
+
+    def test_result_must_parse(self):
+        """Test a patch that breaks the syntax is rejected."""
+        edits = [{"start": 2, "end": 2, "replacement": "    return (pi * r"}]
+        with pytest.raises(PatchError, match="does not parse"):
+            apply_patch(CODE, edits=edits)
+
+    def test_number_lines(self):
+        """Test numbering is padded to the widest line number."""
+        assert number_lines("a\n" * 10).splitlines()[0] == " 1 | a"
+
+
+class TestPatchRetries:
+    """Tests for the generator in patch mode."""
+
+    def _generator(self, responses: list[str]) -> tuple[GeneratorNode, FakeProvider]:
+        generator = GeneratorNode(_settings(retry_format="patch"))
+        generator._provider = UsageProvider(responses)
+        return generator, generator._provider
+
+    def _state(self) -> dict:
+        return {"task": "t", "attempt": 1, "code": CODE, "execution_result": FAILED_RESULT}
+
+    async def test_patch_applied(self):
+        """Test a retry applies the returned edits to the previous code."""
+        edit = {"start": 1, "end": 0, "replacement": "from math import pi"}
+        generator, provider = self._generator(
+            [json.dumps({"edits": [edit], "reasoning": "import pi"})]
+        )
+
+        update = await generator.generate(self._state())
+
+        assert update["code"] == "from math import pi\n" + CODE
+        assert "1 | def area(r):" in provider.prompts[0]
+        assert update["llm_calls"][0]["kind"] == "patch"
+        assert update["llm_calls"][0]["applied"] is True
+
+    async def test_falls_back_to_full_regeneration(self):
+        """Test a patch that doesn't apply triggers a full retry."""
+        bad = json.dumps({"patch": "@@ -1 +1 @@\n-nothing like this\n+x = 1\n"})
+        full = json.dumps({"code": "import math\nprint(math.pi * 4)", "reasoning": "rewrite"})
+        generator, provider = self._generator([bad, full])
+
+        update = await generator.generate(self._state())
+
+        assert update["code"].startswith("import math")
+        assert [c["kind"] for c in update["llm_calls"]] == ["patch", "full"]
+        assert update["llm_calls"][0]["applied"] is False
+        assert update["llm_calls"][1]["fallback"] is True
+        # Both calls count against the budget
+        assert update["tokens_used"] == sum(
+            c["prompt_tokens"] + c["completion_tokens"] for c in update["llm_calls"]
+        )
+
+    async def test_failed_patch_request_regenerates(self):
+        """Test a provider error on the patch call falls back instead of using up the attempt."""
+        full = json.dumps({"code": "import math\nprint(math.pi * 4)", "reasoning": "rewrite"})
+        generator, provider = self._generator([full])
+        generate_json = provider.generate_json
+        calls = 0
+
+        async def flaky(**kwargs):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise TimeoutError("patch call timed out")
+            return await generate_json(**kwargs)
+
+        provider.generate_json = flaky
+
+        update = await generator.generate(self._state())
+
+        assert update["code"].startswith("import math")
+        assert [c["kind"] for c in update["llm_calls"]] == ["full"]
+        assert update["llm_calls"][0]["fallback"] is True
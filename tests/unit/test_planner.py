@@ -0,0 +1,209 @@
+"""
+Tests for Task Decomposition
+"""
+
+import asyncio
+import json
+import sys
+
+import pytest
+from pydantic import ValidationError
+
+from agent_sandbox.contracts.agent_output import TaskPlan
+from agent_sandbox.orchestrator.graph import AgentGraph
+from agent_sandbox.orchestrator.nodes.planner import PlannerNode
+from agent_sandbox.sandbox.models import ExecutionRequest, ExecutionResult, ExecutionStatus
+
+from .test_orchestrator import FakeProvider, _settings
+
+PLAN = {
+    "subtasks": [
+        {
+            "name": "parse",
+            "signature": "def parse(text: str) -> list[int]",
+            "test_code": "def test_parse():\n    assert parse('1,2') == [1, 2]",
+        },
+        {
+            "name": "total",
+            "signature": "def total(values: list[int]) -> int",
+            "test_code": "def test_total():\n    assert total([1, 2]) == 3",
+        },
+        {
+            "name": "report",
+            "signature": "def report(text: str) -> str",
+            "depends_on": ["parse", "total"],
+            "test_code": "def test_report():\n    assert report('1,2') == 'total=3'",
+        },
+    ],
+    "main": "print(report('4,5'))",
+}
+
+FUNCTIONS = {
+    "parse": ["def parse(text):\n    return [int(v) for v in text.split(',')]"],
+    # The first version is wrong and must be retried on its own
+    "total": [
+        "def total(values):\n    return len(values)",
+        "def total(values):\n    return sum(values)",
+    ],
+    "report": ["def report(text):\n    return f'total={total(parse(text))}'"],
+}
+
+
+class PlanProvider(FakeProvider):
+    """Answers the planner with a plan and each subtask with its next version."""
+
+    def __init__(self, plan: dict, functions: dict[str, list[str]]) -> None:
+        super().__init__([])
+        self.plan = plan
+        self.functions = {name: list(versions) for name, versions in functions.items()}
+
+    async def generate(self, system_prompt, user_prompt, temperature=None, max_tokens=None):
+        if user_prompt.startswith("Task:"):
+            self.responses.append(json.dumps(self.plan))
+        else:
+            name = user_prompt.split("FUNCTION: def ")[1].split("(")[0]
+            code = self.functions[name].pop(0)
+            self.responses.append(
+                json.dumps({"code": code, "reasoning": f"implements {name}", "confidence": 0.9})
+            )
+        await asyncio.sleep(0.01)
+        return await super().generate(system_prompt, user_prompt, temperature, max_tokens)
+
+
+class LocalSandbox:
+    """Runs programs with the local interpreter and tracks concurrency."""
+
+    def __init__(self) -> None:
+        self.programs: list[str] = []
+        self.running = 0
+        self.peak = 0
+
+    async def execute(self, request):
+        self.programs.append(request.code)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                sys.executable,
+                "-c",
+                request.code,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+            )
+            output = (await proc.communicate())[0].decode()
+        finally:
+            self.running -= 1
+        return ExecutionResult(
+            stdout=output,
+            stderr=output if proc.returncode else "",
+            exit_code=proc.returncode,
+            status=ExecutionStatus.SUCCESS if proc.returncode == 0 else ExecutionStatus.ERROR,
+        )
+
+
+def _planner(provider, sandbox) -> PlannerNode:
+    planner = PlannerNode(_settings(planner_enabled=True), sandbox)
+    planner._provider = provider
+    return planner
+
+
+class TestTaskPlan:
+    """Tests for the plan contract."""
+
+    def test_dependency_order(self):
+        """Test subtasks are ordered after what they call."""
+        plan = TaskPlan(**{**PLAN, "subtasks": PLAN["subtasks"][::-1]})
+        assert [s.name for s in plan.order()][-1] == "report"
+
+    @pytest.mark.parametrize(
+        "depends_on",
+        [["missing"], ["report"]],
+        ids=["unknown", "cycle"],
+    )
+    def test_invalid_dependencies(self, depends_on):
+        """Test unknown dependencies and cycles are rejected."""
+        subtasks = [dict(s) for s in PLAN["subtasks"]]
+        subtasks[0]["depends_on"] = depends_on
+        with pytest.raises(ValidationError):
+            TaskPlan(subtasks=subtasks, main=PLAN["main"])
+
+
+class TestPlanner:
+    """Tests for solving a plan piecewise."""
+
+    async def test_parallel_solve_and_assemble(self):
+        """Test independent subtasks run together and only the failing one is retried."""
+        sandbox = LocalSandbox()
+        provider = PlanProvider(PLAN, FUNCTIONS)
+
+        update = await _planner(provider, sandbox).plan({"task": "Sum a CSV line"})
+
+        assert sandbox.peak == 2  # parse and total verified concurrently
+        attempts = {s["name"]: s["attempts"] for s in update["plan"]["subtasks"]}
+        assert attempts == {"parse": 1, "total": 2, "report": 1}
+        assert update["plan"]["assembled"] is True
+        assert update["attempt"] == 1
+        assert update["code"].rstrip().endswith("print(report('4,5'))")
+        assert len(update["llm_calls"]) == 5  # plan + 4 subtask generations
+        # The assembled program runs on its own
+        result = await LocalSandbox().execute(ExecutionRequest(code=update["code"]))
+        assert result.stdout == "total=9\n"
+
+    async def test_dependents_of_failed_subtask_not_started(self):
+        """Test a subtask that never passes falls back to whole-program generation."""
+        functions = {**FUNCTIONS, "total": ["def total(values):\n    return 0"] * 3}
+        planner = _planner(PlanProvider(PLAN, functions), LocalSandbox())
+
+        update = await planner.plan({"task": "Sum a CSV line"})
+
+        subtasks = {s["name"]: s for s in update["plan"]["subtasks"]}
+        assert update["plan"]["assembled"] is False
+        assert subtasks["total"]["attempts"] == 3
+        assert subtasks["report"]["attempts"] == 0
+        assert "code" not in update
+        assert planner.should_continue(update) == "generate"
+
+    async def test_simple_task_not_decomposed(self):
+        """Test a plan without subtasks leaves generation to the generator."""
+        planner = _planner(PlanProvider({"subtasks": [], "main": ""}, {}), LocalSandbox())
+
+        update = await planner.plan({"task": "Print 1"})
+
+        assert update["plan"] is None
+        assert len(update["llm_calls"]) == 1
+        assert planner.should_continue(update) == "generate"
+
+    async def test_calls_are_constrained_and_sized_from_the_running_total(self):
+        """Test every call asks for its schema and fits what the earlier calls left."""
+        calls = []
+
+        class MeteredProvider(PlanProvider):
+            async def generate_json(
+                self, system_prompt, user_prompt, temperature=None, max_tokens=None, schema=None
+            ):
+                calls.append((schema["title"], max_tokens))
+                response = await self.generate(system_prompt, user_prompt, temperature)
+                return response.model_copy(update={"total_tokens": 500})
+
+        planner = _planner(MeteredProvider(PLAN, FUNCTIONS), LocalSandbox())
+
+        update = await planner.plan({"task": "Sum a CSV line", "token_budget": 2500})
+
+        assert update["tokens_used"] == 2500
+        assert [title for title, _ in calls] == ["TaskPlan"] + ["AgentOutput"] * 4
+        assert calls[0][1] == 2048
+        # report starts once the plan and three subtask calls have spent 2000 tokens
+        assert calls[-1][1] == 500
+
+    async def test_graph_executes_assembled_program(self, monkeypatch):
+        """Test the assembled program skips generation and runs as attempt 1."""
+        provider = PlanProvider(PLAN, FUNCTIONS)
+        monkeypatch.setattr(
+            "agent_sandbox.orchestrator.nodes.planner.get_provider", lambda **_: provider
+        )
+        agent = AgentGraph(LocalSandbox(), _settings(planner_enabled=True))
+
+        events = [event async for event in agent.run_streaming("Sum a CSV line")]
+
+        assert [name for e in events for name in e] == ["plan", "execute", "verify", "finalize"]
+        assert events[-1]["finalize"]["final_output"] == "total=9\n"
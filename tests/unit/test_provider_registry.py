@@ -0,0 +1,79 @@
+"""
+Tests for the Provider Registry
+"""
+
+import asyncio
+
+from agent_sandbox.providers import http, registry
+
+
+class TestProviderRegistry:
+    """Tests for shared provider instances."""
+
+    def setup_method(self):
+        registry._providers.clear()
+
+    def test_same_backend_is_reused(self):
+        """Test repeated lookups return the same client."""
+        a = registry.get_provider("groq", "key", "llama-3.3-70b-versatile")
+        b = registry.get_provider("groq", "key", "llama-3.3-70b-versatile")
+        assert a is b
+
+    def test_different_model_gets_own_instance(self):
+        """Test providers are keyed by model."""
+        a = registry.get_provider("groq", "key", "llama-3.3-70b-versatile")
+        b = registry.get_provider("groq", "key", "llama-3.1-8b-instant")
+        assert a is not b
+        assert registry.get_registry_stats()["providers"] == 2
+
+    async def test_close_providers(self):
+        """Test shutdown closes and forgets every provider."""
+        registry.get_provider("groq", "key")
+        await registry.close_providers()
+        assert registry.get_registry_stats()["providers"] == 0
+
+
+async def _serve_http(reader, writer):
+    """Minimal HTTP/1.1 keep-alive server answering every request with "ok"."""
+    try:
+        while await reader.readuntil(b"\r\n\r\n"):
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+class TestHttpClients:
+    """Tests for pooled, shared provider HTTP clients."""
+
+    async def test_connections_are_reused(self):
+        """Test sequential requests share one kept-alive connection."""
+        server = await asyncio.start_server(_serve_http, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        before = http.get_http_stats()
+
+        async with http.create_client(base_url=f"http://127.0.0.1:{port}") as client:
+            for _ in range(5):
+                assert (await client.get("/")).text == "ok"
+        server.close()
+
+        stats = http.get_http_stats()
+        assert stats["requests"] == before["requests"] + 5
+        assert stats["connections"] == before["connections"] + 1
+
+    def test_sdk_providers_share_client(self):
+        """Test models of one backend share a connection pool."""
+        registry._providers.clear()
+        a = registry.get_provider("groq", "key", "llama-3.3-70b-versatile")
+        b = registry.get_provider("groq", "key", "llama-3.1-8b-instant")
+        assert a.client._client is b.client._client
+
+    async def test_close_providers_closes_clients(self):
+        """Test shutdown closes the shared clients."""
+        registry._providers.clear()
+        client = registry.get_provider("groq", "key").client._client
+        await registry.close_providers()
+        assert client.is_closed
+        assert http.get_http_stats()["shared_clients"] == 0
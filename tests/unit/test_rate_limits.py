@@ -0,0 +1,180 @@
+"""
+Tests for Provider Rate Limits and Retries
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from agent_sandbox.providers import ratelimit
+from agent_sandbox.providers.base import LLMResponse
+from agent_sandbox.providers.context import estimate_tokens
+from agent_sandbox.providers.ratelimit import RateLimiter, TokenBucket, get_ratelimit_stats
+from agent_sandbox.providers.wrapper import RateLimitedProvider
+
+from .test_orchestrator import FakeProvider
+
+
+def _status_error(status: int, headers: dict[str, str] | None = None) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://api.example.com/chat")
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError(f"{status}", request=request, response=response)
+
+
+class FlakyProvider(FakeProvider):
+    """Provider that raises the given errors first, then answers."""
+
+    def __init__(self, errors: list[Exception]) -> None:
+        super().__init__([])
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def generate(self, system_prompt, user_prompt, temperature=None, max_tokens=None):  # noqa: ARG002
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return LLMResponse(content="ok", model="fake", provider=self.name, total_tokens=50)
+
+
+def _provider(inner, limiter=None, max_retries=3) -> RateLimitedProvider:
+    inner.config.max_retries = max_retries
+    return RateLimitedProvider(inner, limiter or RateLimiter(), retry_base_delay=0.01)
+
+
+class TestRetryPolicy:
+    """Tests for which failures are retried and for how long."""
+
+    def test_retryable_errors(self):
+        """Test rate limits, overloads and network errors are retried; bad requests aren't."""
+        assert ratelimit.is_retryable(_status_error(429))
+        assert ratelimit.is_retryable(_status_error(503))
+        assert ratelimit.is_retryable(httpx.ConnectError("refused"))
+        assert not ratelimit.is_retryable(_status_error(400))
+        assert not ratelimit.is_retryable(ValueError("bad json"))
+
+    def test_retry_after_header(self):
+        """Test Retry-After is read in seconds, milliseconds or as a date."""
+        assert ratelimit.retry_after(_status_error(429, {"retry-after": "2"})) == 2.0
+        assert ratelimit.retry_after(_status_error(429, {"retry-after-ms": "250"})) == 0.25
+        date = "Wed, 21 Oct 2015 07:28:00 GMT"
+        assert ratelimit.retry_after(_status_error(429, {"retry-after": date})) == 0.0
+        assert ratelimit.retry_after(_status_error(429)) is None
+
+    def test_full_jitter_is_bounded(self):
+        """Test backoff stays within [0, min(cap, base * 2^attempt)]."""
+        delays = [ratelimit.backoff_delay(3, base=0.5, cap=2.0) for _ in range(200)]
+        assert all(0 <= d <= 2.0 for d in delays)
+        assert len(set(delays)) > 1
+
+
+class TestTokenBucket:
+    """Tests for client-side request and token limits."""
+
+    def test_wait_time_after_burst(self):
+        """Test a drained bucket reports the time to refill what's needed."""
+        bucket = TokenBucket(per_minute=60)  # One per second
+        bucket.take(60)
+        assert bucket.wait_time(1) == pytest.approx(1.0, abs=0.05)
+
+    def test_settle_refunds_unused_tokens(self):
+        """Test reserving the completion limit doesn't waste the token budget."""
+        limiter = RateLimiter(tokens_per_minute=1000)
+        limiter.tokens.take(800)
+        limiter.settle(reserved=800, used=200)
+        assert limiter.tokens.level == pytest.approx(800, abs=1)  # 200 left + 600 unused
+
+    async def test_calls_queue_instead_of_failing(self):
+        """Test calls over the request limit wait for the bucket to refill."""
+        limiter = RateLimiter(requests_per_minute=600)  # Ten per second
+        limiter.requests.take(600)
+        before = get_ratelimit_stats()
+
+        t0 = time.monotonic()
+        waits = await asyncio.gather(*(limiter.acquire(10) for _ in range(3)))
+
+        # Queued in order, ~0.1 s apart
+        assert time.monotonic() - t0 == pytest.approx(0.3, abs=0.1)
+        assert waits == sorted(waits)
+        assert get_ratelimit_stats()["throttled"] == before["throttled"] + 3
+
+
+class TestRateLimitedProvider:
+    """Tests for retries and throttle reporting around a provider."""
+
+    async def test_retries_transient_failures(self):
+        """Test a 429 and a connection error are retried and reported."""
+        inner = FlakyProvider([_status_error(429), httpx.ConnectError("reset")])
+        before = get_ratelimit_stats()
+
+        response = await _provider(inner).generate("system", "user")
+
+        assert response.content == "ok"
+        assert inner.calls == 3
+        assert response.retries == 2
+        assert response.throttle_wait_ms > 0
+        stats = get_ratelimit_stats()
+        assert stats["retries"] == before["retries"] + 2
+        assert stats["rate_limited"] == before["rate_limited"] + 1
+
+    async def test_retry_after_pauses_every_call(self):
+        """Test Retry-After holds back other calls to the same provider too."""
+        limiter = RateLimiter()
+        inner = FlakyProvider([_status_error(429, {"retry-after": "0.2"})])
+        provider = _provider(inner, limiter)
+
+        t0 = time.monotonic()
+        first = asyncio.create_task(provider.generate("system", "user"))
+        await asyncio.sleep(0.05)
+        second = await provider.generate("system", "other")
+
+        assert time.monotonic() - t0 >= 0.2
+        assert second.throttle_wait_ms > 0
+        assert (await first).retries == 1
+
+    async def test_gives_up(self):
+        """Test non-retryable errors and exhausted retries are raised."""
+        with pytest.raises(httpx.HTTPStatusError):
+            await _provider(FlakyProvider([_status_error(400)])).generate("s", "u")
+
+        inner = FlakyProvider([_status_error(503)] * 3)
+        with pytest.raises(httpx.HTTPStatusError):
+            await _provider(inner, max_retries=2).generate("s", "u")
+        assert inner.calls == 3
+
+    async def test_long_retry_after_fails_fast(self):
+        """Test a Retry-After beyond the max delay fails instead of stalling the job."""
+        inner = FlakyProvider([_status_error(429, {"retry-after": "3600"})])
+        with pytest.raises(httpx.HTTPStatusError):
+            await _provider(inner).generate("s", "u")
+        assert inner.calls == 1
+
+    async def test_cancelled_call_gives_its_tokens_back(self):
+        """Test a call cancelled in flight doesn't keep its reservation."""
+        limiter = RateLimiter(tokens_per_minute=100_000)
+
+        class SlowProvider(FakeProvider):
+            async def generate(self, system_prompt, user_prompt, temperature=None, max_tokens=None):  # noqa: ARG002
+                await asyncio.sleep(10)
+
+        call = asyncio.create_task(_provider(SlowProvider([]), limiter).generate("s", "u"))
+        await asyncio.sleep(0.01)
+        assert limiter.tokens.level < 100_000 - 1000
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+
+        assert limiter.tokens.level == pytest.approx(100_000, abs=1)
+
+    async def test_stream_settles_what_it_used(self):
+        """Test a stream keeps only its prompt and output against the token limit."""
+        limiter = RateLimiter(tokens_per_minute=100_000)
+        text = "word " * 200
+        provider = _provider(FakeProvider([text]), limiter)
+
+        chunks = [chunk async for chunk in provider.stream("system", "user")]
+
+        assert chunks == [text]
+        used = estimate_tokens("system") + estimate_tokens("user") + estimate_tokens(text)
+        assert limiter.tokens.level == pytest.approx(100_000 - used, abs=5)
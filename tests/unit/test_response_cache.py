@@ -0,0 +1,171 @@
+"""
+Tests for the LLM Response Cache
+"""
+
+import time
+from types import SimpleNamespace
+
+from agent_sandbox.providers.base import LLMResponse, ProviderConfig
+from agent_sandbox.providers.cache import ResponseCache, get_cache_stats
+from agent_sandbox.providers.groq import GroqProvider
+from agent_sandbox.providers.wrapper import CachingProvider
+
+from .test_orchestrator import FakeProvider, _settings
+
+
+class CountingProvider(FakeProvider):
+    """Provider that answers every call with a fresh response and counts calls."""
+
+    def __init__(self) -> None:
+        super().__init__([])
+        self.calls = 0
+
+    async def generate(self, system_prompt, user_prompt, temperature=None, max_tokens=None):  # noqa: ARG002
+        self.calls += 1
+        return LLMResponse(
+            content=f"answer {self.calls}",
+            model="fake",
+            provider=self.name,
+            total_tokens=100,
+            latency_ms=250.0,
+        )
+
+
+def _cache(tmp_path, **kwargs) -> ResponseCache:
+    return ResponseCache(tmp_path / "cache.db", **kwargs)
+
+
+class TestCachingProvider:
+    """Tests for serving repeated calls from the cache."""
+
+    async def test_repeated_call_is_served_from_cache(self, tmp_path):
+        """Test an identical temperature-0 call doesn't reach the provider again."""
+        inner = CountingProvider()
+        provider = CachingProvider(inner, _cache(tmp_path))
+        before = get_cache_stats()
+
+        first = await provider.generate_json("system", "user", temperature=0.0)
+        second = await provider.generate_json("system", "user", temperature=0.0)
+
+        assert inner.calls == 1
+        assert second.content == first.content
+        assert second.cached and not first.cached
+        stats = get_cache_stats()
+        assert stats["memory_hits"] == before["memory_hits"] + 1
+        assert stats["tokens_saved"] == before["tokens_saved"] + 100
+        assert stats["latency_saved_ms"] >= before["latency_saved_ms"] + 250
+
+    async def test_sampling_calls_bypass_cache(self, tmp_path):
+        """Test calls above the temperature limit always reach the provider."""
+        inner = CountingProvider()
+        provider = CachingProvider(inner, _cache(tmp_path))
+
+        await provider.generate_json("system", "user", temperature=0.8)
+        await provider.generate_json("system", "user", temperature=0.8)
+
+        assert inner.calls == 2
+
+    async def test_agent_calls_cached_by_default(self, tmp_path):
+        """Test the default limit covers the generator's and critic's temperatures."""
+        inner = CountingProvider()
+        limit = _settings().llm_cache_max_temperature
+        provider = CachingProvider(inner, _cache(tmp_path), max_temperature=limit)
+
+        for temperature in (0.2, 0.2, 0.3, 0.3):
+            await provider.generate_json("system", "user", temperature=temperature)
+
+        assert inner.calls == 2
+
+    async def test_key_covers_prompts_and_params(self, tmp_path):
+        """Test different prompts or sampling params are separate entries."""
+        inner = CountingProvider()
+        provider = CachingProvider(inner, _cache(tmp_path), max_temperature=0.5)
+
+        await provider.generate_json("system", "user", temperature=0.0)
+        await provider.generate_json("system", "other", temperature=0.0)
+        await provider.generate_json("system", "user", temperature=0.3)
+        await provider.generate_json("system", "user", temperature=0.0, max_tokens=64)
+        await provider.generate("system", "user", temperature=0.0)
+
+        assert inner.calls == 5
+
+    async def test_disk_tier_survives_restart(self, tmp_path):
+        """Test a new cache on the same file serves earlier responses."""
+        inner = CountingProvider()
+        await CachingProvider(inner, _cache(tmp_path)).generate_json("s", "u", temperature=0)
+
+        provider = CachingProvider(inner, _cache(tmp_path))
+        response = await provider.generate_json("s", "u", temperature=0)
+
+        assert inner.calls == 1
+        assert response.cached
+
+    async def test_wrapper_delegates_attributes(self, tmp_path):
+        """Test the wrapper looks like the provider it wraps."""
+        inner = CountingProvider()
+        inner.client = object()
+        provider = CachingProvider(inner, _cache(tmp_path))
+
+        assert provider.name == inner.name
+        assert provider.client is inner.client
+
+
+class TestResponseCache:
+    """Tests for eviction, expiry and invalidation."""
+
+    def _response(self, content: str) -> LLMResponse:
+        return LLMResponse(content=content, model="m", provider="p")
+
+    def test_disk_tier_evicts_least_recently_used(self, tmp_path):
+        """Test the disk tier keeps at most ``max_entries`` rows."""
+        cache = _cache(tmp_path, memory_entries=0, max_entries=2)
+        cache.put("a", "p/m", self._response("a"))
+        cache.put("b", "p/m", self._response("b"))
+        time.sleep(0.01)
+        assert cache.get("a") is not None  # "b" is now least recently used
+        cache.put("c", "p/m", self._response("c"))
+
+        assert cache.size()["disk"] == 2
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+
+    def test_expired_entries_are_misses(self, tmp_path):
+        """Test entries older than the TTL are not served."""
+        cache = _cache(tmp_path, ttl_seconds=0.01)
+        cache.put("a", "p/m", self._response("a"))
+        time.sleep(0.02)
+
+        assert cache.get("a") is None
+        assert cache.size()["disk"] == 0
+
+    def test_invalidate_namespace(self, tmp_path):
+        """Test invalidation drops one namespace from both tiers."""
+        cache = _cache(tmp_path)
+        cache.put("a", "groq/m1", self._response("a"))
+        cache.put("b", "groq/m2", self._response("b"))
+
+        assert cache.invalidate("groq/m1") == 1
+        assert cache.get("a") is None
+        assert cache.get("b") is not None
+        assert cache.invalidate() == 1
+
+
+class TestProviderTemperature:
+    """Tests for explicit sampling parameters."""
+
+    async def test_zero_temperature_is_sent(self):
+        """Test temperature 0 isn't replaced by the configured default."""
+        provider = GroqProvider(ProviderConfig(api_key="key", model="m", temperature=0.2))
+        sent = {}
+
+        async def create(**kwargs):
+            sent.update(kwargs)
+            choice = SimpleNamespace(message=SimpleNamespace(content="{}"), finish_reason="stop")
+            return SimpleNamespace(choices=[choice], model="m", usage=None)
+
+        provider.client = SimpleNamespace(
+            chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+        )
+        await provider.generate_json("system", "user", temperature=0.0)
+
+        assert sent["temperature"] == 0.0
@@ -0,0 +1,160 @@
+"""
+Tests for Latency-Aware Provider Routing
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from agent_sandbox.providers import routing
+from agent_sandbox.providers.base import LLMResponse
+from agent_sandbox.providers.routing import CircuitState, RoutingProvider, get_routing_stats
+
+from .test_orchestrator import FakeProvider
+
+
+class BackendProvider(FakeProvider):
+    """Provider with a fixed latency that can be switched to failing."""
+
+    def __init__(self, name: str, delay: float = 0.0, failing: bool = False) -> None:
+        super().__init__([])
+        self.name = name
+        self.delay = delay
+        self.failing = failing
+        self.calls = 0
+
+    async def generate(self, system_prompt, user_prompt, temperature=None, max_tokens=None):  # noqa: ARG002
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.failing:
+            raise httpx.ConnectError(f"{self.name} is down")
+        return LLMResponse(
+            content=self.name, model="fake", provider=self.name, completion_tokens=100
+        )
+
+
+class TestRoutingProvider:
+    """Tests for EWMA scoring, failover and circuit breakers."""
+
+    async def test_routes_to_fastest_backend(self):
+        """Test once every backend has data, calls go to the lowest-latency one."""
+        slow, fast = BackendProvider("slow", 0.03), BackendProvider("fast", 0.0)
+        router = RoutingProvider([slow, fast])
+
+        answers = [(await router.generate("s", "u")).content for _ in range(6)]
+
+        # Each untried backend gets a call first, then the fast one wins
+        assert answers[2:] == ["fast"] * 4
+        stats = router.stats()
+        assert stats["fast/fake"]["latency_ms"] < stats["slow/fake"]["latency_ms"]
+        assert stats["fast/fake"]["tokens_per_s"] > stats["slow/fake"]["tokens_per_s"]
+
+    async def test_failover_and_circuit_opens(self):
+        """Test a failing backend is skipped within the call, then shut off."""
+        down, up = BackendProvider("down", failing=True), BackendProvider("up")
+        router = RoutingProvider([down, up], failure_threshold=2, cooldown_seconds=60)
+        before = get_routing_stats()
+
+        for _ in range(4):
+            assert (await router.generate("s", "u")).content == "up"
+
+        backend = router.backends[0]
+        assert backend.state is CircuitState.OPEN
+        # Two failures opened the circuit; no calls after that
+        assert down.calls == 2
+        stats = get_routing_stats()
+        assert stats["failovers"] >= before["failovers"] + 2
+        assert stats["circuit_opens"] == before["circuit_opens"] + 1
+
+    async def test_half_open_probe_closes_circuit(self):
+        """Test a background probe closes the circuit once the backend recovers."""
+        flaky, up = BackendProvider("flaky", failing=True), BackendProvider("up")
+        router = RoutingProvider([flaky, up], failure_threshold=1, cooldown_seconds=0.01)
+        await router.generate("s", "u")
+        assert router.backends[0].state is CircuitState.OPEN
+
+        flaky.failing = False
+        await asyncio.sleep(0.02)
+        router.ranked()  # Cooldown over: starts the probe
+        assert router.backends[0].state is CircuitState.HALF_OPEN
+        await asyncio.gather(*router._probes)
+
+        assert router.backends[0].state is CircuitState.CLOSED
+
+    async def test_failed_probe_doubles_cooldown(self):
+        """Test a backend that is still down stays open for longer."""
+        down, up = BackendProvider("down", failing=True), BackendProvider("up")
+        router = RoutingProvider([down, up], failure_threshold=1, cooldown_seconds=0.01)
+        await router.generate("s", "u")
+
+        await asyncio.sleep(0.02)
+        router.ranked()
+        await asyncio.gather(*router._probes)
+
+        assert router.backends[0].state is CircuitState.OPEN
+        assert router.backends[0].cooldown == pytest.approx(0.02)
+
+    async def test_all_backends_down_raises(self):
+        """Test the last error surfaces when no backend can answer."""
+        router = RoutingProvider(
+            [BackendProvider("a", failing=True), BackendProvider("b", failing=True)]
+        )
+        with pytest.raises(httpx.ConnectError):
+            await router.generate("s", "u")
+
+    async def test_bad_request_is_raised_without_failover(self):
+        """Test a rejected request skips failover and leaves health alone."""
+
+        class BadRequest(Exception):
+            status_code = 400
+
+        rejecting, up = BackendProvider("rejecting"), BackendProvider("up")
+
+        async def reject(*args, **kwargs):  # noqa: ARG001
+            raise BadRequest("prompt is too long")
+
+        rejecting.generate = reject
+        router = RoutingProvider([rejecting, up], failure_threshold=1)
+
+        with pytest.raises(BadRequest):
+            await router.generate("s", "u")
+
+        assert up.calls == 0
+        backend = router.backends[0]
+        assert backend.failures == 0
+        assert backend.state is CircuitState.CLOSED
+
+    async def test_unauthorized_backend_fails_over_and_opens(self):
+        """Test a backend with a bad key counts as failing instead of blocking every call."""
+
+        class Unauthorized(Exception):
+            status_code = 401
+
+        misconfigured, up = BackendProvider("misconfigured"), BackendProvider("up")
+
+        async def unauthorized(*args, **kwargs):  # noqa: ARG001
+            misconfigured.calls += 1
+            raise Unauthorized("invalid api key")
+
+        misconfigured.generate = unauthorized
+        router = RoutingProvider([misconfigured, up], failure_threshold=2, cooldown_seconds=60)
+
+        for _ in range(4):
+            assert (await router.generate("s", "u")).content == "up"
+
+        # Ranked first while it had no latency data, then shut off
+        assert misconfigured.calls == 2
+        assert router.backends[0].state is CircuitState.OPEN
+
+    async def test_exploration_revisits_stale_backend(self, monkeypatch):
+        """Test a backend that lost the ranking still gets an occasional call."""
+        monkeypatch.setattr(routing, "EXPLORE_EVERY", 5)
+        slow, fast = BackendProvider("slow", 0.02), BackendProvider("fast", 0.0)
+        router = RoutingProvider([slow, fast])
+
+        for _ in range(10):
+            await router.generate("s", "u")
+
+        assert slow.calls >= 2
+        assert fast.calls > slow.calls
@@ -0,0 +1,159 @@
+"""
+Tests for the Agent Runtime Batch API
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from agent_sandbox.orchestrator.graph import AgentGraph
+from agent_sandbox.runtime import AgentRuntime, BatchStats
+from agent_sandbox.sandbox.manager import SandboxManager
+from agent_sandbox.sandbox.models import ExecutionRequest, ExecutionResult, ExecutionStatus
+
+from .test_orchestrator import FakeProvider, _settings
+
+
+class TrackingSandbox:
+    """Sandbox that succeeds after a per-program delay and tracks concurrency."""
+
+    def __init__(self, delays: dict[str, float] | None = None) -> None:
+        self.delays = delays or {}
+        self.running = 0
+        self.peak = 0
+
+    async def execute(self, request):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delays.get(request.code, 0.01))
+        finally:
+            self.running -= 1
+        return ExecutionResult(stdout="ok\n", exit_code=0, status=ExecutionStatus.SUCCESS)
+
+
+class EchoProvider(FakeProvider):
+    """Provider whose program prints the task, whichever job asks first."""
+
+    async def generate(self, system_prompt, user_prompt, temperature=None, max_tokens=None):
+        task = user_prompt.removeprefix("Task: ").split("\n")[0]
+        program = {"code": f"print({task!r})", "reasoning": "trivial", "confidence": 0.5}
+        self.responses.append(json.dumps(program))
+        return await super().generate(system_prompt, user_prompt, temperature, max_tokens)
+
+
+def _runtime(monkeypatch, sandbox, **settings) -> AgentRuntime:
+    provider = EchoProvider([])
+    monkeypatch.setattr(
+        "agent_sandbox.orchestrator.nodes.generator.get_provider", lambda **_: provider
+    )
+    runtime = AgentRuntime(_settings(**settings))
+    runtime._agent = AgentGraph(sandbox, runtime.settings)
+    runtime._initialized = True
+    return runtime
+
+
+class TestRunMany:
+    """Tests for AgentRuntime.run_many."""
+
+    async def test_bounded_concurrency(self, monkeypatch):
+        """Test no more than ``concurrency`` jobs run at once."""
+        sandbox = TrackingSandbox()
+        runtime = _runtime(monkeypatch, sandbox)
+
+        results = [r async for r in runtime.run_many([f"task {i}" for i in range(6)], 2)]
+
+        assert sandbox.peak == 2
+        assert sorted(r["index"] for r in results) == list(range(6))
+        assert all(r["success"] for r in results)
+
+    async def test_results_stream_as_completed(self, monkeypatch):
+        """Test a fast task is yielded before a slow one submitted earlier."""
+        sandbox = TrackingSandbox({"print('slow')": 0.3, "print('fast')": 0.01})
+        runtime = _runtime(monkeypatch, sandbox)
+
+        order = [r["index"] async for r in runtime.run_many(["slow", "fast"], 2)]
+
+        assert order == [1, 0]
+
+    async def test_per_task_deadline(self, monkeypatch):
+        """Test per-task options apply to their task only."""
+        sandbox = TrackingSandbox({"print('slow')": 5, "print('fast')": 0.01})
+        runtime = _runtime(monkeypatch, sandbox)
+
+        results = {
+            r["index"]: r
+            async for r in runtime.run_many(
+                ["slow", "fast"], 2, per_task_options=[{"deadline_seconds": 0.2}, None]
+            )
+        }
+
+        assert results[0]["deadline_exceeded"] is True
+        assert results[1]["success"] is True
+        assert results[1]["deadline_exceeded"] is False
+
+    async def test_failure_does_not_stop_batch(self, monkeypatch):
+        """Test a task that raises yields a failed result."""
+        runtime = _runtime(monkeypatch, TrackingSandbox())
+        original = runtime.run
+
+        async def run(task, **kwargs):
+            if task == "bad":
+                raise RuntimeError("boom")
+            return await original(task, **kwargs)
+
+        monkeypatch.setattr(runtime, "run", run)
+
+        results = {r["index"]: r async for r in runtime.run_many(["bad", "good"])}
+
+        assert results[0]["success"] is False
+        assert results[0]["error"] == "boom"
+        assert results[1]["success"] is True
+        assert runtime.batch_stats.completed == 2
+        assert runtime.batch_stats.succeeded == 1
+
+    async def test_options_must_align(self, monkeypatch):
+        """Test per-task options of the wrong length are rejected."""
+        runtime = _runtime(monkeypatch, TrackingSandbox())
+
+        with pytest.raises(ValueError):
+            async for _ in runtime.run_many(["a", "b"], per_task_options=[{}]):
+                pass
+
+    def test_batch_stats_percentiles(self):
+        """Test nearest-rank percentiles over recorded latencies."""
+        stats = BatchStats()
+        for ms in range(1, 101):
+            stats.record({"success": ms % 2 == 0, "latency_ms": float(ms)})
+
+        assert stats.percentile(50) == 50
+        assert stats.percentile(90) == 90
+        assert stats.percentile(99) == 99
+        assert stats.succeeded == 50
+        assert stats.to_dict()["tasks_per_minute"] > 0
+
+
+class TestSandboxSlots:
+    """Tests for the sandbox container limit."""
+
+    async def test_executions_queue_for_slots(self, monkeypatch):
+        """Test executions beyond the pool size wait for a slot."""
+        manager = SandboxManager(_settings(sandbox_pool_size=2))
+        manager._initialized = True
+        running = peak = 0
+
+        async def execute(request):  # noqa: ARG001
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            return ExecutionResult(exit_code=0, status=ExecutionStatus.SUCCESS)
+
+        monkeypatch.setattr(manager, "_execute", execute)
+
+        await asyncio.gather(*(manager.execute(ExecutionRequest(code="pass")) for _ in range(5)))
+
+        assert peak == 2
+        assert (await manager.get_stats())["avg_slot_wait_ms"] > 0
@@ -0,0 +1,125 @@
+"""
+Tests for the Semantic Solution Cache
+"""
+
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from agent_sandbox.memory import semantic  # noqa: E402
+from agent_sandbox.memory.semantic import SemanticCache, embed, get_semantic_stats  # noqa: E402
+from agent_sandbox.orchestrator.graph import AgentGraph  # noqa: E402
+from agent_sandbox.sandbox.models import ExecutionResult, ExecutionStatus  # noqa: E402
+
+from .test_orchestrator import FakeProvider, _settings  # noqa: E402
+
+PROGRAM = json.dumps({"code": "print(55)", "reasoning": "iterate", "confidence": 0.9})
+
+
+class PassingSandbox:
+    """Sandbox where every program succeeds."""
+
+    def __init__(self) -> None:
+        self.runs = 0
+
+    async def execute(self, request):  # noqa: ARG002
+        self.runs += 1
+        return ExecutionResult(stdout="55\n", exit_code=0, status=ExecutionStatus.SUCCESS)
+
+
+class TestEmbedding:
+    """Tests for the hashed n-gram embedding."""
+
+    def test_paraphrases_are_similar(self):
+        """Test rephrased tasks embed close together and unrelated ones don't."""
+        task = embed("compute the 10th fibonacci")
+        assert float(task @ embed("print fibonacci number 10")) > 0.9
+        assert float(task @ embed("Parse a CSV string into a list of dicts")) < 0.3
+
+    def test_unit_length(self):
+        """Test vectors are normalized, so dot products are cosines."""
+        assert abs(float((embed("Sort a list") ** 2).sum()) - 1) < 1e-5
+
+
+class TestSemanticCache:
+    """Tests for lookup, capacity and persistence."""
+
+    def test_lookup_respects_threshold_and_numbers(self, tmp_path):
+        """Test a match needs the threshold and exactly the same numbers."""
+        cache = SemanticCache(tmp_path / "cache.jsonl", threshold=0.9)
+        cache.add("compute the 10th fibonacci", "print(55)")
+
+        match = cache.lookup("print fibonacci number 10")
+        assert match is not None and match.solution.code == "print(55)"
+        assert cache.lookup("print fibonacci number 20") is None
+        assert cache.lookup("reverse a linked list") is None
+
+    def test_top_k_is_ordered(self):
+        """Test top-k returns the most similar tasks first."""
+        cache = SemanticCache(None)
+        for task in ("merge sort a list", "reverse a string", "sort a list of integers"):
+            cache.add(task, f"# {task}")
+
+        matches = cache.top_k("sort a list of integers with merge sort", k=2)
+        assert [m.solution.task for m in matches] == [
+            "sort a list of integers",
+            "merge sort a list",
+        ]
+        assert matches[0].similarity >= matches[1].similarity
+
+    def test_full_cache_overwrites_oldest(self):
+        """Test the oldest solution makes room once the cache is full."""
+        cache = SemanticCache(None, max_entries=2)
+        cache.add("reverse a string", "a")
+        cache.add("sum a list", "b")
+        cache.add("count vowels in a word", "c")
+
+        assert len(cache) == 2
+        assert {m.solution.code for m in cache.top_k("anything", k=5)} == {"b", "c"}
+
+    def test_reload_from_disk(self, tmp_path):
+        """Test solutions survive a restart."""
+        path = tmp_path / "cache.jsonl"
+        SemanticCache(path).add("compute the 10th fibonacci", "print(55)", ["numpy"])
+
+        match = SemanticCache(path).lookup("print fibonacci number 10")
+        assert match is not None
+        assert match.solution.dependencies == ["numpy"]
+
+
+class TestAgentIntegration:
+    """Tests for serving cached solutions from the generator."""
+
+    async def test_paraphrase_served_without_llm(self, monkeypatch, tmp_path):
+        """Test a paraphrased task reuses the verified solution and re-validates it."""
+        monkeypatch.setattr(semantic, "_cache", None)
+        provider = FakeProvider([PROGRAM])
+        monkeypatch.setattr(
+            "agent_sandbox.orchestrator.nodes.generator.get_provider", lambda **_: provider
+        )
+        settings = _settings(
+            semantic_cache_enabled=True, semantic_cache_path=str(tmp_path / "cache.jsonl")
+        )
+        sandbox = PassingSandbox()
+        agent = AgentGraph(sandbox, settings)
+        before = get_semantic_stats()
+
+        first = await agent.run("compute the 10th fibonacci")
+        second = await agent.run("print fibonacci number 10")
+
+        assert first["success"] and first["semantic_match"] is None
+        assert second["success"]
+        assert second["code"] == "print(55)"
+        assert second["semantic_match"]["task"] == "compute the 10th fibonacci"
+        assert second["tokens_used"] == 0 and second["llm_calls"] == []
+        # Served code still ran in the sandbox
+        assert sandbox.runs == 2
+        assert len(provider.prompts) == 1
+        stats = get_semantic_stats()
+        assert stats["served"] == before["served"] + 1
+        assert stats["validated"] == before["validated"] + 1
+        # The validated solution isn't stored a second time
+        assert len(semantic.get_semantic_cache(settings)) == 1
+        assert len((tmp_path / "cache.jsonl").read_text().splitlines()) == 1
@@ -0,0 +1,141 @@
+"""
+Tests for Single-Flight Coalescing of LLM Calls
+"""
+
+import asyncio
+
+import pytest
+
+from agent_sandbox.orchestrator.nodes.budget import add_usage
+from agent_sandbox.providers.base import LLMResponse
+from agent_sandbox.providers.singleflight import CoalescingProvider, get_coalescing_stats
+
+from .test_orchestrator import FakeProvider
+
+
+class GatedProvider(FakeProvider):
+    """Provider whose calls block until ``release`` is set."""
+
+    def __init__(self) -> None:
+        super().__init__([])
+        self.release = asyncio.Event()
+        self.calls = 0
+        self.cancelled = 0
+
+    async def generate(self, system_prompt, user_prompt, temperature=None, max_tokens=None):  # noqa: ARG002
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return LLMResponse(
+            content=f"answer to {user_prompt}", model="fake", provider=self.name, total_tokens=80
+        )
+
+
+class TestCoalescingProvider:
+    """Tests for sharing in-flight identical calls."""
+
+    async def test_identical_calls_share_one_request(self):
+        """Test concurrent identical calls make one upstream request."""
+        inner = GatedProvider()
+        provider = CoalescingProvider(inner)
+        before = get_coalescing_stats()
+
+        calls = [asyncio.create_task(provider.generate("system", "task")) for _ in range(4)]
+        await asyncio.sleep(0)
+        inner.release.set()
+        responses = await asyncio.gather(*calls)
+
+        assert inner.calls == 1
+        assert {r.content for r in responses} == {"answer to task"}
+        assert [r.coalesced for r in responses].count(True) == 3
+        # Followers spent nothing
+        assert sum(add_usage({}, r) for r in responses) == 80
+        stats = get_coalescing_stats()
+        assert stats["coalesced"] == before["coalesced"] + 3
+        assert stats["tokens_saved"] == before["tokens_saved"] + 240
+
+    async def test_different_calls_are_not_shared(self):
+        """Test calls differing in prompt or temperature each reach the provider."""
+        inner = GatedProvider()
+        provider = CoalescingProvider(inner)
+
+        calls = [
+            asyncio.create_task(provider.generate("system", "a")),
+            asyncio.create_task(provider.generate("system", "b")),
+            asyncio.create_task(provider.generate("system", "a", temperature=0.9)),
+        ]
+        await asyncio.sleep(0)
+        inner.release.set()
+        await asyncio.gather(*calls)
+
+        assert inner.calls == 3
+
+    async def test_sequential_calls_are_not_shared(self):
+        """Test a finished call isn't reused (that's the response cache's job)."""
+        inner = GatedProvider()
+        inner.release.set()
+        provider = CoalescingProvider(inner)
+
+        await provider.generate("system", "task")
+        await provider.generate("system", "task")
+
+        assert inner.calls == 2
+
+    async def test_one_caller_cancelling_keeps_the_others(self):
+        """Test a cancelled caller detaches without killing the shared request."""
+        inner = GatedProvider()
+        provider = CoalescingProvider(inner)
+
+        leaving = asyncio.create_task(provider.generate("system", "task"))
+        staying = asyncio.create_task(provider.generate("system", "task"))
+        await asyncio.sleep(0)
+        leaving.cancel()
+        await asyncio.sleep(0)
+        inner.release.set()
+
+        assert (await staying).content == "answer to task"
+        assert leaving.cancelled()
+        assert inner.cancelled == 0
+
+    async def test_last_caller_cancelling_cancels_upstream(self):
+        """Test the upstream request stops once nobody is waiting for it."""
+        inner = GatedProvider()
+        provider = CoalescingProvider(inner)
+        before = get_coalescing_stats()
+
+        calls = [asyncio.create_task(provider.generate("system", "task")) for _ in range(2)]
+        await asyncio.sleep(0)
+        for call in calls:
+            call.cancel()
+        await asyncio.gather(*calls, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert inner.cancelled == 1
+        assert get_coalescing_stats()["abandoned"] == before["abandoned"] + 1
+
+        # A new call starts a fresh request
+        inner.release.set()
+        assert (await provider.generate("system", "task")).content == "answer to task"
+
+    async def test_errors_reach_every_caller(self):
+        """Test a failed upstream call raises in each waiting caller."""
+
+        class FailingProvider(GatedProvider):
+            async def generate(self, system_prompt, user_prompt, temperature=None, max_tokens=None):  # noqa: ARG002
+                self.calls += 1
+                await asyncio.sleep(0.01)
+                raise ConnectionError("down")
+
+        inner = FailingProvider()
+        provider = CoalescingProvider(inner)
+        results = await asyncio.gather(
+            *(provider.generate("system", "task") for _ in range(3)), return_exceptions=True
+        )
+
+        assert inner.calls == 1
+        assert all(isinstance(r, ConnectionError) for r in results)
+        with pytest.raises(ConnectionError):
+            await provider.generate("system", "task")
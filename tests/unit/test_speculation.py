@@ -0,0 +1,140 @@
+"""
+Tests for Speculative Regeneration
+"""
+
+import json
+
+from agent_sandbox.orchestrator.graph import AgentGraph
+from agent_sandbox.orchestrator.nodes.critic import CriticNode
+from agent_sandbox.orchestrator.nodes.executor import ExecutorNode
+from agent_sandbox.orchestrator.nodes.generator import GeneratorNode
+from agent_sandbox.orchestrator.nodes.speculative import SpeculativeCritiqueNode
+from agent_sandbox.orchestrator.nodes.verifier import VerifierNode
+
+from .test_orchestrator import (
+    FAILED_RESULT,
+    FakeProvider,
+    ScriptedSandbox,
+    SlowProvider,
+    _settings,
+)
+
+
+class TestSpeculation:
+    """Tests for the provisional regeneration raced against the critique."""
+
+    CRITIQUE = json.dumps({"diagnosis": "wrong value", "fix_suggestion": "print 2"})
+
+    def _node(self, critic_provider, generator_provider, sandbox):
+        settings = _settings(speculative_regeneration=True, critic_fast_path=False)
+        critic = CriticNode(settings)
+        critic._provider = critic_provider
+        generator = GeneratorNode(settings)
+        generator._provider = generator_provider
+        executor = ExecutorNode(sandbox, settings)
+        return SpeculativeCritiqueNode(critic, generator, executor, VerifierNode(), settings)
+
+    def _failed_state(self) -> dict:
+        return {
+            "task": "Print 2",
+            "code": "print(1)",
+            "attempt": 1,
+            "max_attempts": 3,
+            "history": [],
+            "execution_result": FAILED_RESULT,
+        }
+
+    def _program(self, n: int) -> str:
+        return json.dumps({"code": f"print({n})", "reasoning": "trivial", "confidence": 0.5})
+
+    async def test_passing_candidate_cancels_critique(self):
+        """Test a candidate that passes first becomes the next attempt."""
+        critic_provider = SlowProvider([self.CRITIQUE])
+        sandbox = ScriptedSandbox()
+        sandbox.calls = 1  # Already failed once
+        node = self._node(critic_provider, FakeProvider([self._program(2)]), sandbox)
+        state = self._failed_state()
+
+        update = await node.critique(state)
+
+        assert critic_provider.cancelled
+        assert update["code"] == "print(2)"
+        assert update["attempt"] == 2
+        assert update["execution_result"].passed
+        assert [e.attempt for e in update["history"]] == [1]
+        assert update["llm_calls"][-1]["speculative"] is True
+        assert node.should_continue({**state, **update}) == "success"
+
+    async def test_critique_first_cancels_candidate(self):
+        """Test the usual retry goes ahead when the critique lands first."""
+        generator_provider = SlowProvider([self._program(2)])
+        node = self._node(FakeProvider([self.CRITIQUE]), generator_provider, ScriptedSandbox())
+        state = self._failed_state()
+
+        update = await node.critique(state)
+
+        assert generator_provider.cancelled
+        assert "wrong value" in update["critique"]
+        assert "code" not in update
+        assert node.should_continue({**state, **update}) == "retry"
+
+    async def test_failed_candidate_usage_is_counted(self):
+        """Test a failing candidate is dropped but its tokens still count."""
+
+        class CountingProvider(FakeProvider):
+            async def generate(self, *args, **kwargs):
+                response = await super().generate(*args, **kwargs)
+                response.total_tokens = 100
+                return response
+
+        sandbox = ScriptedSandbox()  # Next execution fails
+        node = self._node(
+            SlowProvider([self.CRITIQUE], delay=0.2), CountingProvider([self._program(3)]), sandbox
+        )
+
+        update = await node.critique({**self._failed_state(), "tokens_used": 50})
+
+        assert sandbox.calls == 1
+        assert "wrong value" in update["critique"]
+        assert update["tokens_used"] == 150
+        assert [c.get("speculative") for c in update["llm_calls"]] == [None, True]
+
+    async def test_mechanical_failure_not_speculated(self):
+        """Test failures the rule-based critic handles skip speculation."""
+        generator_provider = FakeProvider([])
+        node = self._node(FakeProvider([]), generator_provider, ScriptedSandbox())
+        node.critic.settings = node.settings = _settings(speculative_regeneration=True)
+        state = {
+            **self._failed_state(),
+            "execution_result": {
+                "exit_code": 1,
+                "stderr": "ModuleNotFoundError: No module named 'numpyy'\n",
+            },
+        }
+
+        update = await node.critique(state)
+
+        assert update["critique_source"] == "rules"
+        assert generator_provider.prompts == []
+
+    async def test_graph_finishes_on_winning_candidate(self, monkeypatch):
+        """Test a won race routes straight to finalize."""
+        generator_provider = FakeProvider([self._program(1), self._program(2)])
+        monkeypatch.setattr(
+            "agent_sandbox.orchestrator.nodes.generator.get_provider",
+            lambda **_: generator_provider,
+        )
+        monkeypatch.setattr(
+            "agent_sandbox.orchestrator.nodes.critic.get_provider",
+            lambda **_: SlowProvider([self.CRITIQUE]),
+        )
+        agent = AgentGraph(
+            ScriptedSandbox(), _settings(speculative_regeneration=True, critic_fast_path=False)
+        )
+
+        events = [event async for event in agent.run_streaming("Print 1")]
+
+        assert [name for e in events for name in e] == [
+            "generate", "execute", "verify", "critique", "finalize",
+        ]  # fmt: skip
+        assert events[-1]["finalize"]["success"] is True
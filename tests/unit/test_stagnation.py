@@ -0,0 +1,149 @@
+"""
+Tests for Stagnation Detection
+"""
+
+import json
+
+from agent_sandbox.orchestrator.nodes.executor import ExecutorNode
+from agent_sandbox.orchestrator.nodes.generator import GeneratorNode
+from agent_sandbox.orchestrator.nodes.retry import RetryManagerNode
+from agent_sandbox.orchestrator.nodes.stagnation import (
+    HIGH_TEMPERATURE,
+    RETHINK,
+    code_fingerprint,
+    error_signature,
+    run_fingerprint,
+)
+
+from .test_orchestrator import FAILED_RESULT, FakeProvider, ScriptedSandbox, _settings
+
+
+class TestStagnation:
+    """Tests for attempt fingerprinting and early stopping."""
+
+    def test_fingerprint_ignores_formatting(self):
+        """Test comments and whitespace don't change the fingerprint."""
+        a = "x = 1\nprint(x)\n"
+        b = "# set x\nx  =  1\n\nprint( x )  # show\n"
+        assert code_fingerprint(a) == code_fingerprint(b)
+        assert code_fingerprint(a) != code_fingerprint("x = 2\nprint(x)\n")
+
+    def test_error_signature(self):
+        """Test outcomes map to stable signatures."""
+        assert error_signature({"exit_code": 0, "stderr": ""}) == "ok"
+        assert error_signature({"timed_out": True}) == "timeout"
+        assert error_signature(FAILED_RESULT).startswith("NameError:")
+
+    async def test_identical_code_is_not_reexecuted(self):
+        """Test the executor reuses the result of equivalent earlier code."""
+        settings = _settings()
+        executor = ExecutorNode(settings=settings)  # No sandbox: executing would raise
+        code = "print(math.sqrt(4))"
+        history = [
+            {
+                "attempt": 1,
+                "code": code,
+                "code_hash": code_fingerprint(code),
+                "run_hash": run_fingerprint(code, [], settings.sandbox_timeout_seconds),
+                "execution_result": {**FAILED_RESULT, "execution_time_ms": 40.0},
+            }
+        ]
+        state = {"code": code + "  # retry", "attempt": 2, "max_attempts": 3, "history": history}
+
+        update = await executor.execute(state)
+
+        assert update["execution_reused"] is True
+        assert update["time_saved_ms"] == 40.0
+        assert executor.should_continue({**state, **update}) == "retry"
+
+    async def test_same_code_with_new_dependency_runs(self):
+        """Test a retry that only adds a dependency is executed, not reused."""
+        settings = _settings()
+        sandbox = ScriptedSandbox()
+        sandbox.calls = 1  # Succeed on this run
+        executor = ExecutorNode(sandbox, settings=settings)
+        code = "import requests\nprint(1)"
+        history = [
+            {
+                "attempt": 1,
+                "code": code,
+                "code_hash": code_fingerprint(code),
+                "run_hash": run_fingerprint(code, [], settings.sandbox_timeout_seconds),
+                "execution_result": {
+                    **FAILED_RESULT,
+                    "stderr": "ModuleNotFoundError: No module named 'requests'\n",
+                },
+            }
+        ]
+        state = {
+            "code": code,
+            "dependencies": ["requests"],
+            "attempt": 2,
+            "max_attempts": 3,
+            "history": history,
+        }
+
+        update = await executor.execute(state)
+
+        assert update["execution_reused"] is False
+        assert sandbox.calls == 2
+        assert update["execution_result"].passed
+
+    async def test_repeated_error_escalates_then_stops(self):
+        """Test each repeat escalates one level until none are left."""
+        retry = RetryManagerNode(settings=_settings())
+        state = {
+            "attempt": 1,
+            "max_attempts": 5,
+            "should_retry": True,
+            "code": "print(math.pi)",
+            "execution_result": FAILED_RESULT,
+            "history": [],
+        }
+
+        levels = []
+        for attempt in range(1, 5):
+            state["attempt"] = attempt
+            state["code"] = f"print(math.pi * {attempt})"
+            state.update(await retry.process(state))
+            levels.append(state["escalation_level"])
+            if not state["should_retry"]:
+                break
+
+        assert levels == [0, HIGH_TEMPERATURE, RETHINK, RETHINK]
+        assert state["should_retry"] is False
+        assert state["attempts_saved"] == 1
+        assert "same error" in state["stagnation_reason"]
+
+    async def test_new_error_is_progress(self):
+        """Test a different failure doesn't escalate."""
+        retry = RetryManagerNode(settings=_settings())
+        history = [{"attempt": 1, "code_hash": "x", "error_signature": "SyntaxError:1:bad"}]
+        state = {
+            "attempt": 2,
+            "max_attempts": 3,
+            "should_retry": True,
+            "code": "print(math.pi)",
+            "execution_result": FAILED_RESULT,
+            "history": history,
+        }
+
+        update = await retry.process(state)
+
+        assert update["escalation_level"] == 0
+        assert update["should_retry"] is True
+
+    async def test_generator_applies_escalation(self):
+        """Test higher levels raise the temperature and ask for a rethink."""
+        response = json.dumps({"code": "print(1)", "reasoning": "trivial", "confidence": 0.5})
+        provider = FakeProvider([response, response])
+        generator = GeneratorNode(_settings(escalation_temperature=0.9))
+        generator._provider = provider
+        state = {"task": "t", "attempt": 1, "code": "x", "execution_result": FAILED_RESULT}
+
+        await generator.generate({**state, "escalation_level": HIGH_TEMPERATURE})
+        await generator.generate({**state, "escalation_level": RETHINK})
+
+        assert provider.temperatures == [0.9, 0.9]
+        assert "rethink" not in provider.prompts[0]
+        assert "rethink" in provider.prompts[1]
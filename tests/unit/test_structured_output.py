@@ -0,0 +1,243 @@
+"""
+Tests for Schema-Constrained Decoding and Validation Stats
+"""
+
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from pydantic import BaseModel, Field
+
+from agent_sandbox.contracts.agent_output import AgentOutput, CritiqueOutput
+from agent_sandbox.contracts.validation import ValidationRetryLoop, get_validation_stats
+from agent_sandbox.orchestrator.nodes.generator import GeneratorNode
+from agent_sandbox.providers.base import LLMResponse, ProviderConfig
+from agent_sandbox.providers.cache import ResponseCache
+from agent_sandbox.providers.groq import GroqProvider
+from agent_sandbox.providers.ollama import OllamaProvider
+from agent_sandbox.providers.ratelimit import RateLimiter
+from agent_sandbox.providers.schema import get_schema_stats, output_schema
+from agent_sandbox.providers.wrapper import CachingProvider, RateLimitedProvider
+
+from .test_orchestrator import FakeProvider, _settings
+
+
+class BadRequest(Exception):
+    """SDK-style error carrying an HTTP status."""
+
+    status_code = 400
+
+
+class SchemaRecordingProvider(FakeProvider):
+    """Provider that records the schema of each JSON call."""
+
+    def __init__(self, responses: list[str]) -> None:
+        super().__init__(responses)
+        self.schemas: list[dict | None] = []
+
+    async def generate_json(
+        self, system_prompt, user_prompt, temperature=None, max_tokens=None, schema=None
+    ):
+        self.schemas.append(schema)
+        response = await self.generate(system_prompt, user_prompt, temperature, max_tokens)
+        return response.model_copy(update={"constrained": schema is not None})
+
+
+def _groq(model: str, fail_schema: bool = False) -> tuple[GroqProvider, list[dict]]:
+    provider = GroqProvider(ProviderConfig(api_key="key", model=model))
+    sent: list[dict] = []
+
+    async def create(**kwargs):
+        sent.append(kwargs)
+        if fail_schema and kwargs["response_format"]["type"] == "json_schema":
+            raise BadRequest("response_format json_schema is not supported by this model")
+        choice = SimpleNamespace(message=SimpleNamespace(content="{}"), finish_reason="stop")
+        return SimpleNamespace(choices=[choice], model=model, usage=None)
+
+    provider.client = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )
+    return provider, sent
+
+
+class TestOutputSchema:
+    """Tests for the strict schema generated from the output models."""
+
+    def test_every_property_is_required(self):
+        """Test strict schemas require all properties and forbid extra ones."""
+        schema = output_schema(AgentOutput)
+
+        assert set(schema["required"]) == set(AgentOutput.model_fields)
+        assert schema["additionalProperties"] is False
+        assert "minLength" not in json.dumps(schema)
+        assert "default" not in schema["properties"]["dependencies"]
+
+    def test_property_names_are_not_mistaken_for_keywords(self):
+        """Test a field called like a JSON Schema keyword survives."""
+
+        class Output(BaseModel):
+            format: str = Field(default="", max_length=3)
+            pattern: list[int] = Field(default_factory=list, min_length=1)
+
+        schema = output_schema(Output)
+
+        assert set(schema["properties"]) == {"format", "pattern"}
+        assert "maxLength" not in schema["properties"]["format"]
+
+
+class TestSchemaDecoding:
+    """Tests for providers sending the schema and falling back."""
+
+    async def test_groq_sends_json_schema(self):
+        """Test the schema goes out as a strict json_schema response format."""
+        provider, sent = _groq("schema-model")
+
+        response = await provider.generate_json("s", "u", schema=output_schema(CritiqueOutput))
+
+        assert response.constrained
+        response_format = sent[0]["response_format"]
+        assert response_format["type"] == "json_schema"
+        assert response_format["json_schema"]["name"] == "CritiqueOutput"
+        assert response_format["json_schema"]["strict"] is True
+
+    async def test_rejected_schema_falls_back_and_is_remembered(self):
+        """Test a model refusing schemas gets JSON mode now and from then on."""
+        provider, sent = _groq("no-schema-model", fail_schema=True)
+        before = get_schema_stats()
+
+        first = await provider.generate_json("s", "u", schema=output_schema(AgentOutput))
+        second = await provider.generate_json("s", "u", schema=output_schema(AgentOutput))
+
+        assert not first.constrained and not second.constrained
+        assert [r["response_format"]["type"] for r in sent] == [
+            "json_schema",
+            "json_object",
+            "json_object",
+        ]
+        stats = get_schema_stats()
+        assert stats["rejected"] == before["rejected"] + 1
+        assert "groq/no-schema-model" in stats["unsupported_models"]
+
+    async def test_other_errors_are_not_mistaken_for_rejection(self):
+        """Test an unrelated failure propagates instead of disabling schemas."""
+        provider = GroqProvider(ProviderConfig(api_key="key", model="m"))
+
+        async def create(**kwargs):  # noqa: ARG001
+            raise BadRequest("context length exceeded")
+
+        provider.client = SimpleNamespace(
+            chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+        )
+        with pytest.raises(BadRequest):
+            await provider.generate_json("s", "u", schema=output_schema(AgentOutput))
+        assert "groq/m" not in get_schema_stats()["unsupported_models"]
+
+    async def test_ollama_sends_schema_as_format(self):
+        """Test Ollama gets the schema in "format" and old servers fall back to "json"."""
+        formats = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            fmt = json.loads(request.content)["format"]
+            formats.append(fmt)
+            if isinstance(fmt, dict):
+                return httpx.Response(400, json={"error": "invalid format"})
+            return httpx.Response(200, json={"message": {"content": "{}"}, "done": True})
+
+        provider = OllamaProvider(ProviderConfig(api_key="", model="old-ollama"))
+        provider.client = httpx.AsyncClient(
+            transport=httpx.MockTransport(handler), base_url="http://ollama"
+        )
+        response = await provider.generate_json("s", "u", schema=output_schema(AgentOutput))
+
+        assert formats[0]["title"] == "AgentOutput"
+        assert formats[1] == "json"
+        assert not response.constrained
+
+    async def test_streams_use_the_same_json_mode(self):
+        """Test stream_json sends the schema and token limit, falling back like generate_json."""
+        payloads = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            payload = json.loads(request.content)
+            payloads.append(payload)
+            if isinstance(payload["format"], dict):
+                return httpx.Response(400, json={"error": "invalid format"})
+            lines = [
+                {"message": {"content": '{"a": '}},
+                {"message": {"content": "1}"}, "done": True},
+            ]
+            return httpx.Response(200, text="\n".join(json.dumps(line) for line in lines))
+
+        provider = OllamaProvider(ProviderConfig(api_key="", model="old-ollama-stream"))
+        provider.client = httpx.AsyncClient(
+            transport=httpx.MockTransport(handler), base_url="http://ollama"
+        )
+        chunks = [
+            chunk
+            async for chunk in provider.stream_json(
+                "s", "u", max_tokens=123, schema=output_schema(AgentOutput)
+            )
+        ]
+
+        assert "".join(chunks) == '{"a": 1}'
+        assert [p["format"] if p["format"] == "json" else "schema" for p in payloads] == [
+            "schema",
+            "json",
+        ]
+        assert all(p["options"]["num_predict"] == 123 and p["stream"] for p in payloads)
+        assert "ollama/old-ollama-stream" in get_schema_stats()["unsupported_models"]
+
+    async def test_wrappers_pass_the_schema_through(self, tmp_path):
+        """Test the schema reaches the provider and keys the response cache."""
+        inner = SchemaRecordingProvider(["a", "b"])
+        provider = CachingProvider(
+            RateLimitedProvider(inner, RateLimiter()), ResponseCache(tmp_path / "cache.db")
+        )
+        schema = output_schema(AgentOutput)
+
+        first = await provider.generate_json("s", "u", temperature=0.0, schema=schema)
+        plain = await provider.generate_json("s", "u", temperature=0.0)
+        again = await provider.generate_json("s", "u", temperature=0.0, schema=schema)
+
+        assert inner.schemas == [schema, None]
+        assert (first.content, plain.content) == ("a", "b")
+        assert again.cached and again.constrained
+
+
+class TestValidationStats:
+    """Tests for counting invalid outputs and retries per provider."""
+
+    async def test_generator_counts_by_decoding_mode(self):
+        """Test the generator requests a schema and records whether output validated."""
+        provider = SchemaRecordingProvider(
+            [json.dumps({"code": "print(1)", "reasoning": "trivial"}), "print(2)"]
+        )
+        generator = GeneratorNode(_settings())
+        generator._provider = provider
+        before = get_validation_stats().get("fake/fake", {}).get("constrained", {})
+
+        await generator.generate({"task": "t"})
+        await generator.generate({"task": "t"})
+
+        assert provider.schemas[0]["title"] == "AgentOutput"
+        counts = get_validation_stats()["fake/fake"]["constrained"]
+        assert counts["outputs"] == before.get("outputs", 0) + 2
+        assert counts["invalid"] == before.get("invalid", 0) + 1
+
+    async def test_retry_loop_counts_retries_and_constrains_them(self):
+        """Test each repair round trip is counted and asks for the schema."""
+        provider = SchemaRecordingProvider(
+            [json.dumps({"diagnosis": "Missing import", "fix_suggestion": "Import math"})]
+        )
+        loop = ValidationRetryLoop(_settings())
+        loop._provider = provider
+        bad = LLMResponse(content="{not json", model="m", provider="flaky")
+
+        result = await loop.validate_and_retry(bad, CritiqueOutput, "system", "user")
+
+        assert result.diagnosis == "Missing import"
+        assert provider.schemas == [output_schema(CritiqueOutput)]
+        stats = get_validation_stats()
+        assert stats["flaky/m"]["unconstrained"]["retries"] == 1
+        assert stats["fake/fake"]["constrained"]["outputs"] >= 1
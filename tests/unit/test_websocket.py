@@ -0,0 +1,55 @@
+"""
+Tests for WebSocket Streaming
+"""
+
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from agent_sandbox.api.websocket import router
+from agent_sandbox.orchestrator.graph import AgentGraph
+
+from .test_orchestrator import FakeProvider, ScriptedSandbox, _settings
+
+
+def _client(monkeypatch, engine: str) -> TestClient:
+    provider = FakeProvider(
+        [
+            json.dumps({"code": f"print({n})", "reasoning": "trivial", "confidence": 0.5})
+            for n in (1, 2)
+        ]
+    )
+    monkeypatch.setattr(
+        "agent_sandbox.orchestrator.nodes.generator.get_provider", lambda **_: provider
+    )
+    app = FastAPI()
+    app.include_router(router, prefix="/ws")
+    app.state.agent = AgentGraph(ScriptedSandbox(), _settings(orchestrator_engine=engine))
+    return TestClient(app)
+
+
+class TestStreaming:
+    """Tests for streaming a run over the WebSocket."""
+
+    @pytest.mark.parametrize("engine", ["langgraph", "native"])
+    def test_run_without_test_code(self, monkeypatch, engine):
+        """Test a run streams to completion when verify has nothing to report."""
+        with _client(monkeypatch, engine).websocket_connect("/ws/stream") as websocket:
+            assert websocket.receive_json()["type"] == "connected"
+            websocket.send_json({"task": "Print 1", "mode": "fused"})
+
+            messages = []
+            while not messages or messages[-1]["type"] not in ("complete", "error"):
+                messages.append(websocket.receive_json())
+
+        assert [m["type"] for m in messages] == [
+            "started",
+            "code",
+            "execution_result",
+            "code",
+            "execution_result",
+            "complete",
+        ]
+        assert messages[-1]["data"]["success"] is True